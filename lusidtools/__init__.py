@@ -1,8 +1,17 @@
-import lusidtools.cocoon.cocoon
-import lusidtools.cocoon.instruments
-import lusidtools.cocoon.properties
-import lusidtools.cocoon.systemConfiguration
-import lusidtools.cocoon.utilities
-import lusidtools.cocoon.async_tools
-import lusidtools.cocoon.validator
-import lusidtools.cocoon.dateorcutlabel
+from lusidtools.lazy_imports import lazy_module
+
+# The subpackages are imported when first used so that importing one of them does not import the others
+__getattr__, __dir__ = lazy_module(
+    __name__,
+    {},
+    [
+        "apps",
+        "cocoon",
+        "commands",
+        "extract",
+        "jupyter_tools",
+        "logger",
+        "lpt",
+        "pandas_utils",
+    ],
+)
@@ -1,5 +1,14 @@
-from lusidtools.apps.upsert_instruments import load_instruments
-from lusidtools.apps.upsert_holdings import load_holdings
-from lusidtools.apps.upsert_transactions import load_transactions
-from lusidtools.apps.upsert_quotes import load_quotes
-from lusidtools.apps.upsert_portfolios import load_portfolios
+from lusidtools.lazy_imports import lazy_module
+
+# The public names of the package and the submodule each is imported from, these are imported when first used
+_exports = {
+    "load_instruments": "upsert_instruments",
+    "load_holdings": "upsert_holdings",
+    "load_transactions": "upsert_transactions",
+    "load_quotes": "upsert_quotes",
+    "load_portfolios": "upsert_portfolios",
+}
+
+__all__ = list(_exports)
+
+__getattr__, __dir__ = lazy_module(__name__, _exports, set(_exports.values()))
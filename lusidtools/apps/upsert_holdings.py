@@ -5,15 +5,45 @@ from lusid.utilities import ApiClientFactory
 from lusidtools.logger import LusidLogger
 from lusidtools.cocoon import (
     parse_args,
-    load_data_to_df_and_detect_delimiter,
+    load_data_to_df_chunks_and_detect_delimiter,
+    group_data_frame_chunks,
     load_from_data_frame,
     identify_cash_items,
     validate_mapping_file_structure,
     load_json_file,
+    combine_responses,
     cocoon_printer,
 )
 
 
+def get_holding_set_columns(mapping_required: dict) -> list:
+    """
+    Gets the columns which identify the holding set a row belongs to, a holding set is loaded in a single call for
+    each portfolio and effective date so its rows can not be split across chunks
+
+    Parameters
+    ----------
+    mapping_required : dict
+        The required mapping for holdings
+
+    Returns
+    -------
+    list[str]
+        The columns containing the portfolio code and effective date, constants are excluded
+    """
+
+    columns = []
+
+    for key in ["code", "effective_at"]:
+        value = mapping_required[key]
+        if isinstance(value, dict):
+            value = value.get("column")
+        if isinstance(value, str) and not value.startswith("$"):
+            columns.append(value)
+
+    return columns
+
+
 def load_holdings(args):
     file_type = "holdings"
 
@@ -22,31 +52,50 @@ def load_holdings(args):
     if args["delimiter"]:
         logging.info(f"delimiter specified as {repr(args['delimiter'])}")
     logging.debug("Getting data")
-    holdings = load_data_to_df_and_detect_delimiter(args)
 
     mappings = load_json_file(args["mapping"])
-    if "cash_flag" in mappings.keys():
-        holdings, mappings = identify_cash_items(holdings, mappings, file_type)
 
-    validate_mapping_file_structure(mappings, holdings.columns, file_type)
+    holdings_chunks = load_data_to_df_chunks_and_detect_delimiter(args)
+
+    # Keep the rows of each holding set together when the data is read in chunks
+    if args.get("chunk_size"):
+        holdings_chunks = group_data_frame_chunks(
+            holdings_chunks, get_holding_set_columns(mappings[file_type]["required"])
+        )
+
+    responses = []
+
+    for holdings in holdings_chunks:
+
+        if "cash_flag" in mappings.keys():
+            holdings, mappings = identify_cash_items(holdings, mappings, file_type)
+
+        validate_mapping_file_structure(mappings, holdings.columns, file_type)
+
+        if args["dryrun"]:
+            continue
+
+        responses.append(
+            load_from_data_frame(
+                api_factory=factory,
+                data_frame=holdings,
+                scope=args["scope"],
+                properties_scope=args.get("property_scope", args["scope"]),
+                identifier_mapping=mappings[file_type]["identifier_mapping"],
+                mapping_required=mappings[file_type]["required"],
+                mapping_optional=mappings[file_type].get("optional", {}),
+                file_type=file_type,
+                batch_size=args["batch_size"],
+                property_columns=mappings[file_type].get("property_columns", []),
+                sub_holding_keys=mappings[file_type].get("sub_holding_keys", []),
+            )
+        )
 
     if args["dryrun"]:
         logging.info("--dryrun specified as True, exiting before upsert call is made")
         return 0
 
-    holdings_response = load_from_data_frame(
-        api_factory=factory,
-        data_frame=holdings,
-        scope=args["scope"],
-        properties_scope=args.get("property_scope", args["scope"]),
-        identifier_mapping=mappings[file_type]["identifier_mapping"],
-        mapping_required=mappings[file_type]["required"],
-        mapping_optional=mappings[file_type].get("optional", {}),
-        file_type=file_type,
-        batch_size=args["batch_size"],
-        property_columns=mappings[file_type].get("property_columns", []),
-        sub_holding_keys=mappings[file_type].get("sub_holding_keys", []),
-    )
+    holdings_response = combine_responses(responses, file_type)
 
     succ, errors = cocoon_printer.format_holdings_response(holdings_response)
 
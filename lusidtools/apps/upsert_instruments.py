@@ -3,12 +3,12 @@ import sys
 from lusid.utilities import ApiClientFactory
 from lusidtools.cocoon import (
     load_from_data_frame,
-    load_data_to_df_and_detect_delimiter,
-    check_mapping_fields_exist,
+    load_data_to_df_chunks_and_detect_delimiter,
     parse_args,
     validate_mapping_file_structure,
     identify_cash_items,
     load_json_file,
+    combine_responses,
     cocoon_printer,
 )
 from lusidtools.logger import LusidLogger
@@ -24,7 +24,6 @@ def load_instruments(args):
     if args["delimiter"]:
         logging.info(f"delimiter specified as {repr(args['delimiter'])}")
     logging.debug("Getting data")
-    instruments = load_data_to_df_and_detect_delimiter(args)
 
     # get mappings
     mappings = load_json_file(args["mapping"])
@@ -37,28 +36,40 @@ def load_instruments(args):
         logging.error(err)
         raise ValueError(err)
 
-    validate_mapping_file_structure(mappings, instruments.columns, file_type)
-    if "cash_flag" in mappings.keys():
-        instruments, mappings = identify_cash_items(
-            instruments, mappings, file_type, True
+    responses = []
+
+    # Each chunk of the file is validated and loaded before the next one is read
+    for instruments in load_data_to_df_chunks_and_detect_delimiter(args):
+
+        validate_mapping_file_structure(mappings, instruments.columns, file_type)
+        if "cash_flag" in mappings.keys():
+            instruments, mappings = identify_cash_items(
+                instruments, mappings, file_type, True
+            )
+
+        if args["dryrun"]:
+            continue
+
+        responses.append(
+            load_from_data_frame(
+                api_factory=factory,
+                data_frame=instruments,
+                scope=args["scope"],
+                properties_scope=args.get("property_scope", args["scope"]),
+                mapping_required=mappings[file_type]["required"],
+                mapping_optional=mappings[file_type].get("optional", {}),
+                file_type=file_type,
+                identifier_mapping=mappings[file_type]["identifier_mapping"],
+                batch_size=args["batch_size"],
+                property_columns=mappings[file_type].get("property_columns", []),
+            )
         )
 
     if args["dryrun"]:
         logging.info("--dryrun specified as True, exiting before upsert call is made")
         return 0
 
-    instruments_response = load_from_data_frame(
-        api_factory=factory,
-        data_frame=instruments,
-        scope=args["scope"],
-        properties_scope=args.get("property_scope", args["scope"]),
-        mapping_required=mappings[file_type]["required"],
-        mapping_optional=mappings[file_type].get("optional", {}),
-        file_type=file_type,
-        identifier_mapping=mappings[file_type]["identifier_mapping"],
-        batch_size=args["batch_size"],
-        property_columns=mappings[file_type].get("property_columns", []),
-    )
+    instruments_response = combine_responses(responses, file_type)
 
     succ, errors, failed = cocoon_printer.format_instruments_response(
         instruments_response
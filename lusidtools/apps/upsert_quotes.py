@@ -1,16 +1,17 @@
+import copy
 import logging
 import sys
-import lusid
+import pandas as pd
 from lusid.utilities import ApiClientFactory
 from lusidtools.cocoon import (
     load_from_data_frame,
-    load_data_to_df_and_detect_delimiter,
-    check_mapping_fields_exist,
+    load_data_to_df_chunks_and_detect_delimiter,
     parse_args,
     validate_mapping_file_structure,
     identify_cash_items,
     load_json_file,
     scale_quote_of_type,
+    combine_responses,
     cocoon_printer,
 )
 from lusidtools.logger import LusidLogger
@@ -26,7 +27,6 @@ def load_quotes(args):
     if args["delimiter"]:
         logging.info(f"delimiter specified as {repr(args['delimiter'])}")
     logging.debug("Getting data")
-    quotes = load_data_to_df_and_detect_delimiter(args)
 
     # get mappings
     mappings = load_json_file(args["mapping"])
@@ -40,28 +40,47 @@ def load_quotes(args):
         logging.error(err)
         raise ValueError(err)
 
-    quotes, mappings = identify_cash_items(quotes, mappings, "quotes", True)
+    responses = []
+    dryrun_quotes = []
 
-    validate_mapping_file_structure(mappings, quotes.columns, file_type)
+    # Each chunk of the file is validated and loaded before the next one is read
+    for quotes in load_data_to_df_chunks_and_detect_delimiter(args):
 
-    if "quote_scalar" in mappings[file_type].keys():
-        quotes, mappings = scale_quote_of_type(quotes, mappings)
+        # Scaling the quotes updates the mapping to use the scaled column, so start from the original each chunk
+        chunk_mappings = copy.deepcopy(mappings)
+
+        quotes, chunk_mappings = identify_cash_items(
+            quotes, chunk_mappings, "quotes", True
+        )
+
+        validate_mapping_file_structure(chunk_mappings, quotes.columns, file_type)
+
+        if "quote_scalar" in chunk_mappings[file_type].keys():
+            quotes, chunk_mappings = scale_quote_of_type(quotes, chunk_mappings)
+
+        if args["dryrun"]:
+            dryrun_quotes.append(quotes)
+            continue
+
+        responses.append(
+            load_from_data_frame(
+                api_factory=factory,
+                data_frame=quotes,
+                scope=args["scope"],
+                properties_scope=args.get("property_scope", args["scope"]),
+                identifier_mapping={},
+                mapping_required=chunk_mappings[file_type]["required"],
+                mapping_optional=chunk_mappings[file_type].get("optional", {}),
+                file_type=file_type,
+                batch_size=args["batch_size"],
+                property_columns=chunk_mappings[file_type].get("property_columns", []),
+            )
+        )
 
     if args["dryrun"]:
-        return quotes
-
-    quotes_response = load_from_data_frame(
-        api_factory=factory,
-        data_frame=quotes,
-        scope=args["scope"],
-        properties_scope=args.get("property_scope", args["scope"]),
-        identifier_mapping={},
-        mapping_required=mappings[file_type]["required"],
-        mapping_optional=mappings[file_type].get("optional", {}),
-        file_type=file_type,
-        batch_size=args["batch_size"],
-        property_columns=mappings[file_type].get("property_columns", []),
-    )
+        return pd.concat(dryrun_quotes)
+
+    quotes_response = combine_responses(responses, file_type)
     succ, errors, failed = cocoon_printer.format_quotes_response(quotes_response)
     logging.info(f"number of successful upserts: {len(succ)}")
     logging.info(f"number of failed upserts    : {len(failed)}")
@@ -1,34 +1,72 @@
-import lusidtools.cocoon.cocoon
-import lusidtools.cocoon.instruments
-import lusidtools.cocoon.properties
-import lusidtools.cocoon.systemConfiguration
-import lusidtools.cocoon.utilities
-from lusidtools.cocoon.instruments import resolve_instruments
-from lusidtools.cocoon.properties import create_property_values
-from lusidtools.cocoon.utilities import set_attributes_recursive
-from lusidtools.cocoon.cocoon import load_from_data_frame
-from lusidtools.cocoon.utilities import (
-    checkargs,
-    load_data_to_df_and_detect_delimiter,
-    check_mapping_fields_exist,
-    parse_args,
-    identify_cash_items,
-    validate_mapping_file_structure,
-    get_delimiter,
-    scale_quote_of_type,
-    strip_whitespace,
-    load_json_file,
-    default_fx_forward_model,
-)
-from lusidtools.cocoon.cocoon_printer import (
-    format_holdings_response,
-    format_instruments_response,
-    format_portfolios_response,
-    format_quotes_response,
-    format_transactions_response,
-)
+from lusidtools.lazy_imports import lazy_module
 
-import lusidtools.cocoon.async_tools
-import lusidtools.cocoon.validator
-import lusidtools.cocoon.dateorcutlabel
-from lusidtools.cocoon.seed_sample_data import seed_data
+# The public names of the package and the submodule each is imported from, these are imported when first used
+_exports = {
+    "resolve_instruments": "instruments",
+    "create_property_values": "properties",
+    "set_attributes_recursive": "utilities",
+    "load_from_data_frame": "cocoon",
+    "checkargs": "argument_checks",
+    "get_checkargs_mode": "argument_checks",
+    "set_checkargs_mode": "argument_checks",
+    "load_data_to_df_and_detect_delimiter": "utilities",
+    "load_data_to_df_chunks_and_detect_delimiter": "utilities",
+    "group_data_frame_chunks": "utilities",
+    "combine_responses": "utilities",
+    "check_mapping_fields_exist": "utilities",
+    "parse_args": "utilities",
+    "identify_cash_items": "utilities",
+    "validate_mapping_file_structure": "utilities",
+    "get_delimiter": "utilities",
+    "scale_quote_of_type": "utilities",
+    "strip_whitespace": "utilities",
+    "load_json_file": "utilities",
+    "default_fx_forward_model": "utilities",
+    "format_holdings_response": "cocoon_printer",
+    "format_instruments_response": "cocoon_printer",
+    "format_portfolios_response": "cocoon_printer",
+    "format_quotes_response": "cocoon_printer",
+    "format_transactions_response": "cocoon_printer",
+    "AdaptiveBatchController": "batch_controller",
+    "BatchPlan": "batch_plan",
+    "RateLimiter": "rate_limiter",
+    "get_rate_limiter": "rate_limiter",
+    "set_rate_limiter": "rate_limiter",
+    "RetryPolicy": "retry",
+    "LoadTelemetry": "telemetry",
+    "LoadJournal": "journal",
+    "InstrumentCache": "instrument_cache",
+    "MetadataCache": "metadata_cache",
+    "get_metadata_cache": "metadata_cache",
+    "seed_data": "seed_sample_data",
+}
+
+_submodules = [
+    "argument_checks",
+    "async_tools",
+    "async_transport",
+    "batch_controller",
+    "batch_plan",
+    "cocoon",
+    "cocoon_printer",
+    "dateorcutlabel",
+    "instrument_cache",
+    "instruments",
+    "journal",
+    "mapping_plan",
+    "metadata_cache",
+    "process_tools",
+    "properties",
+    "rate_limiter",
+    "retry",
+    "seed_sample_data",
+    "systemConfiguration",
+    "telemetry",
+    "transaction_type_upload",
+    "utilities",
+    "validator",
+]
+
+__all__ = list(_exports)
+
+__getattr__, __dir__ = lazy_module(__name__, _exports, _submodules)
@@ -0,0 +1,156 @@
+import contextvars
+import functools
+import inspect
+import os
+import typing
+
+# The environment variable which can be used to set when checkargs checks arguments, see get_checkargs_mode
+CHECKARGS_MODE_ENV = "LUSIDTOOLS_CHECKARGS_MODE"
+# Check the arguments of every call to a decorated function
+CHECKARGS_ALWAYS = "always"
+# Only check the arguments of the outermost call, the calls it makes to other decorated functions are trusted
+CHECKARGS_BOUNDARY = "boundary"
+# Never check the arguments
+CHECKARGS_NEVER = "never"
+CHECKARGS_MODES = [CHECKARGS_ALWAYS, CHECKARGS_BOUNDARY, CHECKARGS_NEVER]
+
+# The mode in use, this is read from the environment on first use
+_checkargs_mode = None
+# Whether the arguments have already been checked at the boundary by a decorated function further up the call stack
+_arguments_checked = contextvars.ContextVar(
+    "lusidtools_arguments_checked", default=False
+)
+
+
+def get_checkargs_mode() -> str:
+    """
+    Gets when the checkargs decorator checks arguments. This defaults to CHECKARGS_ALWAYS and can be set with the
+    LUSIDTOOLS_CHECKARGS_MODE environment variable or set_checkargs_mode. In CHECKARGS_BOUNDARY mode the arguments
+    are validated once where a decorated function such as cocoon.load_from_data_frame is called, the per row calls
+    it makes e.g. to populate_model are not checked again.
+
+    Returns
+    -------
+    str
+        The mode, one of CHECKARGS_ALWAYS, CHECKARGS_BOUNDARY or CHECKARGS_NEVER
+    """
+
+    global _checkargs_mode
+
+    if _checkargs_mode is None:
+        mode = os.environ.get(CHECKARGS_MODE_ENV, CHECKARGS_ALWAYS).lower()
+
+        if mode not in CHECKARGS_MODES:
+            raise ValueError(
+                f"The environment variable {CHECKARGS_MODE_ENV} must be one of {str(CHECKARGS_MODES)}, got {mode}"
+            )
+
+        _checkargs_mode = mode
+
+    return _checkargs_mode
+
+
+def set_checkargs_mode(mode: str = None) -> None:
+    """
+    Sets when the checkargs decorator checks arguments for the whole process
+
+    Parameters
+    ----------
+    mode : str
+        The mode, one of CHECKARGS_ALWAYS, CHECKARGS_BOUNDARY or CHECKARGS_NEVER, if None it is read from the
+        environment again on its next use
+    """
+
+    global _checkargs_mode
+
+    if mode is not None and mode not in CHECKARGS_MODES:
+        raise ValueError(
+            f"The checkargs mode must be one of {str(CHECKARGS_MODES)}, got {mode}"
+        )
+
+    _checkargs_mode = mode
+
+
+def checkargs(function: typing.Callable) -> typing.Callable:
+    """
+    This can be used as a decorator to test the type of arguments are correct. It checks that the provided arguments
+    match any type annotations and/or the default value for the parameter. The signature of the function is inspected
+    once when it is decorated, see get_checkargs_mode for when the arguments are checked.
+
+    Parameters
+    ----------
+    function : typing.Callable
+        The function to wrap with annotated types, all parameters must be annotated with a type
+
+    Returns
+    -------
+    _f : typing.Callable
+        The wrapped function
+    """
+
+    # Get all the function arguments in order
+    function_arguments = inspect.signature(function).parameters
+    argument_names = list(function_arguments.keys())
+
+    def check_arguments(args: tuple, kwargs: dict) -> None:
+
+        # Collect each non keyword argument value and key it by the argument name
+        keyed_arguments = dict(zip(argument_names, args))
+
+        # Update this with the keyword argument values
+        keyed_arguments.update(kwargs)
+
+        # For each argument raise an error if it is of the incorrect type and if it has an invalid default value
+        for argument_name, argument_value in keyed_arguments.items():
+
+            # Get the arguments details
+            argument_details = function_arguments.get(argument_name)
+
+            if argument_details is None:
+                raise ValueError(
+                    f"The argument {argument_name} is not a valid keyword argument for this function, valid arguments"
+                    + f" are {str(argument_names)}"
+                )
+
+            # If the argument value is of the wrong type e.g. list instead of dict then throw an error
+            if argument_details.annotation is argument_details.empty or isinstance(
+                argument_value, argument_details.annotation
+            ):
+                continue
+
+            # Only exception to this is if it matches the default value which may be of a different type e.g. None
+            if argument_details.default is argument_details.empty:
+                is_default_value = False
+            elif argument_details.default is None:
+                is_default_value = argument_value is None
+            else:
+                is_default_value = argument_value == argument_details.default
+
+            if not is_default_value:
+                raise TypeError(
+                    f"""The value provided for {argument_name} is of type {type(argument_value)} not of 
+                    type {argument_details.annotation}. Please update the provided value to be of type 
+                    {argument_details.annotation}"""
+                )
+
+    @functools.wraps(function)
+    def _f(*args, **kwargs):
+
+        mode = _checkargs_mode or get_checkargs_mode()
+
+        if mode == CHECKARGS_ALWAYS:
+            check_arguments(args, kwargs)
+            return function(*args, **kwargs)
+
+        if mode == CHECKARGS_NEVER or _arguments_checked.get():
+            return function(*args, **kwargs)
+
+        # Check the arguments at the boundary and trust the calls made from inside it
+        check_arguments(args, kwargs)
+        token = _arguments_checked.set(True)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _arguments_checked.reset(token)
+
+    return _f
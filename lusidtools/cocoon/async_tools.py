@@ -1,8 +1,15 @@
 import asyncio
+import atexit
+import contextvars
 import functools
-from threading import Thread, enumerate
+import os
+from threading import Thread, Lock, enumerate
 import concurrent.futures
 
+# The environment variable which can be used to override the size of the default thread pool
+THREAD_POOL_MAX_WORKERS_ENV = "LUSIDTOOLS_THREAD_POOL_MAX_WORKERS"
+DEFAULT_THREAD_POOL_MAX_WORKERS = 5
+
 
 def start_event_loop_new_thread() -> asyncio.AbstractEventLoop:
     """
@@ -39,6 +46,10 @@ def stop_event_loop_new_thread(loop: asyncio.AbstractEventLoop) -> None:
     if len(match) == 1:
         match[0].join(timeout=1)
 
+    # Close the loop once it has stopped, otherwise it is closed when it is garbage collected at exit
+    if not loop.is_running():
+        loop.close()
+
 
 def start_background_loop(loop: asyncio.AbstractEventLoop) -> None:
     """
@@ -74,21 +85,239 @@ def run_in_executor(f):
     def inner(*args, **kwargs):
         loop = asyncio.get_running_loop()
 
+        # If the function to be wrapped has been provided with a thread pool use that, otherwise use the shared one
+        thread_pool = kwargs.get("thread_pool")
+        if thread_pool is None:
+            thread_pool = get_thread_pool().thread_pool
+
+        # Run the function in a copy of the caller's context e.g. so that checkargs knows the arguments were checked
+        context = contextvars.copy_context()
+
         return loop.run_in_executor(
-            # If the function to be wrapped has been provided with a thread pool use that, otherwise create one
-            kwargs.get("thread_pool", ThreadPool(5).thread_pool),
-            lambda: f(*args, **kwargs),
+            thread_pool, lambda: context.run(f, *args, **kwargs)
         )
 
     return inner
 
 
+class InstrumentedThreadPoolExecutor(concurrent.futures.ThreadPoolExecutor):
+    """
+    A ThreadPoolExecutor which keeps track of how many submitted tasks are waiting for a worker and how many are
+    currently being run
+    """
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self.max_workers = max_workers
+        self.is_shutdown = False
+        self._metrics_lock = Lock()
+        self._submitted = 0
+        self._started = 0
+        self._completed = 0
+
+    def submit(self, fn, *args, **kwargs):
+        def run_task():
+            with self._metrics_lock:
+                self._started += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._metrics_lock:
+                    self._completed += 1
+
+        future = super().submit(run_task)
+
+        with self._metrics_lock:
+            self._submitted += 1
+
+        return future
+
+    def shutdown(self, wait=True, **kwargs):
+        self.is_shutdown = True
+        super().shutdown(wait=wait, **kwargs)
+
+    def metrics(self) -> dict:
+        """
+        Gets a snapshot of the executor's activity
+
+        Returns
+        -------
+        dict
+            The maximum number of workers, the number of threads started, the number of tasks waiting for a worker
+            (queue_depth), the number of tasks being run (active_workers) and the total submitted and completed tasks
+        """
+
+        with self._metrics_lock:
+            return {
+                "max_workers": self.max_workers,
+                "threads": len(self._threads),
+                # A task is counted as submitted once the call to submit returns, so a task may start first
+                "queue_depth": max(self._submitted - self._started, 0),
+                "active_workers": self._started - self._completed,
+                "submitted": self._submitted,
+                "completed": self._completed,
+            }
+
+
 class ThreadPool:
     """
     Creates a class which has a thread pool.
     """
 
     def __init__(self, max_workers):
-        self.thread_pool = concurrent.futures.ThreadPoolExecutor(
-            max_workers=max_workers
+        self.thread_pool = InstrumentedThreadPoolExecutor(max_workers=max_workers)
+
+    def metrics(self) -> dict:
+        """
+        Gets a snapshot of the thread pool's activity, see InstrumentedThreadPoolExecutor.metrics
+
+        Returns
+        -------
+        dict
+            The metrics for the thread pool
+        """
+
+        return self.thread_pool.metrics()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shuts down the thread pool, any tasks already submitted are still run
+
+        Parameters
+        ----------
+        wait : bool
+            Whether or not to wait for the submitted tasks to complete before returning
+        """
+
+        self.thread_pool.shutdown(wait=wait)
+
+
+# The shared thread pools keyed by their maximum number of workers, these are created on first use
+_thread_pools = {}
+_thread_pools_lock = Lock()
+# The shared single thread that request models are converted on, this is created on first use
+_conversion_thread_pool = None
+
+
+def get_default_max_workers() -> int:
+    """
+    Gets the size of the default thread pool, this can be set with the LUSIDTOOLS_THREAD_POOL_MAX_WORKERS
+    environment variable
+
+    Returns
+    -------
+    int
+        The maximum number of workers for the default thread pool
+    """
+
+    max_workers = os.environ.get(THREAD_POOL_MAX_WORKERS_ENV)
+
+    if max_workers is None:
+        return DEFAULT_THREAD_POOL_MAX_WORKERS
+
+    if not max_workers.isdigit() or int(max_workers) < 1:
+        raise ValueError(
+            f"The environment variable {THREAD_POOL_MAX_WORKERS_ENV} must be a positive integer, got {max_workers}"
         )
+
+    return int(max_workers)
+
+
+def get_thread_pool(max_workers: int = None) -> ThreadPool:
+    """
+    Gets the process wide thread pool with the given number of workers, creating it if it does not exist yet. This
+    allows repeated calls e.g. to load_from_data_frame to reuse the same threads rather than creating new ones
+
+    Parameters
+    ----------
+    max_workers : int
+        The maximum number of workers in the thread pool, defaults to get_default_max_workers()
+
+    Returns
+    -------
+    ThreadPool
+        The shared thread pool
+    """
+
+    if max_workers is None:
+        max_workers = get_default_max_workers()
+
+    with _thread_pools_lock:
+        thread_pool = _thread_pools.get(max_workers)
+
+        # Replace any pool which has been shut down outside of shutdown_thread_pools
+        if thread_pool is None or thread_pool.thread_pool.is_shutdown:
+            thread_pool = ThreadPool(max_workers)
+            _thread_pools[max_workers] = thread_pool
+
+        return thread_pool
+
+
+def get_conversion_thread_pool() -> ThreadPool:
+    """
+    Gets the process wide thread pool with a single worker which batches are converted to request models on while
+    the requests for earlier batches are in flight, creating it if it does not exist yet. It is kept apart from the
+    pools the requests are sent with so that converting a batch never waits for a request, or the other way around
+
+    Returns
+    -------
+    ThreadPool
+        The shared conversion thread pool
+    """
+
+    global _conversion_thread_pool
+
+    with _thread_pools_lock:
+        # Replace the pool if it has been shut down outside of shutdown_thread_pools
+        if (
+            _conversion_thread_pool is None
+            or _conversion_thread_pool.thread_pool.is_shutdown
+        ):
+            _conversion_thread_pool = ThreadPool(1)
+
+        return _conversion_thread_pool
+
+
+def get_thread_pool_metrics() -> dict:
+    """
+    Gets the metrics for each of the shared thread pools
+
+    Returns
+    -------
+    dict{int, dict}
+        The metrics for each shared thread pool keyed by its maximum number of workers
+    """
+
+    with _thread_pools_lock:
+        return {
+            max_workers: thread_pool.metrics()
+            for max_workers, thread_pool in _thread_pools.items()
+        }
+
+
+def shutdown_thread_pools(wait: bool = True) -> None:
+    """
+    Shuts down all of the shared thread pools, including the conversion thread pool, they will be recreated if they
+    are used again
+
+    Parameters
+    ----------
+    wait : bool
+        Whether or not to wait for the submitted tasks to complete before returning
+    """
+
+    global _conversion_thread_pool
+
+    with _thread_pools_lock:
+        thread_pools = list(_thread_pools.values())
+        _thread_pools.clear()
+
+        if _conversion_thread_pool is not None:
+            thread_pools.append(_conversion_thread_pool)
+            _conversion_thread_pool = None
+
+    for thread_pool in thread_pools:
+        thread_pool.shutdown(wait=wait)
+
+
+atexit.register(shutdown_thread_pools)
@@ -0,0 +1,290 @@
+import json
+import ssl
+import lusid
+from lusidtools.cocoon.telemetry import request_completed, request_sending
+from lusidtools.cocoon.utilities import checkargs
+
+# aiohttp is an optional dependency which is only required to use the native asyncio transport
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class PreparedRequest(Exception):
+    """
+    An HTTP request which has been prepared by the LUSID SDK but not sent. This is raised from the point at which the
+    SDK would send the request so that nothing after it is run.
+    """
+
+    def __init__(self, method, url, query_params, headers, body, response_types_map):
+        super().__init__(f"{method} {url}")
+        self.method = method
+        self.url = url
+        self.query_params = query_params
+        self.headers = headers
+        self.body = body
+        self.response_types_map = response_types_map
+
+
+class _RequestRecorder(lusid.ApiClient):
+    """
+    An ApiClient which builds requests exactly as the LUSID SDK does, including the path, query parameters,
+    authentication headers and serialised body, but raises them as a PreparedRequest rather than sending them
+    """
+
+    def __init__(self, api_client: lusid.ApiClient):
+        """
+        Parameters
+        ----------
+        api_client : lusid.ApiClient
+            The configured ApiClient to copy the configuration and default headers from
+        """
+
+        # The underlying REST client and thread pool are never used so ApiClient.__init__ is not called
+        self.configuration = api_client.configuration
+        self.default_headers = api_client.default_headers
+        self.cookie = api_client.cookie
+        self.client_side_validation = api_client.client_side_validation
+        self.pool_threads = 1
+        self.rest_client = None
+        self.response_types_map = None
+
+    def call_api(self, *args, **kwargs):
+        self.response_types_map = kwargs.get("response_types_map")
+        return super().call_api(*args, **kwargs)
+
+    def request(
+        self,
+        method,
+        url,
+        query_params=None,
+        headers=None,
+        post_params=None,
+        body=None,
+        _preload_content=True,
+        _request_timeout=None,
+    ):
+        raise PreparedRequest(
+            method=method,
+            url=url,
+            query_params=query_params,
+            headers=headers,
+            body=body,
+            response_types_map=self.response_types_map,
+        )
+
+
+class _RecordingApiFactory:
+    """
+    A stand in for a lusid.utilities.ApiClientFactory which builds APIs that prepare rather than send requests
+    """
+
+    def __init__(self, api_factory: lusid.utilities.ApiClientFactory):
+        self.api_client = api_factory.api_client
+
+    def build(self, api):
+        recorder = _RequestRecorder(self.api_client)
+        api_instance = api(recorder)
+        # ApiClientFactory.build replaces the API's __init__ with one that only accepts an exact ApiClient
+        api_instance.api_client = recorder
+        return api_instance
+
+
+class _AsyncHttpResponse:
+    """
+    The response to a request sent by the AsyncTransport, with the same interface as the SDK's RESTResponse so that
+    it can be deserialised and used to create an ApiException in the same way
+    """
+
+    def __init__(self, status: int, reason: str, data: str, headers: dict):
+        self.status = status
+        self.reason = reason
+        self.data = data
+        self.headers = headers
+
+    def getheaders(self):
+        return self.headers
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+
+class AsyncTransport:
+    """
+    Sends the requests built by the BatchLoader over a pooled aiohttp session from the event loop, rather than
+    blocking a thread in the thread pool for each request that is in flight. Connections are kept alive and reused
+    across batches.
+
+    Only the file types whose batch is loaded with a single request are sent natively, all other file types continue
+    to be loaded through the thread pool.
+    """
+
+    # The file types whose BatchLoader method makes exactly one request to LUSID
+    supported_file_types = ["instrument", "quote", "transaction", "holding"]
+
+    @checkargs
+    def __init__(
+        self,
+        api_factory: lusid.utilities.ApiClientFactory,
+        max_concurrent_requests: int = 100,
+    ):
+        """
+        Parameters
+        ----------
+        api_factory : lusid.utilities.ApiClientFactory
+            The api factory whose configuration (host, token, proxy and certificates) is used for requests
+        max_concurrent_requests : int
+            The maximum number of requests which can be in flight at once
+        """
+
+        if aiohttp is None:
+            raise ImportError(
+                "The async transport requires aiohttp, please install it with 'pip install aiohttp' and try again"
+            )
+
+        self.api_factory = api_factory
+        self.recording_api_factory = _RecordingApiFactory(api_factory)
+        self.max_concurrent_requests = max_concurrent_requests
+        self.session = None
+
+    def _create_session(self):
+        """
+        Creates the aiohttp session, this must be done from within the event loop that the session is used in
+        """
+
+        configuration = self.api_factory.api_client.configuration
+
+        ssl_context = None
+        if configuration.ssl_ca_cert is not None:
+            ssl_context = ssl.create_default_context(cafile=configuration.ssl_ca_cert)
+        elif not configuration.verify_ssl:
+            ssl_context = False
+
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrent_requests, ssl=ssl_context
+        )
+
+        return aiohttp.ClientSession(connector=connector)
+
+    def prepare(self, batch_loader, single_requests: list, **kwargs) -> PreparedRequest:
+        """
+        Prepares the request for a batch by running the synchronous BatchLoader method against an api factory
+        which records the request rather than sending it
+
+        Parameters
+        ----------
+        batch_loader
+            The BatchLoader method to prepare the request with
+        single_requests : list
+            The list of single requests for LUSID
+        kwargs
+            arguments specific to each call e.g. effective_at for holdings
+
+        Returns
+        -------
+        PreparedRequest
+            The prepared request
+        """
+
+        # Get the synchronous function from behind the run_in_executor decorator
+        batch_loader = getattr(batch_loader, "__wrapped__", batch_loader)
+
+        try:
+            batch_loader(self.recording_api_factory, single_requests, **kwargs)
+        except PreparedRequest as prepared_request:
+            return prepared_request
+
+        raise ValueError(
+            f"The batch loader {batch_loader.__name__} did not make a request to LUSID"
+        )
+
+    async def send(self, prepared_request: PreparedRequest):
+        """
+        Sends a prepared request and deserialises the response
+
+        Parameters
+        ----------
+        prepared_request : PreparedRequest
+            The request to send
+
+        Returns
+        -------
+        The deserialised response from LUSID, an ApiException with the headers of the response is raised if the request
+        fails. Each request is sent once, failed requests are retried by the RetryPolicy, which waits for as long as
+        any Retry-After header asks for
+        """
+
+        if self.session is None:
+            self.session = self._create_session()
+
+        configuration = self.api_factory.api_client.configuration
+
+        data = None
+        if prepared_request.body is not None:
+            data = json.dumps(prepared_request.body)
+
+        request_sending(len(data.encode("utf-8")) if data is not None else 0)
+        try:
+            async with self.session.request(
+                prepared_request.method,
+                prepared_request.url,
+                params=prepared_request.query_params or None,
+                headers=prepared_request.headers,
+                data=data,
+                proxy=configuration.proxy,
+                proxy_headers=configuration.proxy_headers,
+            ) as http_response:
+                response = _AsyncHttpResponse(
+                    status=http_response.status,
+                    reason=http_response.reason,
+                    data=await http_response.text(),
+                    headers=dict(http_response.headers),
+                )
+        except aiohttp.ClientError as e:
+            request_completed(0)
+            raise lusid.exceptions.ApiException(
+                status=0, reason=f"{type(e).__name__}: {e}"
+            )
+
+        request_completed(response.status, response.headers, len(response.data))
+
+        if not 200 <= response.status <= 299:
+            raise lusid.exceptions.ApiException(http_resp=response)
+
+        response_type = (prepared_request.response_types_map or {}).get(response.status)
+
+        if response_type is None:
+            return None
+
+        return self.api_factory.api_client.deserialize(response, response_type)
+
+    async def load_batch(self, batch_loader, single_requests: list, **kwargs):
+        """
+        Loads a batch into LUSID using the native asyncio transport
+
+        Parameters
+        ----------
+        batch_loader
+            The BatchLoader method used to build the request
+        single_requests : list
+            The list of single requests for LUSID
+        kwargs
+            arguments specific to each call e.g. effective_at for holdings
+
+        Returns
+        -------
+        The deserialised response from LUSID
+        """
+
+        return await self.send(self.prepare(batch_loader, single_requests, **kwargs))
+
+    async def close(self):
+        """
+        Closes the aiohttp session and its connections, this must be awaited in the event loop the transport was
+        used in
+        """
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
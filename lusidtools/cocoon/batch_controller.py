@@ -0,0 +1,300 @@
+import asyncio
+import json
+import logging
+import math
+import time
+import lusid
+
+
+class AdaptiveBatchController:
+    """
+    Adapts the batch size and the number of batches in flight while data is loaded into LUSID, using additive
+    increase and multiplicative decrease (AIMD). Each successful batch which completes within the target latency
+    grows the batch size by a fixed increment and the concurrency by one batch per window of batches. Throttling
+    (429), server errors (5xx) and timeouts halve both, and slow or oversized batches shrink the batch size. Only
+    one decrease is made for the batches which were already in flight when the previous decrease was made, so a
+    burst of errors from the same window is not counted more than once.
+
+    Every decision is logged and kept in the decisions list so that the bounds can be tuned offline.
+    """
+
+    def __init__(
+        self,
+        min_batch_size: int = 100,
+        max_batch_size: int = None,
+        initial_batch_size: int = None,
+        batch_size_increment: int = None,
+        min_concurrency: int = 1,
+        max_concurrency: int = None,
+        initial_concurrency: int = None,
+        target_latency: float = 10.0,
+        max_payload_bytes: int = None,
+        decrease_factor: float = 0.5,
+    ):
+        """
+        Parameters
+        ----------
+        min_batch_size : int
+            The smallest batch size to use
+        max_batch_size : int
+            The largest batch size to use, defaults to the batch size of the load
+        initial_batch_size : int
+            The batch size to start with, defaults to the max_batch_size
+        batch_size_increment : int
+            The number of rows to add to the batch size after each successful batch, defaults to a tenth of the
+            max_batch_size
+        min_concurrency : int
+            The smallest number of batches to have in flight at once
+        max_concurrency : int
+            The largest number of batches to have in flight at once, defaults to the max_batches_in_flight of the load
+        initial_concurrency : int
+            The number of batches to have in flight at the start, defaults to the max_concurrency
+        target_latency : float
+            The number of seconds a batch should take to load, slower batches shrink the batch size
+        max_payload_bytes : int
+            The largest estimated request body to send, larger batches shrink the batch size. If None the size of the
+            requests is not estimated
+        decrease_factor : float
+            The factor to multiply the batch size and concurrency by when they are decreased
+        """
+
+        if not 0 < decrease_factor < 1:
+            raise ValueError(
+                f"The decrease_factor must be between 0 and 1, got {decrease_factor}"
+            )
+
+        if min_batch_size < 1 or min_concurrency < 1:
+            raise ValueError(
+                "The min_batch_size and min_concurrency must be at least 1"
+            )
+
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.initial_batch_size = initial_batch_size
+        self.batch_size_increment = batch_size_increment
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.initial_concurrency = initial_concurrency
+        self.target_latency = target_latency
+        self.max_payload_bytes = max_payload_bytes
+        self.decrease_factor = decrease_factor
+
+        self.decisions = []
+        self._api_client = None
+
+    def start(self, batch_size: int, max_batches_in_flight: int) -> None:
+        """
+        Resolves the bounds which were not provided from the settings of a load and resets the controller
+
+        Parameters
+        ----------
+        batch_size : int
+            The batch size of the load, used as the default maximum batch size
+        max_batches_in_flight : int
+            The maximum number of batches in flight for the load, used as the default maximum concurrency
+        """
+
+        self._max_batch_size = max(
+            self.max_batch_size or batch_size, self.min_batch_size
+        )
+        self._max_concurrency = max(
+            self.max_concurrency or max_batches_in_flight, self.min_concurrency
+        )
+        self._batch_size_increment = self.batch_size_increment or max(
+            self._max_batch_size // 10, 1
+        )
+
+        self.batch_size = self._bound_batch_size(
+            self.initial_batch_size or self._max_batch_size
+        )
+        # The concurrency grows by a fraction of a batch for each success so it is kept as a float
+        self._concurrency = float(
+            self._bound_concurrency(self.initial_concurrency or self._max_concurrency)
+        )
+        self.error_rate = 0.0
+
+        self._in_flight = 0
+        self._waiters = []
+        self._last_decrease = float("-inf")
+
+    @property
+    def concurrency(self) -> int:
+        """
+        The number of batches which can currently be in flight at once
+        """
+
+        return int(self._concurrency)
+
+    def _bound_batch_size(self, batch_size: float) -> int:
+        return int(min(max(batch_size, self.min_batch_size), self._max_batch_size))
+
+    def _bound_concurrency(self, concurrency: float) -> float:
+        return min(max(concurrency, self.min_concurrency), self._max_concurrency)
+
+    def locked(self) -> bool:
+        """
+        Whether a batch would have to wait for another to complete before it can be sent, as asyncio.Semaphore
+        """
+
+        return self._in_flight >= self.concurrency
+
+    async def acquire(self) -> None:
+        """
+        Waits until there is room for another batch in flight, as asyncio.Semaphore
+        """
+
+        while self.locked():
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+        self._in_flight += 1
+
+    def release(self) -> None:
+        """
+        Marks a batch as no longer in flight, as asyncio.Semaphore
+        """
+
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        """
+        Wakes the batches waiting for room so that they check again whether they can be sent
+        """
+
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def estimate_payload_bytes(self, single_requests: list, sample_size: int = 10):
+        """
+        Estimates the size of the request body for a batch from the serialised size of a sample of its requests
+
+        Parameters
+        ----------
+        single_requests : list
+            The LUSID request models in the batch
+        sample_size : int
+            The number of requests to serialise
+
+        Returns
+        -------
+        int
+            The estimated size in bytes, or None if the size of requests is not being estimated
+        """
+
+        if self.max_payload_bytes is None or not single_requests:
+            return None
+
+        if self._api_client is None:
+            self._api_client = lusid.ApiClient()
+
+        sample = single_requests[:sample_size]
+        sample_bytes = len(
+            json.dumps(
+                self._api_client.sanitize_for_serialization(sample), default=str
+            ).encode("utf-8")
+        )
+
+        return math.ceil(sample_bytes * len(single_requests) / len(sample))
+
+    def record(
+        self,
+        rows: int,
+        started_at: float,
+        status: int = None,
+        payload_bytes: int = None,
+    ) -> dict:
+        """
+        Adjusts the batch size and concurrency using the outcome of a batch
+
+        Parameters
+        ----------
+        rows : int
+            The number of rows in the batch
+        started_at : float
+            When the batch was sent, from time.monotonic()
+        status : int
+            The HTTP status of the response, 0 for a timeout or connection error or None if the batch failed
+            without a response
+        payload_bytes : int
+            The estimated size of the request body, see estimate_payload_bytes
+
+        Returns
+        -------
+        dict
+            The decision made
+        """
+
+        now = time.monotonic()
+        latency = now - started_at
+        throttled = status is not None and (status in (0, 429) or status >= 500)
+        self.error_rate = 0.9 * self.error_rate + 0.1 * throttled
+
+        # Only decrease once for the batches which were in flight when the last decrease was made
+        can_decrease = started_at >= self._last_decrease
+
+        if throttled and can_decrease:
+            action = "decrease"
+            self.batch_size = self._bound_batch_size(
+                self.batch_size * self.decrease_factor
+            )
+            self._concurrency = self._bound_concurrency(
+                math.floor(self._concurrency * self.decrease_factor)
+            )
+            self._last_decrease = now
+        elif (
+            payload_bytes is not None
+            and self.max_payload_bytes is not None
+            and payload_bytes > self.max_payload_bytes
+        ):
+            action = "shrink_to_payload"
+            self.batch_size = self._bound_batch_size(
+                min(self.batch_size, rows * self.max_payload_bytes / payload_bytes)
+            )
+        elif status is not None and 200 <= status <= 299:
+            if latency > self.target_latency:
+                if can_decrease:
+                    action = "decrease_batch_size"
+                    self.batch_size = self._bound_batch_size(
+                        self.batch_size * self.decrease_factor
+                    )
+                    self._last_decrease = now
+                else:
+                    action = "hold"
+            else:
+                action = "increase"
+                self.batch_size = self._bound_batch_size(
+                    self.batch_size + self._batch_size_increment
+                )
+                # Grows by one batch for each window of successful batches
+                self._concurrency = self._bound_concurrency(
+                    self._concurrency + 1 / max(self._concurrency, 1)
+                )
+        else:
+            # Other errors e.g. a 400 for an invalid request say nothing about the capacity of LUSID
+            action = "hold"
+
+        decision = {
+            "action": action,
+            "rows": rows,
+            "status": status,
+            "latency": round(latency, 3),
+            "payload_bytes": payload_bytes,
+            "error_rate": round(self.error_rate, 3),
+            "batch_size": self.batch_size,
+            "concurrency": self.concurrency,
+        }
+        self.decisions.append(decision)
+
+        logging.info(
+            "Adaptive batching decision: "
+            + ", ".join(f"{key}={value}" for key, value in decision.items())
+        )
+
+        # Wake any batches waiting for room in case the concurrency has grown
+        self._wake_waiters()
+
+        return decision
@@ -0,0 +1,383 @@
+import typing
+import numpy as np
+import pandas as pd
+from lusidtools.cocoon.utilities import load_json_file
+from lusidtools.cocoon.validator import Validator
+
+
+class BatchPlan:
+    """
+    Plans how the rows of a DataFrame are split into the batches loaded into LUSID, and which of those batches must be
+    loaded one after the other.
+
+    Batches in the same synchronous batch can be loaded concurrently, but every batch in a synchronous batch must
+    complete before any batch in the next one is loaded:
+
+    - file types which are not portfolio specific e.g. instruments are split by batch size into one synchronous batch
+    - file types loaded for each effective date e.g. holdings have a synchronous batch for each effective date, with a
+      batch for each portfolio containing all of its rows for that date
+    - other portfolio specific file types e.g. transactions have a batch for each portfolio in each synchronous batch,
+      the first synchronous batch holds the first batch size rows of each portfolio, the second the next and so on
+
+    The batches of file types whose batches are independent of each other e.g. transactions, which are marked with
+    unordered_allowed in the domain settings, need not wait for each other. With the "none" ordering they are all in
+    the same synchronous batch, so each batch of each portfolio can be loaded as soon as there is room for another
+    request. The batches of other file types e.g. portfolio groups, where each batch creates or adds to the same group,
+    keep their order, and the lanes of a portfolio specific file type load the batches of each portfolio in order.
+
+    The rows of each portfolio, or of each portfolio and effective date, are found with one pass over the DataFrame
+    rather than a scan for each value, and the plan can be inspected with to_data_frame before anything is loaded.
+    """
+
+    def __init__(
+        self,
+        data_frame: pd.DataFrame,
+        mapping_required: dict,
+        file_type: str,
+        batch_size: int = None,
+        domain_lookup: dict = None,
+    ):
+        """
+        Parameters
+        ----------
+        data_frame : pd.DataFrame
+            The DataFrame containing the data to load
+        mapping_required : dict
+            The required mapping, the code and effective_at must be mapped to columns e.g. as returned by
+            cocoon.utilities.preprocess_data_frame
+        file_type : str
+            The file type to load e.g. "transactions"
+        batch_size : int
+            The batch size to use, defaults to the default batch size of the file type
+        domain_lookup : dict
+            The domain lookup, defaults to the domain settings in the cocoon configuration
+        """
+
+        if domain_lookup is None:
+            domain_lookup = load_json_file("config/domain_settings.json")
+
+        self.file_type = (
+            Validator(file_type, "file_type")
+            .make_singular()
+            .make_lower()
+            .check_allowed_value(list(domain_lookup.keys()))
+            .value
+        )
+
+        settings = domain_lookup[self.file_type]
+        self.data_frame = data_frame
+        self.batch_size = (
+            batch_size if batch_size is not None else settings["default_batch_size"]
+        )
+        self.portfolio_specific = settings["portfolio_specific"]
+        self.by_effective_at = (
+            self.portfolio_specific
+            and "effective_at" in settings["required_call_attributes"]
+        )
+        self.unordered_allowed = settings["unordered_allowed"]
+
+        # The ordering used when none is given, the batches are only loaded without ordering when they are independent
+        if self.unordered_allowed:
+            self.default_ordering = "none"
+        elif self.by_effective_at:
+            self.default_ordering = "portfolio"
+        else:
+            self.default_ordering = "global"
+
+        key_columns = []
+        if self.by_effective_at:
+            key_columns.append(mapping_required["effective_at"])
+        if self.portfolio_specific:
+            key_columns.append(mapping_required["code"])
+
+        Validator(key_columns, "mapping_required").check_subset_of_list(
+            list(data_frame.columns), "DataFrame Columns"
+        )
+
+        # Each group is the code and effective date of a portfolio, the number of the synchronous batch it is loaded
+        # in when it is loaded for an effective date, and the positions of its rows in order
+        self.groups = self._group_rows(key_columns) if key_columns else []
+        self._fixed = None
+
+    def _group_rows(self, key_columns: list) -> list:
+        """
+        Groups the rows by the values of the key columns in one pass. The groups are ordered by the first appearance
+        of the effective date, then of the code within it, as is the order of the rows in each group. Rows without a
+        value in a key column are not in any group
+        """
+
+        group_ids = np.zeros(len(self.data_frame), dtype=np.int64)
+        key_values = []
+        key_counts = []
+
+        for column in key_columns:
+            column_ids, _ = pd.factorize(self.data_frame[column])
+            # The values are kept as they were found e.g. numpy.datetime64 rather than Timestamp
+            values = self.data_frame[column].unique()
+            values = values[~pd.isna(values)]
+
+            group_ids = np.where(
+                (group_ids < 0) | (column_ids < 0),
+                -1,
+                group_ids * len(values) + column_ids,
+            )
+            key_values.append(values)
+            key_counts.append(len(values))
+
+        valid = group_ids >= 0
+        combined_ids, combined_keys = pd.factorize(group_ids[valid])
+
+        # Decode each combination into the position of each of its keys in order of first appearance
+        key_positions = []
+        remainder = np.asarray(combined_keys)
+        for count in reversed(key_counts):
+            key_positions.insert(0, remainder % count)
+            remainder = remainder // count
+
+        # Combinations are found in order of their first row, ordering them by the first key groups them by date
+        group_order = np.argsort(key_positions[0], kind="stable")
+        group_rank = np.empty_like(group_order)
+        group_rank[group_order] = np.arange(len(group_order))
+
+        ranked_ids = group_rank[combined_ids]
+        row_order = np.flatnonzero(valid)[np.argsort(ranked_ids, kind="stable")]
+        counts = np.bincount(ranked_ids, minlength=len(group_order))
+        positions = np.split(row_order, np.cumsum(counts)[:-1])
+
+        groups = []
+        sync_batch_number = -1
+        for rank, group in enumerate(group_order):
+            keys = [
+                values[key_position[group]]
+                for values, key_position in zip(key_values, key_positions)
+            ]
+
+            # Each effective date is loaded in the next synchronous batch
+            if (
+                rank == 0
+                or key_positions[0][group] != key_positions[0][group_order[rank - 1]]
+            ):
+                sync_batch_number += 1
+
+            groups.append(
+                {
+                    "code": keys[-1],
+                    "effective_at": keys[0] if self.by_effective_at else None,
+                    "sync_batch": sync_batch_number if self.by_effective_at else None,
+                    "positions": positions[rank],
+                }
+            )
+
+        return groups
+
+    def _plan(
+        self, get_batch_size: typing.Callable, ordering: str = "global"
+    ) -> typing.Iterator:
+        """
+        Yields the rows, portfolio code, effective date and synchronous batch number of each batch, where the rows
+        are a slice or an array of positions in the DataFrame
+        """
+
+        if ordering == "none" and not self.unordered_allowed:
+            raise ValueError(
+                f"The batches of the {self.file_type} file type depend on each other so they must be loaded in order, "
+                f"please use the portfolio or global ordering"
+            )
+
+        # Everything can be sent up asynchronously in a single synchronous batch
+        if not self.portfolio_specific:
+            start = 0
+            while start < len(self.data_frame):
+                batch_size = get_batch_size()
+                yield slice(start, start + batch_size), None, None, 0
+                start += batch_size
+            return
+
+        # The rows of each portfolio for an effective date are loaded together, one effective date at a time
+        if self.by_effective_at:
+            for group in self.groups:
+                code, effective_at = group["code"], group["effective_at"]
+                yield group["positions"], code, effective_at, group["sync_batch"]
+            return
+
+        # Each synchronous batch contains the next batch of rows for every portfolio which has rows left, without
+        # global ordering the batches are taken in the same order but are all in the first synchronous batch
+        start = 0
+        sync_batch_number = 0
+        while any(start < len(group["positions"]) for group in self.groups):
+            batch_size = get_batch_size()
+            for group in self.groups:
+                rows = group["positions"][start : start + batch_size]
+                if len(rows):
+                    yield rows, str(group["code"]), None, sync_batch_number
+            start += batch_size
+            if ordering == "global":
+                sync_batch_number += 1
+
+    def batches(
+        self,
+        batch_size: typing.Union[int, typing.Callable] = None,
+        ordering: str = "global",
+    ):
+        """
+        Creates the batches in the order they are loaded
+
+        Parameters
+        ----------
+        batch_size : int or callable
+            The batch size to use, or a function which returns the batch size to use for the next batch e.g. from an
+            adaptive batch controller. Defaults to the batch size of the plan
+        ordering : str
+            "global" puts the batches of each portfolio in successive synchronous batches, "none" puts the batches
+            of file types whose batches are independent e.g. transactions in the same synchronous batch
+
+        Returns
+        -------
+        typing.Iterator[tuple]
+            The DataFrame, portfolio code, effective date and synchronous batch number of each batch
+        """
+
+        if batch_size is None:
+            batch_size = self.batch_size
+
+        get_batch_size = batch_size if callable(batch_size) else lambda: batch_size
+
+        for rows, code, effective_at, sync_batch_number in self._plan(
+            get_batch_size, ordering
+        ):
+            yield self._take(rows), code, effective_at, sync_batch_number
+
+    def _take(self, rows) -> pd.DataFrame:
+        """
+        Takes the rows of a batch from the DataFrame, rows which are next to each other are sliced rather than taken,
+        which does not copy them
+        """
+
+        if not isinstance(rows, slice) and rows[-1] - rows[0] + 1 == len(rows):
+            rows = slice(rows[0], rows[-1] + 1)
+
+        return self.data_frame.iloc[rows]
+
+    def _fixed_batches(self) -> list:
+        """
+        Plans the batches at the batch size of the plan, once, so that they can be found by their number
+        """
+
+        if self._fixed is None:
+            self._fixed = list(self._plan(lambda: self.batch_size))
+
+        return self._fixed
+
+    def lanes(self) -> dict:
+        """
+        Groups the batches of a portfolio specific file type into a lane for each portfolio. The batches in a lane
+        must be loaded in order, one at a time, but the lanes are independent of each other e.g. the holdings set for
+        one portfolio do not depend on those of another
+
+        Returns
+        -------
+        dict
+            The numbers of the batches in each lane, in the order they must be loaded, keyed by portfolio code
+        """
+
+        if not self.portfolio_specific:
+            raise ValueError(
+                f"The {self.file_type} file type is not portfolio specific so its batches are not ordered in lanes"
+            )
+
+        lanes = {}
+        for batch_number, (_, code, _, _) in enumerate(self._fixed_batches()):
+            lanes.setdefault(code, []).append(batch_number)
+
+        return lanes
+
+    def batch(self, batch_number: int) -> tuple:
+        """
+        Creates one of the batches of a portfolio specific file type at the batch size of the plan
+
+        Parameters
+        ----------
+        batch_number : int
+            The number of the batch in the order they are loaded
+
+        Returns
+        -------
+        tuple
+            The DataFrame, portfolio code, effective date and synchronous batch number of the batch
+        """
+
+        rows, code, effective_at, sync_batch_number = self._fixed_batches()[
+            batch_number
+        ]
+        return self._take(rows), code, effective_at, sync_batch_number
+
+    def sync_batches(self) -> list:
+        """
+        Groups the batches into their synchronous batches
+
+        Returns
+        -------
+        sync_batches : list[dict]
+            The synchronous batches, each with the DataFrame, portfolio code and effective date of its async batches
+        """
+
+        sync_batches = []
+
+        for async_batch, code, effective_at, sync_batch_number in self.batches():
+            if sync_batch_number == len(sync_batches):
+                sync_batches.append(
+                    {"async_batches": [], "codes": [], "effective_at": []}
+                )
+
+            sync_batches[-1]["async_batches"].append(async_batch)
+            sync_batches[-1]["codes"].append(code)
+            sync_batches[-1]["effective_at"].append(effective_at)
+
+        return sync_batches
+
+    def to_data_frame(self, ordering: str = "global") -> pd.DataFrame:
+        """
+        Describes each batch without creating it
+
+        Parameters
+        ----------
+        ordering : str
+            The ordering of the batches, see batches
+
+        Returns
+        -------
+        pd.DataFrame
+            A row for each batch in the order they are loaded, with its synchronous batch number, portfolio code,
+            effective date, number of rows and the positions of its first and last rows in the DataFrame
+        """
+
+        rows = []
+
+        for positions, code, effective_at, sync_batch_number in self._plan(
+            lambda: self.batch_size, ordering
+        ):
+            if isinstance(positions, slice):
+                positions = range(len(self.data_frame))[positions]
+
+            rows.append(
+                {
+                    "sync_batch": sync_batch_number,
+                    "code": code,
+                    "effective_at": effective_at,
+                    "rows": len(positions),
+                    "first_row": positions[0],
+                    "last_row": positions[-1],
+                }
+            )
+
+        return pd.DataFrame(
+            rows,
+            columns=[
+                "sync_batch",
+                "code",
+                "effective_at",
+                "rows",
+                "first_row",
+                "last_row",
+            ],
+        )
@@ -1,14 +1,41 @@
 import asyncio
+import collections
+import contextlib
+import contextvars
+import functools
+import time
+import typing
 import lusid
 import pandas as pd
 import numpy as np
 import json
 from lusidtools import cocoon
-from lusidtools.cocoon.async_tools import run_in_executor, ThreadPool
+from lusidtools.cocoon.async_tools import (
+    run_in_executor,
+    get_conversion_thread_pool,
+    get_thread_pool,
+)
+from lusidtools.cocoon.async_transport import AsyncTransport
+from lusidtools.cocoon.batch_controller import AdaptiveBatchController
+from lusidtools.cocoon.batch_plan import BatchPlan
+from lusidtools.cocoon.instrument_cache import (
+    get_default_instrument_cache,
+    get_namespace,
+)
 from lusidtools.cocoon.dateorcutlabel import DateOrCutLabel
+from lusidtools.cocoon.journal import COMPLETE, FAILED, LoadJournal
+from lusidtools.cocoon.mapping_plan import MappingPlan
+from lusidtools.cocoon.rate_limiter import DEFAULT_ENDPOINT, get_rate_limiter
+from lusidtools.cocoon.retry import RetryPolicy
+from lusidtools.cocoon.telemetry import LoadTelemetry, instrument_api_client
+from lusidtools.cocoon.process_tools import (
+    deserialise_models,
+    get_default_max_processes,
+    get_process_pool,
+    serialise_models,
+)
 from lusidtools.cocoon.utilities import (
     checkargs,
-    strip_whitespace,
     group_request_into_one,
 )
 from lusidtools.cocoon.validator import Validator
@@ -353,13 +380,16 @@ class BatchLoader:
                 return e
 
     @staticmethod
-    @run_in_executor
-    def load_instrument_property_batch(
+    async def load_instrument_property_batch(
         api_factory: lusid.utilities.ApiClientFactory, property_batch: list, **kwargs
     ) -> [lusid.models.UpsertInstrumentPropertiesResponse]:
         """
         Add properties to the set instruments
 
+        The distinct identifiers of each identifier type are resolved with batched searches, the properties of the
+        requests which resolve to the same instrument are merged and the upserts are then sent in batches. The
+        searches and the upserts are each sent concurrently.
+
         Parameters
         ----------
         api_factory : lusid.utilities.ApiClientFactory
@@ -369,61 +399,113 @@ class BatchLoader:
             identifiers will be resolved to a LusidInstrumentId, where an identifier resolves to more
             than one LusidInstrumentId the property will be added to all matching instruments
         kwargs
+            instrument_cache, search_batch_size and upsert_batch_size can be used to override the defaults
 
         Returns
         -------
         list[lusid.models.UpsertInstrumentPropertiesResponse]
-            the response from LUSID
+            the response from LUSID for each request which resolved to an instrument, requests which did not resolve
+            to any instrument are omitted
         """
 
-        results = []
-        for request in property_batch:
-            search_request = lusid.models.InstrumentSearchProperty(
-                key=f"instrument/default/{request.identifier_type}",
-                value=request.identifier,
-            )
+        instrument_cache = kwargs.get("instrument_cache")
+        if instrument_cache is None:
+            instrument_cache = get_default_instrument_cache()
+        namespace = get_namespace(api_factory.api_client.configuration.host)
+        search_batch_size = kwargs.get("search_batch_size", 500)
+        upsert_batch_size = kwargs.get("upsert_batch_size", 500)
 
-            # find the matching instruments
-            mastered_instruments = api_factory.build(
-                lusid.api.SearchApi
-            ).instruments_search(
-                instrument_search_property=[search_request], mastered_only=True
+        # Group the distinct identifier values by identifier type
+        identifier_values = {}
+        for request in property_batch:
+            identifier_values.setdefault(request.identifier_type, {})[
+                str(request.identifier)
+            ] = None
+
+        # Use the LusidInstrumentIds the identifiers have already been resolved to if they are cached
+        resolved = {}
+        searches = []
+        for identifier_type, values in identifier_values.items():
+            resolved[identifier_type] = instrument_cache.get_many(
+                namespace, identifier_type, list(values)
             )
+            missing = [
+                value for value in values if value not in resolved[identifier_type]
+            ]
 
-            # flat map the results to a list of luids
-            luids = [
-                luid
-                for luids in [
-                    list(
-                        map(
-                            lambda m: m.identifiers["LusidInstrumentId"].value,
-                            mastered.mastered_instruments,
-                        )
+            for i in range(0, len(missing), search_batch_size):
+                searches.append(
+                    (
+                        identifier_type,
+                        cocoon.instruments._search_instruments_batch(
+                            api_factory,
+                            f"Instrument/default/{identifier_type}",
+                            missing[i : i + search_batch_size],
+                            **kwargs,
+                        ),
                     )
-                    for mastered in [matches for matches in mastered_instruments]
-                ]
-                for luid in luids
-            ]
+                )
+
+        search_responses = await asyncio.gather(*[search for _, search in searches])
+
+        for (identifier_type, _), response in zip(searches, search_responses):
+            for luids in response.values():
+                if isinstance(luids, lusid.exceptions.ApiException):
+                    raise luids
 
-            if len(luids) == 0:
-                continue
+            resolved[identifier_type].update(response)
 
-            properties_request = [
-                lusid.models.UpsertInstrumentPropertyRequest(
-                    identifier_type="LusidInstrumentId",
-                    identifier=luid,
-                    properties=request.properties,
+            # Cache the identifiers which resolved to instruments
+            instrument_cache.set_many(
+                namespace,
+                identifier_type,
+                {value: luids for value, luids in response.items() if len(luids) > 0},
+            )
+
+        # Merge the properties of the requests for the same instrument, later requests take precedence
+        instrument_properties = {}
+        request_luids = []
+        for request in property_batch:
+            luids = resolved[request.identifier_type][str(request.identifier)]
+            request_luids.append(luids)
+
+            for luid in luids:
+                instrument_properties.setdefault(luid, {}).update(
+                    {
+                        model_property.key: model_property
+                        for model_property in request.properties or []
+                    }
                 )
-                for luid in luids
-            ]
 
-            results.append(
-                api_factory.build(
-                    lusid.api.InstrumentsApi
-                ).upsert_instruments_properties(properties_request)
+        properties_requests = [
+            lusid.models.UpsertInstrumentPropertyRequest(
+                identifier_type="LusidInstrumentId",
+                identifier=luid,
+                properties=list(properties.values()),
             )
+            for luid, properties in instrument_properties.items()
+        ]
+
+        upsert_batches = [
+            properties_requests[i : i + upsert_batch_size]
+            for i in range(0, len(properties_requests), upsert_batch_size)
+        ]
 
-        return results
+        upsert_responses = await asyncio.gather(
+            *[
+                _upsert_instrument_properties(api_factory, upsert_batch, **kwargs)
+                for upsert_batch in upsert_batches
+            ]
+        )
+
+        # Report the response for each request using the batch which upserted the properties of its first instrument
+        luid_responses = {
+            properties_request.identifier: response
+            for upsert_batch, response in zip(upsert_batches, upsert_responses)
+            for properties_request in upsert_batch
+        }
+
+        return [luid_responses[luids[0]] for luids in request_luids if len(luids) > 0]
 
     @staticmethod
     @run_in_executor
@@ -532,10 +614,39 @@ class BatchLoader:
                 return e
 
 
+@run_in_executor
+def _upsert_instrument_properties(
+    api_factory: lusid.utilities.ApiClientFactory,
+    properties_requests: list,
+    **kwargs,
+) -> lusid.models.UpsertInstrumentPropertiesResponse:
+    """
+    Upserts the properties of a batch of instruments identified by their LusidInstrumentId in a single request
+
+    Parameters
+    ----------
+    api_factory : lusid.utilities.ApiClientFactory
+        The api factory to use
+    properties_requests : list[lusid.models.UpsertInstrumentPropertyRequest]
+        The properties to upsert
+    kwargs
+
+    Returns
+    -------
+    lusid.models.UpsertInstrumentPropertiesResponse
+        The response from LUSID
+    """
+
+    return api_factory.build(lusid.api.InstrumentsApi).upsert_instruments_properties(
+        properties_requests
+    )
+
+
 async def _load_data(
     api_factory: lusid.utilities.ApiClientFactory,
     single_requests: list,
     file_type: str,
+    endpoint: str = None,
     **kwargs,
 ):
     """
@@ -549,6 +660,8 @@ async def _load_data(
         The list of single requests for LUSID
     file_type : str
         The file type e.g. instruments, portfolios etc.
+    endpoint : str
+        The endpoint class the batch is loaded with e.g. "InstrumentsApi", used to limit the rate of requests
     kwargs
         arguments specific to each call e.g. effective_at for holdings
 
@@ -558,8 +671,21 @@ async def _load_data(
         A static method on batchloader
     """
 
-    # Dynamically call the correct async function to use based on the file type
-    return await getattr(BatchLoader, f"load_{file_type}_batch")(
+    # Wait for the process wide rate limiter, which is shared with any other loads, extracts and queries
+    await get_rate_limiter().acquire_async(endpoint or DEFAULT_ENDPOINT)
+
+    # Dynamically get the correct async function to use based on the file type
+    batch_loader = getattr(BatchLoader, f"load_{file_type}_batch")
+
+    # If the native asyncio transport is in use send the request from the event loop rather than a thread
+    async_transport = kwargs.get("async_transport")
+    if (
+        async_transport is not None
+        and file_type in async_transport.supported_file_types
+    ):
+        return await async_transport.load_batch(batch_loader, single_requests, **kwargs)
+
+    return await batch_loader(
         api_factory,
         single_requests,
         # Any specific arguments e.g. 'code' for transactions, 'effective_at' for holdings is passed in via **kwargs
@@ -614,90 +740,115 @@ def _convert_batch_to_models(
          A list of populated LUSID request models
     """
 
-    # Get the data types of the columns to be added as properties
-    property_dtypes = data_frame.loc[:, property_columns].dtypes
+    # Resolve the mapping, data types, identifier keys and nested model structure once for the batch
+    mapping_plan = MappingPlan(
+        file_type=file_type,
+        domain_lookup=domain_lookup,
+        dtypes=data_frame.dtypes,
+        mapping_required=mapping_required,
+        mapping_optional=mapping_optional,
+        property_columns=property_columns,
+        properties_scope=properties_scope,
+        instrument_identifier_mapping=instrument_identifier_mapping,
+        sub_holding_keys=sub_holding_keys,
+        sub_holding_keys_scope=sub_holding_keys_scope,
+        unique_identifiers=kwargs["unique_identifiers"],
+        full_key_format=kwargs["full_key_format"],
+    )
 
-    # Get the types of the attributes on the top level model for this request
-    open_api_types = getattr(
-        lusid.models, domain_lookup[file_type]["top_level_model"]
-    ).openapi_types
+    # Construct the single request objects from the columns of the DataFrame
+    return mapping_plan.build_models(data_frame)
 
-    # If there is a sub_holding_keys attribute and it has a dict type this means the sub_holding_keys
-    # need to be populated with property values
-    if (
-        "sub_holding_keys" in open_api_types.keys()
-        and "dict" in open_api_types["sub_holding_keys"]
-    ):
-        sub_holding_key_dtypes = data_frame.loc[:, sub_holding_keys].dtypes
-    # If not and they are provided as full keys
-    elif len(sub_holding_keys) > 0:
-        sub_holding_keys_row = cocoon.properties._infer_full_property_keys(
-            partial_keys=sub_holding_keys,
-            properties_scope=sub_holding_keys_scope,
-            domain="Transaction",
-        )
-    # If no keys
-    else:
-        sub_holding_keys_row = None
 
-    unique_identifiers = kwargs["unique_identifiers"]
+def _convert_batch_to_payload(**kwargs) -> bytes:
+    """
+    This function populates the required models from a DataFrame in a worker process and serialises them so that
+    they can be returned to the process loading them into LUSID, see _convert_batch_to_models for the arguments
 
-    # Iterate over the DataFrame creating the single requests
-    single_requests = []
-    for index, row in data_frame.iterrows():
+    Returns
+    -------
+    bytes
+        The serialised request models, see cocoon.process_tools.deserialise_models
+    """
 
-        # Create the property values for this row
-        if domain_lookup[file_type]["domain"] is None:
-            properties = None
-        else:
-            properties = cocoon.properties.create_property_values(
-                row=row,
-                scope=properties_scope,
-                domain=domain_lookup[file_type]["domain"],
-                dtypes=property_dtypes,
-            )
+    return serialise_models(_convert_batch_to_models(**kwargs))
 
-        # Create the sub-holding-keys for this row
-        if (
-            "sub_holding_keys" in open_api_types.keys()
-            and "dict" in open_api_types["sub_holding_keys"]
-        ):
-            sub_holding_keys_row = cocoon.properties.create_property_values(
-                row=row,
-                scope=sub_holding_keys_scope,
-                domain="Transaction",
-                dtypes=sub_holding_key_dtypes,
-            )
 
-        # Create identifiers for this row if applicable
-        if instrument_identifier_mapping is None or not bool(
-            instrument_identifier_mapping
-        ):
-            identifiers = None
-        else:
-            identifiers = cocoon.instruments.create_identifiers(
-                index=index,
-                row=row,
-                file_type=file_type,
-                instrument_identifier_mapping=instrument_identifier_mapping,
-                unique_identifiers=unique_identifiers,
-                full_key_format=kwargs["full_key_format"],
-            )
+def _create_sync_batches(
+    data_frame: pd.DataFrame,
+    mapping_required: dict,
+    batch_size: int,
+    file_type: str,
+    domain_lookup: dict,
+) -> list:
+    """
+    This splits the DataFrame into synchronous batches. Every batch in a synchronous batch can be loaded concurrently,
+    but all of them must complete before any batch in the next synchronous batch is loaded
 
-        # Construct the from the mapping, properties and identifiers the single request object and add it to the list
-        single_requests.append(
-            cocoon.utilities.populate_model(
-                model_object_name=domain_lookup[file_type]["top_level_model"],
-                required_mapping=mapping_required,
-                optional_mapping=mapping_optional,
-                row=row,
-                properties=properties,
-                identifiers=identifiers,
-                sub_holding_keys=sub_holding_keys_row,
-            )
-        )
+    Parameters
+    ----------
+    data_frame : pd.DataFrame
+        The DataFrame containing the data to load
+    mapping_required : dict
+        The required mapping
+    batch_size : int
+        The batch size to use
+    file_type : str
+        The file type to load
+    domain_lookup : dict
+        The domain lookup
+
+    Returns
+    -------
+    sync_batches : list[dict]
+        The synchronous batches, each with the DataFrame, portfolio code and effective date of its async batches
+    """
+
+    return BatchPlan(
+        data_frame=data_frame,
+        mapping_required=mapping_required,
+        file_type=file_type,
+        batch_size=batch_size,
+        domain_lookup=domain_lookup,
+    ).sync_batches()
+
+
+def _create_adaptive_batches(
+    data_frame: pd.DataFrame,
+    mapping_required: dict,
+    file_type: str,
+    domain_lookup: dict,
+    batch_controller: AdaptiveBatchController,
+) -> typing.Iterator:
+    """
+    This splits the DataFrame into batches in the same way as _create_sync_batches, except that the size of each
+    batch is read from an adaptive batch controller when the batch is created rather than being fixed up front
+
+    Parameters
+    ----------
+    data_frame : pd.DataFrame
+        The DataFrame containing the data to load
+    mapping_required : dict
+        The required mapping
+    file_type : str
+        The file type to load, this must allow batching and must not be loaded for each effective date
+    domain_lookup : dict
+        The domain lookup
+    batch_controller : AdaptiveBatchController
+        The controller to read the batch size from
+
+    Returns
+    -------
+    typing.Iterator[tuple]
+        The DataFrame, portfolio code, effective date and synchronous batch number of each batch
+    """
 
-    return single_requests
+    return BatchPlan(
+        data_frame=data_frame,
+        mapping_required=mapping_required,
+        file_type=file_type,
+        domain_lookup=domain_lookup,
+    ).batches(lambda: batch_controller.batch_size)
 
 
 async def _construct_batches(
@@ -713,10 +864,21 @@ async def _construct_batches(
     domain_lookup: dict,
     sub_holding_keys: list,
     sub_holding_keys_scope: str,
+    max_batches_in_flight: int = None,
+    parallelism: str = "thread",
+    max_processes: int = None,
+    batch_controller: AdaptiveBatchController = None,
+    retry_policy: RetryPolicy = None,
+    telemetry: LoadTelemetry = None,
+    batch_plan: BatchPlan = None,
+    ordering: str = None,
+    journal: LoadJournal = None,
     **kwargs,
 ):
     """
-    This constructs the batches and asynchronously sends them to be loaded into LUSID
+    This constructs the batches and asynchronously sends them to be loaded into LUSID. The batches are converted to
+    models so that the next batches are built while the requests for earlier batches are in flight, either one at a
+    time on a thread or several at once in a pool of worker processes
 
     Parameters
     ----------
@@ -744,153 +906,414 @@ async def _construct_batches(
         The sub holding keys to use
     sub_holding_keys_scope : str
         The scope to use for the sub-holding keys
+    max_batches_in_flight : int
+        The maximum number of batches which have been converted to models but not yet loaded, defaults to the
+        maximum number of concurrent requests for the async transport or twice the size of the thread pool
+    parallelism : str
+        Where the batches are converted to models, "thread" converts them one at a time on a thread and "process"
+        converts several at once in worker processes
+    max_processes : int
+        The number of worker processes to use when the parallelism is "process", defaults to the number of CPUs
+    batch_controller : AdaptiveBatchController
+        The controller to adapt the batch size and number of batches in flight with while loading, if None they are
+        fixed at the batch_size and max_batches_in_flight
+    retry_policy : RetryPolicy
+        The policy to retry and split failed batches with, if None each batch is sent once
+    telemetry : LoadTelemetry
+        Records the time each request spends converting, serialising, sending and deserialising, if None nothing is
+        recorded
+    batch_plan : BatchPlan
+        The plan of the batches to load, if None it is created from the DataFrame
+    ordering : str
+        How the batches of portfolio specific file types are ordered. "portfolio" loads the batches of each portfolio
+        in order with the portfolios loaded concurrently, "global" waits for every portfolio to complete a batch e.g.
+        an effective date before any portfolio starts the next and "none" loads each batch of each portfolio as soon
+        as there is room for it, which is only allowed for file types whose batches are independent e.g.
+        transactions. Defaults to "none" for those file types, "portfolio" for file types loaded for each effective
+        date e.g. holdings and "global" otherwise e.g. for portfolio groups
+    journal : LoadJournal
+        The journal to record the outcome of each batch in, batches which completed in an earlier load with the same
+        journal are skipped. If None every batch is loaded
     kwargs
         Arguments specific to each call e.g. effective_at for holdings
 
     Returns
     -------
     dict
-        Contains the success responses and the errors (where an API exception has been raised)
+        Contains the success responses, the errors (where an API exception has been raised), the retries, splits and
+        latency of each batch and how well the scheduler kept the batches in flight busy
     """
 
-    # Get the different behaviours required for different entities e.g quotes can be batched without worrying about portfolios
-    batching_no_portfolios = [
-        file_type
-        for file_type, settings in domain_lookup.items()
-        if not settings["portfolio_specific"]
-    ]
-    batching_with_portfolios = [
-        file_type
-        for file_type, settings in domain_lookup.items()
-        if settings["portfolio_specific"]
-    ]
+    if retry_policy is None:
+        retry_policy = RetryPolicy(max_attempts=1, split_statuses=())
 
-    if file_type in batching_no_portfolios:
+    # Bound the number of batches which have been converted to models but whose requests have not yet completed
+    if max_batches_in_flight is None:
+        max_batches_in_flight = (
+            kwargs["async_transport"].max_concurrent_requests
+            if kwargs.get("async_transport") is not None
+            else 2 * kwargs["thread_pool"].max_workers
+        )
+    in_flight = asyncio.Semaphore(max_batches_in_flight)
 
-        # Everything can be sent up asynchronously, prepare batches based on batch size alone
-        async_batches = [
-            data_frame.iloc[i : i + batch_size]
-            for i in range(0, len(data_frame), batch_size)
-        ]
+    # The adaptive controller takes the place of the semaphore, growing and shrinking the number of batches in flight
+    if batch_controller is not None:
+        batch_controller.start(
+            batch_size=batch_size, max_batches_in_flight=max_batches_in_flight
+        )
+        in_flight = batch_controller
+
+    # Models are built on their own thread so that the next batch is converted while earlier batches are in flight
+    loop = asyncio.get_running_loop()
+    conversion_thread_pool = get_conversion_thread_pool().thread_pool
+
+    # With process parallelism each worker converts a batch at a time so one batch per worker is converted ahead
+    process_pool = None
+    conversions_ahead = 1
+    if parallelism == "process":
+        conversions_ahead = max_processes or get_default_max_processes()
+        process_pool = get_process_pool(conversions_ahead)
+
+    conversion_arguments = dict(
+        mapping_required=mapping_required,
+        mapping_optional=mapping_optional,
+        property_columns=property_columns,
+        properties_scope=properties_scope,
+        instrument_identifier_mapping=instrument_identifier_mapping,
+        file_type=file_type,
+        domain_lookup=domain_lookup,
+        sub_holding_keys=sub_holding_keys,
+        sub_holding_keys_scope=sub_holding_keys_scope,
+    )
 
-        # Nest the async batches inside a single synchronous batch
-        sync_batches = [
-            {
-                "async_batches": async_batches,
-                "codes": [None] * len(async_batches),
-                "effective_at": [None] * len(async_batches),
-            }
-        ]
+    async def convert_batch(async_batch):
+        if process_pool is None:
+            # Convert in a copy of the current context so that arguments checked at the boundary are trusted
+            return await loop.run_in_executor(
+                conversion_thread_pool,
+                functools.partial(
+                    contextvars.copy_context().run,
+                    _convert_batch_to_models,
+                    data_frame=async_batch,
+                    **conversion_arguments,
+                    **kwargs,
+                ),
+            )
 
-    elif file_type in batching_with_portfolios:
+        # Only the arguments used to build the models are sent to the worker, the rest e.g. the thread pool can not
+        # be pickled
+        payload = await loop.run_in_executor(
+            process_pool,
+            functools.partial(
+                _convert_batch_to_payload,
+                data_frame=async_batch,
+                unique_identifiers=kwargs["unique_identifiers"],
+                full_key_format=kwargs["full_key_format"],
+                **conversion_arguments,
+            ),
+        )
+        return await loop.run_in_executor(
+            conversion_thread_pool, deserialise_models, payload
+        )
 
-        if "effective_at" in domain_lookup[file_type]["required_call_attributes"]:
+    # Dates are converted a whole column at a time for all of the rows before the DataFrame is split into batches,
+    # rather than again for each batch
+    data_frame = MappingPlan(
+        dtypes=data_frame.dtypes,
+        unique_identifiers=kwargs["unique_identifiers"],
+        full_key_format=kwargs["full_key_format"],
+        **conversion_arguments,
+    ).convert_date_columns(data_frame)
+
+    # Batches are only split when each of their requests can be loaded on its own e.g. not the holdings of a portfolio
+    split_allowed = domain_lookup[file_type]["split_allowed"]
+
+    def record_attempt(single_requests, started_at, status):
+        batch_controller.record(
+            rows=len(single_requests),
+            started_at=started_at,
+            status=status,
+            payload_bytes=batch_controller.estimate_payload_bytes(single_requests),
+        )
 
-            # Get unique effective dates
-            unique_effective_dates = list(
-                data_frame[mapping_required["effective_at"]].unique()
+    async def convert_batch_timed(async_batch):
+        started_at = time.perf_counter()
+        single_requests = await convert_batch(async_batch)
+        return single_requests, time.perf_counter() - started_at
+
+    async def load_requests(single_requests, code, effective_at, batch_number, convert):
+        recording = (
+            telemetry.record_request(
+                name=f"load_{file_type}_batch",
+                batch=batch_number,
+                rows=len(single_requests),
+                code=code,
+                convert=convert,
             )
+            if telemetry is not None
+            else contextlib.nullcontext()
+        )
 
-            # Create a group for each effective date as they can not be batched asynchronously
-            effective_at_groups = [
-                data_frame.loc[
-                    data_frame[mapping_required["effective_at"]] == effective_at
-                ]
-                for effective_at in unique_effective_dates
-            ]
+        with recording:
+            return await _load_data(
+                api_factory=api_factory,
+                single_requests=single_requests,
+                file_type=file_type,
+                endpoint=domain_lookup[file_type]["endpoint"],
+                code=code,
+                effective_at=effective_at,
+                **kwargs,
+            )
 
-            # Create a synchronous batch for each effective date
-            sync_batches = [
-                {
-                    # Different portfolio codes can be batched asynchronously inside the synchronous batch
-                    "async_batches": [
-                        effective_at_group.loc[
-                            data_frame[mapping_required["code"]] == code
-                        ]
-                        for code in list(
-                            effective_at_group[mapping_required["code"]].unique()
-                        )
-                    ],
-                    "codes": list(
-                        effective_at_group[mapping_required["code"]].unique()
-                    ),
-                    "effective_at": [
-                        list(
-                            effective_at_group[
-                                mapping_required["effective_at"]
-                            ].unique()
-                        )[0]
-                    ]
-                    * len(list(effective_at_group[mapping_required["code"]].unique())),
-                }
-                for effective_at_group in effective_at_groups
-            ]
+    def identify_batch(async_batch, code, effective_at):
+        return journal.identify(
+            file_type=file_type,
+            scope=kwargs.get("scope"),
+            code=code,
+            effective_at=effective_at,
+            data_frame=async_batch,
+        )
 
-        else:
+    async def load_batch(
+        single_requests, code, effective_at, batch_number, convert, journal_batch=None
+    ):
+        try:
+            responses, statistics = await retry_policy.load_batch(
+                functools.partial(
+                    load_requests,
+                    code=code,
+                    effective_at=effective_at,
+                    batch_number=batch_number,
+                    convert=convert,
+                ),
+                single_requests,
+                split_allowed=split_allowed,
+                on_attempt=record_attempt if batch_controller is not None else None,
+            )
+            batch_statistics.append(statistics)
+        except Exception:
+            if journal_batch is not None:
+                journal.record(journal_batch, FAILED)
+            raise
+        finally:
+            in_flight.release()
+
+        # The outcome is recorded as soon as the batch completes so that a load which stops can be resumed from here
+        if journal_batch is not None:
+            journal.record(
+                journal_batch,
+                FAILED
+                if any(isinstance(response, Exception) for response in responses)
+                else COMPLETE,
+            )
 
-            unique_portfolios = list(data_frame[mapping_required["code"]].unique())
+        return responses
 
-            # Different portfolio codes can be batched asynchronously
-            async_batches = [
-                data_frame.loc[data_frame[mapping_required["code"]] == code]
-                for code in unique_portfolios
-            ]
+    # The batches to load in order, with the synchronous batch each belongs to. The size of each batch is decided as
+    # it is created when there is an adaptive controller and the file type is split into batches by size
+    if batch_plan is None:
+        batch_plan = BatchPlan(
+            data_frame=data_frame,
+            mapping_required=mapping_required,
+            file_type=file_type,
+            batch_size=batch_size,
+            domain_lookup=domain_lookup,
+        )
 
-            # Inside the synchronous batch split the values for each portfolio into appropriate batch sizes
-            sync_batches = [
-                {
-                    "async_batches": [
-                        async_batch.iloc[i : i + batch_size]
-                        for async_batch in async_batches
-                    ],
-                    "codes": [str(code) for code in unique_portfolios],
-                    "effective_at": [None] * len(async_batches),
-                }
-                for i in range(
-                    0,
-                    max([len(async_batch) for async_batch in async_batches]),
-                    batch_size,
-                )
-            ]
+    if ordering is None:
+        ordering = batch_plan.default_ordering
 
-    # Asynchronously load the data into LUSID
-    responses = [
-        await asyncio.gather(
-            *[
-                _load_data(
-                    api_factory=api_factory,
-                    single_requests=_convert_batch_to_models(
-                        data_frame=async_batch,
-                        mapping_required=mapping_required,
-                        mapping_optional=mapping_optional,
-                        property_columns=property_columns,
-                        properties_scope=properties_scope,
-                        instrument_identifier_mapping=instrument_identifier_mapping,
-                        file_type=file_type,
-                        domain_lookup=domain_lookup,
-                        sub_holding_keys=sub_holding_keys,
-                        sub_holding_keys_scope=sub_holding_keys_scope,
-                        **kwargs,
-                    ),
-                    file_type=file_type,
-                    code=code,
-                    effective_at=effective_at,
-                    **kwargs,
+    if ordering == "none" and not batch_plan.unordered_allowed:
+        raise ValueError(
+            f"The batches of the {file_type} file type depend on each other e.g. the effective dates of holdings so "
+            f"they must be loaded in order, please use the portfolio or global ordering"
+        )
+
+    # With a journal the batches are found by their rows, so they must be split the same way each time
+    if (
+        batch_controller is not None
+        and domain_lookup[file_type]["batch_allowed"]
+        and not batch_plan.by_effective_at
+        and journal is None
+    ):
+        batches = batch_plan.batches(
+            lambda: batch_controller.batch_size, ordering=ordering
+        )
+    else:
+        batches = batch_plan.batches(ordering=ordering)
+
+    batch_statistics = []
+    skipped = 0
+    started_at = time.perf_counter()
+
+    async def load_lane(batch_numbers):
+        nonlocal skipped
+
+        for batch_number in batch_numbers:
+            # Stop starting batches once another lane has failed
+            if lanes_failed:
+                return
+
+            async_batch, code, effective_at, _ = batch_plan.batch(batch_number)
+
+            journal_batch = None
+            if journal is not None:
+                journal_batch = identify_batch(async_batch, code, effective_at)
+                if journal.is_complete(journal_batch):
+                    skipped += 1
+                    continue
+
+            await in_flight.acquire()
+            try:
+                single_requests, convert = await convert_batch_timed(async_batch)
+            except BaseException:
+                in_flight.release()
+                raise
+
+            try:
+                lane_responses[batch_number] = await load_batch(
+                    single_requests,
+                    code,
+                    effective_at,
+                    batch_number,
+                    convert,
+                    journal_batch,
                 )
-                for async_batch, code, effective_at in zip(
-                    sync_batch["async_batches"],
-                    sync_batch["codes"],
-                    sync_batch["effective_at"],
+            except Exception as e:
+                lane_responses[batch_number] = e
+
+    if batch_plan.portfolio_specific and ordering == "portfolio":
+        # Each portfolio has a lane which loads its batches e.g. effective dates in order, the lanes run concurrently
+        # with the number of batches in flight across all of them bounded, so a slow portfolio only holds up its own
+        lane_responses = {}
+        lanes_failed = False
+        lanes = [
+            asyncio.ensure_future(load_lane(batch_numbers))
+            for batch_numbers in batch_plan.lanes().values()
+        ]
+
+        try:
+            await asyncio.gather(*lanes)
+        except BaseException:
+            lanes_failed = True
+            raise
+        finally:
+            # Let any requests which have already been sent complete before returning or raising
+            if lanes:
+                await asyncio.wait(lanes)
+
+        # The responses are returned in the same order as the batches would be loaded with global ordering
+        batch_responses = [
+            lane_responses[batch_number] for batch_number in sorted(lane_responses)
+        ]
+
+    else:
+        # The batches which are being converted in order, each holds a slot in the in flight semaphore
+        conversions = collections.deque()
+        batches_remaining = True
+
+        # The requests for each synchronous batch, every batch must complete before any batch in the next one is sent
+        current_sync_batch_number = None
+        current_sync_batch = []
+        previous_sync_batch = []
+        all_batches = []
+
+        try:
+            while True:
+                # Start converting the next batches, only waiting for a slot when no conversion is running, otherwise
+                # the slots could all be held by conversions that can not be loaded until the next one is awaited
+                while (
+                    batches_remaining
+                    and len(conversions) < conversions_ahead
+                    and (not conversions or not in_flight.locked())
+                ):
+                    # The slot is taken before the next batch is created so that an adaptive batch size is up to date
+                    await in_flight.acquire()
+                    batch = next(batches, None)
+                    if batch is None:
+                        in_flight.release()
+                        batches_remaining = False
+                        break
+
+                    async_batch, code, effective_at, sync_batch_number = batch
+
+                    # Batches which completed in an earlier load with the journal are not converted or loaded again
+                    journal_batch = None
+                    if journal is not None:
+                        journal_batch = identify_batch(async_batch, code, effective_at)
+                        if journal.is_complete(journal_batch):
+                            in_flight.release()
+                            skipped += 1
+                            continue
+
+                    conversions.append(
+                        (
+                            asyncio.ensure_future(convert_batch_timed(async_batch)),
+                            code,
+                            effective_at,
+                            sync_batch_number,
+                            journal_batch,
+                        )
+                    )
+
+                if not conversions:
+                    break
+
+                (
+                    conversion,
+                    code,
+                    effective_at,
+                    sync_batch_number,
+                    journal_batch,
+                ) = conversions.popleft()
+
+                try:
+                    single_requests, convert = await conversion
+                except Exception:
+                    in_flight.release()
+                    raise
+
+                if sync_batch_number != current_sync_batch_number:
+                    previous_sync_batch = current_sync_batch or previous_sync_batch
+                    current_sync_batch = []
+                    current_sync_batch_number = sync_batch_number
+
+                # Preserve the ordering between synchronous batches e.g. holdings with different effective dates
+                if previous_sync_batch:
+                    await asyncio.wait(previous_sync_batch)
+                    previous_sync_batch = []
+
+                batch = asyncio.ensure_future(
+                    load_batch(
+                        single_requests,
+                        code,
+                        effective_at,
+                        len(all_batches),
+                        convert,
+                        journal_batch,
+                    )
                 )
-                if not async_batch.empty
-            ],
-            return_exceptions=True,
-        )
-        for sync_batch in sync_batches
-    ]
+                current_sync_batch.append(batch)
+                all_batches.append(batch)
+
+            batch_responses = await asyncio.gather(*all_batches, return_exceptions=True)
 
+        finally:
+            # Stop any conversions which are no longer needed after an error
+            for conversion, *_ in conversions:
+                conversion.cancel()
+            if conversions:
+                await asyncio.wait([conversion for conversion, *_ in conversions])
+
+            # Let any requests which have already been sent complete before returning or raising
+            if all_batches:
+                await asyncio.wait(all_batches)
+
+    # A batch which was split has a response for each part
     responses_flattened = [
-        response for responses_sub in responses for response in responses_sub
+        response
+        for responses in batch_responses
+        for response in (responses if isinstance(responses, list) else [responses])
     ]
 
     # Raise any internal exceptions rather than propagating them to the response
@@ -900,10 +1323,27 @@ async def _construct_batches(
         ):
             raise response
 
+    if skipped:
+        logging.info(
+            f"Skipped {skipped} batches of {file_type}s which completed in an earlier load"
+        )
+
+    # The share of the time loading that the batches in flight were busy, counting retries and splits
+    elapsed = time.perf_counter() - started_at
+    busy = sum(statistics["latency"] for statistics in batch_statistics)
+
     # Collects the exceptions as failures and successful calls as values
     return {
         "errors": [r for r in responses_flattened if isinstance(r, Exception)],
         "success": [r for r in responses_flattened if not isinstance(r, Exception)],
+        "batches": batch_statistics,
+        "scheduler": {
+            "ordering": ordering,
+            "max_batches_in_flight": max_batches_in_flight,
+            "elapsed": elapsed,
+            "utilisation": busy / (elapsed * max_batches_in_flight) if elapsed else 0.0,
+            "skipped": skipped,
+        },
     }
 
 
@@ -925,6 +1365,16 @@ def load_from_data_frame(
     holdings_adjustment_only: bool = False,
     thread_pool_max_workers: int = 5,
     sub_holding_keys_scope: str = None,
+    async_transport: bool = False,
+    max_concurrent_requests: int = 100,
+    max_batches_in_flight: int = None,
+    parallelism: str = "thread",
+    max_processes: int = None,
+    batch_controller: AdaptiveBatchController = None,
+    retry_policy: RetryPolicy = None,
+    telemetry: LoadTelemetry = None,
+    ordering: str = None,
+    journal: LoadJournal = None,
 ):
     """
 
@@ -960,9 +1410,54 @@ def load_from_data_frame(
     holdings_adjustment_only : bool
         Whether to use the adjust_holdings api call rather than set_holdings when working with holdings
     thread_pool_max_workers : int
-        The maximum number of workers to use in the thread pool used by the function
+        The maximum number of workers to use in the thread pool used by the function, the thread pool is shared
+        with other calls using the same number of workers
     sub_holding_keys_scope : str
         The scope to add the sub-holding keys to
+    async_transport : bool
+        Whether to send the upsert requests for instruments, quotes, transactions and holdings over a pooled aiohttp
+        session from the event loop rather than from the thread pool, this requires aiohttp to be installed
+    max_concurrent_requests : int
+        The maximum number of requests in flight at once when using the async transport
+    max_batches_in_flight : int
+        The maximum number of batches which have been converted to models but not yet loaded into LUSID
+    parallelism : str
+        Where the DataFrame is converted to request models, "thread" converts one batch at a time on a thread while
+        earlier batches are loaded, "process" shards the batches across a pool of worker processes so that very large
+        DataFrames are converted on several cores at once. As the worker processes are started with spawn they import
+        the script which is loading, so a script using "process" must call load_from_data_frame from inside an
+        if __name__ == "__main__": block, otherwise each worker runs the load again as it starts and fails
+    max_processes : int
+        The number of worker processes to use when the parallelism is "process", defaults to the number of CPUs, the
+        process pool is shared with other calls using the same number of processes
+    batch_controller : AdaptiveBatchController
+        Adapts the batch size and the number of batches in flight to the observed response times, throttling and
+        server errors while loading, within the bounds it is created with. By default the batch_size is used as the
+        largest batch size and max_batches_in_flight as the largest number of batches in flight
+    retry_policy : RetryPolicy
+        The policy to retry throttled, failed and timed out batches with and to split batches which are too large
+        with. Defaults to RetryPolicy(), so a batch which is throttled, times out or fails with a 5xx status is sent
+        up to 4 times with backoff and a batch which is too large or too slow is split in half where its file type
+        allows it, whereas earlier versions sent each batch once. Use RetryPolicy(max_attempts=1, split_statuses=())
+        to send each batch once. The retries, splits and latency of each batch are returned in "batches"
+    telemetry : LoadTelemetry
+        Records the timing of each phase of each request, the number of rows and the size of the request and response
+        bodies, which can be summarised with telemetry.summary() or exported with telemetry.to_data_frame(),
+        telemetry.dump_stats() or as opentelemetry spans
+    ordering : str
+        How the batches of portfolio specific file types are ordered. "portfolio" loads the batches of each portfolio
+        in order while the portfolios are loaded concurrently, "global" waits for every portfolio to complete a batch
+        e.g. an effective date before any portfolio starts the next and "none" loads each batch of each portfolio as
+        soon as there is room for another batch in flight, so a large portfolio does not leave the others idle.
+        "none" is only allowed for file types whose batches are independent e.g. transactions, for which it is the
+        default. Holdings, whose effective dates must be loaded in order, default to "portfolio" and the other file
+        types e.g. portfolio groups to "global". The share of the time the batches in flight were busy is returned
+        in "scheduler"
+    journal : LoadJournal
+        The journal to record the outcome of each batch in as it completes, so that a load which stops part of the
+        way through can be resumed by running it again with the same journal. Batches which completed are skipped,
+        and counted in "scheduler", while those which failed or were not loaded are loaded again. The batch size is
+        fixed while loading with a journal
     Returns
     -------
     responses: dict
@@ -1073,6 +1568,24 @@ def load_from_data_frame(
         .value
     )
 
+    parallelism = (
+        Validator(parallelism, "parallelism")
+        .make_lower()
+        .check_allowed_value(["thread", "process"])
+        .value
+    )
+
+    if ordering is not None:
+        ordering = (
+            Validator(ordering, "ordering")
+            .make_lower()
+            .check_allowed_value(["portfolio", "global", "none"])
+            .value
+        )
+
+    if retry_policy is None:
+        retry_policy = RetryPolicy()
+
     # Ensures that it is a single index dataframe
     Validator(data_frame.index, "data_frame_index").check_is_not_instance(pd.MultiIndex)
 
@@ -1147,8 +1660,17 @@ def load_from_data_frame(
         exempt_attributes=["identifiers", "properties", "instrument_identifiers"],
     )
 
-    # Create the thread pool to use with the async_tools.run_in_executor decorator to make sync functions awaitable
-    thread_pool = ThreadPool(thread_pool_max_workers).thread_pool
+    # Get the shared thread pool to use with the async_tools.run_in_executor decorator to make sync functions awaitable
+    thread_pool = get_thread_pool(thread_pool_max_workers).thread_pool
+
+    # Create the optional native asyncio transport, this fails fast if aiohttp is not installed
+    transport = (
+        AsyncTransport(
+            api_factory=api_factory, max_concurrent_requests=max_concurrent_requests
+        )
+        if async_transport
+        else None
+    )
 
     if instrument_name_enrichment:
         loop = cocoon.async_tools.start_event_loop_new_thread()
@@ -1169,7 +1691,8 @@ def load_from_data_frame(
         cocoon.async_tools.stop_event_loop_new_thread(loop)
 
     """
-    Unnest and populate defaults where a mapping is provided with column and/or default fields in a nested dictionary
+    Unnest and populate defaults where a mapping is provided with column and/or default fields in a nested dictionary,
+    convert lists and dictionaries to strings and remove whitespace, in one pass over the columns of the DataFrame
     
     e.g.
     {'name': {
@@ -1184,14 +1707,15 @@ def load_from_data_frame(
     (
         data_frame,
         mapping_required,
-    ) = cocoon.utilities.handle_nested_default_and_column_mapping(
-        data_frame=data_frame, mapping=mapping_required, constant_prefix="$"
-    )
-    (
-        data_frame,
         mapping_optional,
-    ) = cocoon.utilities.handle_nested_default_and_column_mapping(
-        data_frame=data_frame, mapping=mapping_optional, constant_prefix="$"
+    ) = cocoon.utilities.preprocess_data_frame(
+        data_frame=data_frame,
+        mapping_required=mapping_required,
+        mapping_optional=mapping_optional,
+        identifier_mapping=identifier_mapping,
+        property_columns=property_columns,
+        remove_white_space=remove_white_space,
+        constant_prefix="$",
     )
 
     # Get all the DataFrame columns as well as those that contain at least one null value
@@ -1225,17 +1749,6 @@ def load_from_data_frame(
         data_frame_columns, "DataFrame Columns"
     )
 
-    # Converts higher level data types such as dictionaries and lists to strings
-    data_frame = data_frame.applymap(cocoon.utilities.convert_cell_value_to_string)
-
-    if remove_white_space:
-        column_list = [property_columns]
-        for col in [mapping_optional, mapping_required, identifier_mapping]:
-            column_list.append(col.values())
-
-        column_list = list(set([item for sublist in column_list for item in sublist]))
-        data_frame = strip_whitespace(data_frame, column_list)
-
     # Get the types of the attributes on the top level model for this request
     open_api_types = getattr(
         lusid.models, domain_lookup[file_type]["top_level_model"]
@@ -1288,25 +1801,50 @@ def load_from_data_frame(
         "thread_pool": thread_pool,
     }
 
+    if transport is not None:
+        keyword_arguments["async_transport"] = transport
+
+    # Record the size and timing of the requests the SDK makes for the telemetry, the ApiClient is restored once the
+    # load completes
+    instrumented = (
+        instrument_api_client(api_factory.api_client)
+        if telemetry is not None
+        else contextlib.nullcontext()
+    )
+
     # Get the responses from LUSID
-    responses = asyncio.run_coroutine_threadsafe(
-        _construct_batches(
-            api_factory=api_factory,
-            data_frame=data_frame,
-            mapping_required=mapping_required,
-            mapping_optional=mapping_optional,
-            property_columns=property_columns,
-            properties_scope=properties_scope,
-            instrument_identifier_mapping=identifier_mapping,
-            batch_size=batch_size,
-            file_type=file_type,
-            domain_lookup=domain_lookup,
-            sub_holding_keys=sub_holding_keys,
-            sub_holding_keys_scope=sub_holding_keys_scope,
-            **keyword_arguments,
-        ),
-        loop,
-    ).result()
+    with instrumented:
+        try:
+            responses = asyncio.run_coroutine_threadsafe(
+                _construct_batches(
+                    api_factory=api_factory,
+                    data_frame=data_frame,
+                    mapping_required=mapping_required,
+                    mapping_optional=mapping_optional,
+                    property_columns=property_columns,
+                    properties_scope=properties_scope,
+                    instrument_identifier_mapping=identifier_mapping,
+                    batch_size=batch_size,
+                    file_type=file_type,
+                    domain_lookup=domain_lookup,
+                    sub_holding_keys=sub_holding_keys,
+                    sub_holding_keys_scope=sub_holding_keys_scope,
+                    max_batches_in_flight=max_batches_in_flight,
+                    parallelism=parallelism,
+                    max_processes=max_processes,
+                    batch_controller=batch_controller,
+                    retry_policy=retry_policy,
+                    telemetry=telemetry,
+                    ordering=ordering,
+                    journal=journal,
+                    **keyword_arguments,
+                ),
+                loop,
+            ).result()
+        finally:
+            # Close the async transport's connections from the event loop they were opened in
+            if transport is not None:
+                asyncio.run_coroutine_threadsafe(transport.close(), loop).result()
 
     # Stop the additional event loop
     cocoon.async_tools.stop_event_loop_new_thread(loop)
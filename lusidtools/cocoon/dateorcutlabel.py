@@ -1,11 +1,27 @@
 import numpy as np
 import pandas as pd
 from dateutil import parser
+from pandas._libs.tslibs.parsing import guess_datetime_format
 from datetime import datetime
 import pytz
 import re
 from collections import UserString
 
+# The patterns used to classify dates provided as strings, these are compiled once rather than on every call
+_CUT_LABEL_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}N\w+")
+_ISO_UTC_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z")
+_ISO_UTC_FRACTION_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}.\d+Z")
+_ISO_OFFSET_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[\+-]\d{2}:\d+")
+_ISO_OFFSET_FRACTION_PATTERN = re.compile(
+    r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}.\d+[\+-]\d{2}:\d{2}"
+)
+_ISO_NO_TIMEZONE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}")
+_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# The directives which are parsed differently by strptime and dateutil e.g. two digit years, timezone names and
+# weekdays, dates in these formats are parsed individually
+_AMBIGUOUS_DIRECTIVES = ["%y", "%Z", "%a", "%A"]
+
 
 def _process_timestamp(datetime_value: pd.Timestamp):
     """
@@ -73,30 +89,28 @@ def _process_date_as_string(datetime_value: str):
 
     """
     # Cut label regular expression, no modification required
-    if re.findall("\d{4}-\d{2}-\d{2}N\w+", datetime_value):
+    if _CUT_LABEL_PATTERN.search(datetime_value):
         pass
 
     # Already in isoformat and UTC timezone
-    elif re.findall(
-        "\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z", datetime_value
-    ) or re.findall("\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}.\d+Z", datetime_value):
+    elif _ISO_UTC_PATTERN.search(datetime_value) or _ISO_UTC_FRACTION_PATTERN.search(
+        datetime_value
+    ):
         pass
 
     # Already in isoformat but not necessarily UTC timezone
-    elif re.findall(
-        "\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[\+-]\d{2}:\d+", datetime_value
-    ) or re.findall(
-        "\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}.\d+[\+-]\d{2}:\d{2}", datetime_value
-    ):
+    elif _ISO_OFFSET_PATTERN.search(
+        datetime_value
+    ) or _ISO_OFFSET_FRACTION_PATTERN.search(datetime_value):
         # Convert to UTC
         datetime_value = (
             parser.isoparse(datetime_value).astimezone(pytz.utc).isoformat()
         )
 
     # ISO format with no timezone
-    elif re.findall("\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}", datetime_value):
+    elif _ISO_NO_TIMEZONE_PATTERN.search(datetime_value):
         datetime_value = datetime_value + "+00:00"
-    elif re.findall("\d{4}-\d{2}-\d{2}", datetime_value):
+    elif _DATE_PATTERN.search(datetime_value):
         datetime_value = datetime_value + "T00:00:00+00:00"
     else:
         datetime_value = _process_datetime(
@@ -105,6 +119,43 @@ def _process_date_as_string(datetime_value: str):
     return datetime_value
 
 
+def _infer_date_format(datetime_value: str):
+    """
+    Infers the format of a date provided as a string as dateutil parses it with the day first, in the same way as
+    pd.to_datetime infers formats
+
+    Parameters
+    ----------
+    datetime_value : str
+        Datetime value provided as a string
+
+    Returns
+    -------
+    date_format : str
+        The format of the date, or None if it can not be inferred or parsing other dates with it could give a
+        different result to dateutil e.g. when dateutil had to put the month first
+    """
+
+    try:
+        date_format = guess_datetime_format(datetime_value, dayfirst=True)
+    except (TypeError, ValueError):
+        return None
+
+    if (
+        date_format is None
+        or "%Y" not in date_format
+        or any(directive in date_format for directive in _AMBIGUOUS_DIRECTIVES)
+        or (
+            "%m" in date_format
+            and "%d" in date_format
+            and date_format.index("%m") < date_format.index("%d")
+        )
+    ):
+        return None
+
+    return date_format
+
+
 def _process_numpy_datetime64(datetime_value: np.datetime64) -> str:
     """
     Converts numpy.datetime64 to UTC date to a string
@@ -196,3 +247,116 @@ class DateOrCutLabel(UserString):
             return datetime_value
 
         self.data = convert_datetime_utc(datetime_value, date_format)
+
+
+def convert_date_or_cut_label_column(
+    values: pd.Series, date_format: str = None
+) -> pd.Series:
+    """
+    Converts a whole column of dates or cut labels to timezone aware UTC datetimes as strings. The result for each
+    value is the same as str(DateOrCutLabel(value, date_format)) but each distinct value is only converted once.
+
+    Datetime columns are converted to UTC in a single operation. Strings are classified with the precompiled patterns
+    so that cut labels and dates which are already in an ISO format are passed through or completed without being
+    parsed. The remaining distinct values are grouped by their shape, the format of each group is inferred from its
+    first value and the group is parsed with pd.to_datetime. Only the values which do not match the format of their
+    group, or whose format could be parsed differently by dateutil, are parsed one at a time.
+
+    Parameters
+    ----------
+    values : pd.Series
+        The column of dates or cut labels to convert
+    date_format : str
+        (optional)The format of a custom date as a string eg "%Y-%m-%d %H:%M:%S.%f". see https://strftime.org/
+
+    Returns
+    -------
+    pd.Series
+        The converted values as strings with the same index as the column, null values are kept as None
+    """
+
+    codes, uniques = pd.factorize(values)
+
+    # The last position holds the value used for nulls, which have a code of -1
+    converted = np.empty(len(uniques) + 1, dtype=object)
+    converted[-1] = None
+
+    if isinstance(uniques, pd.DatetimeIndex) and date_format is None:
+        # If there is no timezone assume that it is in UTC, otherwise convert to UTC
+        uniques = (
+            uniques.tz_localize(pytz.UTC)
+            if uniques.tz is None
+            else uniques.tz_convert(pytz.UTC)
+        )
+        converted[:-1] = [timestamp.isoformat() for timestamp in uniques]
+
+    elif date_format is not None:
+        converted[:-1] = [str(DateOrCutLabel(value, date_format)) for value in uniques]
+
+    else:
+        unique_values = np.asarray(uniques, dtype=object)
+        is_string = np.array(
+            [isinstance(value, str) for value in unique_values], dtype=bool
+        )
+
+        # Values which are not strings e.g. datetimes in an object column are converted individually
+        converted[:-1][~is_string] = [
+            str(DateOrCutLabel(value)) for value in unique_values[~is_string]
+        ]
+
+        text = pd.Series(unique_values[is_string], dtype=object)
+        result = text.copy()
+        unclassified = np.ones(len(text), dtype=bool)
+
+        def classify(*patterns):
+            matches = unclassified.copy()
+            matches[unclassified] = np.logical_or.reduce(
+                [
+                    text[unclassified].str.contains(pattern).to_numpy(dtype=bool)
+                    for pattern in patterns
+                ]
+            )
+            unclassified[matches] = False
+            return matches
+
+        # Cut labels and ISO formatted dates in the UTC timezone need no modification
+        classify(_CUT_LABEL_PATTERN, _ISO_UTC_PATTERN, _ISO_UTC_FRACTION_PATTERN)
+
+        # ISO formatted dates with a timezone offset are converted to UTC
+        offset = classify(_ISO_OFFSET_PATTERN, _ISO_OFFSET_FRACTION_PATTERN)
+        result[offset] = [_process_date_as_string(value) for value in text[offset]]
+
+        # ISO formatted dates with no timezone have the UTC timezone added
+        no_timezone = classify(_ISO_NO_TIMEZONE_PATTERN)
+        result[no_timezone] = text[no_timezone] + "+00:00"
+
+        date = classify(_DATE_PATTERN)
+        result[date] = text[date] + "T00:00:00+00:00"
+
+        # Any other format is parsed a group of values with the same shape, e.g. 01/02/2020 and 03/04/2020, at a time
+        others = text[unclassified]
+        parsed_others = pd.Series(None, index=others.index, dtype=object)
+        shapes = others.str.replace(r"\d", "0", regex=True)
+
+        for _, group in others.groupby(shapes, sort=False):
+            date_format = _infer_date_format(group.iloc[0])
+            if date_format is None:
+                continue
+
+            parsed = pd.to_datetime(
+                group, format=date_format, errors="coerce", utc=True
+            ).dropna()
+            parsed_others[parsed.index] = [
+                timestamp.isoformat() for timestamp in parsed
+            ]
+
+        # Values which do not match the format of their group are parsed individually
+        failed = parsed_others.isna()
+        parsed_others[failed] = [
+            _process_date_as_string(value) for value in others[failed]
+        ]
+        result[unclassified] = parsed_others.to_numpy(dtype=object)
+
+        converted[:-1][is_string] = result.to_numpy(dtype=object)
+
+    return pd.Series(converted[codes], index=values.index, dtype=object)
@@ -0,0 +1,379 @@
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+
+# The environment variables which can be used to configure the default instrument cache
+INSTRUMENT_CACHE_PATH_ENV = "LUSIDTOOLS_INSTRUMENT_CACHE_PATH"
+INSTRUMENT_CACHE_TTL_ENV = "LUSIDTOOLS_INSTRUMENT_CACHE_TTL"
+DEFAULT_INSTRUMENT_CACHE_MAX_SIZE = 250000
+DEFAULT_INSTRUMENT_CACHE_TTL = 24 * 60 * 60
+
+# The kinds of value which are cached for an identifier
+LUSID_INSTRUMENT_ID = "LusidInstrumentId"
+INSTRUMENT_NAME = "Name"
+
+
+class InstrumentCache:
+    """
+    A cache of the results of resolving instrument identifiers e.g. a Figi to the LusidInstrumentIds of the
+    instruments in LUSID. There is an in memory tier which holds the most recently used entries and an optional
+    SQLite tier on disk which persists entries between processes.
+
+    Each entry is keyed by a namespace, which separates the values from different LUSID environments and the kind of
+    value cached, the identifier type and the identifier value. Entries expire once they are older than the ttl and
+    can be invalidated as at a point in time. Only identifiers which resolve to an instrument are cached so that an
+    instrument created later is always found.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_INSTRUMENT_CACHE_MAX_SIZE,
+        ttl: float = DEFAULT_INSTRUMENT_CACHE_TTL,
+        path: str = None,
+    ):
+        """
+        Parameters
+        ----------
+        max_size : int
+            The maximum number of entries to hold in memory, the least recently used entries are evicted first
+        ttl : float
+            The number of seconds an entry is valid for
+        path : str
+            The path of the SQLite database to persist entries to, if None entries are only held in memory
+        """
+
+        if max_size < 0:
+            raise ValueError(f"The max_size must not be negative, got {max_size}")
+
+        if ttl <= 0:
+            raise ValueError(f"The ttl must be positive, got {ttl}")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._connection = None
+        self.reset_statistics()
+
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            with self._connection:
+                self._connection.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS instrument_cache (
+                        namespace TEXT NOT NULL,
+                        identifier_type TEXT NOT NULL,
+                        identifier_value TEXT NOT NULL,
+                        result TEXT NOT NULL,
+                        cached_at REAL NOT NULL,
+                        PRIMARY KEY (namespace, identifier_type, identifier_value)
+                    )
+                    """
+                )
+
+    def reset_statistics(self) -> None:
+        """
+        Resets the hit and miss statistics
+        """
+
+        self._statistics = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+        }
+
+    def statistics(self) -> dict:
+        """
+        Gets the hit and miss statistics of the cache, these can be used to size it
+
+        Returns
+        -------
+        dict
+            The number of hits in each tier, misses, expired entries and evictions from memory, the number of entries
+            in each tier and the hit rate
+        """
+
+        with self._lock:
+            statistics = dict(self._statistics)
+            statistics["memory_size"] = len(self._entries)
+            statistics["disk_size"] = (
+                self._connection.execute(
+                    "SELECT COUNT(*) FROM instrument_cache"
+                ).fetchone()[0]
+                if self._connection is not None
+                else 0
+            )
+
+        statistics["hits"] = statistics["memory_hits"] + statistics["disk_hits"]
+        lookups = statistics["hits"] + statistics["misses"]
+        statistics["hit_rate"] = statistics["hits"] / lookups if lookups else 0.0
+
+        return statistics
+
+    def _store_in_memory(self, key: tuple, result, cached_at: float) -> None:
+        """
+        Stores an entry in memory, evicting the least recently used entries if the cache is full
+        """
+
+        if self.max_size == 0:
+            return
+
+        self._entries[key] = (result, cached_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._statistics["evictions"] += 1
+
+    def get_many(self, namespace: str, identifier_type: str, values: list) -> dict:
+        """
+        Gets the cached results for identifier values
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the entries, see get_namespace
+        identifier_type : str
+            The identifier type e.g. "Figi"
+        values : list[str]
+            The identifier values
+
+        Returns
+        -------
+        dict
+            The cached result for each value which was found, values which were not found are omitted
+        """
+
+        now = time.time()
+        found = {}
+        missing = []
+
+        with self._lock:
+            for value in values:
+                key = (namespace, identifier_type, value)
+                entry = self._entries.get(key)
+
+                if entry is not None and now - entry[1] > self.ttl:
+                    del self._entries[key]
+                    self._statistics["expired"] += 1
+                    entry = None
+
+                if entry is None:
+                    missing.append(value)
+                    continue
+
+                self._entries.move_to_end(key)
+                self._statistics["memory_hits"] += 1
+                found[value] = entry[0]
+
+            if self._connection is not None and missing:
+                # Query the disk tier in chunks to stay within the SQLite limit on parameters
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i : i + 500]
+                    rows = self._connection.execute(
+                        "SELECT identifier_value, result, cached_at FROM instrument_cache "
+                        "WHERE namespace = ? AND identifier_type = ? AND identifier_value IN "
+                        f"({', '.join('?' * len(chunk))})",
+                        [namespace, identifier_type, *chunk],
+                    ).fetchall()
+
+                    for value, result, cached_at in rows:
+                        if now - cached_at > self.ttl:
+                            self._statistics["expired"] += 1
+                            continue
+
+                        found[value] = json.loads(result)
+                        self._statistics["disk_hits"] += 1
+                        self._store_in_memory(
+                            (namespace, identifier_type, value), found[value], cached_at
+                        )
+
+            self._statistics["misses"] += len(values) - len(found)
+
+        return found
+
+    def get(self, namespace: str, identifier_type: str, value: str, default=None):
+        """
+        Gets the cached result for an identifier value
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the entry, see get_namespace
+        identifier_type : str
+            The identifier type e.g. "Figi"
+        value : str
+            The identifier value
+        default
+            The value to return if there is no cached result
+
+        Returns
+        -------
+        The cached result or the default
+        """
+
+        return self.get_many(namespace, identifier_type, [value]).get(value, default)
+
+    def set_many(self, namespace: str, identifier_type: str, results: dict) -> None:
+        """
+        Caches the results for identifier values
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the entries, see get_namespace
+        identifier_type : str
+            The identifier type e.g. "Figi"
+        results : dict
+            The result for each identifier value, this must be serialisable to JSON
+        """
+
+        now = time.time()
+
+        with self._lock:
+            for value, result in results.items():
+                self._store_in_memory((namespace, identifier_type, value), result, now)
+
+            if self._connection is not None and results:
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO instrument_cache VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (namespace, identifier_type, value, json.dumps(result), now)
+                            for value, result in results.items()
+                        ],
+                    )
+
+    def set(self, namespace: str, identifier_type: str, value: str, result) -> None:
+        """
+        Caches the result for an identifier value
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the entry, see get_namespace
+        identifier_type : str
+            The identifier type e.g. "Figi"
+        value : str
+            The identifier value
+        result
+            The result, this must be serialisable to JSON
+        """
+
+        self.set_many(namespace, identifier_type, {value: result})
+
+    def invalidate(self, as_at: datetime = None) -> None:
+        """
+        Removes the entries which were cached before a point in time, e.g. when instruments have been remapped
+
+        Parameters
+        ----------
+        as_at : datetime
+            The entries cached before this time are removed, if None all entries are removed
+        """
+
+        cutoff = as_at.timestamp() if as_at is not None else float("inf")
+
+        with self._lock:
+            for key in [
+                key for key, entry in self._entries.items() if entry[1] < cutoff
+            ]:
+                del self._entries[key]
+
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute(
+                        "DELETE FROM instrument_cache WHERE cached_at < ?",
+                        (cutoff,),
+                    )
+
+    def close(self) -> None:
+        """
+        Closes the connection to the SQLite database, the entries in memory can still be used
+        """
+
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def get_namespace(api_url: str, kind: str = LUSID_INSTRUMENT_ID) -> str:
+    """
+    Gets the namespace for the entries cached for a LUSID environment
+
+    Parameters
+    ----------
+    api_url : str
+        The url of the LUSID api, so that the values from different environments are kept apart
+    kind : str
+        The kind of value which is cached e.g. LUSID_INSTRUMENT_ID or INSTRUMENT_NAME
+
+    Returns
+    -------
+    str
+        The namespace
+    """
+
+    return f"{api_url or ''}#{kind}"
+
+
+# The process wide instrument cache, this is created on first use
+_default_instrument_cache = None
+_default_instrument_cache_lock = Lock()
+
+
+def get_default_instrument_cache() -> InstrumentCache:
+    """
+    Gets the process wide instrument cache, creating it if it does not exist yet. It is persisted to the SQLite
+    database at the path in the LUSIDTOOLS_INSTRUMENT_CACHE_PATH environment variable if it is set and its ttl in
+    seconds can be set with the LUSIDTOOLS_INSTRUMENT_CACHE_TTL environment variable
+
+    Returns
+    -------
+    InstrumentCache
+        The process wide instrument cache
+    """
+
+    global _default_instrument_cache
+
+    with _default_instrument_cache_lock:
+        if _default_instrument_cache is None:
+            ttl = os.environ.get(INSTRUMENT_CACHE_TTL_ENV, DEFAULT_INSTRUMENT_CACHE_TTL)
+
+            try:
+                ttl = float(ttl)
+            except ValueError:
+                raise ValueError(
+                    f"The environment variable {INSTRUMENT_CACHE_TTL_ENV} must be a number of seconds, got {ttl}"
+                )
+
+            _default_instrument_cache = InstrumentCache(
+                ttl=ttl, path=os.environ.get(INSTRUMENT_CACHE_PATH_ENV)
+            )
+
+        return _default_instrument_cache
+
+
+def set_default_instrument_cache(instrument_cache: InstrumentCache) -> None:
+    """
+    Replaces the process wide instrument cache, e.g. with one which has a different size. Use an InstrumentCache
+    with a max_size of 0 and no path to disable caching.
+
+    Parameters
+    ----------
+    instrument_cache : InstrumentCache
+        The cache to use, if None the default cache is created again on its next use
+    """
+
+    global _default_instrument_cache
+
+    with _default_instrument_cache_lock:
+        _default_instrument_cache = instrument_cache
@@ -2,12 +2,25 @@ import lusid
 import lusid.models as models
 from lusid.api import InstrumentsApi, SearchApi
 import numpy as np
-import time
 from lusidtools.cocoon.utilities import checkargs
 import pandas as pd
 import logging
 import re
-from lusidtools.cocoon.async_tools import run_in_executor
+from lusidtools import cocoon
+from lusidtools.cocoon.async_tools import run_in_executor, get_thread_pool
+from lusidtools.cocoon.instrument_cache import (
+    InstrumentCache,
+    INSTRUMENT_NAME,
+    get_default_instrument_cache,
+    get_namespace,
+)
+from lusidtools.cocoon.metadata_cache import get_metadata_cache
+from lusidtools.cocoon.rate_limiter import (
+    get_endpoint,
+    get_rate_limiter,
+    rate_limited,
+)
+from lusidtools.cocoon.retry import RetryPolicy, in_retried_batch
 import asyncio
 from typing import Callable
 
@@ -126,15 +139,261 @@ def create_identifiers(
     return identifiers
 
 
+@run_in_executor
+def _call_api(function: Callable, arguments: dict, **kwargs):
+    """
+    Calls a LUSID API method on the thread pool
+
+    Parameters
+    ----------
+    function : Callable
+        The API method to call
+    arguments : dict
+        The arguments for the API method
+    kwargs
+        e.g. the thread pool to use
+
+    Returns
+    -------
+    The response from the API method
+    """
+
+    return function(**arguments)
+
+
+async def _call_with_retries(
+    function: Callable, arguments: dict, retry_policy: RetryPolicy = None, **kwargs
+):
+    """
+    Calls a LUSID API method, retrying it with the retry policy if it fails. Each attempt waits for the process wide
+    rate limiter first, and the waits are made on the event loop so that no thread is blocked while waiting
+
+    Parameters
+    ----------
+    function : Callable
+        The API method to call
+    arguments : dict
+        The arguments for the API method
+    retry_policy : RetryPolicy
+        The policy to retry the call with, defaults to three attempts with an exponential backoff, or a single attempt
+        if the call is made while loading a batch which is already retried, see retry.in_retried_batch
+    kwargs
+        e.g. the thread pool to use
+
+    Returns
+    -------
+    The response from the API method
+    """
+
+    if retry_policy is None:
+        retry_policy = RetryPolicy(max_attempts=1 if in_retried_batch() else 3)
+
+    async def call():
+        await get_rate_limiter().acquire_async(get_endpoint(function))
+        return await _call_api(function, arguments, **kwargs)
+
+    return await retry_policy.call(call)
+
+
+async def _get_instruments_batch(
+    api_factory: lusid.utilities.ApiClientFactory,
+    identifier_type: str,
+    values: list,
+    **kwargs,
+) -> dict:
+    """
+    Gets the instruments for a batch of values of a unique identifier type in a single request
+
+    Parameters
+    ----------
+    api_factory : lusid.utilities.ApiClientFactory
+        The api factory to use
+    identifier_type : str
+        The unique identifier type e.g. "Figi"
+    values : list[str]
+        The identifier values to get the instruments for
+    kwargs
+
+    Returns
+    -------
+    dict
+        The LusidInstrumentIds of the instruments found for each value, or the exception if the request failed
+    """
+
+    try:
+        response = await _call_with_retries(
+            api_factory.build(InstrumentsApi).get_instruments,
+            dict(identifier_type=identifier_type, request_body=values),
+            **kwargs,
+        )
+    except lusid.exceptions.ApiException as error:
+        return {value: error for value in values}
+
+    return {
+        value: [response.values[value].lusid_instrument_id]
+        if value in response.values
+        else []
+        for value in values
+    }
+
+
+async def _search_instruments_batch(
+    api_factory: lusid.utilities.ApiClientFactory,
+    identifier_key: str,
+    values: list,
+    **kwargs,
+) -> dict:
+    """
+    Searches the securities master for a batch of values of an identifier which is not unique in a single request
+
+    Parameters
+    ----------
+    api_factory : lusid.utilities.ApiClientFactory
+        The api factory to use
+    identifier_key : str
+        The property key of the identifier e.g. "Instrument/default/Isin"
+    values : list[str]
+        The identifier values to search for
+    kwargs
+
+    Returns
+    -------
+    dict
+        The LusidInstrumentIds of the instruments found for each value, or the exception if the request failed
+    """
+
+    try:
+        response = await _call_with_retries(
+            api_factory.build(SearchApi).instruments_search,
+            dict(
+                instrument_search_property=[
+                    models.InstrumentSearchProperty(key=identifier_key, value=value)
+                    for value in values
+                ],
+                mastered_only=True,
+            ),
+            **kwargs,
+        )
+    except lusid.exceptions.ApiException as error:
+        return {value: error for value in values}
+
+    return {
+        value: [
+            instrument.identifiers["LusidInstrumentId"].value
+            for instrument in result.mastered_instruments
+        ]
+        for value, result in zip(values, response)
+    }
+
+
+async def _resolve_identifier_values(
+    api_factory: lusid.utilities.ApiClientFactory,
+    identifier_values: dict,
+    unique_identifier_types: list,
+    batch_size: int,
+    instrument_cache: InstrumentCache,
+    **kwargs,
+) -> dict:
+    """
+    Resolves the distinct values of each identifier to instruments in LUSID. Values in the instrument cache are not
+    requested again. The values of unique identifier types are retrieved with InstrumentsApi.get_instruments and the
+    values of any other identifiers are searched for with SearchApi.instruments_search, in batches which are all sent
+    concurrently.
+
+    Parameters
+    ----------
+    api_factory : lusid.utilities.ApiClientFactory
+        The api factory to use
+    identifier_values : dict
+        The distinct values to resolve for the property key of each identifier
+    unique_identifier_types : list[str]
+        The identifier types which are unique in LUSID
+    batch_size : int
+        The number of values to resolve in each request
+    instrument_cache : InstrumentCache
+        The cache of the LusidInstrumentIds each identifier value resolves to
+    kwargs
+
+    Returns
+    -------
+    dict
+        The LusidInstrumentIds found for each value of each identifier, or the exception if the request failed
+    """
+
+    namespace = get_namespace(api_factory.api_client.configuration.host)
+    resolved_values = {identifier_key: {} for identifier_key in identifier_values}
+    identifier_keys = []
+    requests = []
+
+    for identifier_key, values in identifier_values.items():
+        identifier_type = identifier_key.split("/")[2]
+
+        # Only request the values which are not already cached
+        resolved_values[identifier_key].update(
+            instrument_cache.get_many(namespace, identifier_type, values)
+        )
+        values = [
+            value for value in values if value not in resolved_values[identifier_key]
+        ]
+
+        for i in range(0, len(values), batch_size):
+            identifier_keys.append(identifier_key)
+
+            if identifier_type in unique_identifier_types:
+                requests.append(
+                    _get_instruments_batch(
+                        api_factory,
+                        identifier_type,
+                        values[i : i + batch_size],
+                        **kwargs,
+                    )
+                )
+            else:
+                requests.append(
+                    _search_instruments_batch(
+                        api_factory,
+                        identifier_key,
+                        values[i : i + batch_size],
+                        **kwargs,
+                    )
+                )
+
+    responses = await asyncio.gather(*requests)
+
+    for identifier_key, response in zip(identifier_keys, responses):
+        resolved_values[identifier_key].update(response)
+
+        # Cache the values which resolved to instruments, failures and values without an instrument are not cached
+        instrument_cache.set_many(
+            namespace,
+            identifier_key.split("/")[2],
+            {
+                value: luids
+                for value, luids in response.items()
+                if isinstance(luids, list) and len(luids) > 0
+            },
+        )
+
+    return resolved_values
+
+
 @checkargs
 def resolve_instruments(
     api_factory: lusid.utilities.ApiClientFactory,
     data_frame: pd.DataFrame,
     identifier_mapping: dict,
+    batch_size: int = 500,
+    thread_pool_max_workers: int = 5,
+    instrument_cache: InstrumentCache = None,
+    retry_policy: RetryPolicy = None,
 ):
     """
     This function attempts to resolve each row of the file to an instrument in LUSID
 
+    Each distinct identifier value is only resolved once, no matter how many rows it appears in, and values which have
+    already been resolved are taken from the instrument cache. The remaining values are resolved in batches which are
+    sent concurrently and the results are then broadcast back to the rows.
+
     Parameters
     ----------
     api_factory : lusid.utilities.ApiClientFactory
@@ -143,6 +402,14 @@ def resolve_instruments(
         The DataFrame containing the transactions or holdings to resolve to unique instruments
     identifier_mapping : dict
         The column mapping between allowable identifiers in LUSID and identifier columns in the dataframe
+    batch_size : int
+        The number of identifier values to resolve in each request to LUSID
+    thread_pool_max_workers : int
+        The maximum number of requests to LUSID to make concurrently
+    instrument_cache : InstrumentCache
+        The cache of the LusidInstrumentIds each identifier value resolves to, defaults to the process wide cache
+    retry_policy : RetryPolicy
+        The policy to retry failed requests with, defaults to three attempts with an exponential backoff
 
     Returns
     -------
@@ -172,7 +439,7 @@ def resolve_instruments(
         )
 
     # Get the allowable instrument identifiers from LUSID
-    response = api_factory.build(InstrumentsApi).get_instrument_identifier_types()
+    response = get_metadata_cache(api_factory).get_instrument_identifier_types()
     """
     # Collect the names and property keys for the identifiers and concatenate them
     allowable_identifier_names = [identifier.identifier_type for identifier in response.values]
@@ -184,113 +451,121 @@ def resolve_instruments(
         raise Exception(
             'there are LUSID identifiers in the identifier_mapping which are not configured in LUSID')
     """
+    # Only unique identifier types can be retrieved with InstrumentsApi.get_instruments
+    unique_identifier_types = [
+        identifier.identifier_type
+        for identifier in response.values
+        if identifier.is_unique_identifier_type
+    ]
+
     # Copy the data_frame to ensure the original isn't modified
     _data_frame = data_frame.copy(deep=True)
 
-    # Set up the result Pandas Series to track resolution
-    found_with = pd.Series(index=_data_frame.index, dtype=np.dtype(object))
-    resolvable = pd.Series(index=_data_frame.index, dtype=np.dtype(bool))
-    luid = pd.Series(index=_data_frame.index, dtype=np.dtype(object))
-    comment = pd.Series(index=_data_frame.index, dtype=np.dtype(object))
-    logging.info("Beginning instrument resolution process")
-    # Iterate over each row in the DataFrame
-    for index, row in _data_frame.iterrows():
-
-        if index % 10 == 0:
-            logging.info(f"Up to row {index}")
-        # Initialise list to hold the identifiers used to resolve
-        found_with_current = []
-        # Initialise a value of False for the row's resolvability to an instrument in LUSID
-        resolvable_current = False
-        # Initilise the LUID value
-        luid_current = None
-        # Initialise the comment value
-        comment_current = "No instruments found for the given identifiers"
-        # Takes the currency resolution function and applies it
-        currency = row[identifier_mapping["Instrument/default/Currency"]]
-
-        if not pd.isna(currency):
-            resolvable_current = True
-            found_with_current.append(currency)
-            luid_current = currency
-            comment_current = "Resolved as cash with a currency"
-
-        search_requests = [
-            models.InstrumentSearchProperty(
-                key=f"Instrument/default/{identifier_lusid}"
-                if "Instrument/" not in identifier_lusid
-                else identifier_lusid,
-                value=row[identifier_dataframe],
-            )
-            for identifier_lusid, identifier_dataframe in identifier_mapping.items()
-            if not pd.isnull(row[identifier_dataframe])
-        ]
+    # Get the property key and values of each identifier, converted to strings as they are used in requests
+    identifier_keys = {
+        identifier_lusid: f"Instrument/default/{identifier_lusid}"
+        if "Instrument/" not in identifier_lusid
+        else identifier_lusid
+        for identifier_lusid in identifier_mapping.keys()
+    }
+    identifier_columns = {
+        identifier_lusid: _data_frame[identifier_dataframe].map(
+            lambda value: value if pd.isna(value) else str(value)
+        )
+        for identifier_lusid, identifier_dataframe in identifier_mapping.items()
+    }
 
-        # Call LUSID to search for instruments
-        attempts = 0
+    # Dedupe the identifier values so that each one is only resolved once
+    identifier_values = {
+        identifier_keys[identifier_lusid]: list(column.dropna().unique())
+        for identifier_lusid, column in identifier_columns.items()
+    }
 
-        if len(search_requests) > 0:
-            while attempts < 3:
-                try:
-                    response = api_factory.build(SearchApi).instruments_search(
-                        instrument_search_property=search_requests, mastered_only=True
-                    )
-                    break
-                except lusid.exceptions.ApiException as error_message:
-                    attempts += 1
-                    comment_current = f"Failed to find instrument due to LUSID error during search due to status {error_message.status} with reason {error_message.reason}"
-                    time.sleep(5)
-
-            if attempts == 3:
-                # Update the luid series
-                luid.iloc[index] = luid_current
-                # Update the found with series
-                found_with.iloc[index] = found_with_current
-                # Update the resolvable series
-                resolvable.iloc[index] = resolvable_current
-                # Update the comment series
-                comment.iloc[index] = comment_current
-                continue
+    logging.info(
+        "Beginning instrument resolution process for "
+        + ", ".join(
+            f"{len(values)} distinct {identifier_key.split('/')[2]} values"
+            for identifier_key, values in identifier_values.items()
+        )
+    )
 
-            search_request_number = -1
+    if instrument_cache is None:
+        instrument_cache = get_default_instrument_cache()
+
+    # Start a new event loop in a new thread, this is required to run inside a Jupyter notebook
+    loop = cocoon.async_tools.start_event_loop_new_thread()
+
+    try:
+        resolved_values = asyncio.run_coroutine_threadsafe(
+            _resolve_identifier_values(
+                api_factory=api_factory,
+                identifier_values=identifier_values,
+                unique_identifier_types=unique_identifier_types,
+                batch_size=batch_size,
+                instrument_cache=instrument_cache,
+                thread_pool=get_thread_pool(thread_pool_max_workers).thread_pool,
+                retry_policy=retry_policy,
+            ),
+            loop,
+        ).result()
+    finally:
+        cocoon.async_tools.stop_event_loop_new_thread(loop)
+
+    # Initialise the resolution of each row, rows with a currency are resolved as cash
+    currency = _data_frame[identifier_mapping["Instrument/default/Currency"]].to_numpy(
+        dtype=object
+    )
+    is_cash = ~pd.isna(currency)
+
+    resolvable = is_cash.copy()
+    luid = np.where(is_cash, currency, None)
+    found_with = [[value] if cash else [] for value, cash in zip(currency, is_cash)]
+    comment = np.where(
+        is_cash,
+        "Resolved as cash with a currency",
+        "No instruments found for the given identifiers",
+    ).astype(object)
+    uniquely_resolved = np.zeros(len(_data_frame), dtype=bool)
+
+    # Broadcast the results for each identifier back to the rows in the order of the mapping, the first identifier to
+    # uniquely resolve a row is used
+    for identifier_lusid, column in identifier_columns.items():
+        identifier_key = identifier_keys[identifier_lusid]
+        identifier_type = identifier_key.split("/")[2]
+
+        rows = np.flatnonzero(~pd.isna(column.to_numpy()) & ~uniquely_resolved)
+        results = column.iloc[rows].map(resolved_values[identifier_key]).to_numpy()
+        matches = np.array(
+            [len(result) if isinstance(result, list) else -1 for result in results]
+        )
 
-            for result in response:
+        failed = rows[matches == -1]
+        comment[failed] = [
+            f"Failed to find instrument due to LUSID error during search due to status {error.status} with reason {error.reason}"
+            for error in results[matches == -1]
+        ]
 
-                search_request_number += 1
-                # If there are matches
-                if len(result.mastered_instruments) == 1:
-                    # Add the identifier responsible for the successful search request to the list
-                    found_with_current.append(
-                        search_requests[search_request_number].key.split("/")[2]
-                    )
-                    comment_current = (
-                        "Uniquely resolved to an instrument in the securities master"
-                    )
-                    resolvable_current = True
-                    luid_current = (
-                        result.mastered_instruments[0]
-                        .identifiers["LusidInstrumentId"]
-                        .value
-                    )
-                    break
-
-                elif len(result.mastered_instruments) > 1:
-                    comment_current = f'Multiple instruments found for the instrument using identifier {search_requests[search_request_number].key.split("/")[2]}'
-                    resolvable_current = False
-                    luid_current = np.NaN
-
-        # Update the luid series
-        luid.iloc[index] = luid_current
-        # Update the found with series
-        found_with.iloc[index] = found_with_current
-        # Update the resolvable series
-        resolvable.iloc[index] = resolvable_current
-        # Update the comment series
-        comment.iloc[index] = comment_current
-
-    # Add the series to the dataframe
+        multiple = rows[matches > 1]
+        comment[multiple] = (
+            f"Multiple instruments found for the instrument using identifier "
+            f"{identifier_type}"
+        )
+        resolvable[multiple] = False
+        luid[multiple] = np.NaN
+
+        unique = rows[matches == 1]
+        comment[unique] = "Uniquely resolved to an instrument in the securities master"
+        resolvable[unique] = True
+        luid[unique] = [result[0] for result in results[matches == 1]]
+        for row in unique:
+            found_with[row] = found_with[row] + [identifier_type]
+        uniquely_resolved[unique] = True
+
+    # Add the resolution to the dataframe
     _data_frame["resolvable"] = resolvable
-    _data_frame["foundWith"] = found_with
+    _data_frame["foundWith"] = pd.Series(
+        found_with, index=_data_frame.index, dtype=object
+    )
     _data_frame["LusidInstrumentId"] = luid
     _data_frame["comment"] = comment
 
@@ -313,17 +588,8 @@ def get_unique_identifiers(api_factory: lusid.utilities.ApiClientFactory):
     list[str]
         The property keys of the available identifiers
     """
-    # Get the allowed instrument identifiers from LUSID
-    identifiers = api_factory.build(
-        lusid.api.InstrumentsApi
-    ).get_instrument_identifier_types()
-
-    # Return the identifiers that are configured to be unique
-    return [
-        identifier.identifier_type
-        for identifier in identifiers.values
-        if identifier.is_unique_identifier_type
-    ]
+    # Get the identifiers that are configured to be unique, these are cached for the api factory
+    return get_metadata_cache(api_factory).get_unique_identifier_types()
 
 
 async def enrich_instruments(
@@ -332,9 +598,18 @@ async def enrich_instruments(
     instrument_identifier_mapping: dict,
     mapping_required: dict,
     constant_prefix: str = "$",
+    instrument_cache: InstrumentCache = None,
     **kwargs,
 ):
+    if instrument_cache is None:
+        instrument_cache = get_default_instrument_cache()
+
+    namespace = get_namespace(
+        api_factory.api_client.configuration.host, INSTRUMENT_NAME
+    )
+
     search_requests_all = []
+    cached_names = []
 
     for index, row in data_frame.iterrows():
         search_requests_instrument = [
@@ -348,7 +623,19 @@ async def enrich_instruments(
             if not pd.isna(row[identifier_column])
         ]
 
+        # Only the identifiers before the first one with a cached name need to be searched for
+        cached_name = np.NaN
+        for position, search_request in enumerate(search_requests_instrument):
+            name = instrument_cache.get(
+                namespace, search_request.key.split("/")[2], str(search_request.value)
+            )
+            if name is not None:
+                cached_name = name
+                search_requests_instrument = search_requests_instrument[:position]
+                break
+
         search_requests_all.append(search_requests_instrument)
+        cached_names.append(cached_name)
 
     responses = await asyncio.gather(
         *[
@@ -362,14 +649,22 @@ async def enrich_instruments(
 
     names = []
 
-    for response in responses:
-        name = np.NaN
-        for single_search in response:
+    for search_requests, response, cached_name in zip(
+        search_requests_all, responses, cached_names
+    ):
+        name = cached_name
+        for search_request, single_search in zip(search_requests, response):
             if isinstance(single_search, Exception):
                 logging.warning(single_search)
                 continue
             elif len(single_search[0].external_instruments) > 0:
                 name = single_search[0].external_instruments[0].name
+                instrument_cache.set(
+                    namespace,
+                    search_request.key.split("/")[2],
+                    str(search_request.value),
+                    name,
+                )
                 break
         names.append(name)
 
@@ -449,6 +744,7 @@ async def instrument_search(
     return instrument_search_results
 
 
+@rate_limited("SearchApi")
 @run_in_executor
 def instrument_search_single(
     api_factory: lusid.utilities.ApiClientFactory,
@@ -0,0 +1,194 @@
+import hashlib
+import sqlite3
+import time
+from threading import Lock
+import pandas as pd
+
+# The outcomes recorded for each batch
+COMPLETE = "complete"
+FAILED = "failed"
+
+# The columns of the journal, one row for each batch
+JOURNAL_COLUMNS = [
+    "key",
+    "file_type",
+    "scope",
+    "code",
+    "effective_at",
+    "first_row",
+    "last_row",
+    "rows",
+    "status",
+    "recorded_at",
+]
+
+
+class LoadJournal:
+    """
+    A journal of the batches loaded into LUSID, kept in a SQLite database on disk, so that a load which is stopped
+    part of the way through e.g. by an expired token or a lost connection can be resumed without loading everything
+    again.
+
+    Each batch is identified by its file type, scope, portfolio code and effective date and a hash of its rows, and
+    the outcome of loading it is recorded as soon as it completes. When a load is run again with the same journal the
+    batches which completed are skipped and those which failed, or were not loaded, are loaded. As batches are found
+    by their rows they must be split the same way in each run, so the batch size is fixed while loading with a
+    journal.
+    """
+
+    def __init__(self, path: str):
+        """
+        Parameters
+        ----------
+        path : str
+            The path of the SQLite database to keep the journal in, it is created if it does not exist
+        """
+
+        self.path = path
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS load_journal (
+                    key TEXT PRIMARY KEY,
+                    file_type TEXT NOT NULL,
+                    scope TEXT,
+                    code TEXT,
+                    effective_at TEXT,
+                    first_row TEXT NOT NULL,
+                    last_row TEXT NOT NULL,
+                    rows INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    recorded_at REAL NOT NULL
+                )
+                """
+            )
+
+    @staticmethod
+    def identify(
+        file_type: str,
+        scope: str,
+        code: str,
+        effective_at,
+        data_frame: pd.DataFrame,
+    ) -> dict:
+        """
+        Identifies a batch by what it is loaded into and the contents of its rows
+
+        Parameters
+        ----------
+        file_type : str
+            The file type of the batch e.g. "transaction"
+        scope : str
+            The scope the batch is loaded into, None if the file type does not have one
+        code : str
+            The code of the portfolio the batch is loaded into, None if the file type is not portfolio specific
+        effective_at
+            The effective date the batch is loaded at, None if it is not loaded at an effective date
+        data_frame : pd.DataFrame
+            The rows of the batch
+
+        Returns
+        -------
+        dict
+            The key of the batch along with the values it was made from and the range of rows it covers
+        """
+
+        batch = {
+            "file_type": file_type,
+            "scope": None if scope is None else str(scope),
+            "code": None if code is None else str(code),
+            "effective_at": None if effective_at is None else str(effective_at),
+            "first_row": str(data_frame.index[0]),
+            "last_row": str(data_frame.index[-1]),
+            "rows": len(data_frame),
+        }
+
+        digest = hashlib.sha256(
+            "\0".join(
+                str(batch[column])
+                for column in ["file_type", "scope", "code", "effective_at"]
+            ).encode("utf-8")
+        )
+        digest.update("\0".join(map(str, data_frame.columns)).encode("utf-8"))
+        digest.update(
+            pd.util.hash_pandas_object(data_frame, index=True).values.tobytes()
+        )
+        batch["key"] = digest.hexdigest()
+
+        return batch
+
+    def is_complete(self, batch: dict) -> bool:
+        """
+        Checks whether a batch has already been loaded
+
+        Parameters
+        ----------
+        batch : dict
+            The batch, as identified by identify
+
+        Returns
+        -------
+        bool
+            Whether the batch completed in an earlier load
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status FROM load_journal WHERE key = ?", (batch["key"],)
+            ).fetchone()
+
+        return row is not None and row[0] == COMPLETE
+
+    def record(self, batch: dict, status: str) -> None:
+        """
+        Records the outcome of loading a batch, replacing any earlier outcome
+
+        Parameters
+        ----------
+        batch : dict
+            The batch, as identified by identify
+        status : str
+            The outcome of loading the batch, COMPLETE or FAILED
+        """
+
+        if status not in [COMPLETE, FAILED]:
+            raise ValueError(
+                f"The status must be one of {[COMPLETE, FAILED]}, got {status}"
+            )
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO load_journal ({', '.join(JOURNAL_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(JOURNAL_COLUMNS))})",
+                tuple(batch[column] for column in JOURNAL_COLUMNS[:-2])
+                + (status, time.time()),
+            )
+
+    def to_data_frame(self) -> pd.DataFrame:
+        """
+        Gets the outcome of each batch in the journal
+
+        Returns
+        -------
+        pd.DataFrame
+            A row for each batch with the columns in JOURNAL_COLUMNS, in the order they were recorded
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {', '.join(JOURNAL_COLUMNS)} FROM load_journal ORDER BY recorded_at"
+            ).fetchall()
+
+        return pd.DataFrame(rows, columns=JOURNAL_COLUMNS)
+
+    def close(self) -> None:
+        """
+        Closes the connection to the SQLite database
+        """
+
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,968 @@
+import copy
+import functools
+import itertools
+from collections.abc import Mapping
+import lusid
+import pandas as pd
+from lusidtools import cocoon
+from lusidtools.cocoon.argument_checks import checkargs
+from lusidtools.cocoon.dateorcutlabel import (
+    DateOrCutLabel,
+    convert_date_or_cut_label_column,
+)
+
+
+# Attributes which are used on most models but are populated outside of the provided mapping
+ADDITIONAL_ATTRIBUTES = [
+    "instrument_identifiers",
+    "properties",
+    "sub_holding_keys",
+    "identifiers",
+]
+
+
+class _Missing:
+    """
+    A marker used in place of null values so that each cell only has to be checked for nulls once per column
+    """
+
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+# The different ways in which a value from a row can be set on a model attribute
+_LEAF_VALUE = 0
+_LEAF_DATE = 1
+_LEAF_LIST = 2
+
+# The prefix of the columns added to a DataFrame for its date columns once they have been converted, see
+# MappingPlan.convert_date_columns
+_CONVERTED_DATE_PREFIX = "__converted_date__"
+
+
+@checkargs
+def update_dict(orig_dict: dict, new_dict) -> None:
+    """
+    This is used to update a dictionary with another dictionary. Using the default Python update method does not merge
+    nested dictionaries. This method allows for this. This modifies the original dictionary in place.
+
+    Parameters
+    ----------
+    orig_dict : dict
+        The original dictionary to update
+    new_dict : dict
+        The new dictionary to merge with the original
+
+    Returns
+    -------
+    orig_dict : dict
+        The updated original dictionary
+    """
+
+    # Iterate over key value pairs in the new dictionary to merge into the original
+    for key, val in new_dict.items():
+        # If a mapping object (e.g. dictionary) call the function recursively
+        if isinstance(val, Mapping):
+            tmp = update_dict(orig_dict.get(key, {}), val)
+            orig_dict[key] = tmp
+        # If a list then merge it into the original dictionary
+        elif isinstance(val, list):
+            orig_dict[key] = orig_dict.get(key, []) + val
+        # Do the same for any other type
+        else:
+            orig_dict[key] = new_dict[key]
+
+    return orig_dict
+
+
+@checkargs
+def expand_dictionary(dictionary: dict, key_separator: str = ".") -> dict:
+    """
+    Takes a flat dictionary (no nesting) with keys separated by a separator and converts it into a nested
+    dictionary
+
+    Parameters
+    ----------
+    dictionary : dict
+        The input dictionary with separated keys
+    key_separator : str
+        The seprator to use
+
+    Returns
+    -------
+    dict_expanded : dict
+        The expanded nested dictionary
+    """
+
+    dict_expanded = {}
+
+    # Loop over each composite key and final value
+    for key, value in dictionary.items():
+        # Split the key on the separator
+        components = key.split(key_separator)
+        # Get the expanded dictionary for this key and update the master dictionary
+        update_dict(
+            dict_expanded, expand_dictionary_single_recursive(0, components, value)
+        )
+
+    return dict_expanded
+
+
+@checkargs
+def expand_dictionary_single_recursive(index: int, key_list: list, value) -> dict:
+    """
+    Takes a list of keys and a value and turns it into a nested dictionary. This is a recursive function.
+
+    Parameters
+    ----------
+    index : int
+        The current index of the key in the list of keys
+    key_list : list[str]
+        The list of keys to turn into a nested dictionary
+    value : any
+        The final value to match against the last (deepest) key
+
+    Returns
+    -------
+    dict
+        The final value to match against the last (deepest) key
+    """
+
+    # Gets the current key in the list
+    key = key_list[index]
+
+    # If it is the last key in the list return a dictionary with it keyed against the value
+    if key == key_list[-1]:
+        return {key: value}
+
+    # Otherwise if it is not the last key, key it against calling this function recursively with the next key
+    return {key: expand_dictionary_single_recursive(index + 1, key_list, value)}
+
+
+def extract_lusid_model_from_attribute_type(attribute_type: str) -> str:
+    """
+    Extracts a LUSID model from a complex attribute type e.g. dict(str, InstrumentIdValue) if it exists. If there
+    is no LUSID model the attribute type is still returned
+
+    Parameters
+    ----------
+    attribute_type : str
+        The attribute type to extract the model from
+
+    Returns
+    -------
+    attribute_type : str
+        The returned attribute type with the LUSID model extracted if possible
+    nested_type : str
+        The type of nesting used e.g. List or Dict
+    """
+
+    nested_type = None
+
+    # If the attribute type is a dictionary e.g. dict(str, InstrumentIdValue), extract the type
+    if "dict" in attribute_type:
+        attribute_type = attribute_type.split(", ")[1].rstrip(")")
+        nested_type = "dict"
+    # If it is a list e.g. list[ModelProperty] extract the type
+    if "list" in attribute_type:
+        attribute_type = attribute_type.split("list[")[1].rstrip("]")
+        nested_type = "list"
+
+    return attribute_type, nested_type
+
+
+def _collect_mapping_columns(mapping: dict, columns: list) -> list:
+    """
+    Collects every column referenced by an expanded (nested) mapping in the order they are found
+
+    Parameters
+    ----------
+    mapping : dict
+        The expanded mapping
+    columns : list[str]
+        The list to add the columns to
+
+    Returns
+    -------
+    columns : list[str]
+        The columns referenced by the mapping
+    """
+
+    for value in mapping.values():
+        if isinstance(value, dict):
+            _collect_mapping_columns(value, columns)
+        elif value is not None and value not in columns:
+            columns.append(value)
+
+    return columns
+
+
+class ModelPlan:
+    """
+    The compiled plan for populating a single lusid.models object from a row of values. This is resolved once from the
+    model's openapi_types and the expanded mapping so that populating a model for each row is a flat walk over the plan
+    rather than re-inspecting the model. cocoon.utilities.set_attributes_recursive also uses these plans, compiled once
+    for each model and mapping, see build_model_from_row.
+    """
+
+    def __init__(self, model_object, mapping: dict, column_positions: dict):
+        """
+        Parameters
+        ----------
+        model_object : lusid.models
+            The object from lusid.models to populate
+        mapping : dict
+            The expanded dictionary mapping the columns to the LUSID model attributes
+        column_positions : dict{str, int}
+            The position of each column in the rows that the plan is built from
+        """
+
+        self.model_object = model_object
+        self.mapping = mapping
+        self.column_positions = column_positions
+
+        # Plans for the classes of a polymorphic model, compiled on first use and keyed by the discriminator value
+        self._discriminated_plans = {}
+
+        obj_attr = model_object.openapi_types
+        obj_attr_required_map = model_object.required_map
+
+        # Generate the intersection between the available attributes and the provided attributes
+        populate_attributes = set(
+            list(mapping.keys()) + ADDITIONAL_ATTRIBUTES
+        ).intersection(set(obj_attr.keys()))
+
+        self.additional_attributes = []
+        self.identifier_attributes = []
+        self.leaves = []
+        self.nested = []
+        self.total_count = 0
+        self.none_count = 0
+        self.missing_value = False
+
+        for key in populate_attributes:
+
+            attribute_type = obj_attr[key]
+
+            # Additional attributes are populated from the values provided when the model is built
+            if key in ADDITIONAL_ATTRIBUTES:
+                # Handle identifiers provided within instrument definition (e.g. 'Bond', 'Future', etc.)
+                if (key, attribute_type) == ("identifiers", "dict(str, str)"):
+                    self.identifier_attributes.append(
+                        (
+                            key,
+                            [
+                                (str_key, column_positions[str_value])
+                                for str_key, str_value in mapping[key].items()
+                            ],
+                        )
+                    )
+                else:
+                    self.additional_attributes.append(key)
+                continue
+
+            self.total_count += 1
+
+            if mapping[key] is None:
+                self.none_count += 1
+                if obj_attr_required_map[key] == "required":
+                    self.missing_value = True
+                continue
+
+            # If there is no more nesting the value is set from the row
+            if not isinstance(mapping[key], dict):
+                if "date" in key or "created" in key or "effective_at" in key:
+                    leaf_type = _LEAF_DATE
+                elif "list" in attribute_type:
+                    leaf_type = _LEAF_LIST
+                else:
+                    leaf_type = _LEAF_VALUE
+
+                self.leaves.append(
+                    (
+                        key,
+                        column_positions[mapping[key]],
+                        leaf_type,
+                        obj_attr_required_map[key] == "required",
+                        bool(mapping[key]),
+                    )
+                )
+
+            # If there is more nesting compile a plan for the nested model
+            else:
+                # Ensure that that if there is a complex attribute type e.g. dict(str, InstrumentIdValue) it is extracted
+                attribute_type, nested_type = extract_lusid_model_from_attribute_type(
+                    attribute_type
+                )
+
+                self.nested.append(
+                    (
+                        key,
+                        ModelPlan(
+                            model_object=getattr(lusid.models, attribute_type),
+                            mapping=mapping[key],
+                            column_positions=column_positions,
+                        ),
+                        nested_type == "list",
+                    )
+                )
+
+    def build(
+        self, row: tuple, properties=None, identifiers=None, sub_holding_keys=None
+    ):
+        """
+        Builds the model for a single row
+
+        Parameters
+        ----------
+        row : tuple
+            The values for the row, ordered by the column positions the plan was compiled with. Null values must
+            be replaced with MISSING
+        properties : any
+            The properties to use on this model
+        identifiers : any
+            The instrument identifiers to use on this model
+        sub_holding_keys
+            The sub holding keys to use on this model
+
+        Returns
+        -------
+        new model_object : lusid.models
+            An instance of the model object with populated attributes, or None if all of its attributes are None
+        """
+
+        additional_values = {
+            "instrument_identifiers": identifiers,
+            "properties": properties,
+            "sub_holding_keys": sub_holding_keys,
+            "identifiers": identifiers,
+        }
+
+        obj_init_values = {
+            key: additional_values[key] for key in self.additional_attributes
+        }
+
+        for key, identifier_positions in self.identifier_attributes:
+            obj_init_values[key] = {
+                str_key: row[position]
+                for str_key, position in identifier_positions
+                if row[position] is not MISSING
+            }
+
+        none_count = self.none_count
+        missing_value = self.missing_value
+
+        for key, position, leaf_type, required, counted in self.leaves:
+            value = row[position]
+
+            if value is MISSING:
+                if required:
+                    missing_value = True
+                elif counted:
+                    none_count += 1
+            # Converts to a date if it is a date field
+            elif leaf_type == _LEAF_DATE:
+                obj_init_values[key] = str(DateOrCutLabel(value))
+            # Converts to a list element if it is a list field
+            elif leaf_type == _LEAF_LIST and not isinstance(value, list):
+                obj_init_values[key] = [value]
+            else:
+                obj_init_values[key] = value
+
+        for key, nested_plan, is_list in self.nested:
+            value = nested_plan.build(row)
+            obj_init_values[key] = [value] if is_list else value
+
+        # If all attributes are None propagate None rather than a model filled with Nones
+        if self.total_count == none_count or missing_value:
+            return None
+
+        # Create an instance of and populate the model object
+        instance = self.model_object(**obj_init_values)
+
+        # Support for polymorphism, we can identify these `abstract` classes by the existence of the below
+        if getattr(instance, "discriminator"):
+            discriminator = getattr(instance, getattr(instance, "discriminator"))
+
+            if discriminator not in self._discriminated_plans:
+                actual_class = self.model_object.discriminator_value_class_map[
+                    discriminator
+                ]
+                self._discriminated_plans[discriminator] = ModelPlan(
+                    model_object=getattr(lusid.models, actual_class),
+                    mapping=self.mapping,
+                    column_positions=self.column_positions,
+                )
+
+            return self._discriminated_plans[discriminator].build(row)
+
+        return instance
+
+
+class _PropertyValuesPlan:
+    """
+    The plan for creating the property values for the rows of a DataFrame, see
+    cocoon.properties.create_property_values_from_data_frame
+    """
+
+    def __init__(self, scope: str, domain: str, property_columns: list):
+        """
+        Parameters
+        ----------
+        scope : str
+            The scope to create the property values in
+        domain : str
+            The domain to create the property values in
+        property_columns : list[str]
+            The columns to create property values for
+        """
+
+        self.scope = scope
+        self.domain = domain
+        self.property_columns = list(property_columns)
+
+    def build_all(self, data_frame: pd.DataFrame) -> list:
+        """
+        Creates the property values for every row of a DataFrame in one pass over its columns
+
+        Parameters
+        ----------
+        data_frame : pd.DataFrame
+            The DataFrame to create the property values from
+
+        Returns
+        -------
+        list[dict {str, models.PerpetualProperty}] or list[list[models.PerpetualProperty]]
+            The property values for each row
+        """
+
+        return cocoon.properties.create_property_values_from_data_frame(
+            data_frame=data_frame,
+            scope=self.scope,
+            domain=self.domain,
+            property_columns=self.property_columns,
+        )
+
+
+class _IdentifiersPlan:
+    """
+    The compiled plan for creating the instrument identifiers for a row, equivalent to
+    cocoon.instruments.create_identifiers
+    """
+
+    def __init__(
+        self,
+        file_type: str,
+        instrument_identifier_mapping: dict,
+        unique_identifiers: list,
+        full_key_format: bool,
+        column_positions: dict,
+    ):
+        """
+        Parameters
+        ----------
+        file_type : str
+            The file type to create identifiers for
+        instrument_identifier_mapping : dict
+            The instrument identifier mapping to use
+        unique_identifiers : list
+            The list of allowable unique instrument identifiers
+        full_key_format : bool
+            Whether or not the full key format i.e. 'Instrument/default/Figi' is required
+        column_positions : dict{str, int}
+            The position of each column in the rows that the plan is built from
+        """
+
+        self.is_instrument = file_type == "instrument"
+        self.unique_identifiers = unique_identifiers
+        self.unique_identifiers_set = set(unique_identifiers or [])
+        self.identifiers = [
+            (
+                cocoon.instruments.prepare_key(identifier_lusid, full_key_format),
+                column_positions[identifier_column],
+            )
+            for identifier_lusid, identifier_column in instrument_identifier_mapping.items()
+        ]
+
+    def build(self, index, row: tuple) -> dict:
+        """
+        Creates the identifiers for a single row
+
+        Parameters
+        ----------
+        index
+            The index of the row in the DataFrame
+        row : tuple
+            The values for the row with null values replaced by MISSING
+
+        Returns
+        -------
+        identifiers : dict
+            The identifiers to use on the request
+        """
+
+        if self.is_instrument:
+            identifiers = {
+                key: lusid.models.InstrumentIdValue(value=row[position])
+                for key, position in self.identifiers
+                if row[position] is not MISSING
+            }
+        else:
+            identifiers = {
+                key: row[position]
+                for key, position in self.identifiers
+                if row[position] is not MISSING
+            }
+
+        # If there are no identifiers raise an error
+        if len(identifiers) == 0:
+            raise ValueError(
+                f"""The row at index {str(index)} has no value for every single one of the provided
+        identifiers. Please ensure that each row has at least one identifier and try again"""
+            )
+
+        if self.is_instrument:
+            # If there are no unique identifiers raise an Exception as you need at least one to make a successful call
+            if self.unique_identifiers_set.isdisjoint(identifiers.keys()):
+                raise ValueError(
+                    f"""The instrument at index {str(index)} has no value for at least one unique
+            identifier. Please ensure that each instrument has at least one unique identifier and try again. The
+            allowed unique identifiers are {str(self.unique_identifiers)}"""
+                )
+
+        # If the transaction/holding is cash remove all other identifiers and just use this one
+        elif "Instrument/default/Currency" in identifiers:
+            identifiers = {
+                "Instrument/default/Currency": identifiers[
+                    "Instrument/default/Currency"
+                ]
+            }
+
+        return identifiers
+
+
+class MappingPlan:
+    """
+    A compiled plan for converting a DataFrame into LUSID request models. The mapping, property data types, identifier
+    keys and nested model structure are resolved once when the plan is created, the models are then built from the
+    DataFrame's column arrays without creating a pd.Series for each row.
+    """
+
+    def __init__(
+        self,
+        file_type: str,
+        domain_lookup: dict,
+        dtypes: pd.Series,
+        mapping_required: dict,
+        mapping_optional: dict,
+        property_columns: list,
+        properties_scope: str,
+        instrument_identifier_mapping: dict,
+        sub_holding_keys: list,
+        sub_holding_keys_scope: str,
+        unique_identifiers: list = None,
+        full_key_format: bool = True,
+    ):
+        """
+        Parameters
+        ----------
+        file_type : str
+            The file type to load
+        domain_lookup : dict
+            The domain lookup
+        dtypes : pd.Series
+            The data types of the DataFrame's columns
+        mapping_required : dict
+            The required mapping
+        mapping_optional : dict
+            The optional mapping
+        property_columns : list
+            The property columns to add as property values
+        properties_scope : str
+            The scope to add the property values in
+        instrument_identifier_mapping : dict
+            The mapping for the identifiers
+        sub_holding_keys : list
+            The sub holding keys to use
+        sub_holding_keys_scope : str
+            The scope to use for the sub holding keys
+        unique_identifiers : list
+            The list of allowable unique instrument identifiers
+        full_key_format : bool
+            Whether or not the full key format i.e. 'Instrument/default/Figi' is required for identifiers
+        """
+
+        self.columns = []
+        self.column_positions = {}
+
+        def register_columns(columns):
+            for column in columns:
+                if column not in self.column_positions:
+                    self.column_positions[column] = len(self.columns)
+                    self.columns.append(column)
+
+        # Get the model to populate
+        model_object = getattr(
+            lusid.models, domain_lookup[file_type]["top_level_model"]
+        )
+        open_api_types = model_object.openapi_types
+
+        # Merge the optional mapping into the required mapping and expand it from being a dot separated flat
+        # dictionary e.g. transaction_price.price to being nested, without modifying the provided mappings
+        mapping_expanded = expand_mappings(mapping_required, mapping_optional)
+
+        register_columns(_collect_mapping_columns(mapping_expanded, []))
+
+        # Create the property values plan for this file type
+        self.properties = None
+        if domain_lookup[file_type]["domain"] is not None:
+            self.properties = _PropertyValuesPlan(
+                scope=properties_scope,
+                domain=domain_lookup[file_type]["domain"],
+                property_columns=property_columns,
+            )
+
+        # If there is a sub_holding_keys attribute and it has a dict type this means the sub_holding_keys
+        # need to be populated with property values
+        self.sub_holding_keys = None
+        self.sub_holding_keys_row = None
+        if (
+            "sub_holding_keys" in open_api_types.keys()
+            and "dict" in open_api_types["sub_holding_keys"]
+        ):
+            self.sub_holding_keys = _PropertyValuesPlan(
+                scope=sub_holding_keys_scope,
+                domain="Transaction",
+                property_columns=sub_holding_keys,
+            )
+        # If not and they are provided as full keys
+        elif len(sub_holding_keys) > 0:
+            self.sub_holding_keys_row = cocoon.properties._infer_full_property_keys(
+                partial_keys=sub_holding_keys,
+                properties_scope=sub_holding_keys_scope,
+                domain="Transaction",
+            )
+
+        # Create the identifiers plan if applicable
+        self.identifiers = None
+        if instrument_identifier_mapping:
+            register_columns(instrument_identifier_mapping.values())
+            self.identifiers = _IdentifiersPlan(
+                file_type=file_type,
+                instrument_identifier_mapping=instrument_identifier_mapping,
+                unique_identifiers=unique_identifiers,
+                full_key_format=full_key_format,
+                column_positions=self.column_positions,
+            )
+
+        self.model = ModelPlan(
+            model_object=model_object,
+            mapping=mapping_expanded,
+            column_positions=self.column_positions,
+        )
+
+        # Dates are converted a whole column at a time rather than for each row, the converted columns are added to
+        # the rows after the other columns
+        self.date_columns = []
+        self._use_converted_date_columns(self.model)
+
+    def _use_converted_date_columns(self, model_plan: ModelPlan) -> None:
+        """
+        Points the date attributes of a model plan and its nested plans at the converted date columns
+
+        Parameters
+        ----------
+        model_plan : ModelPlan
+            The plan to update
+        """
+
+        for i, (key, position, leaf_type, required, counted) in enumerate(
+            model_plan.leaves
+        ):
+            if leaf_type != _LEAF_DATE:
+                continue
+
+            column = self.columns[position]
+            if column not in self.date_columns:
+                self.date_columns.append(column)
+
+            model_plan.leaves[i] = (
+                key,
+                len(self.columns) + self.date_columns.index(column),
+                _LEAF_VALUE,
+                required,
+                counted,
+            )
+
+        for _, nested_plan, _ in model_plan.nested:
+            self._use_converted_date_columns(nested_plan)
+
+    def _column_arrays(self, data_frame: pd.DataFrame) -> list:
+        """
+        Gets an object array for each of the columns used by the plan with null values replaced by MISSING
+
+        Parameters
+        ----------
+        data_frame : pd.DataFrame
+            The DataFrame to get the columns from
+
+        Returns
+        -------
+        list[np.ndarray]
+            The column arrays ordered by the plan's column positions
+        """
+
+        arrays = []
+
+        for column in self.columns:
+            series = data_frame[column]
+            null_mask = series.isna().to_numpy()
+            # Always copy so that the DataFrame is never modified when nulls are replaced
+            array = series.to_numpy(dtype=object, copy=True)
+            if null_mask.any():
+                array[null_mask] = MISSING
+            arrays.append(array)
+
+        for column in self.date_columns:
+            # Use the dates converted for the whole DataFrame before it was split into batches if there are any
+            converted_column = f"{_CONVERTED_DATE_PREFIX}{column}"
+            series = (
+                data_frame[converted_column]
+                if converted_column in data_frame.columns
+                else convert_date_or_cut_label_column(data_frame[column])
+            )
+            null_mask = series.isna().to_numpy()
+            array = series.to_numpy(dtype=object, copy=True)
+            if null_mask.any():
+                array[null_mask] = MISSING
+            arrays.append(array)
+
+        return arrays
+
+    def convert_date_columns(self, data_frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converts the date columns used by the plan for all of the rows of a DataFrame at once, so that the batches
+        taken from it are not converted again when their models are built
+
+        Parameters
+        ----------
+        data_frame : pd.DataFrame
+            The DataFrame containing the dates to convert
+
+        Returns
+        -------
+        pd.DataFrame
+            A copy of the DataFrame with a column added for each converted date column, the original columns are left
+            unchanged
+        """
+
+        data_frame = data_frame.copy(deep=False)
+
+        for column in self.date_columns:
+            data_frame[
+                f"{_CONVERTED_DATE_PREFIX}{column}"
+            ] = convert_date_or_cut_label_column(data_frame[column])
+
+        return data_frame
+
+    def build_models(self, data_frame: pd.DataFrame) -> list:
+        """
+        Builds a populated LUSID request model for each row of the DataFrame
+
+        Parameters
+        ----------
+        data_frame : pd.DataFrame
+            The DataFrame containing the data to convert
+
+        Returns
+        -------
+        single_requests : list
+             A list of populated LUSID request models
+        """
+
+        if data_frame.empty:
+            return []
+
+        # The property values are created a column at a time for all of the rows
+        rows_properties = (
+            itertools.repeat(None)
+            if self.properties is None
+            else self.properties.build_all(data_frame)
+        )
+        rows_sub_holding_keys = (
+            itertools.repeat(self.sub_holding_keys_row)
+            if self.sub_holding_keys is None
+            else self.sub_holding_keys.build_all(data_frame)
+        )
+
+        single_requests = []
+
+        for index, row, properties, sub_holding_keys in zip(
+            data_frame.index,
+            zip(*self._column_arrays(data_frame)),
+            rows_properties,
+            rows_sub_holding_keys,
+        ):
+
+            single_requests.append(
+                self.model.build(
+                    row,
+                    properties=properties,
+                    identifiers=None
+                    if self.identifiers is None
+                    else self.identifiers.build(index, row),
+                    sub_holding_keys=sub_holding_keys,
+                )
+            )
+
+        return single_requests
+
+
+def _freeze_mapping(mapping: dict) -> tuple:
+    """
+    Converts a nested mapping into nested tuples so that it can be used as the key of a cache
+    """
+
+    return tuple(
+        (key, _freeze_mapping(value) if isinstance(value, dict) else value)
+        for key, value in mapping.items()
+    )
+
+
+def _thaw_mapping(frozen_mapping: tuple) -> dict:
+    """
+    Converts nested tuples created by _freeze_mapping back into a nested mapping
+    """
+
+    return {
+        key: _thaw_mapping(value) if isinstance(value, tuple) else value
+        for key, value in frozen_mapping
+    }
+
+
+def _compile_row_plan(model_object, mapping: dict) -> tuple:
+    """
+    Compiles the plan for populating a model from a row with the columns the plan reads, in position order
+    """
+
+    columns = _collect_mapping_columns(mapping, [])
+    model_plan = ModelPlan(
+        model_object=model_object,
+        mapping=mapping,
+        column_positions={column: i for i, column in enumerate(columns)},
+    )
+
+    return model_plan, columns
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_cached_row_plan(model_object, frozen_mapping: tuple) -> tuple:
+    """
+    Compiles the plan for populating a model from a row, once for each model and mapping
+    """
+
+    return _compile_row_plan(model_object, _thaw_mapping(frozen_mapping))
+
+
+@functools.lru_cache(maxsize=1024)
+def _expand_cached_mappings(frozen_required: tuple, frozen_optional: tuple) -> tuple:
+    """
+    Merges and expands a required and optional mapping, once for each pair of mappings
+    """
+
+    mapping = update_dict(
+        _thaw_mapping(frozen_required), _thaw_mapping(frozen_optional)
+    )
+
+    return _freeze_mapping(expand_dictionary(mapping))
+
+
+def expand_mappings(mapping_required: dict, mapping_optional: dict) -> dict:
+    """
+    Merges the optional mapping into the required mapping and expands it from being a dot separated flat dictionary
+    e.g. transaction_price.price to being nested. Neither mapping is modified and the result is cached for each pair
+    of mappings.
+
+    Parameters
+    ----------
+    mapping_required : dict
+        The required mapping
+    mapping_optional : dict
+        The optional mapping
+
+    Returns
+    -------
+    dict
+        The merged and expanded mapping
+    """
+
+    try:
+        return _thaw_mapping(
+            _expand_cached_mappings(
+                _freeze_mapping(mapping_required), _freeze_mapping(mapping_optional)
+            )
+        )
+    # Mappings which contain unhashable values can not be cached
+    except TypeError:
+        return expand_dictionary(
+            update_dict(copy.deepcopy(mapping_required), mapping_optional)
+        )
+
+
+def build_model_from_row(
+    model_object,
+    mapping: dict,
+    row: pd.Series,
+    properties=None,
+    identifiers=None,
+    sub_holding_keys=None,
+):
+    """
+    Builds a populated model from a single row using a plan which is compiled once for each model and mapping. The
+    model is identical to the one built by cocoon.utilities.set_attributes_recursive.
+
+    Parameters
+    ----------
+    model_object : lusid.models
+        The object from lusid.models to populate
+    mapping : dict
+        The expanded dictionary mapping the Series columns to the LUSID model attributes
+    row : pd.Series
+        The row to populate the model from
+    properties : any
+        The properties to use on this model
+    identifiers : any
+        The instrument identifiers to use on this model
+    sub_holding_keys
+        The sub holding keys to use on this model
+
+    Returns
+    -------
+    new model_object : lusid.models
+        An instance of the model object with populated attributes, or None if all of its attributes are None
+    """
+
+    try:
+        model_plan, columns = _compile_cached_row_plan(
+            model_object, _freeze_mapping(mapping)
+        )
+    # Mappings which contain unhashable values can not be cached
+    except TypeError:
+        model_plan, columns = _compile_row_plan(model_object, mapping)
+
+    values = []
+    for column in columns:
+        value = row[column]
+        # Values such as lists are never null, pd.isna would check each of their elements
+        if pd.api.types.is_scalar(value) and pd.isna(value):
+            value = MISSING
+        values.append(value)
+
+    return model_plan.build(
+        tuple(values),
+        properties=properties,
+        identifiers=identifiers,
+        sub_holding_keys=sub_holding_keys,
+    )
@@ -0,0 +1,167 @@
+import copy
+import lusid
+from threading import Lock, RLock
+
+# The kinds of metadata which are cached
+IDENTIFIER_TYPES = "identifier_types"
+TRANSACTION_TYPES = "transaction_types"
+PROPERTY_DEFINITIONS = "property_definitions"
+
+
+class MetadataCache:
+    """
+    A cache of the metadata which is read from LUSID on every load but rarely changes, i.e. the instrument identifier
+    types, the transaction type configuration and the data types of the property definitions which exist. There is one
+    cache for each lusid.utilities.ApiClientFactory, see get_metadata_cache, so it lasts for the session which uses the
+    factory. Use refresh to get the metadata from LUSID again after it has been changed elsewhere.
+    """
+
+    def __init__(self, api_factory: lusid.utilities.ApiClientFactory):
+        """
+        Parameters
+        ----------
+        api_factory : lusid.utilities.ApiClientFactory
+            The api factory to use to get the metadata from LUSID
+        """
+
+        self.api_factory = api_factory
+        self._lock = RLock()
+        self._identifier_types = None
+        self._transaction_types = None
+        self._property_data_types = {}
+
+    def refresh(self, *kinds: str) -> None:
+        """
+        Removes cached metadata so that it is read from LUSID again on its next use
+
+        Parameters
+        ----------
+        kinds : str
+            The kinds of metadata to refresh e.g. IDENTIFIER_TYPES, TRANSACTION_TYPES or PROPERTY_DEFINITIONS, if none
+            are given all metadata is refreshed
+        """
+
+        kinds = kinds or (IDENTIFIER_TYPES, TRANSACTION_TYPES, PROPERTY_DEFINITIONS)
+
+        with self._lock:
+            if IDENTIFIER_TYPES in kinds:
+                self._identifier_types = None
+            if TRANSACTION_TYPES in kinds:
+                self._transaction_types = None
+            if PROPERTY_DEFINITIONS in kinds:
+                self._property_data_types.clear()
+
+    def get_instrument_identifier_types(self):
+        """
+        Gets the instrument identifier types configured in LUSID
+
+        Returns
+        -------
+        lusid.models.ResourceListOfInstrumentIdTypeDescriptor
+            The instrument identifier types
+        """
+
+        with self._lock:
+            if self._identifier_types is None:
+                self._identifier_types = self.api_factory.build(
+                    lusid.api.InstrumentsApi
+                ).get_instrument_identifier_types()
+
+            return self._identifier_types
+
+    def get_unique_identifier_types(self) -> list:
+        """
+        Gets the instrument identifier types which are configured to be unique
+
+        Returns
+        -------
+        list[str]
+            The unique identifier types e.g. "Figi"
+        """
+
+        return [
+            identifier.identifier_type
+            for identifier in self.get_instrument_identifier_types().values
+            if identifier.is_unique_identifier_type
+        ]
+
+    def list_configuration_transaction_types(self):
+        """
+        Gets the transaction type configuration in LUSID, a copy is returned so that it can be modified safely
+
+        Returns
+        -------
+        lusid.models.TransactionSetConfigurationData
+            The transaction type configuration
+        """
+
+        with self._lock:
+            if self._transaction_types is None:
+                self._transaction_types = self.api_factory.build(
+                    lusid.api.SystemConfigurationApi
+                ).list_configuration_transaction_types()
+
+            return copy.deepcopy(self._transaction_types)
+
+    def get_property_data_types(self, property_keys: list) -> dict:
+        """
+        Gets the data types of the property definitions which are known to exist
+
+        Parameters
+        ----------
+        property_keys : list[str]
+            The property keys to get the data types for
+
+        Returns
+        -------
+        dict
+            The data type of each property key which is known to exist, the other keys are omitted
+        """
+
+        with self._lock:
+            return {
+                property_key: self._property_data_types[property_key]
+                for property_key in property_keys
+                if property_key in self._property_data_types
+            }
+
+    def set_property_data_types(self, data_types: dict) -> None:
+        """
+        Records the data types of property definitions which exist
+
+        Parameters
+        ----------
+        data_types : dict
+            The data type of each property key
+        """
+
+        with self._lock:
+            self._property_data_types.update(data_types)
+
+
+_metadata_cache_lock = Lock()
+
+
+def get_metadata_cache(api_factory: lusid.utilities.ApiClientFactory) -> MetadataCache:
+    """
+    Gets the metadata cache attached to an api factory, creating it if it does not exist yet
+
+    Parameters
+    ----------
+    api_factory : lusid.utilities.ApiClientFactory
+        The api factory to get the metadata cache for
+
+    Returns
+    -------
+    MetadataCache
+        The metadata cache for the api factory
+    """
+
+    with _metadata_cache_lock:
+        metadata_cache = getattr(api_factory, "_lusidtools_metadata_cache", None)
+
+        if metadata_cache is None:
+            metadata_cache = MetadataCache(api_factory)
+            api_factory._lusidtools_metadata_cache = metadata_cache
+
+        return metadata_cache
@@ -0,0 +1,157 @@
+import atexit
+import concurrent.futures
+import io
+import multiprocessing
+import os
+import pickle
+from threading import Lock
+import lusid
+
+# The marker used in place of the SDK configuration of each model in a serialised payload
+_CONFIGURATION_ID = "lusid.Configuration"
+
+
+class _ModelPickler(pickle.Pickler):
+    """
+    Pickles LUSID models without their SDK configuration, each model has its own copy of this which is far larger
+    than the model itself
+    """
+
+    def persistent_id(self, obj):
+        if isinstance(obj, lusid.Configuration):
+            return _CONFIGURATION_ID
+        return None
+
+
+class _ModelUnpickler(pickle.Unpickler):
+    """
+    Unpickles LUSID models which were pickled by _ModelPickler, giving them all the same SDK configuration
+    """
+
+    def __init__(self, file, configuration: lusid.Configuration):
+        super().__init__(file)
+        self.configuration = configuration
+
+    def persistent_load(self, pid):
+        if pid != _CONFIGURATION_ID:
+            raise pickle.UnpicklingError(f"Unsupported persistent id {pid}")
+        return self.configuration
+
+
+def serialise_models(models: list) -> bytes:
+    """
+    Serialises LUSID models so that they can be returned from a worker process
+
+    Parameters
+    ----------
+    models : list
+        The LUSID models to serialise
+
+    Returns
+    -------
+    bytes
+        The serialised models
+    """
+
+    payload = io.BytesIO()
+    _ModelPickler(payload, protocol=pickle.HIGHEST_PROTOCOL).dump(models)
+    return payload.getvalue()
+
+
+def deserialise_models(payload: bytes) -> list:
+    """
+    Deserialises LUSID models which were serialised with serialise_models. The models are restored without being
+    constructed again and share a single SDK configuration, which is only used for client side validation
+
+    Parameters
+    ----------
+    payload : bytes
+        The serialised models
+
+    Returns
+    -------
+    list
+        The LUSID models
+    """
+
+    return _ModelUnpickler(
+        io.BytesIO(payload), lusid.Configuration.get_default_copy()
+    ).load()
+
+
+# The shared process pools keyed by their maximum number of workers, these are created on first use
+_process_pools = {}
+_process_pools_lock = Lock()
+
+
+def get_default_max_processes() -> int:
+    """
+    Gets the size of the default process pool, this is the number of CPUs available to the process
+
+    Returns
+    -------
+    int
+        The maximum number of worker processes for the default process pool
+    """
+
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+def get_process_pool(max_workers: int = None) -> concurrent.futures.ProcessPoolExecutor:
+    """
+    Gets the process wide pool of worker processes with the given number of workers, creating it if it does not exist
+    yet. The workers are started with spawn rather than fork as the event loop and thread pools are running in the
+    parent, and they are reused by later calls as each has to import lusid and pandas when it starts. As spawned
+    workers import the __main__ module of the parent, a script which uses the pool must only do so from inside an
+    if __name__ == "__main__": block
+
+    Parameters
+    ----------
+    max_workers : int
+        The maximum number of worker processes, defaults to get_default_max_processes()
+
+    Returns
+    -------
+    concurrent.futures.ProcessPoolExecutor
+        The shared process pool
+    """
+
+    if max_workers is None:
+        max_workers = get_default_max_processes()
+
+    with _process_pools_lock:
+        process_pool = _process_pools.get(max_workers)
+
+        # Replace any pool which has been broken e.g. by a worker being killed
+        if process_pool is None or process_pool._broken:
+            process_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _process_pools[max_workers] = process_pool
+
+        return process_pool
+
+
+def shutdown_process_pools(wait: bool = True) -> None:
+    """
+    Shuts down all of the shared process pools, they will be recreated if they are used again
+
+    Parameters
+    ----------
+    wait : bool
+        Whether or not to wait for the submitted tasks to complete before returning
+    """
+
+    with _process_pools_lock:
+        process_pools = list(_process_pools.values())
+        _process_pools.clear()
+
+    for process_pool in process_pools:
+        process_pool.shutdown(wait=wait)
+
+
+atexit.register(shutdown_process_pools)
@@ -1,8 +1,12 @@
 from lusidtools.cocoon.utilities import checkargs
 from lusidtools import cocoon
+from lusidtools.cocoon.async_tools import run_in_executor, get_thread_pool
+from lusidtools.cocoon.metadata_cache import get_metadata_cache
 import lusid
+import numpy as np
 import pandas as pd
 import logging
+import asyncio
 
 # Map Numpy data types to LUSID data types
 global_constants = {
@@ -40,6 +44,13 @@ def check_property_definitions_exist_in_scope_single(
 
     data_type = None
 
+    cached_data_types = get_metadata_cache(api_factory).get_property_data_types(
+        [property_key]
+    )
+
+    if property_key in cached_data_types:
+        return True, cached_data_types[property_key]
+
     try:
         response = api_factory.build(
             lusid.PropertyDefinitionsApi
@@ -51,6 +62,9 @@ def check_property_definitions_exist_in_scope_single(
 
         exists = True
         data_type = response.data_type_id.code
+        get_metadata_cache(api_factory).set_property_data_types(
+            {property_key: data_type}
+        )
 
     except lusid.exceptions.ApiException:
         exists = False
@@ -58,6 +72,129 @@ def check_property_definitions_exist_in_scope_single(
     return exists, data_type
 
 
+@run_in_executor
+def _get_property_definitions_batch(
+    api_factory: lusid.utilities.ApiClientFactory, property_keys: list, **kwargs
+) -> dict:
+    """
+    Gets a batch of property definitions from LUSID in a single request
+
+    Parameters
+    ----------
+    api_factory : lusid.utilities.ApiClientFactory
+        The ApiFactory to use
+    property_keys : list[str]
+        The property keys to get from LUSID
+    kwargs
+
+    Returns
+    -------
+    dict
+        The data type of each property definition which exists
+    """
+
+    try:
+        response = api_factory.build(
+            lusid.PropertyDefinitionsApi
+        ).get_multiple_property_definitions(property_keys=property_keys)
+
+    # If the batch is rejected e.g. because one of the keys is invalid fall back to checking each key in turn
+    except lusid.exceptions.ApiException:
+        data_types = {}
+        for property_key in property_keys:
+            exists, data_type = check_property_definitions_exist_in_scope_single(
+                api_factory=api_factory, property_key=property_key
+            )
+            if exists:
+                data_types[property_key] = data_type
+        return data_types
+
+    return {
+        property_definition.key: property_definition.data_type_id.code
+        for property_definition in response.values
+    }
+
+
+async def _get_property_definitions(
+    api_factory: lusid.utilities.ApiClientFactory,
+    property_keys: list,
+    batch_size: int,
+    **kwargs,
+) -> list:
+    """
+    Gets the property definitions from LUSID in batches which are sent concurrently
+    """
+
+    return await asyncio.gather(
+        *[
+            _get_property_definitions_batch(
+                api_factory, property_keys[i : i + batch_size], **kwargs
+            )
+            for i in range(0, len(property_keys), batch_size)
+        ]
+    )
+
+
+@checkargs
+def get_property_definition_data_types(
+    api_factory: lusid.utilities.ApiClientFactory,
+    property_keys: list,
+    batch_size: int = 100,
+    thread_pool_max_workers: int = 5,
+) -> dict:
+    """
+    This function gets the data types of the property definitions which exist inside LUSID. The definitions which are
+    already known to exist are taken from the metadata cache of the api factory, the rest are requested in batches
+    which are sent concurrently.
+
+    Parameters
+    ----------
+    api_factory : lusid.utilities.ApiClientFactory
+        The ApiFactory to use
+    property_keys : list[str]
+        The property keys to get from LUSID
+    batch_size : int
+        The number of property keys to request in each batch
+    thread_pool_max_workers : int
+        The maximum number of batches to request concurrently
+
+    Returns
+    -------
+    dict
+        The data type of each property definition which exists, keys without a definition are omitted
+    """
+
+    property_keys = list(dict.fromkeys(property_keys))
+    metadata_cache = get_metadata_cache(api_factory)
+    data_types = metadata_cache.get_property_data_types(property_keys)
+    missing_keys = [key for key in property_keys if key not in data_types]
+
+    if len(missing_keys) == 0:
+        return data_types
+
+    # Start a new event loop in a new thread, this is required to run inside a Jupyter notebook
+    loop = cocoon.async_tools.start_event_loop_new_thread()
+
+    try:
+        responses = asyncio.run_coroutine_threadsafe(
+            _get_property_definitions(
+                api_factory=api_factory,
+                property_keys=missing_keys,
+                batch_size=batch_size,
+                thread_pool=get_thread_pool(thread_pool_max_workers).thread_pool,
+            ),
+            loop,
+        ).result()
+    finally:
+        cocoon.async_tools.stop_event_loop_new_thread(loop)
+
+    for response in responses:
+        metadata_cache.set_property_data_types(response)
+        data_types.update(response)
+
+    return data_types
+
+
 @checkargs
 def check_property_definitions_exist_in_scope(
     api_factory: lusid.utilities.ApiClientFactory,
@@ -95,30 +232,34 @@ def check_property_definitions_exist_in_scope(
     # Initialise a set to hold the missing properties
     missing_keys = set([])
 
+    # Create the property key for each column
+    column_data_types = data_frame.loc[:, property_columns].dtypes
+    column_property_keys = {
+        column_name: f"{domain}/{scope}/{cocoon.utilities.make_code_lusid_friendly(column_name)}"
+        for column_name in column_data_types.index
+    }
+
+    # Get the data types of the property definitions which exist in a single pass
+    lusid_data_types = get_property_definition_data_types(
+        api_factory=api_factory, property_keys=list(column_property_keys.values())
+    )
+
     # Iterate over the column names
     column_property_mapping = {}
-    for column_name, data_type in data_frame.loc[
-        :, property_columns
-    ].dtypes.iteritems():
+    for column_name, data_type in column_data_types.iteritems():
 
-        # Create the property key
-        property_key = (
-            f"{domain}/{scope}/{cocoon.utilities.make_code_lusid_friendly(column_name)}"
-        )
+        property_key = column_property_keys[column_name]
 
         column_property_mapping[property_key] = column_name
 
-        # Get a tuple with the first value being True/False key is missing, second is data type of the key
-        exists, data_type_lusid = check_property_definitions_exist_in_scope_single(
-            api_factory=api_factory, property_key=property_key
-        )
-
         # If the key is missing add it to the set
-        if not exists:
+        if property_key not in lusid_data_types:
             missing_keys.add(property_key)
 
         # If it is not missing check that the data type of the property matches the dataframe
         else:
+            data_type_lusid = lusid_data_types[property_key]
+
             # If the data type does not match
             if data_type_lusid != global_constants["data_type_mapping"][str(data_type)]:
                 logging.warning(
@@ -233,6 +374,10 @@ def create_property_definitions_from_file(
             f"Created - {property_response.key} - with datatype {property_response.data_type_id.code}"
         )
 
+        get_metadata_cache(api_factory).set_property_data_types(
+            {property_response.key: property_response.data_type_id.code}
+        )
+
         # Grab the key off the response to use when referencing this property in other LUSID calls
         property_key_mapping[column_name] = property_response.key
 
@@ -361,6 +506,90 @@ def create_property_values(
     return properties
 
 
+@checkargs
+def create_property_values_from_data_frame(
+    data_frame: pd.DataFrame, scope: str, domain: str, property_columns: list = None
+) -> list:
+    """
+    This function generates the property values for every row of a DataFrame in one pass, it is equivalent to calling
+    create_property_values for each row. The property key and LUSID data type of each column are resolved once, null
+    values are found a whole column at a time and the models share a single SDK configuration rather than each
+    creating their own.
+
+    Parameters
+    ----------
+    data_frame : pd.DataFrame
+        The DataFrame to create property values for
+    scope : str
+        The scope to create the property values in
+    domain : str
+        The domain to create the property values in
+    property_columns : list[str]
+        The columns to create property values for, defaults to all of the columns in the DataFrame
+
+    Returns
+    -------
+    properties : list[dict {str, models.PerpetualProperty}] or list[list[models.PerpetualProperty]]
+        The property values for each row in the order of the DataFrame, these are lists for the instrument domain
+    """
+
+    if property_columns is None:
+        property_columns = list(data_frame.columns)
+
+    dtypes = data_frame.dtypes[property_columns]
+
+    # Ensure that all data types in the file have been mapped
+    if not (
+        set([str(data_type) for data_type in dtypes.unique()])
+        <= set(global_constants["data_type_mapping"])
+    ):
+        raise TypeError(
+            """There are data types in the data_frame which have not been mapped to LUSID data types,
+            please ensure that all data types have been mapped before retrying"""
+        )
+
+    # The configuration is only used by the models for client side validation so it can be shared between them
+    configuration = lusid.Configuration.get_default_copy()
+    row_properties = [{} for _ in range(len(data_frame))]
+
+    # Add the property values for each column to every row which has a value, columns are visited in order so each
+    # row's properties are in the same order as create_property_values would create them
+    for column_name, data_type in dtypes.items():
+
+        lusid_data_type = global_constants["data_type_mapping"][str(data_type)]
+        property_key = (
+            f"{domain}/{scope}/{cocoon.utilities.make_code_lusid_friendly(column_name)}"
+        )
+        column = data_frame[column_name]
+        values = column.to_numpy(dtype=object)
+
+        for position in np.flatnonzero(column.notna().to_numpy()):
+            row_value = values[position]
+
+            if lusid_data_type == "string":
+                property_value = lusid.models.PropertyValue(
+                    label_value=row_value, local_vars_configuration=configuration
+                )
+            else:
+                property_value = lusid.models.PropertyValue(
+                    metric_value=lusid.models.MetricValue(
+                        value=row_value, local_vars_configuration=configuration
+                    ),
+                    local_vars_configuration=configuration,
+                )
+
+            row_properties[position][property_key] = lusid.models.PerpetualProperty(
+                key=property_key,
+                value=property_value,
+                local_vars_configuration=configuration,
+            )
+
+    if domain.lower() == "instrument":
+        return [list(properties.values()) for properties in row_properties]
+
+    return row_properties
+
+
 def _infer_full_property_keys(
     partial_keys: list, properties_scope: str, domain: str
 ) -> list:
@@ -0,0 +1,454 @@
+import asyncio
+import functools
+import json
+import os
+import time
+from threading import Lock
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# The environment variables which can be used to configure the process wide rate limiter
+RATE_LIMITS_ENV = "LUSIDTOOLS_RATE_LIMITS"
+RATE_LIMIT_PATH_ENV = "LUSIDTOOLS_RATE_LIMIT_PATH"
+
+# The key of the rate used for the endpoint classes which do not have their own
+DEFAULT_ENDPOINT = "default"
+
+
+class TokenBucket:
+    """
+    A token bucket which holds up to capacity tokens and is refilled at rate tokens per second. Requests reserve a
+    token rather than waiting for one, so the bucket can go into debt and each request is told how long to wait for
+    its token to be refilled. This lets the same bucket be used by threads, which sleep, and by coroutines, which
+    await, without either polling it.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Parameters
+        ----------
+        rate : float
+            The number of tokens added each second
+        capacity : float
+            The largest number of tokens held, this is the largest burst of requests which do not wait. Defaults to
+            one second of tokens
+        """
+
+        if rate <= 0:
+            raise ValueError(f"The rate must be positive, got {rate}")
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+
+        if self.capacity < 1:
+            raise ValueError(f"The capacity must be at least 1, got {self.capacity}")
+
+        self.tokens = self.capacity
+        self.updated_at = None
+
+    def _refill(self, now: float) -> None:
+        if self.updated_at is not None:
+            # The clock may go backwards when the bucket is shared between processes
+            elapsed = max(now - self.updated_at, 0.0)
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def reserve(self, now: float, tokens: float = 1) -> float:
+        """
+        Takes tokens from the bucket
+
+        Parameters
+        ----------
+        now : float
+            The current time in seconds
+        tokens : float
+            The number of tokens to take
+
+        Returns
+        -------
+        float
+            The number of seconds to wait before the tokens are available
+        """
+
+        self._refill(now)
+        self.tokens -= tokens
+        return max(-self.tokens / self.rate, 0.0)
+
+    def wait_time(self, now: float) -> float:
+        """
+        Gets the number of seconds a request made now would wait for its token, without taking it
+
+        Parameters
+        ----------
+        now : float
+            The current time in seconds
+
+        Returns
+        -------
+        float
+            The number of seconds to wait
+        """
+
+        self._refill(now)
+        return max((1 - self.tokens) / self.rate, 0.0)
+
+
+class RateLimiter:
+    """
+    Limits the rate of the requests made to LUSID with a token bucket for each endpoint class e.g. "InstrumentsApi",
+    so that concurrent loads, extracts and queries against the same environment share one budget rather than each
+    being throttled by LUSID. Endpoint classes without a rate of their own use the default rate, and are not limited
+    if there is none.
+
+    With a path the buckets are kept in a file which is locked while they are updated, so that several processes on
+    the same machine share the budget.
+    """
+
+    def __init__(
+        self,
+        rate: float = None,
+        rates: dict = None,
+        capacity: float = None,
+        path: str = None,
+    ):
+        """
+        Parameters
+        ----------
+        rate : float
+            The number of requests per second for endpoint classes without a rate in rates, if None they are not
+            limited
+        rates : dict
+            The number of requests per second for each endpoint class e.g. {"SearchApi": 5}
+        capacity : float
+            The largest burst of requests for each endpoint class, defaults to one second of requests
+        path : str
+            The path of the file to share the buckets between processes with, if None they are only shared within
+            this process
+        """
+
+        if path is not None and fcntl is None:
+            raise ValueError(
+                "A rate limiter shared between processes requires file locking, which is not available on this "
+                "platform"
+            )
+
+        self.rate = rate
+        self.rates = dict(rates or {})
+        self.capacity = capacity
+        self.path = path
+
+        self._buckets = {}
+        self._statistics = {}
+        self._lock = Lock()
+
+        # Create the buckets up front so that invalid rates are found straight away
+        for endpoint in [DEFAULT_ENDPOINT, *self.rates]:
+            self._get_bucket(endpoint)
+
+    def _get_bucket(self, endpoint: str):
+        """
+        Gets the token bucket for an endpoint class, endpoint classes without their own rate share the default bucket
+        """
+
+        if endpoint not in self.rates:
+            endpoint = DEFAULT_ENDPOINT
+
+        if endpoint not in self._buckets:
+            rate = self.rates.get(endpoint, self.rate)
+            self._buckets[endpoint] = (
+                TokenBucket(rate, self.capacity) if rate is not None else None
+            )
+
+        return endpoint, self._buckets[endpoint]
+
+    def _update_buckets(self, update):
+        """
+        Calls update with the current time, holding the file lock and loading the state of the buckets from the file
+        around it when the buckets are shared between processes
+        """
+
+        if self.path is None:
+            return update(time.time())
+
+        file_descriptor = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(file_descriptor, fcntl.LOCK_EX)
+
+            with os.fdopen(file_descriptor, "r+", closefd=False) as file:
+                content = file.read()
+                state = json.loads(content) if content else {}
+
+                for endpoint, bucket in self._buckets.items():
+                    if bucket is not None and endpoint in state:
+                        bucket.tokens, bucket.updated_at = state[endpoint]
+
+                result = update(time.time())
+
+                state.update(
+                    {
+                        endpoint: [bucket.tokens, bucket.updated_at]
+                        for endpoint, bucket in self._buckets.items()
+                        if bucket is not None
+                    }
+                )
+                file.seek(0)
+                file.truncate()
+                file.write(json.dumps(state))
+
+            return result
+        finally:
+            # Closing the file releases the lock
+            os.close(file_descriptor)
+
+    def reserve(self, endpoint: str, tokens: float = 1) -> float:
+        """
+        Reserves the tokens for a request to an endpoint class
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint class the request is made to e.g. "InstrumentsApi"
+        tokens : float
+            The number of tokens to reserve
+
+        Returns
+        -------
+        float
+            The number of seconds to wait before making the request
+        """
+
+        with self._lock:
+            endpoint, bucket = self._get_bucket(endpoint)
+
+            if bucket is None:
+                wait = 0.0
+            else:
+                wait = self._update_buckets(
+                    lambda now: bucket.reserve(now, tokens=tokens)
+                )
+
+            statistics = self._statistics.setdefault(
+                endpoint, {"requests": 0, "waits": 0, "total_wait": 0.0}
+            )
+            statistics["requests"] += 1
+            statistics["waits"] += wait > 0
+            statistics["total_wait"] += wait
+
+        return wait
+
+    def acquire(self, endpoint: str, tokens: float = 1) -> float:
+        """
+        Waits for the tokens for a request to an endpoint class, blocking the calling thread
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint class the request is made to e.g. "InstrumentsApi"
+        tokens : float
+            The number of tokens to wait for
+
+        Returns
+        -------
+        float
+            The number of seconds waited
+        """
+
+        wait = self.reserve(endpoint, tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, endpoint: str, tokens: float = 1) -> float:
+        """
+        Waits for the tokens for a request to an endpoint class without blocking the event loop
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint class the request is made to e.g. "InstrumentsApi"
+        tokens : float
+            The number of tokens to wait for
+
+        Returns
+        -------
+        float
+            The number of seconds waited
+        """
+
+        wait = self.reserve(endpoint, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def wait_time(self, endpoint: str) -> float:
+        """
+        Gets the number of seconds a request to an endpoint class made now would wait for
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint class e.g. "InstrumentsApi"
+
+        Returns
+        -------
+        float
+            The number of seconds to wait
+        """
+
+        with self._lock:
+            endpoint, bucket = self._get_bucket(endpoint)
+
+            if bucket is None:
+                return 0.0
+
+            return self._update_buckets(bucket.wait_time)
+
+    def statistics(self) -> dict:
+        """
+        Gets the number of requests, how many had to wait and for how long in total, and the current wait time, for
+        each endpoint class which has been limited
+
+        Returns
+        -------
+        dict
+            The statistics keyed by endpoint class, or "default" for those without their own rate
+        """
+
+        with self._lock:
+            statistics = {
+                endpoint: dict(endpoint_statistics)
+                for endpoint, endpoint_statistics in self._statistics.items()
+            }
+
+        for endpoint, endpoint_statistics in statistics.items():
+            endpoint_statistics["wait_time"] = self.wait_time(endpoint)
+
+        return statistics
+
+
+def get_endpoint(function) -> str:
+    """
+    Gets the endpoint class of a LUSID API method e.g. "InstrumentsApi" for InstrumentsApi.get_instruments
+
+    Parameters
+    ----------
+    function
+        The bound API method
+
+    Returns
+    -------
+    str
+        The name of the class of the API the method belongs to
+    """
+
+    return type(getattr(function, "__self__", None)).__name__
+
+
+def rate_limited(endpoint: str):
+    """
+    Waits for the process wide rate limiter before each call of an awaitable function which makes a request to the
+    endpoint class
+
+    Parameters
+    ----------
+    endpoint : str
+        The endpoint class the function makes a request to e.g. "SearchApi"
+
+    Returns
+    -------
+    decorator : callable
+        Decorates the function
+    """
+
+    def decorator(f):
+        @functools.wraps(f)
+        async def inner(*args, **kwargs):
+            await get_rate_limiter().acquire_async(endpoint)
+            return await f(*args, **kwargs)
+
+        return inner
+
+    return decorator
+
+
+def parse_rates(rates: str) -> dict:
+    """
+    Parses the rates for the endpoint classes from a string e.g. "default=20,SearchApi=5"
+
+    Parameters
+    ----------
+    rates : str
+        The comma separated rates in requests per second, a single number is used as the default rate
+
+    Returns
+    -------
+    dict
+        The rate for each endpoint class, with the default rate keyed by "default"
+    """
+
+    parsed_rates = {}
+
+    for rate in filter(None, (rate.strip() for rate in rates.split(","))):
+        endpoint, _, value = rate.rpartition("=")
+
+        try:
+            parsed_rates[endpoint.strip() or DEFAULT_ENDPOINT] = float(value)
+        except ValueError:
+            raise ValueError(
+                f"The rate limit {rate} must be a number of requests per second, optionally preceded by an endpoint "
+                f"class e.g. SearchApi=5"
+            )
+
+    return parsed_rates
+
+
+# The process wide rate limiter, this is created on first use
+_rate_limiter = None
+_rate_limiter_lock = Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Gets the process wide rate limiter, creating it if it does not exist yet. The rates are read from the
+    LUSIDTOOLS_RATE_LIMITS environment variable e.g. "default=20,SearchApi=5" and requests are not limited if it is
+    not set. The buckets are shared with other processes through the file at the path in the
+    LUSIDTOOLS_RATE_LIMIT_PATH environment variable if it is set
+
+    Returns
+    -------
+    RateLimiter
+        The process wide rate limiter
+    """
+
+    global _rate_limiter
+
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            rates = parse_rates(os.environ.get(RATE_LIMITS_ENV, ""))
+
+            _rate_limiter = RateLimiter(
+                rate=rates.pop(DEFAULT_ENDPOINT, None),
+                rates=rates,
+                path=os.environ.get(RATE_LIMIT_PATH_ENV),
+            )
+
+        return _rate_limiter
+
+
+def set_rate_limiter(rate_limiter: RateLimiter) -> None:
+    """
+    Replaces the process wide rate limiter used by the loaders, extracts and queries in lusidtools
+
+    Parameters
+    ----------
+    rate_limiter : RateLimiter
+        The rate limiter to use, if None it is created again from the environment variables on its next use
+    """
+
+    global _rate_limiter
+
+    with _rate_limiter_lock:
+        _rate_limiter = rate_limiter
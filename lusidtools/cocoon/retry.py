@@ -0,0 +1,355 @@
+import asyncio
+import contextvars
+import email.utils
+import logging
+import random
+import time
+from datetime import datetime, timezone
+import lusid
+from urllib3.exceptions import HTTPError
+
+# The errors raised without a response from LUSID e.g. when a request times out or the connection is dropped
+TRANSIENT_ERRORS = (asyncio.TimeoutError, TimeoutError, ConnectionError, HTTPError)
+
+# The statuses worth retrying, 0 is used for a timeout or connection error which has no response
+DEFAULT_RETRY_STATUSES = (0, 408, 429, 500, 502, 503, 504)
+
+# The statuses which suggest that a request was too large or too slow to process, a batch which fails with one of
+# these is split in half rather than being sent again as it is
+DEFAULT_SPLIT_STATUSES = (0, 408, 413, 504)
+
+# Whether the current call is made while loading a batch which is retried by a RetryPolicy, see in_retried_batch
+_in_retried_batch = contextvars.ContextVar("lusidtools_in_retried_batch", default=False)
+
+
+def in_retried_batch() -> bool:
+    """
+    Checks whether the current call is made while loading a batch which a RetryPolicy retries, e.g. the instrument
+    searches made by the instrument property batch loader. The requests made while loading such a batch should be sent
+    once, as retrying them as well would multiply the number of requests sent and stack the backoffs.
+
+    Returns
+    -------
+    bool
+        Whether the batch being loaded is retried
+    """
+
+    return _in_retried_batch.get()
+
+
+def get_status(error):
+    """
+    Gets the HTTP status for a failed request
+
+    Parameters
+    ----------
+    error
+        The exception raised or returned by the request
+
+    Returns
+    -------
+    int
+        The HTTP status of the response, 0 for a timeout or connection error or None if the request failed for
+        another reason
+    """
+
+    if isinstance(error, lusid.exceptions.ApiException):
+        return error.status
+
+    if isinstance(error, TRANSIENT_ERRORS):
+        return 0
+
+    return None
+
+
+def get_retry_after(error):
+    """
+    Gets the number of seconds LUSID has asked for a request to be retried after from the Retry-After header of its
+    response, which is either a number of seconds or an HTTP date
+
+    Parameters
+    ----------
+    error
+        The exception raised or returned by the request
+
+    Returns
+    -------
+    float
+        The number of seconds to wait, or None if there is no valid Retry-After header
+    """
+
+    headers = getattr(error, "headers", None)
+    if not headers:
+        return None
+
+    # The headers are a dict rather than a case insensitive mapping when the async transport is used
+    retry_after = next(
+        (value for key, value in headers.items() if key.lower() == "retry-after"),
+        None,
+    )
+    if retry_after is None:
+        return None
+
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed request to LUSID is retried. Throttled requests, server errors and timeouts are
+    retried with an exponential backoff and full jitter, waiting for as long as LUSID asks for in any Retry-After
+    header instead. Batches which fail because of their size, e.g. with a 413 or a timeout, are split in half and
+    each half is sent on its own.
+
+    The waits are made with asyncio.sleep so that no thread is blocked while a request is waiting to be retried.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        jitter: bool = True,
+        retry_statuses: tuple = DEFAULT_RETRY_STATUSES,
+        split_statuses: tuple = DEFAULT_SPLIT_STATUSES,
+        min_split_size: int = 1,
+    ):
+        """
+        Parameters
+        ----------
+        max_attempts : int
+            The number of times a request is sent before its failure is returned
+        base_delay : float
+            The number of seconds the backoff starts from, this doubles after each attempt
+        max_delay : float
+            The largest number of seconds to back off for, this does not limit a Retry-After header
+        jitter : bool
+            Whether to wait for a random time of up to the backoff rather than the backoff itself, this spreads out
+            the retries of batches which failed together
+        retry_statuses : tuple
+            The HTTP statuses to retry, 0 is used for a timeout or connection error
+        split_statuses : tuple
+            The HTTP statuses for which a batch is split in half rather than retried as it is
+        min_split_size : int
+            The smallest number of requests in each half of a split batch
+        """
+
+        if max_attempts < 1:
+            raise ValueError(f"The max_attempts must be at least 1, got {max_attempts}")
+
+        if min_split_size < 1:
+            raise ValueError(
+                f"The min_split_size must be at least 1, got {min_split_size}"
+            )
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_statuses = tuple(retry_statuses)
+        self.split_statuses = tuple(split_statuses)
+        self.min_split_size = min_split_size
+
+    def should_retry(self, status: int, attempt: int) -> bool:
+        """
+        Whether a request which failed with the status should be sent again
+
+        Parameters
+        ----------
+        status : int
+            The HTTP status the request failed with, see get_status
+        attempt : int
+            The number of times the request has been sent
+
+        Returns
+        -------
+        bool
+            Whether to retry the request
+        """
+
+        return status in self.retry_statuses and attempt < self.max_attempts
+
+    def should_split(self, status: int, batch_size: int) -> bool:
+        """
+        Whether a batch which failed with the status should be split in half
+
+        Parameters
+        ----------
+        status : int
+            The HTTP status the batch failed with, see get_status
+        batch_size : int
+            The number of requests in the batch
+
+        Returns
+        -------
+        bool
+            Whether to split the batch
+        """
+
+        return status in self.split_statuses and batch_size >= 2 * self.min_split_size
+
+    def get_delay(self, attempt: int, error=None) -> float:
+        """
+        Gets the number of seconds to wait before sending a request again
+
+        Parameters
+        ----------
+        attempt : int
+            The number of times the request has been sent
+        error
+            The exception the request failed with, any Retry-After header on its response is used as the delay
+
+        Returns
+        -------
+        float
+            The number of seconds to wait
+        """
+
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            return retry_after
+
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+        if self.jitter:
+            return random.uniform(0, backoff)
+
+        return backoff
+
+    async def call(self, function, *args, **kwargs):
+        """
+        Awaits a call which raises the exceptions from LUSID, retrying it with this policy
+
+        Parameters
+        ----------
+        function
+            The coroutine function to call
+        args
+            The arguments for the function
+        kwargs
+            The keyword arguments for the function
+
+        Returns
+        -------
+        The result of the function
+        """
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await function(*args, **kwargs)
+            except (lusid.exceptions.ApiException, *TRANSIENT_ERRORS) as e:
+                if not self.should_retry(get_status(e), attempt):
+                    raise
+                await asyncio.sleep(self.get_delay(attempt, e))
+
+    async def load_batch(
+        self,
+        load,
+        single_requests: list,
+        split_allowed: bool = False,
+        on_attempt=None,
+    ):
+        """
+        Loads a batch with this policy, retrying it and splitting it in half when it fails. The halves of a split
+        batch are sent one after the other so that a split batch does not send more requests at once than before.
+
+        Parameters
+        ----------
+        load
+            The coroutine function which loads a list of requests into LUSID, this may raise or return the exception
+            from LUSID
+        single_requests : list
+            The requests in the batch
+        split_allowed : bool
+            Whether the requests in the batch are independent of one another so the batch can be split
+        on_attempt
+            Called with the requests, the time.monotonic() when they were sent and the HTTP status of the response,
+            see get_status, after each attempt
+
+        Returns
+        -------
+        list
+            The response or exception from LUSID for each batch that was sent, there is more than one if the batch was
+            split
+        dict
+            The number of rows in the batch, the number of requests sent, retries and splits, the seconds spent
+            waiting to retry and the seconds taken to load the batch
+        """
+
+        statistics = {
+            "rows": len(single_requests),
+            "requests": 0,
+            "retries": 0,
+            "splits": 0,
+            "retry_delay": 0.0,
+            "latency": 0.0,
+        }
+        started_at = time.monotonic()
+
+        async def load_with_retry(requests):
+            attempt = 0
+            while True:
+                attempt += 1
+                statistics["requests"] += 1
+                attempt_started_at = time.monotonic()
+                error = None
+
+                try:
+                    response = await load(requests)
+                    # Some of the batch loaders return rather than raise the exception from LUSID
+                    if isinstance(response, lusid.exceptions.ApiException):
+                        error = response
+                except (lusid.exceptions.ApiException, *TRANSIENT_ERRORS) as e:
+                    error = e
+                    response = e
+
+                status = 200 if error is None else get_status(error)
+                if on_attempt is not None:
+                    on_attempt(requests, attempt_started_at, status)
+
+                if error is None:
+                    return [response]
+
+                if split_allowed and self.should_split(status, len(requests)):
+                    statistics["splits"] += 1
+                    middle = len(requests) // 2
+                    logging.info(
+                        f"Splitting a batch of {len(requests)} requests which failed with status {status}"
+                    )
+                    return await load_with_retry(
+                        requests[:middle]
+                    ) + await load_with_retry(requests[middle:])
+
+                if not self.should_retry(status, attempt):
+                    # Errors without a response from LUSID are internal so they are raised rather than returned
+                    if isinstance(error, TRANSIENT_ERRORS):
+                        raise error
+                    return [response]
+
+                delay = self.get_delay(attempt, error)
+                statistics["retries"] += 1
+                statistics["retry_delay"] += delay
+                logging.info(
+                    f"Retrying a batch of {len(requests)} requests which failed with status {status} in "
+                    f"{delay:.2f} seconds"
+                )
+                await asyncio.sleep(delay)
+
+        # The requests made while loading the batch are left to this policy to retry, if it retries at all
+        token = _in_retried_batch.set(self.max_attempts > 1)
+        try:
+            return await load_with_retry(single_requests), statistics
+        finally:
+            statistics["latency"] = time.monotonic() - started_at
+            _in_retried_batch.reset(token)
@@ -0,0 +1,358 @@
+import contextlib
+import contextvars
+import datetime
+import functools
+import json
+import time
+from threading import Lock
+import lusid
+import pandas as pd
+from lusidtools.lpt import lpt
+from lusidtools.lpt.record import Rec
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+# The columns written by lpt.dump_stats for the calls made by lpt.lse.Caller
+STATS_COLUMNS = [
+    "startTime",
+    "endTime",
+    "name",
+    "requestId",
+    "duration",
+    "elapsed",
+    "status",
+]
+
+# The columns of the telemetry recorded for each request, the phases are in seconds
+TELEMETRY_COLUMNS = STATS_COLUMNS + [
+    "batch",
+    "code",
+    "rows",
+    "requests",
+    "convert",
+    "serialize",
+    "send",
+    "deserialize",
+    "requestBytes",
+    "responseBytes",
+]
+
+# The telemetry of the request being made in the current context, this is copied to the thread the request is made in
+_current_request = contextvars.ContextVar("_current_request", default=None)
+
+
+def request_sending(request_bytes: int = None) -> None:
+    """
+    Records that the request being made in the current context is about to be sent, the time since the request was
+    started or the previous response was received is spent serialising it
+
+    Parameters
+    ----------
+    request_bytes : int
+        The size of the request body
+    """
+
+    record = _current_request.get()
+    if record is None:
+        return
+
+    now = time.perf_counter()
+    record["serialize"] += now - record["_mark"]
+    record["requestBytes"] += request_bytes or 0
+    record["requests"] += 1
+    record["_mark"] = now
+
+
+def request_completed(status: int, headers=None, response_bytes: int = None) -> None:
+    """
+    Records the response to the request being made in the current context, the time since it was sent is spent in
+    the network and on the server, which reports its share in the lusid-meta-duration header
+
+    Parameters
+    ----------
+    status : int
+        The HTTP status of the response
+    headers
+        The headers of the response
+    response_bytes : int
+        The size of the response body
+    """
+
+    record = _current_request.get()
+    if record is None:
+        return
+
+    now = time.perf_counter()
+    record["send"] += now - record["_mark"]
+    record["responseBytes"] += response_bytes or 0
+    record["status"] = status
+    record["_mark"] = now
+
+    headers = headers or {}
+    record["elapsed"] += float(headers.get("lusid-meta-duration", 0)) / 1000
+    record["requestId"] = headers.get("lusid-meta-requestId", record["requestId"])
+
+
+@contextlib.contextmanager
+def instrument_api_client(api_client: lusid.ApiClient):
+    """
+    Records the size, timing and server duration of the requests made by an ApiClient for the telemetry of the
+    request being made in the current context, until the context exits when the ApiClient is restored. Requests made
+    without telemetry are sent as they were.
+
+    Parameters
+    ----------
+    api_client : lusid.ApiClient
+        The ApiClient to instrument, if it is already instrumented e.g. by a load which is still running it is left
+        as it is
+    """
+
+    if getattr(api_client, "_telemetry_instrumented", False):
+        yield
+        return
+
+    request = api_client.request
+    # The request set on the ApiClient itself rather than the method of its class, if there is one
+    own_request = vars(api_client).get("request")
+
+    @functools.wraps(request)
+    def instrumented_request(method, url, *args, body=None, **kwargs):
+        if _current_request.get() is None:
+            return request(method, url, *args, body=body, **kwargs)
+
+        # The body has already been sanitised so it is serialised in the same way as by the REST client
+        request_sending(len(json.dumps(body).encode("utf-8")) if body else 0)
+
+        try:
+            response = request(method, url, *args, body=body, **kwargs)
+        except lusid.exceptions.ApiException as e:
+            request_completed(e.status, e.headers, len(e.body or ""))
+            raise
+
+        request_completed(response.status, response.getheaders(), len(response.data))
+        return response
+
+    api_client.request = instrumented_request
+    api_client._telemetry_instrumented = True
+
+    try:
+        yield
+    finally:
+        # Put back the request the ApiClient had before it was instrumented
+        if own_request is None:
+            del api_client.request
+        else:
+            api_client.request = own_request
+        del api_client._telemetry_instrumented
+
+
+class LoadTelemetry:
+    """
+    Records the time each request made while loading data into LUSID spends in each phase, converting the rows to
+    models, serialising them, sending them and waiting for LUSID, which reports its own duration, and deserialising
+    the response, along with the number of rows and the size of the request and response bodies.
+
+    A record is kept for each attempt of each batch, so a retried or split batch has a record for each request. The
+    records can be returned as a DataFrame, summarised by phase, written in the same CSV format as lpt.dump_stats and,
+    if opentelemetry is installed, exported as spans.
+    """
+
+    def __init__(self, spans: bool = False, tracer=None):
+        """
+        Parameters
+        ----------
+        spans : bool
+            Whether to export a span for each request, with a child span for each phase, this requires opentelemetry
+        tracer
+            The opentelemetry tracer to create the spans with, defaults to the tracer for lusidtools
+        """
+
+        if (spans or tracer is not None) and trace is None:
+            raise ValueError(
+                "Exporting spans requires opentelemetry, please install opentelemetry-api"
+            )
+
+        if spans and tracer is None:
+            tracer = trace.get_tracer("lusidtools.cocoon")
+
+        self.tracer = tracer
+        self.records = []
+        self._lock = Lock()
+
+    @contextlib.contextmanager
+    def record_request(
+        self,
+        name: str,
+        batch: int,
+        rows: int,
+        code: str = None,
+        convert: float = 0.0,
+    ):
+        """
+        Records the telemetry of the request made in the block, which is copied to any thread it is made in by
+        run_in_executor
+
+        Parameters
+        ----------
+        name : str
+            The name of the request e.g. "load_transaction_batch"
+        batch : int
+            The number of the batch the request is for
+        rows : int
+            The number of rows in the request
+        code : str
+            The code of the portfolio the request is for
+        convert : float
+            The number of seconds taken to convert the batch the request is for to models
+
+        Returns
+        -------
+        dict
+            The record of the request
+        """
+
+        record = {
+            "startTime": datetime.datetime.now(),
+            "endTime": None,
+            "name": name,
+            "requestId": "n/a",
+            "duration": 0.0,
+            "elapsed": 0.0,
+            "status": None,
+            "batch": batch,
+            "code": code,
+            "rows": rows,
+            "requests": 0,
+            "convert": convert,
+            "serialize": 0.0,
+            "send": 0.0,
+            "deserialize": 0.0,
+            "requestBytes": 0,
+            "responseBytes": 0,
+            "_start": time.perf_counter(),
+            "_start_ns": time.time_ns(),
+        }
+        record["_mark"] = record["_start"]
+
+        token = _current_request.set(record)
+        try:
+            yield record
+        finally:
+            _current_request.reset(token)
+
+            now = time.perf_counter()
+            if record["requests"]:
+                record["deserialize"] = now - record["_mark"]
+            else:
+                # Without an instrumented request the whole request is counted as sending it
+                record["send"] = now - record["_start"]
+            record["duration"] = now - record["_start"]
+            record["endTime"] = datetime.datetime.now()
+
+            if self.tracer is not None:
+                self._export_span(record)
+
+            with self._lock:
+                self.records.append(
+                    {
+                        key: value
+                        for key, value in record.items()
+                        if not key.startswith("_")
+                    }
+                )
+
+    def _export_span(self, record: dict) -> None:
+        """
+        Exports a span for a request with a child span for each of its phases, one after the other
+        """
+
+        start_ns = record["_start_ns"]
+        span = self.tracer.start_span(
+            record["name"],
+            start_time=start_ns,
+            attributes={
+                "lusid.batch": record["batch"],
+                "lusid.rows": record["rows"],
+                "lusid.status": record["status"] or 0,
+                "lusid.request_id": record["requestId"],
+                "lusid.request_bytes": record["requestBytes"],
+                "lusid.response_bytes": record["responseBytes"],
+                "lusid.convert_seconds": record["convert"],
+                "lusid.server_seconds": record["elapsed"],
+            },
+        )
+        context = trace.set_span_in_context(span)
+
+        phase_start_ns = start_ns
+        for phase in ["serialize", "send", "deserialize"]:
+            phase_end_ns = phase_start_ns + int(record[phase] * 1e9)
+            self.tracer.start_span(
+                phase, context=context, start_time=phase_start_ns
+            ).end(end_time=phase_end_ns)
+            phase_start_ns = phase_end_ns
+
+        span.end(end_time=start_ns + int(record["duration"] * 1e9))
+
+    def to_data_frame(self) -> pd.DataFrame:
+        """
+        Gets the telemetry of each request
+
+        Returns
+        -------
+        pd.DataFrame
+            A row for each request with the columns in TELEMETRY_COLUMNS
+        """
+
+        with self._lock:
+            return pd.DataFrame(list(self.records), columns=TELEMETRY_COLUMNS)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Summarises where the time was spent while loading, the time spent sending requests is split between the
+        network and the server using the duration reported by LUSID
+
+        Returns
+        -------
+        pd.DataFrame
+            The total seconds spent in each phase and its share of the total, indexed by phase
+        """
+
+        stats = self.to_data_frame()
+
+        seconds = pd.Series(
+            {
+                # Each batch is converted once however many requests it is loaded with
+                "convert": stats.drop_duplicates("batch")["convert"].sum(),
+                "serialize": stats["serialize"].sum(),
+                "network": (stats["send"] - stats["elapsed"]).clip(lower=0).sum(),
+                "server": stats["elapsed"].sum(),
+                "deserialize": stats["deserialize"].sum(),
+            },
+            dtype=float,
+        )
+        total = seconds.sum()
+
+        return pd.DataFrame(
+            {
+                "seconds": seconds,
+                "share": seconds / total if total else seconds * 0,
+            }
+        ).rename_axis("phase")
+
+    def dump_stats(self, filename: str) -> None:
+        """
+        Writes the telemetry of each request in the same format as lpt.dump_stats
+
+        Parameters
+        ----------
+        filename : str
+            The path of the CSV file to write, or "-" to display the stats
+        """
+
+        with self._lock:
+            records = [Rec(**record) for record in self.records]
+
+        lpt.dump_stats(filename, records, STATS_COLUMNS)
@@ -1,6 +1,7 @@
 import lusid
 import lusid.models as models
 import logging
+from lusidtools.cocoon.metadata_cache import get_metadata_cache, TRANSACTION_TYPES
 
 logger = logging.getLogger()
 
@@ -25,10 +26,8 @@ def create_transaction_type_configuration(api_factory, alias, movements):
         The response from creating the transaction type
     """
 
-    # Call LUSID to get your transaction type configuration
-    response = api_factory.build(
-        lusid.api.SystemConfigurationApi
-    ).list_configuration_transaction_types()
+    # Get your transaction type configuration, this is cached for the api factory
+    response = get_metadata_cache(api_factory).list_configuration_transaction_types()
 
     aliases_current = [
         (alias.type, alias.transaction_group)
@@ -57,6 +56,8 @@ def create_transaction_type_configuration(api_factory, alias, movements):
         )
     )
 
+    get_metadata_cache(api_factory).refresh(TRANSACTION_TYPES)
+
     return response
 
 
@@ -78,10 +79,10 @@ def upsert_transaction_type_alias(api_factory, new_transaction_config):
         The response from setting the transaction type
     """
 
-    # Call LUSID to get a list of the current transaction types
+    # Get a list of the current transaction types, this is cached for the api factory
 
-    current_transaction_types = api_factory.build(
-        lusid.api.SystemConfigurationApi
+    current_transaction_types = get_metadata_cache(
+        api_factory
     ).list_configuration_transaction_types()
 
     transaction_configs_list = current_transaction_types.transaction_configs
@@ -134,4 +135,6 @@ def upsert_transaction_type_alias(api_factory, new_transaction_config):
         )
     )
 
+    get_metadata_cache(api_factory).refresh(TRANSACTION_TYPES)
+
     return set_response
@@ -6,94 +6,27 @@ import uuid
 
 import numpy as np
 import lusid
-from collections.abc import Mapping
 import pandas as pd
 from detect_delimiter import detect
 import requests
 import json
 import inspect
-import functools
 from pathlib import Path
 import re
-from lusidtools.cocoon.dateorcutlabel import DateOrCutLabel
 import lusid.models as models
 import logging
 import time as default_time
+from lusidtools.cocoon.argument_checks import checkargs
+from lusidtools.cocoon.mapping_plan import (
+    build_model_from_row,
+    expand_mappings,
+    extract_lusid_model_from_attribute_type,
+)
 from lusidtools.cocoon.validator import Validator
 import types
 import typing
 
 
-def checkargs(function: typing.Callable) -> typing.Callable:
-    """
-    This can be used as a decorator to test the type of arguments are correct. It checks that the provided arguments
-    match any type annotations and/or the default value for the parameter.
-
-    Parameters
-    ----------
-    function : typing.Callable
-        The function to wrap with annotated types, all parameters must be annotated with a type
-
-    Returns
-    -------
-    _f : typing.Callable
-        The wrapped function
-    """
-
-    @functools.wraps(function)
-    def _f(*args, **kwargs):
-
-        # Get all the function arguments in order
-        function_arguments = inspect.signature(function).parameters
-
-        # Collect each non keyword argument value and key it by the argument name
-        keyed_arguments = {
-            list(function_arguments.keys())[i]: args[i] for i in range(0, len(args))
-        }
-
-        # Update this with the keyword argument values
-        keyed_arguments.update(kwargs)
-
-        # For each argument raise an error if it is of the incorrect type and if it has an invalid default value
-        for argument_name, argument_value in keyed_arguments.items():
-
-            if argument_name not in list(function_arguments.keys()):
-                raise ValueError(
-                    f"The argument {argument_name} is not a valid keyword argument for this function, valid arguments"
-                    + f" are {str(list(function_arguments.keys()))}"
-                )
-
-            # Get the arguments details
-            argument_details = function_arguments[argument_name]
-            # Assume that there is no default value for this parameter
-            is_default_value = False
-
-            # If there is a default value
-            if argument_details.default is not argument_details.empty:
-                # Check to see if the argument value matches the default
-                if argument_details.default is None:
-                    is_default_value = argument_value is argument_details.default
-                else:
-                    is_default_value = argument_value == argument_details.default
-
-            # If the argument value is of the wrong type e.g. list instead of dict then throw an error
-            if (
-                not isinstance(argument_value, argument_details.annotation)
-                and argument_details.annotation is not argument_details.empty
-            ):
-                # Only exception to this is if it matches the default value which may be of a different type e.g. None
-                if not is_default_value:
-                    raise TypeError(
-                        f"""The value provided for {argument_name} is of type {type(argument_value)} not of 
-                    type {argument_details.annotation}. Please update the provided value to be of type 
-                    {argument_details.annotation}"""
-                    )
-
-        return function(*args, **kwargs)
-
-    return _f
-
-
 def make_code_lusid_friendly(raw_code) -> str:
     """
     This function takes a column name and converts it to a LUSID friendly code creating LUSID objects. LUSID allows
@@ -184,10 +117,9 @@ def populate_model(
     if model_object is None:
         raise TypeError("The provided model_object is not a lusid.model object")
 
-    # Expand the mapping out from being a dot separated flat dictionary e.g. transaction_price.price to being nested
-    update_dict(required_mapping, optional_mapping)
-
-    mapping_expanded = expand_dictionary(required_mapping)
+    # Merge the mappings and expand them from being a dot separated flat dictionary e.g. transaction_price.price to
+    # being nested, this does not modify the provided mappings and is only done once for each pair of mappings
+    mapping_expanded = expand_mappings(required_mapping, optional_mapping)
 
     # Set the attributes on the model
     return set_attributes_recursive(
@@ -234,212 +166,16 @@ def set_attributes_recursive(
         An instance of the model object with populated attributes
     """
 
-    # Get the object attributes
-    obj_attr = model_object.openapi_types
-    obj_attr_required_map = model_object.required_map
-    obj_init_values = {}
-
-    # Additional attributes which are used on most models but will be populated outside the provided mapping
-    additional_attributes = {
-        "instrument_identifiers": identifiers,
-        "properties": properties,
-        "sub_holding_keys": sub_holding_keys,
-        "identifiers": identifiers,
-    }
-
-    # Generate the intersection between the available attributes and the provided attributes
-    provided_attributes = set(list(mapping.keys()) + list(additional_attributes.keys()))
-    available_attributes = set(list(obj_attr.keys()))
-    populate_attributes = provided_attributes.intersection(available_attributes)
-
-    # Used to check if all attributes are none
-    total_count = 0
-    none_count = 0
-    missing_value = False
-
-    # For each of the attributes to populate
-    for key in list(populate_attributes):
-
-        # Get the attribute type
-        attribute_type = obj_attr[key]
-
-        # If it is an additional attribute, populate it with the provided values and move to the next attribute
-        if key in list(additional_attributes.keys()):
-            # Handle identifiers provided within instrument definition (e.g. 'Bond', 'Future', etc.)
-            if (key, attribute_type) == ("identifiers", "dict(str, str)"):
-                obj_init_values[key] = {
-                    str_key: row[str_value]
-                    for str_key, str_value in mapping[key].items()
-                    if not pd.isna(row[str_value])
-                }
-            else:
-                obj_init_values[key] = additional_attributes[key]
-
-            continue
-
-        # This block keeps track of the number of missing (non-additional) attributes
-        else:
-            total_count += 1
-            if mapping[key] is None:
-                none_count += 1
-
-        # If this is the last object and there is no more nesting set the value from the row
-        if not isinstance(mapping[key], dict):
-            # If this exists in the mapping with a value and there is a value in the row for it
-            if mapping[key] is not None and not pd.isna(row[mapping[key]]):
-                # Converts to a date if it is a date field
-                if "date" in key or "created" in key or "effective_at" in key:
-                    obj_init_values[key] = str(DateOrCutLabel(row[mapping[key]]))
-                # Converts to a list element if it is a list field
-                elif "list" in attribute_type and not isinstance(
-                    row[mapping[key]], list
-                ):
-                    obj_init_values[key] = [row[mapping[key]]]
-                else:
-                    obj_init_values[key] = row[mapping[key]]
-            elif obj_attr_required_map[key] == "required":
-                missing_value = True
-            elif mapping[key]:
-                none_count += 1
-
-        # if there is more nesting call the function recursively
-        else:
-            # Ensure that that if there is a complex attribute type e.g. dict(str, InstrumentIdValue) it is extracted
-            attribute_type, nested_type = extract_lusid_model_from_attribute_type(
-                attribute_type
-            )
-
-            # Call the function recursively
-            value = set_attributes_recursive(
-                model_object=getattr(lusid.models, attribute_type),
-                mapping=mapping[key],
-                row=row,
-            )
-
-            obj_init_values[key] = [value] if nested_type == "list" else value
-
-    """
-    If all attributes are None propagate None rather than a model filled with Nones. For example if a CorporateActionSourceId
-    has no scope or code return build a model with CorporateActionSourceId = None rather than CorporateActionSourceId = 
-    lusid.models.ResourceId(scope=None, code=None)
-    
-    """
-    if total_count == none_count or missing_value:
-        return None
-
-    # Create an instance of and populate the model object
-    instance = model_object(**obj_init_values)
-
-    # Support for polymorphism, we can identify these `abstract` classes by the existence of the below
-    if getattr(instance, "discriminator"):
-        discriminator = getattr(instance, getattr(instance, "discriminator"))
-
-        actual_class = model_object.discriminator_value_class_map[discriminator]
-
-        return set_attributes_recursive(
-            model_object=getattr(lusid.models, actual_class), mapping=mapping, row=row,
-        )
-
-    return instance
-
-
-@checkargs
-def update_dict(orig_dict: dict, new_dict) -> None:
-    """
-    This is used to update a dictionary with another dictionary. Using the default Python update method does not merge
-    nested dictionaries. This method allows for this. This modifies the original dictionary in place.
-
-    Parameters
-    ----------
-    orig_dict : dict
-        The original dictionary to update
-    new_dict : dict
-        The new dictionary to merge with the original
-
-    Returns
-    -------
-    orig_dict : dict
-        The updated original dictionary
-    """
-
-    # Iterate over key value pairs in the new dictionary to merge into the original
-    for key, val in new_dict.items():
-        # If a mapping object (e.g. dictionary) call the function recursively
-        if isinstance(val, Mapping):
-            tmp = update_dict(orig_dict.get(key, {}), val)
-            orig_dict[key] = tmp
-        # If a list then merge it into the original dictionary
-        elif isinstance(val, list):
-            orig_dict[key] = orig_dict.get(key, []) + val
-        # Do the same for any other type
-        else:
-            orig_dict[key] = new_dict[key]
-
-    return orig_dict
-
-
-@checkargs
-def expand_dictionary(dictionary: dict, key_separator: str = ".") -> dict:
-    """
-    Takes a flat dictionary (no nesting) with keys separated by a separator and converts it into a nested
-    dictionary
-
-    Parameters
-    ----------
-    dictionary : dict
-        The input dictionary with separated keys
-    key_separator : str
-        The seprator to use
-
-    Returns
-    -------
-    dict_expanded : dict
-        The expanded nested dictionary
-    """
-
-    dict_expanded = {}
-
-    # Loop over each composite key and final value
-    for key, value in dictionary.items():
-        # Split the key on the separator
-        components = key.split(key_separator)
-        # Get the expanded dictionary for this key and update the master dictionary
-        update_dict(
-            dict_expanded, expand_dictionary_single_recursive(0, components, value)
-        )
-
-    return dict_expanded
-
-
-@checkargs
-def expand_dictionary_single_recursive(index: int, key_list: list, value) -> dict:
-    """
-    Takes a list of keys and a value and turns it into a nested dictionary. This is a recursive function.
-
-    Parameters
-    ----------
-    index : int
-        The current index of the key in the list of keys
-    key_list : list[str]
-        The list of keys to turn into a nested dictionary
-    value : any
-        The final value to match against the last (deepest) key
-
-    Returns
-    -------
-    dict
-        The final value to match against the last (deepest) key
-    """
-
-    # Gets the current key in the list
-    key = key_list[index]
-
-    # If it is the last key in the list return a dictionary with it keyed against the value
-    if key == key_list[-1]:
-        return {key: value}
-
-    # Otherwise if it is not the last key, key it against calling this function recursively with the next key
-    return {key: expand_dictionary_single_recursive(index + 1, key_list, value)}
+    # The attributes to populate, how to convert each value and the nested models are resolved once for each model
+    # and mapping, populating the model is then a walk over this plan
+    return build_model_from_row(
+        model_object=model_object,
+        mapping=mapping,
+        row=row,
+        properties=properties,
+        identifiers=identifiers,
+        sub_holding_keys=sub_holding_keys,
+    )
 
 
 @checkargs
@@ -674,38 +410,6 @@ def get_required_attributes_from_model(model_object) -> list:
     return required_attributes
 
 
-def extract_lusid_model_from_attribute_type(attribute_type: str) -> str:
-    """
-    Extracts a LUSID model from a complex attribute type e.g. dict(str, InstrumentIdValue) if it exists. If there
-    is no LUSID model the attribute type is still returned
-
-    Parameters
-    ----------
-    attribute_type : str
-        The attribute type to extract the model from
-
-    Returns
-    -------
-    attribute_type : str
-        The returned attribute type with the LUSID model extracted if possible
-    nested_type : str
-        The type of nesting used e.g. List or Dict
-    """
-
-    nested_type = None
-
-    # If the attribute type is a dictionary e.g. dict(str, InstrumentIdValue), extract the type
-    if "dict" in attribute_type:
-        attribute_type = attribute_type.split(", ")[1].rstrip(")")
-        nested_type = "dict"
-    # If it is a list e.g. list[ModelProperty] extract the type
-    if "list" in attribute_type:
-        attribute_type = attribute_type.split("list[")[1].rstrip("]")
-        nested_type = "list"
-
-    return attribute_type, nested_type
-
-
 @checkargs
 def check_nested_model(required_attribute_type: str) -> bool:
     """
@@ -927,19 +631,20 @@ def load_json_file(file_path: str) -> dict:
 
 
 @checkargs
-def load_data_to_df_and_detect_delimiter(args: dict) -> pd.DataFrame:
+def detect_file_delimiter(args: dict) -> str:
     """
-    This function loads data from given file path and converts it into a pandas DataFrame
+    This function detects the delimiter of a file from its header row, unless a delimiter has been specified. The
+    delimiter is stored in args["delimiter"]
 
     Parameters
     ----------
     args : dict
-        Arguments parsed in from command line, containing args["file_path"]
+        Arguments parsed in from command line, containing args["file_path"], args["num_header"] and args["delimiter"]
 
     Returns
     -------
-    pd.DataFrame : pd.dataframe
-        DataFrame containing data
+    delimiter : str
+        The delimiter of the file
     """
     if not os.path.exists(args["file_path"]):
         raise OSError(f"file path {args['file_path']} does not exist")
@@ -967,15 +672,265 @@ def load_data_to_df_and_detect_delimiter(args: dict) -> pd.DataFrame:
                 )
                 raise ValueError(err)
 
-    with open(args["file_path"], "r") as read_file:
-        # read data from lines specified at command line by num_header and num_footer
-        return pd.read_csv(
-            args["file_path"],
-            delimiter=args["delimiter"],
-            header=args["num_header"],
-            skipfooter=args["num_footer"],
-            engine="python",
+    return args["delimiter"]
+
+
+@checkargs
+def count_data_rows(args: dict) -> int:
+    """
+    This function counts the rows of data in a file, excluding the rows before the column titles, the column titles
+    and the footer rows. Rows are counted as records in the same way as pd.read_csv reads them, so a quoted field
+    which spans several lines is part of a single row, and blank lines are not counted as they are skipped when the
+    file is read.
+
+    Parameters
+    ----------
+    args : dict
+        Arguments parsed in from command line, containing args["file_path"], args["num_header"],
+        args["num_footer"] and args["delimiter"]
+
+    Returns
+    -------
+    int
+        The number of rows of data
+    """
+    delimiter = detect_file_delimiter(args)
+
+    with open(args["file_path"], "r", newline="") as read_file:
+        # The python parser does not recognise quoted fields when the delimiter is longer than a single character
+        reader = (
+            csv.reader(read_file, delimiter=delimiter)
+            if len(delimiter) == 1
+            else csv.reader(read_file, quoting=csv.QUOTE_NONE)
         )
+        rows = sum(1 for row in reader if len(row) > 1 or (row and row[0].strip()))
+
+    return max(rows - args["num_header"] - 1 - args["num_footer"], 0)
+
+
+def _read_csv_arguments(args: dict) -> dict:
+    """
+    This function creates the arguments for pd.read_csv from the command line arguments. The C parser is used unless
+    the delimiter is longer than a single character, which only the python parser supports. Neither parser can skip
+    footer lines while reading a file in chunks, so the number of rows to read is counted instead.
+
+    Parameters
+    ----------
+    args : dict
+        Arguments parsed in from command line
+
+    Returns
+    -------
+    dict
+        The keyword arguments for pd.read_csv
+    """
+    delimiter = detect_file_delimiter(args)
+
+    read_csv_arguments = {
+        "filepath_or_buffer": args["file_path"],
+        "delimiter": delimiter,
+        "header": args["num_header"],
+        "engine": "c" if len(delimiter) == 1 else "python",
+    }
+
+    if args["num_footer"]:
+        read_csv_arguments["nrows"] = count_data_rows(args)
+
+    return read_csv_arguments
+
+
+@checkargs
+def load_data_to_df_and_detect_delimiter(args: dict) -> pd.DataFrame:
+    """
+    This function loads data from given file path and converts it into a pandas DataFrame
+
+    Parameters
+    ----------
+    args : dict
+        Arguments parsed in from command line, containing args["file_path"]
+
+    Returns
+    -------
+    pd.DataFrame : pd.dataframe
+        DataFrame containing data
+    """
+    # read data from lines specified at command line by num_header and num_footer
+    return pd.read_csv(**_read_csv_arguments(args))
+
+
+@checkargs
+def load_data_to_df_chunks_and_detect_delimiter(args: dict) -> typing.Iterator:
+    """
+    This function loads data from given file path in chunks of args["chunk_size"] rows, so that only one chunk of the
+    file is held in memory at a time. If no chunk size is specified the whole file is loaded as a single chunk.
+
+    Parameters
+    ----------
+    args : dict
+        Arguments parsed in from command line, containing args["file_path"] and optionally args["chunk_size"]
+
+    Returns
+    -------
+    typing.Iterator[pd.DataFrame]
+        The chunks of data, the index of each chunk continues from the end of the previous chunk
+    """
+    if not args.get("chunk_size"):
+        yield load_data_to_df_and_detect_delimiter(args)
+        return
+
+    logging.info(f"loading data in chunks of {args['chunk_size']} rows")
+
+    # The reader is closed explicitly as it is only a context manager from pandas 1.2
+    chunks = pd.read_csv(**_read_csv_arguments(args), chunksize=args["chunk_size"])
+    try:
+        for chunk in chunks:
+            yield chunk
+    finally:
+        chunks.close()
+
+
+def group_data_frame_chunks(chunks: typing.Iterable, columns: list) -> typing.Iterator:
+    """
+    This function regroups chunks of data so that all of the rows which share the same values in the given columns
+    are in the same chunk. The rows at the end of a chunk are carried over to the next chunk if their group may
+    continue into it. The rows of each group must therefore be contiguous in the data, e.g. holdings should be grouped
+    by portfolio and effective date so that each holding set is loaded in a single call.
+
+    Parameters
+    ----------
+    chunks : typing.Iterable[pd.DataFrame]
+        The chunks of data
+    columns : list[str]
+        The columns whose values identify a group
+
+    Returns
+    -------
+    typing.Iterator[pd.DataFrame]
+        The regrouped chunks of data
+    """
+    seen_groups = set()
+    carried_over = None
+
+    def check_groups_are_new(chunk: pd.DataFrame):
+        groups = set(
+            chunk[columns].drop_duplicates().itertuples(index=False, name=None)
+        )
+        repeated_groups = groups & seen_groups
+
+        if repeated_groups:
+            err = (
+                f"The rows for {columns} {sorted(repeated_groups, key=str)[0]} are not contiguous, please sort the "
+                f"data by {columns} to load it in chunks"
+            )
+            logging.error(err)
+            raise ValueError(err)
+
+        seen_groups.update(groups)
+
+    for chunk in chunks:
+        if carried_over is not None:
+            chunk = pd.concat([carried_over, chunk])
+
+        if chunk.empty:
+            continue
+
+        # The rows of the last group in the chunk may continue in the next chunk so they are carried over
+        last_group = pd.Series(
+            tuple(chunk[columns].iloc[-1]), index=columns, dtype=object
+        )
+        in_last_group = (chunk[columns] == last_group).all(axis=1)
+        carried_over = chunk.loc[in_last_group]
+        chunk = chunk.loc[~in_last_group]
+
+        if chunk.empty:
+            continue
+
+        check_groups_are_new(chunk)
+        yield chunk
+
+    if carried_over is not None and not carried_over.empty:
+        check_groups_are_new(carried_over)
+        yield carried_over
+
+
+def combine_responses(responses: list, file_type: str) -> dict:
+    """
+    This function combines the responses from loading several chunks of data with load_from_data_frame into a single
+    response
+
+    Parameters
+    ----------
+    responses : list[dict]
+        The responses from load_from_data_frame
+    file_type : str
+        The file type of the data, e.g. "transactions"
+
+    Returns
+    -------
+    dict
+        The combined response, with the same structure as the response from load_from_data_frame
+    """
+    combined_response = {file_type: {"errors": [], "success": []}}
+
+    for response in responses:
+        for file_type, file_type_response in response.items():
+            combined_file_type_response = combined_response.setdefault(file_type, {})
+            for key, values in file_type_response.items():
+                # Statistics such as those of the scheduler are collected for each chunk and combined below
+                if isinstance(values, dict):
+                    combined_file_type_response.setdefault(key, []).append(values)
+                else:
+                    combined_file_type_response.setdefault(key, []).extend(values)
+
+    for combined_file_type_response in combined_response.values():
+        if "scheduler" in combined_file_type_response:
+            combined_file_type_response["scheduler"] = combine_scheduler_statistics(
+                combined_file_type_response["scheduler"]
+            )
+
+    return combined_response
+
+
+def combine_scheduler_statistics(statistics: list) -> dict:
+    """
+    This function combines the scheduler statistics from loading several chunks of data with load_from_data_frame
+
+    Parameters
+    ----------
+    statistics : list[dict]
+        The scheduler statistics of each chunk
+
+    Returns
+    -------
+    dict
+        The combined statistics, the elapsed time and skipped batches are summed, the utilisation is that of all of the
+        chunks together and the ordering and maximum number of batches in flight are those of the chunks, or a list of
+        them if the chunks differ
+    """
+
+    elapsed = sum(chunk["elapsed"] for chunk in statistics)
+    capacity = sum(
+        chunk["elapsed"] * chunk["max_batches_in_flight"] for chunk in statistics
+    )
+    busy = sum(
+        chunk["utilisation"] * chunk["elapsed"] * chunk["max_batches_in_flight"]
+        for chunk in statistics
+    )
+
+    combined = {}
+    for key in ["ordering", "max_batches_in_flight"]:
+        values = list(dict.fromkeys(chunk[key] for chunk in statistics))
+        combined[key] = values[0] if len(values) == 1 else values
+
+    combined.update(
+        {
+            "elapsed": elapsed,
+            "utilisation": busy / capacity if capacity else 0.0,
+            "skipped": sum(chunk.get("skipped", 0) for chunk in statistics),
+        }
+    )
+
+    return combined
 
 
 def get_delimiter(sample_string: str):
@@ -1083,6 +1038,12 @@ def parse_args(args: dict):
         type=int,
         help="specifies the batch size for async requests",
     )
+    ap.add_argument(
+        "-cs",
+        "--chunk_size",
+        type=int,
+        help="read and load the data file in chunks of this many rows rather than all at once",
+    )
     ap.add_argument(
         "-disp",
         "--display_response_head",
@@ -1344,7 +1305,8 @@ def validate_mapping_file_structure(mapping: dict, columns: list, file_type: str
 
 def strip_whitespace(df: pd.DataFrame, columns: list) -> pd.DataFrame:
     """
-    This function removes prefixed or postfixed white space from string values in a Pandas DataFrame
+    This function removes prefixed or postfixed white space from string values in a Pandas DataFrame, the DataFrame
+    provided is not modified
 
     Parameters
     ----------
@@ -1359,16 +1321,150 @@ def strip_whitespace(df: pd.DataFrame, columns: list) -> pd.DataFrame:
         DataFrame with whitespace removed
     """
 
-    stripped_df = pd.DataFrame.copy(df)
+    # A shallow copy shares the data of the columns which are not stripped rather than copying the whole DataFrame
+    stripped_df = df.copy(deep=False)
 
     for col in columns:
-        stripped_df[col] = stripped_df[col].apply(
-            lambda x: x.strip() if isinstance(x, str) else x
-        )
+        stripped_df[col] = strip_whitespace_from_column(stripped_df[col])
 
     return stripped_df
 
 
+def strip_whitespace_from_column(column: pd.Series) -> pd.Series:
+    """
+    Removes prefixed or postfixed white space from the string values in a column with the vectorised string methods,
+    leaving any other values as they are
+
+    Parameters
+    ----------
+    column : pd.Series
+        The column to remove whitespace from
+
+    Returns
+    -------
+    pd.Series
+        The column with whitespace removed, or the column itself if it can not contain strings
+    """
+
+    if not (
+        pd.api.types.is_object_dtype(column.dtype)
+        or pd.api.types.is_string_dtype(column.dtype)
+        or pd.api.types.is_categorical_dtype(column.dtype)
+    ):
+        return column
+
+    # Values which are not strings are stripped to NaN, so these are replaced with the original values
+    stripped = column.astype(object).str.strip()
+    return stripped.where(stripped.notna(), column.astype(object))
+
+
+def convert_nested_cells_to_string(column: pd.Series) -> pd.Series:
+    """
+    Converts the lists and dictionaries in a column to strings with convert_cell_value_to_string. Columns with a
+    numeric or date type are returned as they are without looking at their values, and object columns are only
+    converted if they contain a list or a dictionary. Categorical and string columns are returned with the object type
+    as they would be by DataFrame.applymap.
+
+    Parameters
+    ----------
+    column : pd.Series
+        The column to convert
+
+    Returns
+    -------
+    pd.Series
+        The converted column, or the column itself if it does not contain a list or a dictionary
+    """
+
+    if isinstance(column.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+        column = column.astype(object)
+
+    if not pd.api.types.is_object_dtype(column.dtype):
+        return column
+
+    # A column of strings can be ruled out without iterating over it in Python
+    if pd.api.types.infer_dtype(column, skipna=True) in ["string", "empty"]:
+        return column
+
+    if any(isinstance(value, (list, dict)) for value in column.values):
+        return column.map(convert_cell_value_to_string)
+
+    return column
+
+
+def preprocess_data_frame(
+    data_frame: pd.DataFrame,
+    mapping_required: dict,
+    mapping_optional: dict,
+    identifier_mapping: dict,
+    property_columns: list,
+    remove_white_space: bool = True,
+    constant_prefix: str = "$",
+):
+    """
+    Prepares a DataFrame to be loaded into LUSID in one pass over its columns. The defaults and constants in the
+    mappings are populated with handle_nested_default_and_column_mapping, the lists and dictionaries in each column are
+    converted to strings and the whitespace is stripped from the mapped columns.
+
+    The DataFrame provided is not modified. Its columns are shared with the DataFrame returned, and each column which
+    changes is replaced on its own, so at most one column is copied at a time rather than the whole DataFrame.
+
+    Parameters
+    ----------
+    data_frame : pd.DataFrame
+        The DataFrame to prepare
+    mapping_required : dict
+        The required mapping, which may contain nested column and default mappings
+    mapping_optional : dict
+        The optional mapping, which may contain nested column and default mappings
+    identifier_mapping : dict
+        The mapping of the instrument identifiers
+    property_columns : list
+        The columns to create properties from
+    remove_white_space : bool
+        Whether to remove whitespace from the mapped columns
+    constant_prefix : str
+        The prefix used to specify a constant
+
+    Returns
+    -------
+    data_frame : pd.DataFrame
+        The prepared DataFrame
+    mapping_required : dict
+        The required mapping without nesting
+    mapping_optional : dict
+        The optional mapping without nesting
+    """
+
+    data_frame = data_frame.copy(deep=False)
+
+    data_frame, mapping_required = handle_nested_default_and_column_mapping(
+        data_frame=data_frame, mapping=mapping_required, constant_prefix=constant_prefix
+    )
+    data_frame, mapping_optional = handle_nested_default_and_column_mapping(
+        data_frame=data_frame, mapping=mapping_optional, constant_prefix=constant_prefix
+    )
+
+    strip_columns = set()
+    if remove_white_space:
+        strip_columns.update(property_columns)
+        for mapping in [mapping_optional, mapping_required, identifier_mapping]:
+            strip_columns.update(mapping.values())
+
+    for column_name in list(data_frame.columns):
+        original_column = data_frame[column_name]
+        column = convert_nested_cells_to_string(original_column)
+
+        if column_name in strip_columns:
+            column = strip_whitespace_from_column(column)
+
+        # Only the columns which have changed are replaced
+        if column is not original_column:
+            data_frame[column_name] = column
+
+    return data_frame, mapping_required, mapping_optional
+
+
 def generate_time_based_unique_id(time_generator: None):
     """
     Generates a unique ID based on the time since epoch.
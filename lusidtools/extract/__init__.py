@@ -1 +1,8 @@
-from lusidtools.extract.group_holdings import get_holdings_for_group
+from lusidtools.lazy_imports import lazy_module
+
+# The public names of the package and the submodule each is imported from, these are imported when first used
+_exports = {"get_holdings_for_group": "group_holdings"}
+
+__all__ = list(_exports)
+
+__getattr__, __dir__ = lazy_module(__name__, _exports, ["group_holdings"])
@@ -1,4 +1,4 @@
-from lusidtools.cocoon.async_tools import run_in_executor, ThreadPool
+from lusidtools.cocoon.async_tools import run_in_executor, get_thread_pool
 import lusid
 import asyncio
 from functools import reduce
@@ -7,6 +7,7 @@ from lusidtools.cocoon.async_tools import (
     start_event_loop_new_thread,
     stop_event_loop_new_thread,
 )
+from lusidtools.cocoon.rate_limiter import rate_limited
 
 
 def _join_holdings(
@@ -107,6 +108,7 @@ def _join_holdings(
     return {dict_key: joined_holdings}
 
 
+@rate_limited("PortfolioGroupsApi")
 @run_in_executor
 def _get_portfolio_group(
     api_factory: lusid.utilities.ApiClientFactory, scope: str, code: str, **kwargs
@@ -151,6 +153,7 @@ def _get_portfolio_group(
     return response
 
 
+@rate_limited("TransactionPortfoliosApi")
 @run_in_executor
 def _get_portfolio_holdings(
     api_factory: lusid.utilities.ApiClientFactory, scope: str, code: str, **kwargs
@@ -379,8 +382,8 @@ def get_holdings_for_group(
         The list of property keys to decorate onto the holdings, must be from the Instrument domain
     """
 
-    # Create a new thread pool to run the asynchronous tasks in
-    thread_pool = ThreadPool(num_threads).thread_pool
+    # Get the shared thread pool to run the asynchronous tasks in
+    thread_pool = get_thread_pool(num_threads).thread_pool
     kwargs["thread_pool"] = thread_pool
 
     # Start a new event loop in a new thread, this is required to run inside a Jupyter notebook
@@ -1,2 +1,9 @@
-from lusidtools.jupyter_tools.stop_execution import StopExecution
-from lusidtools.jupyter_tools.hide_code_button import toggle_code
+from lusidtools.lazy_imports import lazy_module
+
+# The public names of the package and the submodule each is imported from, these are imported when first used so
+# that IPython is only imported when they are
+_exports = {"StopExecution": "stop_execution", "toggle_code": "hide_code_button"}
+
+__all__ = list(_exports)
+
+__getattr__, __dir__ = lazy_module(__name__, _exports, set(_exports.values()))
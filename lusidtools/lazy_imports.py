@@ -0,0 +1,45 @@
+import importlib
+
+
+def lazy_module(package: str, exports: dict, submodules: list = ()):
+    """
+    Creates the module level __getattr__ and __dir__ functions (PEP 562) which import the public names of a package
+    from its submodules the first time they are used, so that importing the package does not import pandas, lusid and
+    every submodule up front
+
+    Parameters
+    ----------
+    package : str
+        The name of the package e.g. "lusidtools.cocoon"
+    exports : dict
+        The submodule each public name of the package is imported from e.g. {"load_from_data_frame": "cocoon"}
+    submodules : list
+        The submodules of the package which are available as attributes of it without being imported first
+
+    Returns
+    -------
+    __getattr__ : callable
+        The module level __getattr__ of the package
+    __dir__ : callable
+        The module level __dir__ of the package
+    """
+
+    module = importlib.import_module(package)
+    submodules = set(submodules)
+
+    def __getattr__(name: str):
+        if name in exports:
+            value = getattr(importlib.import_module(f"{package}.{exports[name]}"), name)
+        elif name in submodules:
+            value = importlib.import_module(f"{package}.{name}")
+        else:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+        # Cache the name on the package so that __getattr__ is only called the first time it is used
+        setattr(module, name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(module)) | set(exports) | submodules)
+
+    return __getattr__, __dir__
@@ -4,6 +4,7 @@ import inspect
 import json
 import os
 
+from lusidtools.cocoon.rate_limiter import get_endpoint, get_rate_limiter
 from . import lpt
 from .either import Either
 from .record import Rec
@@ -33,6 +34,7 @@ class ExtendedAPI:
             pass
 
         self.api = ApiConverter(api, lusid)
+        self.api_url = getattr(getattr(api, "configuration", None), "host", None)
         self.models = lusid.models
         self.lusid = lusid
         self.stats_file = config.get("stats", "")
@@ -93,6 +95,9 @@ class Caller:
             if self.as_at:  # and signature(fn).parameters.get('as_at'):
                 adjKwargs.update({"as_at": lpt.to_date(self.as_at)})
 
+            # Wait for the rate limiter shared with the other lusidtools callers
+            get_rate_limiter().acquire(get_endpoint(fn))
+
             # Measure execution time of the call
             startTime = datetime.datetime.now()
             try:
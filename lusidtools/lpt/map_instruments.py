@@ -2,6 +2,10 @@ import os
 
 import pandas as pd
 
+from lusidtools.cocoon.instrument_cache import (
+    get_default_instrument_cache,
+    get_namespace,
+)
 from lusidtools.lpt import lpt
 from lusidtools.lpt import lse
 from lusidtools.lpt import stdargs
@@ -9,6 +13,7 @@ from lusidtools.lpt.either import Either
 
 mapping_prefixes = {"Figi": "FIGI", "ClientInternal": "INT", "QuotePermId": "QPI"}
 
+# Explicit mappings added with include_mappings, instruments resolved from LUSID are held in the instrument cache
 mapping_table = {}
 
 
@@ -58,9 +63,16 @@ def main():
     lpt.standard_flow(parse, lse.connect, process_args)
 
 
-def map_instruments(api, df, column):
+def map_instruments(api, df, column, instrument_cache=None):
     WORKING = "__:::__"  # temporary column name
 
+    if instrument_cache is None:
+        instrument_cache = get_default_instrument_cache()
+    namespace = get_namespace(getattr(api, "api_url", None))
+
+    # The LUIDs for the prefixed identifiers resolved in this call
+    resolved = {}
+
     # Apply any known mappings to avoid unecessary i/o
 
     if len(mapping_table) > 0:
@@ -69,10 +81,12 @@ def map_instruments(api, df, column):
         if len(srs) > 0:
             df.loc[srs.index, column] = srs
 
-    # updates the mappings table
-    def update_mappings(src, prefix):
-        mapping_table.update(
-            {prefix + k: v.lusid_instrument_id for k, v in src.items()}
+    # updates the resolved mappings and the instrument cache
+    def update_mappings(src, prefix, instr_type):
+        luids = {k: v.lusid_instrument_id for k, v in src.items()}
+        resolved.update({prefix + k: v for k, v in luids.items()})
+        instrument_cache.set_many(
+            namespace, instr_type, {k: [v] for k, v in luids.items()}
         )
 
     def batch_query(instr_type, prefix, outstanding):
@@ -86,7 +100,7 @@ def map_instruments(api, df, column):
                 get_failed = result.content.failed
 
                 # Update successfully found items
-                update_mappings(get_found, prefix)
+                update_mappings(get_found, prefix, instr_type)
 
                 if len(get_failed) > 0:
                     if instr_type == "ClientInternal":
@@ -101,7 +115,7 @@ def map_instruments(api, df, column):
                                 return Either.Left("Failed to add internal instruments")
 
                             # Update successfully added items
-                            update_mappings(add_worked, prefix)
+                            update_mappings(add_worked, prefix, instr_type)
 
                             # Kick off the next batch
                             return batch_query(instr_type, prefix, remainder)
@@ -141,8 +155,16 @@ def map_instruments(api, df, column):
             uniques = subset[[column]].drop_duplicates(column)
             uniques[WORKING] = uniques[column].str.slice(width)
 
+            # Use the cached LUIDs, only identifiers which resolve to a single instrument can be mapped
+            cached = instrument_cache.get_many(
+                namespace, instr_type, list(uniques[WORKING])
+            )
+            cached = {k: v[0] for k, v in cached.items() if len(v) == 1}
+            resolved.update({prefix + k: v for k, v in cached.items()})
+            uniques = uniques[~uniques[WORKING].isin(list(cached.keys()))]
+
             def map_success(v):
-                df.loc[subset.index, column] = subset[column].map(mapping_table)
+                df.loc[subset.index, column] = subset[column].map(resolved)
                 return Either.Right(df)
 
             return batch_query(instr_type, prefix, uniques).bind(map_success)
@@ -28,6 +28,7 @@ setup(
         "pyyaml==5.4",
         "flatten-json==0.1.7",
     ],
+    extras_require={"async": ["aiohttp>=3.7"]},
     include_package_data=True,
     python_requires=">=3.7",
     entry_points={
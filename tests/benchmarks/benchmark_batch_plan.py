@@ -0,0 +1,104 @@
+"""
+Measures the time taken to plan the batches of a holdings backfill, comparing the previous planner, which masked the
+DataFrame for each effective date and then for each portfolio within it, against the BatchPlan, which groups the rows
+in one pass.
+
+Run from the root of the repository with:
+
+    python -m tests.benchmarks.benchmark_batch_plan --dates 2000 --portfolios 800
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from lusidtools.cocoon.batch_plan import BatchPlan
+from lusidtools.cocoon.utilities import load_json_file
+
+
+def legacy_holding_batches(data_frame: pd.DataFrame) -> int:
+    """
+    The previous planner for file types loaded for each effective date, returning the number of batches
+    """
+
+    effective_at_groups = [
+        data_frame.loc[data_frame["effective_at"] == effective_at]
+        for effective_at in data_frame["effective_at"].unique()
+    ]
+
+    return sum(
+        len(
+            [
+                effective_at_group.loc[effective_at_group["code"] == code]
+                for code in effective_at_group["code"].unique()
+            ]
+        )
+        for effective_at_group in effective_at_groups
+    )
+
+
+def planned_holding_batches(data_frame: pd.DataFrame, domain_lookup: dict) -> int:
+    """
+    Plans the batches with a BatchPlan and creates each of them, returning the number of batches
+    """
+
+    plan = BatchPlan(
+        data_frame=data_frame,
+        mapping_required={"code": "code", "effective_at": "effective_at"},
+        file_type="holding",
+        domain_lookup=domain_lookup,
+    )
+    return sum(1 for _ in plan.batches())
+
+
+def shuffled(data_frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shuffles the rows so that the rows of each batch are not next to each other
+    """
+
+    return data_frame.sample(frac=1, random_state=0)
+
+
+def main(dates: int, portfolios: int, holdings: int):
+    random = np.random.RandomState(0)
+    rows = dates * portfolios * holdings
+    data_frame = pd.DataFrame(
+        {
+            "effective_at": np.repeat(
+                pd.date_range("2015-01-01", periods=dates).values, portfolios * holdings
+            ),
+            "code": np.tile(
+                np.repeat([f"Fund{i}" for i in range(portfolios)], holdings), dates
+            ),
+            "units": random.randint(1, 10000, rows),
+        }
+    )
+    domain_lookup = load_json_file("config/domain_settings.json")
+
+    print(f"{rows} rows, {dates} dates and {portfolios} portfolios")
+    print(f"{'planner':<10}{'order':<10}{'batches':>10}{'elapsed s':>12}")
+
+    for order, frame in [("sorted", data_frame), ("shuffled", shuffled(data_frame))]:
+        for planner, plan in [
+            ("legacy", legacy_holding_batches),
+            ("plan", lambda frame: planned_holding_batches(frame, domain_lookup)),
+        ]:
+            start = time.perf_counter()
+            batches = plan(frame)
+            elapsed = time.perf_counter() - start
+            print(f"{planner:<10}{order:<10}{batches:>10}{elapsed:>12.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dates", type=int, default=200, help="effective dates")
+    parser.add_argument("--portfolios", type=int, default=100, help="portfolios")
+    parser.add_argument(
+        "--holdings", type=int, default=5, help="holdings in each portfolio"
+    )
+    arguments = parser.parse_args()
+    main(
+        dates=arguments.dates,
+        portfolios=arguments.portfolios,
+        holdings=arguments.holdings,
+    )
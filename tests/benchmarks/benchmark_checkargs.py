@@ -0,0 +1,141 @@
+"""
+Measures the overhead which the checkargs decorator adds to each call of a function, comparing the original decorator
+which inspected the signature on every call against the current one in each of its modes.
+
+Run from the root of the repository with:
+
+    python -m tests.benchmarks.benchmark_checkargs --calls 100000
+"""
+
+import argparse
+import functools
+import inspect
+import time
+import pandas as pd
+from lusidtools.cocoon.utilities import (
+    checkargs,
+    set_checkargs_mode,
+    CHECKARGS_MODES,
+)
+
+
+def legacy_checkargs(function):
+    """
+    The checkargs decorator as it was before the signature was inspected once when decorating
+    """
+
+    @functools.wraps(function)
+    def _f(*args, **kwargs):
+        function_arguments = inspect.signature(function).parameters
+        keyed_arguments = {
+            list(function_arguments.keys())[i]: args[i] for i in range(0, len(args))
+        }
+        keyed_arguments.update(kwargs)
+
+        for argument_name, argument_value in keyed_arguments.items():
+            if argument_name not in list(function_arguments.keys()):
+                raise ValueError(f"The argument {argument_name} is not valid")
+
+            argument_details = function_arguments[argument_name]
+            is_default_value = False
+
+            if argument_details.default is not argument_details.empty:
+                if argument_details.default is None:
+                    is_default_value = argument_value is argument_details.default
+                else:
+                    is_default_value = argument_value == argument_details.default
+
+            if (
+                not isinstance(argument_value, argument_details.annotation)
+                and argument_details.annotation is not argument_details.empty
+            ):
+                if not is_default_value:
+                    raise TypeError(
+                        f"The value provided for {argument_name} is invalid"
+                    )
+
+        return function(*args, **kwargs)
+
+    return _f
+
+
+def populate_model(
+    model_object_name: str,
+    required_mapping: dict,
+    optional_mapping: dict,
+    row: pd.Series,
+    properties,
+    identifiers: dict = None,
+    sub_holding_keys=None,
+):
+    """
+    A function with the same signature as cocoon.utilities.populate_model which does no work
+    """
+
+    return None
+
+
+def seconds_per_call(function, calls: int, repeat: int) -> float:
+    """
+    Calls a function with populate_model's arguments and returns the fastest observed time per call
+
+    Parameters
+    ----------
+    function : callable
+        The function to time
+    calls : int
+        The number of calls to make in each run
+    repeat : int
+        The number of times to run the calls
+
+    Returns
+    -------
+    float
+        The seconds per call of the fastest run
+    """
+
+    row = pd.Series({"id": "txn_1", "units": 100})
+    mapping = {"transaction_id": "id", "units": "units"}
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function(
+                "TransactionRequest",
+                mapping,
+                {},
+                row,
+                None,
+                identifiers={"Figi": "BBG000C05BD1"},
+            )
+        timings.append(time.perf_counter() - start)
+
+    return min(timings) / calls
+
+
+def main(calls: int, repeat: int):
+    undecorated = seconds_per_call(populate_model, calls, repeat)
+    results = {
+        "legacy": seconds_per_call(legacy_checkargs(populate_model), calls, repeat)
+    }
+
+    decorated = checkargs(populate_model)
+    for mode in CHECKARGS_MODES:
+        set_checkargs_mode(mode)
+        results[mode] = seconds_per_call(decorated, calls, repeat)
+    set_checkargs_mode(None)
+
+    print(f"{'decorator':<12}{'overhead us/call':>18}")
+    for name, seconds in results.items():
+        print(f"{name:<12}{(seconds - undecorated) * 1e6:>18.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=100000, help="calls per run")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="timed runs per decorator"
+    )
+    arguments = parser.parse_args()
+    main(calls=arguments.calls, repeat=arguments.repeat)
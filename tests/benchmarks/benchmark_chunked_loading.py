@@ -0,0 +1,98 @@
+"""
+Measures the time and peak memory taken to read a transactions file with the python parser, as the apps did
+previously, against reading it with the C parser in one go and in chunks.
+
+Run from the root of the repository with:
+
+    python -m tests.benchmarks.benchmark_chunked_loading --rows 200000 --chunk_size 10000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+from lusidtools.cocoon import (
+    load_data_to_df_and_detect_delimiter,
+    load_data_to_df_chunks_and_detect_delimiter,
+)
+from tests.benchmarks.benchmark_model_construction import synthetic_data_frame
+
+
+def read_with_python_parser(args):
+    """
+    The previous implementation, the whole file is read with the python parser
+    """
+
+    return pd.read_csv(
+        args["file_path"],
+        delimiter=",",
+        header=args["num_header"],
+        skipfooter=args["num_footer"],
+        engine="python",
+    )
+
+
+def read_in_chunks(args):
+    """
+    Reads the file in chunks, only keeping the number of rows in each chunk
+    """
+
+    return sum(
+        len(chunk) for chunk in load_data_to_df_chunks_and_detect_delimiter(args)
+    )
+
+
+def run(read, args):
+    """
+    Reads the file and returns the elapsed time and peak traced memory
+    """
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    read(dict(args))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main(rows: int, chunk_size: int):
+    file_path = os.path.join(tempfile.mkdtemp(), "transactions.csv")
+    synthetic_data_frame(rows).to_csv(file_path, index=False)
+
+    with open(file_path, "a") as footer:
+        footer.write("Total rows\n")
+
+    args = {
+        "file_path": file_path,
+        "num_header": 0,
+        "num_footer": 1,
+        "delimiter": None,
+        "line_terminator": r"\n",
+        "chunk_size": chunk_size,
+    }
+
+    print(f"{'mode':<20}{'rows/s':>12}{'elapsed s':>12}{'peak MiB':>11}")
+
+    for mode, read in [
+        ("python parser", read_with_python_parser),
+        ("c parser", load_data_to_df_and_detect_delimiter),
+        ("c parser chunked", read_in_chunks),
+    ]:
+        elapsed, peak = run(read, args)
+        print(
+            f"{mode:<20}{rows / elapsed:>12,.0f}{elapsed:>12.2f}{peak / 2 ** 20:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=200000, help="rows in the file")
+    parser.add_argument(
+        "--chunk_size", type=int, default=10000, help="rows in each chunk"
+    )
+    arguments = parser.parse_args()
+    main(rows=arguments.rows, chunk_size=arguments.chunk_size)
@@ -0,0 +1,122 @@
+"""
+Measures the throughput of a holdings backfill loaded with a lane for each portfolio, which loads the effective dates
+of each portfolio in order while the portfolios are loaded concurrently, against waiting for every portfolio to
+complete an effective date before any starts the next. The requests to LUSID are simulated with a latency which
+varies between requests, and one portfolio is slower than the rest.
+
+Run from the root of the repository with:
+
+    python -m tests.benchmarks.benchmark_holding_lanes --portfolios 20 --dates 10 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import time
+from unittest import mock
+import numpy as np
+import pandas as pd
+from lusidtools import cocoon
+from lusidtools.cocoon.async_tools import get_thread_pool
+
+
+def run(data_frame, ordering, latency, slow_factor, max_batches_in_flight):
+    """
+    Loads the holdings with simulated requests and returns the elapsed time
+    """
+
+    domain_lookup = cocoon.utilities.load_json_file("config/domain_settings.json")
+    random = np.random.RandomState(0)
+
+    async def fake_load_data(api_factory, single_requests, file_type, code, **kwargs):
+        # Exponentially distributed latencies, with the first portfolio slower than the rest
+        await asyncio.sleep(
+            random.exponential(latency) * (slow_factor if code == "Fund0" else 1)
+        )
+        return len(single_requests)
+
+    with mock.patch.object(cocoon.cocoon, "_load_data", fake_load_data):
+        start = time.perf_counter()
+        asyncio.run(
+            cocoon.cocoon._construct_batches(
+                api_factory=None,
+                data_frame=data_frame,
+                mapping_required={
+                    "code": "code",
+                    "effective_at": "effective_at",
+                    "tax_lots.units": "units",
+                },
+                mapping_optional={},
+                property_columns=[],
+                properties_scope="Benchmark",
+                instrument_identifier_mapping={"Figi": "figi"},
+                batch_size=domain_lookup["holding"]["default_batch_size"],
+                file_type="holding",
+                domain_lookup=domain_lookup,
+                sub_holding_keys=[],
+                sub_holding_keys_scope="Benchmark",
+                max_batches_in_flight=max_batches_in_flight,
+                ordering=ordering,
+                scope="Benchmark",
+                full_key_format=domain_lookup["holding"]["full_key_format"],
+                unique_identifiers=["Figi"],
+                thread_pool=get_thread_pool(5).thread_pool,
+            )
+        )
+        return time.perf_counter() - start
+
+
+def main(portfolios, dates, holdings, latency, slow_factor, max_batches_in_flight):
+    data_frame = pd.DataFrame(
+        {
+            "effective_at": np.repeat(
+                pd.date_range("2020-01-01", periods=dates).strftime("%Y-%m-%d"),
+                portfolios * holdings,
+            ),
+            "code": np.tile(
+                np.repeat([f"Fund{i}" for i in range(portfolios)], holdings), dates
+            ),
+            "figi": "BBG000C05BD1",
+            "units": 100,
+        }
+    )
+    requests = portfolios * dates
+
+    print(f"{portfolios} portfolios with {dates} effective dates, {requests} requests")
+    print(f"{'ordering':<12}{'requests/s':>12}{'elapsed s':>12}")
+
+    for ordering in ["global", "portfolio"]:
+        elapsed = run(data_frame, ordering, latency, slow_factor, max_batches_in_flight)
+        print(f"{ordering:<12}{requests / elapsed:>12,.1f}{elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--portfolios", type=int, default=20, help="portfolios")
+    parser.add_argument("--dates", type=int, default=10, help="effective dates")
+    parser.add_argument(
+        "--holdings", type=int, default=5, help="holdings per portfolio and date"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="mean seconds per request"
+    )
+    parser.add_argument(
+        "--slow_factor",
+        type=float,
+        default=5.0,
+        help="how many times slower the requests for the slow portfolio are",
+    )
+    parser.add_argument(
+        "--max_batches_in_flight",
+        type=int,
+        default=None,
+        help="the bound on the batches in flight, defaults to one per portfolio",
+    )
+    arguments = parser.parse_args()
+    main(
+        portfolios=arguments.portfolios,
+        dates=arguments.dates,
+        holdings=arguments.holdings,
+        latency=arguments.latency,
+        slow_factor=arguments.slow_factor,
+        max_batches_in_flight=arguments.max_batches_in_flight or arguments.portfolios,
+    )
@@ -0,0 +1,111 @@
+"""
+Measures how long it takes to import the lusidtools packages in a fresh interpreter with python -X importtime, and
+fails if any of them takes longer than its budget or imports a module it should only import when it is used. The
+packages import their public names lazily, so importing a package, or one of the lpt queries, must not import
+pandas, the lusid SDK and the rest of cocoon up front.
+
+Run from the root of the repository with:
+
+    python -m tests.benchmarks.benchmark_import_time --repeat 5
+"""
+
+import argparse
+import subprocess
+import sys
+
+# The budget in milliseconds of each import and the modules it must not import
+BUDGETS = {
+    "lusidtools": (50, ["pandas", "lusid", "lusidtools.cocoon.cocoon"]),
+    "lusidtools.cocoon": (50, ["pandas", "lusid", "lusidtools.cocoon.cocoon"]),
+    "lusidtools.apps": (50, ["pandas", "lusid", "lusidtools.cocoon.cocoon"]),
+    "lusidtools.extract": (50, ["pandas", "lusid", "lusidtools.cocoon.cocoon"]),
+    "lusidtools.cocoon.rate_limiter": (150, ["pandas", "lusid"]),
+    "lusidtools.lpt.lse": (1000, ["lusidtools.cocoon.cocoon"]),
+    "lusidtools.cocoon.cocoon": (2500, []),
+}
+
+
+def import_time(module: str) -> tuple:
+    """
+    Imports a module in a fresh interpreter with python -X importtime
+
+    Parameters
+    ----------
+    module : str
+        The module to import
+
+    Returns
+    -------
+    float
+        The number of milliseconds taken to import the module, including the modules it imports
+    dict
+        The number of milliseconds taken to import each module which was imported, excluding the modules it imports
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total = 0.0
+    self_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        self_times[name.strip()] = int(self_us) / 1000
+        if name.strip() == module:
+            total = int(cumulative_us) / 1000
+
+    return total, self_times
+
+
+def main(repeat: int, scale: float, top: int) -> int:
+    failures = []
+
+    print(f"{'module':<34}{'ms':>10}{'budget':>10}")
+    for module, (budget, forbidden) in BUDGETS.items():
+        timings = [import_time(module) for _ in range(repeat)]
+        total, self_times = min(timings, key=lambda timing: timing[0])
+        budget *= scale
+
+        print(f"{module:<34}{total:>10.1f}{budget:>10.1f}")
+        for name, milliseconds in sorted(
+            self_times.items(), key=lambda item: item[1], reverse=True
+        )[:top]:
+            print(f"    {name:<30}{milliseconds:>10.1f}")
+
+        if total > budget:
+            failures.append(
+                f"{module} took {total:.1f}ms, over its {budget:.1f}ms budget"
+            )
+
+        imported = sorted(set(forbidden) & set(self_times))
+        if imported:
+            failures.append(f"{module} imported {', '.join(imported)}")
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="imports per module, the fastest is used"
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiplies the budgets, for machines slower than the one they were set on",
+    )
+    parser.add_argument(
+        "--top", type=int, default=0, help="slowest modules to show for each import"
+    )
+    arguments = parser.parse_args()
+    sys.exit(main(repeat=arguments.repeat, scale=arguments.scale, top=arguments.top))
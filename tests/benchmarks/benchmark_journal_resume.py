@@ -0,0 +1,136 @@
+"""
+Measures the time taken to recover a load of transactions which stopped part of the way through, comparing loading
+everything again against resuming the load with the journal it kept, which skips the batches that completed. The
+requests to LUSID are simulated with a fixed latency and the load is stopped by an error after a share of the batches.
+
+Run from the root of the repository with:
+
+    python -m tests.benchmarks.benchmark_journal_resume --rows 20000 --stop_after 0.9
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from unittest import mock
+import numpy as np
+import pandas as pd
+from lusidtools import cocoon
+from lusidtools.cocoon.async_tools import get_thread_pool
+from lusidtools.cocoon.journal import LoadJournal
+
+
+def run(data_frame, batch_size, latency, journal=None, stop_after=None):
+    """
+    Loads the transactions with simulated requests, stopping with an error after stop_after batches, and returns the
+    elapsed time and the number of batches sent
+    """
+
+    domain_lookup = cocoon.utilities.load_json_file("config/domain_settings.json")
+    sent = []
+
+    async def fake_load_data(api_factory, single_requests, file_type, code, **kwargs):
+        if stop_after is not None and len(sent) >= stop_after:
+            raise ConnectionError("The connection to LUSID was lost")
+        sent.append(code)
+        await asyncio.sleep(latency)
+        return len(single_requests)
+
+    with mock.patch.object(cocoon.cocoon, "_load_data", fake_load_data):
+        start = time.perf_counter()
+        try:
+            asyncio.run(
+                cocoon.cocoon._construct_batches(
+                    api_factory=None,
+                    data_frame=data_frame,
+                    mapping_required={
+                        "code": "code",
+                        "transaction_id": "id",
+                        "type": "type",
+                        "transaction_date": "transaction_date",
+                        "settlement_date": "transaction_date",
+                        "units": "units",
+                        "transaction_price.price": "price",
+                        "transaction_price.type": "price_type",
+                        "total_consideration.amount": "total_consideration",
+                        "total_consideration.currency": "currency",
+                    },
+                    mapping_optional={},
+                    property_columns=[],
+                    properties_scope="Benchmark",
+                    instrument_identifier_mapping={"Figi": "figi"},
+                    batch_size=batch_size,
+                    file_type="transaction",
+                    domain_lookup=domain_lookup,
+                    sub_holding_keys=[],
+                    sub_holding_keys_scope="Benchmark",
+                    max_batches_in_flight=10,
+                    journal=journal,
+                    scope="Benchmark",
+                    full_key_format=domain_lookup["transaction"]["full_key_format"],
+                    unique_identifiers=["Figi"],
+                    thread_pool=get_thread_pool(5).thread_pool,
+                )
+            )
+        except ConnectionError:
+            pass
+
+        return time.perf_counter() - start, len(sent)
+
+
+def main(rows, portfolios, batch_size, latency, stop_after):
+    data_frame = pd.DataFrame(
+        {
+            "code": np.tile(
+                [f"Fund{i}" for i in range(portfolios)], rows // portfolios
+            ),
+            "id": [f"txn_{i}" for i in range(rows // portfolios * portfolios)],
+            "figi": "BBG000C05BD1",
+            "transaction_date": "2020-01-01",
+            "type": "Buy",
+            "units": 100,
+            "price": 10.0,
+            "price_type": "Price",
+            "total_consideration": 1000.0,
+            "currency": "GBP",
+        }
+    )
+    batches = -(-len(data_frame) // portfolios // batch_size) * portfolios
+    journal = LoadJournal(os.path.join(tempfile.mkdtemp(), "load_journal.db"))
+
+    print(f"{len(data_frame)} transactions in {batches} batches")
+    print(f"{'recovery':<10}{'batches sent':>14}{'elapsed s':>12}")
+
+    # The load stops after a share of the batches, keeping the journal of those which completed
+    run(data_frame, batch_size, latency, journal, int(batches * stop_after))
+
+    for recovery, recovery_journal in [("reload", None), ("resume", journal)]:
+        elapsed, sent = run(data_frame, batch_size, latency, recovery_journal)
+        print(f"{recovery:<10}{sent:>14}{elapsed:>12.2f}")
+
+    journal.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=20000, help="transactions")
+    parser.add_argument("--portfolios", type=int, default=10, help="portfolios")
+    parser.add_argument("--batch_size", type=int, default=200, help="batch size")
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="seconds per request"
+    )
+    parser.add_argument(
+        "--stop_after",
+        type=float,
+        default=0.9,
+        help="the share of the batches loaded before the load stops",
+    )
+    arguments = parser.parse_args()
+    main(
+        rows=arguments.rows,
+        portfolios=arguments.portfolios,
+        batch_size=arguments.batch_size,
+        latency=arguments.latency,
+        stop_after=arguments.stop_after,
+    )
@@ -0,0 +1,238 @@
+"""
+Measures the rows per second at which request models are built for each file type in
+lusidtools/cocoon/config/domain_settings.json, comparing the original row by row (iterrows) population against the
+compiled MappingPlan used by cocoon._convert_batch_to_models.
+
+Run from the root of the repository with:
+
+    python -m tests.benchmarks.benchmark_model_construction --rows 5000
+"""
+
+import argparse
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from lusidtools import cocoon
+from lusidtools.cocoon.mapping_plan import MappingPlan
+from lusidtools.cocoon.utilities import convert_cell_value_to_string
+from tests.unit.cocoon.test_mapping_plan import (
+    legacy_convert_batch_to_models,
+    unique_identifiers,
+)
+
+# The mapping and property columns used to build models for each file type
+scenarios = {
+    "transaction": {
+        "mapping_required": {
+            "transaction_id": "id",
+            "type": "transaction_type",
+            "transaction_date": "transaction_date",
+            "settlement_date": "settlement_date",
+            "units": "units",
+            "transaction_price.price": "price",
+            "transaction_price.type": "price_type",
+            "total_consideration.amount": "amount",
+            "total_consideration.currency": "currency",
+        },
+        "mapping_optional": {"source": "source", "exchange_rate": None},
+        "identifier_mapping": {"Figi": "figi", "Isin": "isin"},
+        "property_columns": ["region", "strategy", "market_value"],
+        "sub_holding_keys": [],
+    },
+    "holding": {
+        "mapping_required": {
+            "tax_lots.units": "units",
+            "tax_lots.cost.amount": "amount",
+            "tax_lots.cost.currency": "currency",
+        },
+        "mapping_optional": {"tax_lots.purchase_date": "transaction_date"},
+        "identifier_mapping": {"Figi": "figi", "Isin": "isin"},
+        "property_columns": ["region", "market_value"],
+        "sub_holding_keys": ["strategy"],
+    },
+    "instrument": {
+        "mapping_required": {"name": "name"},
+        "mapping_optional": {},
+        "identifier_mapping": {"Figi": "figi", "Isin": "isin"},
+        "property_columns": ["region", "strategy", "market_value"],
+        "sub_holding_keys": [],
+    },
+    "portfolio": {
+        "mapping_required": {
+            "code": "id",
+            "display_name": "name",
+            "base_currency": "currency",
+        },
+        "mapping_optional": {"created": "transaction_date", "description": "source"},
+        "identifier_mapping": None,
+        "property_columns": ["region"],
+        "sub_holding_keys": ["Transaction/Operations/Strategy"],
+    },
+    "quote": {
+        "mapping_required": {
+            "quote_id.quote_series_id.provider": "source",
+            "quote_id.quote_series_id.instrument_id": "figi",
+            "quote_id.quote_series_id.instrument_id_type": "identifier_type",
+            "quote_id.quote_series_id.quote_type": "price_type",
+            "quote_id.quote_series_id.field": "field",
+            "quote_id.effective_at": "transaction_date",
+            "metric_value.value": "price",
+            "metric_value.unit": "currency",
+        },
+        "mapping_optional": {},
+        "identifier_mapping": None,
+        "property_columns": [],
+        "sub_holding_keys": [],
+    },
+    "instrument_property": {
+        "mapping_required": {
+            "identifier_type": "identifier_type",
+            "identifier": "figi",
+        },
+        "mapping_optional": {},
+        "identifier_mapping": None,
+        "property_columns": ["region", "strategy", "market_value"],
+        "sub_holding_keys": [],
+    },
+    "portfolio_group": {
+        "mapping_required": {"code": "strategy", "display_name": "name"},
+        "mapping_optional": {"values.scope": "source", "values.code": "id"},
+        "identifier_mapping": None,
+        "property_columns": ["region"],
+        "sub_holding_keys": [],
+    },
+    "reference_portfolio": {
+        "mapping_required": {"code": "id", "display_name": "name"},
+        "mapping_optional": {
+            "base_currency": "currency",
+            "created": "transaction_date",
+        },
+        "identifier_mapping": None,
+        "property_columns": ["region"],
+        "sub_holding_keys": [],
+    },
+}
+
+
+def synthetic_data_frame(rows: int) -> pd.DataFrame:
+    """
+    Creates a DataFrame containing the columns used by every scenario
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows to create
+
+    Returns
+    -------
+    pd.DataFrame
+        The synthetic data
+    """
+
+    random = np.random.RandomState(0)
+    row_numbers = np.arange(rows)
+
+    data_frame = pd.DataFrame(
+        {
+            "id": [f"txn_{i}" for i in row_numbers],
+            "name": [f"Instrument {i}" for i in row_numbers],
+            "transaction_type": random.choice(["Buy", "Sell"], rows),
+            "transaction_date": pd.Timestamp("2020-01-01", tz="UTC")
+            + pd.to_timedelta(row_numbers % 365, unit="D"),
+            "settlement_date": "2020-12-31T00:00:00Z",
+            "units": random.randint(1, 10000, rows),
+            "price": random.uniform(1, 200, rows),
+            "price_type": "Price",
+            "amount": random.uniform(1, 1e6, rows),
+            "currency": random.choice(["GBP", "USD", "EUR"], rows),
+            "source": "Benchmark",
+            "figi": [f"BBG{i:09d}" for i in row_numbers],
+            "isin": [f"GB{i:010d}" if i % 3 else None for i in row_numbers],
+            "identifier_type": "Figi",
+            "field": "mid",
+            "region": random.choice(["EMEA", "APAC", None], rows),
+            "strategy": random.choice(["Growth", "Income"], rows),
+            "market_value": random.uniform(1, 1e6, rows),
+        }
+    )
+
+    return data_frame.applymap(convert_cell_value_to_string)
+
+
+def rows_per_second(function, rows: int, repeat: int) -> float:
+    """
+    Runs a function and returns the best observed throughput in rows per second
+
+    Parameters
+    ----------
+    function : callable
+        The function to time
+    rows : int
+        The number of rows the function processes
+    repeat : int
+        The number of times to run the function
+
+    Returns
+    -------
+    float
+        The rows per second of the fastest run
+    """
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    return rows / min(timings)
+
+
+def main(rows: int, repeat: int):
+    # The row by row population emits a deprecation warning for every row
+    warnings.simplefilter("ignore", FutureWarning)
+
+    domain_lookup = cocoon.utilities.load_json_file("config/domain_settings.json")
+    data_frame = synthetic_data_frame(rows)
+
+    print(f"{'file_type':<22}{'iterrows rows/s':>18}{'plan rows/s':>15}{'speedup':>10}")
+
+    for file_type in domain_lookup.keys():
+        scenario = scenarios[file_type]
+
+        def build_legacy():
+            return legacy_convert_batch_to_models(
+                data_frame=data_frame, file_type=file_type, **scenario
+            )
+
+        def build_plan():
+            return MappingPlan(
+                file_type=file_type,
+                domain_lookup=domain_lookup,
+                dtypes=data_frame.dtypes,
+                mapping_required=scenario["mapping_required"],
+                mapping_optional=scenario["mapping_optional"],
+                property_columns=scenario["property_columns"],
+                properties_scope="TestScope",
+                instrument_identifier_mapping=scenario["identifier_mapping"],
+                sub_holding_keys=scenario["sub_holding_keys"],
+                sub_holding_keys_scope="TestScope",
+                unique_identifiers=unique_identifiers,
+                full_key_format=domain_lookup[file_type]["full_key_format"],
+            ).build_models(data_frame)
+
+        # Both approaches must agree before their throughput is worth comparing
+        assert build_legacy() == build_plan(), f"Models differ for {file_type}"
+
+        legacy = rows_per_second(build_legacy, rows, repeat)
+        plan = rows_per_second(build_plan, rows, repeat)
+
+        print(f"{file_type:<22}{legacy:>18,.0f}{plan:>15,.0f}{plan / legacy:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=5000, help="rows per file type")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per approach")
+    arguments = parser.parse_args()
+    main(rows=arguments.rows, repeat=arguments.repeat)
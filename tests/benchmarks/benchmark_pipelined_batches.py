@@ -0,0 +1,182 @@
+"""
+Measures the throughput and peak memory of cocoon._construct_batches, which converts the next batch to models while
+earlier batches are in flight, against the previous behaviour of converting every batch in a synchronous batch up
+front and waiting for all of them to complete before starting the next. The requests to LUSID are simulated by a
+thread which sleeps for a fixed latency.
+
+Run from the root of the repository with:
+
+    python -m tests.benchmarks.benchmark_pipelined_batches --rows 20000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from unittest import mock
+from lusidtools import cocoon
+from lusidtools.cocoon.async_tools import get_thread_pool
+from tests.benchmarks.benchmark_model_construction import (
+    scenarios,
+    synthetic_data_frame,
+)
+
+
+async def construct_batches_unpipelined(sync_batches, convert, load):
+    """
+    The previous implementation, every batch in a synchronous batch is converted before any of them is loaded
+    """
+
+    responses = [
+        await asyncio.gather(
+            *[
+                load(convert(async_batch), code, effective_at)
+                for async_batch, code, effective_at in zip(
+                    sync_batch["async_batches"],
+                    sync_batch["codes"],
+                    sync_batch["effective_at"],
+                )
+                if not async_batch.empty
+            ],
+            return_exceptions=True,
+        )
+        for sync_batch in sync_batches
+    ]
+
+    return [response for responses_sub in responses for response in responses_sub]
+
+
+def run(file_type, data_frame, mapping_required, batch_size, latency, pipelined):
+    """
+    Loads the data with simulated requests and returns the elapsed time and peak traced memory
+    """
+
+    domain_lookup = cocoon.utilities.load_json_file("config/domain_settings.json")
+    scenario = scenarios[file_type]
+    thread_pool = get_thread_pool(5).thread_pool
+
+    keyword_arguments = {
+        "scope": "Benchmark",
+        "full_key_format": domain_lookup[file_type]["full_key_format"],
+        "unique_identifiers": ["Figi", "Isin"],
+        "thread_pool": thread_pool,
+    }
+
+    def blocking_request(single_requests):
+        time.sleep(latency)
+        return len(single_requests)
+
+    async def fake_load_data(api_factory, single_requests, file_type, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            thread_pool, blocking_request, single_requests
+        )
+
+    construct_arguments = dict(
+        api_factory=None,
+        data_frame=data_frame,
+        mapping_required=mapping_required,
+        mapping_optional=scenario["mapping_optional"],
+        property_columns=scenario["property_columns"],
+        properties_scope="Benchmark",
+        instrument_identifier_mapping=scenario["identifier_mapping"],
+        batch_size=batch_size,
+        file_type=file_type,
+        domain_lookup=domain_lookup,
+        sub_holding_keys=scenario["sub_holding_keys"],
+        sub_holding_keys_scope="Benchmark",
+    )
+
+    def convert(async_batch):
+        return cocoon.cocoon._convert_batch_to_models(
+            data_frame=async_batch,
+            mapping_required=mapping_required,
+            mapping_optional=scenario["mapping_optional"],
+            property_columns=scenario["property_columns"],
+            properties_scope="Benchmark",
+            instrument_identifier_mapping=scenario["identifier_mapping"],
+            file_type=file_type,
+            domain_lookup=domain_lookup,
+            sub_holding_keys=scenario["sub_holding_keys"],
+            sub_holding_keys_scope="Benchmark",
+            **keyword_arguments,
+        )
+
+    async def load(single_requests, code, effective_at):
+        return await fake_load_data(None, single_requests, file_type)
+
+    async def unpipelined_run():
+        sync_batches = cocoon.cocoon._create_sync_batches(
+            data_frame=data_frame,
+            mapping_required=mapping_required,
+            batch_size=batch_size,
+            file_type=file_type,
+            domain_lookup=domain_lookup,
+        )
+        return await construct_batches_unpipelined(sync_batches, convert, load)
+
+    async def pipelined_run():
+        with mock.patch.object(cocoon.cocoon, "_load_data", fake_load_data):
+            return await cocoon.cocoon._construct_batches(
+                **construct_arguments, **keyword_arguments
+            )
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    asyncio.run(pipelined_run() if pipelined else unpipelined_run())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main(rows: int, latency: float, batch_size: int):
+    data_frame = synthetic_data_frame(rows)
+    # Spread the rows over portfolios and a handful of effective dates
+    data_frame["portfolio"] = [f"Fund{i % 10}" for i in range(rows)]
+    data_frame["effective_at"] = [f"2020-01-0{1 + i % 3}" for i in range(rows)]
+
+    runs = {
+        "instrument": scenarios["instrument"]["mapping_required"],
+        "transaction": {
+            "code": "portfolio",
+            **scenarios["transaction"]["mapping_required"],
+        },
+        "holding": {
+            "code": "portfolio",
+            "effective_at": "effective_at",
+            **scenarios["holding"]["mapping_required"],
+        },
+    }
+
+    print(
+        f"{'file_type':<14}{'mode':<14}{'rows/s':>10}{'elapsed s':>12}{'peak MiB':>11}"
+    )
+
+    for file_type, mapping_required in runs.items():
+        for pipelined in [False, True]:
+            elapsed, peak = run(
+                file_type,
+                data_frame,
+                mapping_required,
+                batch_size,
+                latency,
+                pipelined,
+            )
+            print(
+                f"{file_type:<14}{'pipelined' if pipelined else 'unpipelined':<14}"
+                f"{rows / elapsed:>10,.0f}{elapsed:>12.2f}{peak / 2 ** 20:>11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=20000, help="rows to load")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="simulated seconds per request"
+    )
+    parser.add_argument("--batch_size", type=int, default=500, help="rows per batch")
+    arguments = parser.parse_args()
+    main(
+        rows=arguments.rows, latency=arguments.latency, batch_size=arguments.batch_size
+    )
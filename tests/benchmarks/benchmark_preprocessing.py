@@ -0,0 +1,113 @@
+"""
+Measures the time and peak memory taken by load_from_data_frame to prepare a DataFrame before it is loaded, comparing
+the previous steps, which populated the defaults in place, converted every cell with DataFrame.applymap and deep
+copied the DataFrame to strip whitespace, against the single pass of preprocess_data_frame.
+
+Run from the root of the repository with:
+
+    python -m tests.benchmarks.benchmark_preprocessing --rows 500000
+"""
+
+import argparse
+import time
+import tracemalloc
+from lusidtools.cocoon.utilities import (
+    convert_cell_value_to_string,
+    handle_nested_default_and_column_mapping,
+    preprocess_data_frame,
+    strip_whitespace,
+)
+from tests.benchmarks.benchmark_model_construction import synthetic_data_frame
+
+mapping_required = {
+    "code": "$Benchmark",
+    "transaction_id": "id",
+    "type": "transaction_type",
+    "transaction_date": "transaction_date",
+    "settlement_date": "settlement_date",
+    "units": "units",
+    "transaction_price.price": "price",
+    "transaction_price.type": "price_type",
+    "total_consideration.amount": "amount",
+    "total_consideration.currency": {"column": "currency", "default": "GBP"},
+}
+mapping_optional = {"source": "source"}
+identifier_mapping = {"Figi": "figi", "Isin": "isin"}
+property_columns = ["region", "strategy", "market_value"]
+
+
+def legacy_preprocess(data_frame):
+    """
+    The previous implementation, as it was in load_from_data_frame
+    """
+
+    data_frame, required = handle_nested_default_and_column_mapping(
+        data_frame, mapping_required
+    )
+    data_frame, optional = handle_nested_default_and_column_mapping(
+        data_frame, mapping_optional
+    )
+    data_frame = data_frame.applymap(convert_cell_value_to_string)
+
+    column_list = [property_columns]
+    for col in [optional, required, identifier_mapping]:
+        column_list.append(col.values())
+
+    column_list = list(set([item for sublist in column_list for item in sublist]))
+    return strip_whitespace(data_frame, column_list)
+
+
+def fused_preprocess(data_frame):
+    """
+    The current implementation
+    """
+
+    return preprocess_data_frame(
+        data_frame=data_frame,
+        mapping_required=mapping_required,
+        mapping_optional=mapping_optional,
+        identifier_mapping=identifier_mapping,
+        property_columns=property_columns,
+    )[0]
+
+
+def run(preprocess, data_frame):
+    """
+    Prepares the DataFrame and returns the elapsed time and peak traced memory, not counting the DataFrame itself
+    """
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    preprocess(data_frame)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main(rows: int):
+    data_frame = synthetic_data_frame(rows)
+    # Pad some of the strings so that there is whitespace to strip
+    data_frame["figi"] = " " + data_frame["figi"] + " "
+    size = data_frame.memory_usage(index=True, deep=True).sum()
+
+    print(f"DataFrame of {rows} rows using {size / 2 ** 20:.1f} MiB")
+    print(f"{'mode':<10}{'elapsed s':>12}{'peak MiB':>11}{'peak/input':>12}")
+
+    for mode, preprocess in [
+        ("legacy", legacy_preprocess),
+        ("fused", fused_preprocess),
+    ]:
+        # The legacy steps add columns to the DataFrame provided, so each mode is given its own copy
+        elapsed, peak = run(preprocess, data_frame.copy(deep=True))
+        print(f"{mode:<10}{elapsed:>12.3f}{peak / 2 ** 20:>11.1f}{peak / size:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--rows", type=int, default=500000, help="rows in the synthetic DataFrame"
+    )
+    arguments = parser.parse_args()
+    main(rows=arguments.rows)
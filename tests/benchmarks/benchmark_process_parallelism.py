@@ -0,0 +1,100 @@
+"""
+Measures the rows per second at which cocoon._construct_batches converts a large DataFrame of transactions to request
+models on a thread, against converting it in pools of worker processes of increasing size. The requests to LUSID are
+simulated and return immediately so that only the conversion is measured.
+
+Run from the root of the repository with:
+
+    python -m tests.benchmarks.benchmark_process_parallelism --rows 200000 --processes 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import time
+from unittest import mock
+from lusidtools import cocoon
+from lusidtools.cocoon.async_tools import get_thread_pool
+from lusidtools.cocoon.process_tools import get_process_pool
+from tests.benchmarks.benchmark_model_construction import (
+    scenarios,
+    synthetic_data_frame,
+)
+
+
+def rows_per_second(data_frame, batch_size: int, parallelism: str, processes: int):
+    """
+    Converts the DataFrame with simulated requests and returns the rows converted per second
+    """
+
+    domain_lookup = cocoon.utilities.load_json_file("config/domain_settings.json")
+    scenario = scenarios["transaction"]
+
+    async def fake_load_data(api_factory, single_requests, file_type, **kwargs):
+        return len(single_requests)
+
+    start = time.perf_counter()
+
+    with mock.patch.object(cocoon.cocoon, "_load_data", fake_load_data):
+        responses = asyncio.run(
+            cocoon.cocoon._construct_batches(
+                api_factory=None,
+                data_frame=data_frame,
+                # The transactions are loaded into a portfolio for each code
+                mapping_required={**scenario["mapping_required"], "code": "portfolio"},
+                mapping_optional=scenario["mapping_optional"],
+                property_columns=scenario["property_columns"],
+                properties_scope="Benchmark",
+                instrument_identifier_mapping=scenario["identifier_mapping"],
+                batch_size=batch_size,
+                file_type="transaction",
+                domain_lookup=domain_lookup,
+                sub_holding_keys=scenario["sub_holding_keys"],
+                sub_holding_keys_scope="Benchmark",
+                parallelism=parallelism,
+                max_processes=processes,
+                scope="Benchmark",
+                full_key_format=domain_lookup["transaction"]["full_key_format"],
+                unique_identifiers=["Figi", "Isin"],
+                thread_pool=get_thread_pool(5).thread_pool,
+            )
+        )
+
+    elapsed = time.perf_counter() - start
+    assert sum(responses["success"]) == len(data_frame)
+
+    return len(data_frame) / elapsed
+
+
+def main(rows: int, batch_size: int, processes: list):
+    # Spread the rows over several portfolios so that their batches can be converted concurrently
+    data_frame = synthetic_data_frame(rows).assign(
+        portfolio=lambda df: "Portfolio" + (df.index % 8).astype(str)
+    )
+
+    thread = rows_per_second(data_frame, batch_size, "thread", None)
+    print(f"{'parallelism':<20}{'rows/s':>12}{'speedup':>10}")
+    print(f"{'thread':<20}{thread:>12,.0f}{1:>9.1f}x")
+
+    for process_count in processes:
+        # Start the workers before timing as each has to import lusid and pandas
+        pool = get_process_pool(process_count)
+        list(pool.map(abs, range(process_count)))
+
+        process = rows_per_second(data_frame, batch_size, "process", process_count)
+        label = f"process ({process_count})"
+        print(f"{label:<20}{process:>12,.0f}{process / thread:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=200000, help="rows to convert")
+    parser.add_argument("--batch_size", type=int, default=2000, help="rows per batch")
+    parser.add_argument(
+        "--processes", type=int, nargs="+", default=[1, 2, 4], help="pool sizes"
+    )
+    arguments = parser.parse_args()
+    main(
+        rows=arguments.rows,
+        batch_size=arguments.batch_size,
+        processes=arguments.processes,
+    )
@@ -0,0 +1,138 @@
+"""
+Measures the throughput and utilisation of loading transactions where one portfolio has far more transactions than the
+rest, comparing global ordering, which waits for a batch of every portfolio to complete before the next batch of any
+portfolio starts, against loading each batch of each portfolio as soon as there is room for another batch in flight.
+The requests to LUSID are simulated with a fixed latency.
+
+Run from the root of the repository with:
+
+    python -m tests.benchmarks.benchmark_skewed_transactions --large 5000 --portfolios 200 --latency 0.2
+"""
+
+import argparse
+import asyncio
+from unittest import mock
+import numpy as np
+import pandas as pd
+from lusidtools import cocoon
+from lusidtools.cocoon.async_tools import get_thread_pool
+
+
+def run(data_frame, ordering, batch_size, latency, max_batches_in_flight):
+    """
+    Loads the transactions with simulated requests and returns the scheduler statistics
+    """
+
+    domain_lookup = cocoon.utilities.load_json_file("config/domain_settings.json")
+
+    async def fake_load_data(api_factory, single_requests, file_type, code, **kwargs):
+        await asyncio.sleep(latency)
+        return len(single_requests)
+
+    with mock.patch.object(cocoon.cocoon, "_load_data", fake_load_data):
+        responses = asyncio.run(
+            cocoon.cocoon._construct_batches(
+                api_factory=None,
+                data_frame=data_frame,
+                mapping_required={
+                    "code": "code",
+                    "transaction_id": "id",
+                    "type": "type",
+                    "transaction_date": "transaction_date",
+                    "settlement_date": "transaction_date",
+                    "units": "units",
+                    "transaction_price.price": "price",
+                    "transaction_price.type": "price_type",
+                    "total_consideration.amount": "total_consideration",
+                    "total_consideration.currency": "currency",
+                },
+                mapping_optional={},
+                property_columns=[],
+                properties_scope="Benchmark",
+                instrument_identifier_mapping={"Figi": "figi"},
+                batch_size=batch_size,
+                file_type="transaction",
+                domain_lookup=domain_lookup,
+                sub_holding_keys=[],
+                sub_holding_keys_scope="Benchmark",
+                max_batches_in_flight=max_batches_in_flight,
+                ordering=ordering,
+                scope="Benchmark",
+                full_key_format=domain_lookup["transaction"]["full_key_format"],
+                unique_identifiers=["Figi"],
+                thread_pool=get_thread_pool(5).thread_pool,
+            )
+        )
+        return len(responses["success"]), responses["scheduler"]
+
+
+def main(large, portfolios, transactions, batch_size, latency, max_batches_in_flight):
+    codes = np.concatenate(
+        [
+            np.repeat("Fund0", large),
+            np.repeat([f"Fund{i}" for i in range(1, portfolios + 1)], transactions),
+        ]
+    )
+    data_frame = pd.DataFrame(
+        {
+            "code": codes,
+            "id": [f"txn_{i}" for i in range(len(codes))],
+            "figi": "BBG000C05BD1",
+            "transaction_date": "2020-01-01",
+            "type": "Buy",
+            "units": 100,
+            "price": 10.0,
+            "price_type": "Price",
+            "total_consideration": 1000.0,
+            "currency": "GBP",
+        }
+    )
+
+    print(
+        f"One portfolio of {large} transactions and {portfolios} of {transactions}, "
+        f"{max_batches_in_flight} batches in flight"
+    )
+    print(f"{'ordering':<12}{'requests/s':>12}{'elapsed s':>12}{'utilisation':>13}")
+
+    for ordering in ["global", "none"]:
+        requests, scheduler = run(
+            data_frame, ordering, batch_size, latency, max_batches_in_flight
+        )
+        elapsed = scheduler["elapsed"]
+        print(
+            f"{ordering:<12}{requests / elapsed:>12,.1f}{elapsed:>12.2f}"
+            f"{scheduler['utilisation']:>13.0%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--large", type=int, default=5000, help="transactions in the large portfolio"
+    )
+    parser.add_argument("--portfolios", type=int, default=200, help="small portfolios")
+    parser.add_argument(
+        "--transactions",
+        type=int,
+        default=5,
+        help="transactions in each small portfolio",
+    )
+    parser.add_argument("--batch_size", type=int, default=100, help="batch size")
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="seconds per request"
+    )
+    parser.add_argument(
+        "--max_batches_in_flight",
+        type=int,
+        default=10,
+        help="the bound on the batches in flight",
+    )
+    arguments = parser.parse_args()
+    main(
+        large=arguments.large,
+        portfolios=arguments.portfolios,
+        transactions=arguments.transactions,
+        batch_size=arguments.batch_size,
+        latency=arguments.latency,
+        max_batches_in_flight=arguments.max_batches_in_flight,
+    )
@@ -0,0 +1,296 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import pandas as pd
+from parameterized import parameterized
+from lusidtools.apps import upsert_holdings
+from lusidtools.cocoon import (
+    combine_responses,
+    group_data_frame_chunks,
+    load_data_to_df_and_detect_delimiter,
+    load_data_to_df_chunks_and_detect_delimiter,
+    parse_args,
+)
+from lusidtools.logger import LusidLogger
+
+test_data_root = Path(__file__).parent.joinpath("test_data")
+
+
+class ChunkedLoadingTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        LusidLogger("debug")
+
+    @parameterized.expand(
+        [
+            [
+                f"header:{num_header}_footer:{num_footer}_file:{file_name}_chunk_size:{chunk_size}",
+                file_name,
+                num_header,
+                num_footer,
+                chunk_size,
+            ]
+            for file_name in ["instruments.csv", "instruments_tab.csv"]
+            for num_header in [0, 2]
+            for num_footer in [0, 2]
+            for chunk_size in [1, 4, 1000]
+        ]
+    )
+    def test_chunks_match_python_parser(
+        self, _, file_name, num_header, num_footer, chunk_size
+    ) -> None:
+        """
+        Tests that reading a file in chunks with the C parser gives the same data as reading the whole file with the
+        python parser, including skipping the header and footer lines and detecting the delimiter
+
+        :param str file_name: The name of the file to read
+        :param int num_header: The number of lines before the column titles
+        :param int num_footer: The number of lines after the data
+        :param int chunk_size: The number of rows in each chunk
+
+        :return: None
+        """
+
+        file_path = str(test_data_root.joinpath(file_name))
+        args = {
+            "file_path": file_path,
+            "num_header": num_header,
+            "num_footer": num_footer,
+            "delimiter": None,
+            "line_terminator": r"\n",
+            "chunk_size": chunk_size,
+        }
+
+        chunks = list(load_data_to_df_chunks_and_detect_delimiter(dict(args)))
+        whole_file = load_data_to_df_and_detect_delimiter(dict(args))
+        expected = pd.read_csv(
+            file_path,
+            delimiter="\t" if "tab" in file_name else ",",
+            header=num_header,
+            skipfooter=num_footer,
+            engine="python",
+        )
+
+        self.assertTrue(all(len(chunk) <= chunk_size for chunk in chunks))
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+        pd.testing.assert_frame_equal(whole_file, expected)
+
+    @parameterized.expand(
+        [["whole_file", None], ["chunk_size:1", 1], ["chunk_size:4", 4]]
+    )
+    def test_quoted_field_over_several_lines_with_footer(self, _, chunk_size) -> None:
+        """
+        Tests that a quoted field which spans several lines is read as part of a single row, so that the footer lines
+        are still skipped and are not loaded as data
+
+        :param int chunk_size: The number of rows in each chunk, None to load the whole file
+
+        :return: None
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "multi_line.csv")
+            with open(file_path, "w") as file:
+                file.write('preamble\na,b,c\n1,"multi\nline",3\n\n4,x,6\nfooter1\n')
+
+            args = {
+                "file_path": file_path,
+                "num_header": 1,
+                "num_footer": 1,
+                "delimiter": None,
+                "line_terminator": r"\n",
+                "chunk_size": chunk_size,
+            }
+
+            chunks = list(load_data_to_df_chunks_and_detect_delimiter(args))
+            expected = pd.read_csv(file_path, header=1, skipfooter=1, engine="python")
+
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+        self.assertEqual(list(expected["b"]), ["multi\nline", "x"])
+
+    def test_no_chunk_size_loads_whole_file(self) -> None:
+        """
+        Tests that the whole file is loaded as a single chunk if no chunk size is specified
+
+        :return: None
+        """
+
+        args, _ = parse_args(
+            ["-f", str(test_data_root.joinpath("instruments.csv")), "-m", "mapping"]
+        )
+
+        self.assertIsNone(args["chunk_size"])
+        self.assertEqual(
+            len(list(load_data_to_df_chunks_and_detect_delimiter(args))), 1
+        )
+        self.assertEqual(
+            parse_args(["-f", "file", "-m", "mapping", "-cs", "500"])[0]["chunk_size"],
+            500,
+        )
+
+    def test_group_chunks_keeps_groups_together(self) -> None:
+        """
+        Tests that rows of the same group which are split across chunks are carried over into a single chunk
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {
+                "portfolio": ["A", "A", "A", "B", "B", "A", "C"],
+                "date": ["2020-01-01"] * 5 + ["2020-01-02"] * 2,
+                "units": range(7),
+            }
+        )
+        chunks = [data_frame.iloc[i : i + 2] for i in range(0, len(data_frame), 2)]
+
+        grouped = list(group_data_frame_chunks(chunks, ["portfolio", "date"]))
+
+        self.assertEqual(
+            [list(chunk["units"]) for chunk in grouped], [[0, 1, 2], [3, 4], [5], [6]]
+        )
+
+    def test_group_chunks_rejects_unsorted_data(self) -> None:
+        """
+        Tests that a group which reappears after it has been yielded raises an error
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {"portfolio": ["A", "B", "A", "B"], "units": range(4)}
+        )
+        chunks = [data_frame.iloc[i : i + 1] for i in range(len(data_frame))]
+
+        with self.assertRaises(ValueError):
+            list(group_data_frame_chunks(chunks, ["portfolio"]))
+
+    def test_combine_responses(self) -> None:
+        """
+        Tests that the responses from each chunk are combined in order
+
+        :return: None
+        """
+
+        responses = [
+            {"quotes": {"errors": [], "success": [1, 2]}},
+            {"quotes": {"errors": ["error"], "success": [3]}},
+        ]
+
+        self.assertEqual(
+            combine_responses(responses, "quotes"),
+            {"quotes": {"errors": ["error"], "success": [1, 2, 3]}},
+        )
+        self.assertEqual(
+            combine_responses([], "quotes"), {"quotes": {"errors": [], "success": []}}
+        )
+
+    def test_combine_responses_with_scheduler_statistics(self) -> None:
+        """
+        Tests that the scheduler statistics of each chunk are combined into the statistics of the whole load rather
+        than extended like the responses
+
+        :return: None
+        """
+
+        responses = [
+            {
+                "transactions": {
+                    "errors": [],
+                    "success": [1],
+                    "scheduler": {
+                        "ordering": "none",
+                        "max_batches_in_flight": 4,
+                        "elapsed": 1.0,
+                        "utilisation": 1.0,
+                        "skipped": 0,
+                    },
+                }
+            },
+            {
+                "transactions": {
+                    "errors": [],
+                    "success": [2],
+                    "scheduler": {
+                        "ordering": "none",
+                        "max_batches_in_flight": 4,
+                        "elapsed": 3.0,
+                        "utilisation": 0.2,
+                        "skipped": 2,
+                    },
+                }
+            },
+        ]
+
+        self.assertEqual(
+            combine_responses(responses, "transactions"),
+            {
+                "transactions": {
+                    "errors": [],
+                    "success": [1, 2],
+                    "scheduler": {
+                        "ordering": "none",
+                        "max_batches_in_flight": 4,
+                        "elapsed": 4.0,
+                        "utilisation": 0.4,
+                        "skipped": 2,
+                    },
+                }
+            },
+        )
+
+    def test_load_holdings_in_chunks(self) -> None:
+        """
+        Tests that the holdings app loads each chunk separately without splitting a holding set across chunks
+
+        :return: None
+        """
+
+        temp_dir = tempfile.mkdtemp()
+        file_path = os.path.join(temp_dir, "holdings.csv")
+        mapping_path = os.path.join(temp_dir, "mapping.json")
+
+        pd.DataFrame(
+            {
+                "portfolio": ["A", "A", "A", "B", "B", "A", "A"],
+                "date": ["2020-01-01"] * 5 + ["2020-01-02"] * 2,
+                "figi": "BBG000C05BD1",
+                "units": range(7),
+            }
+        ).to_csv(file_path, index=False)
+
+        with open(mapping_path, "w") as mapping_file:
+            json.dump(
+                {
+                    "holdings": {
+                        "required": {
+                            "code": "portfolio",
+                            "effective_at": "date",
+                            "tax_lots.units": "units",
+                        },
+                        "identifier_mapping": {"Figi": "figi"},
+                    }
+                },
+                mapping_file,
+            )
+
+        args, _ = parse_args(
+            ["-f", file_path, "-m", mapping_path, "-s", "TestScope", "-cs", "2"]
+        )
+
+        def fake_load_from_data_frame(data_frame, file_type, **kwargs):
+            return {file_type: {"errors": [], "success": [list(data_frame["units"])]}}
+
+        with mock.patch.object(upsert_holdings, "ApiClientFactory"), mock.patch.object(
+            upsert_holdings, "load_from_data_frame", fake_load_from_data_frame
+        ), mock.patch.object(
+            upsert_holdings.cocoon_printer,
+            "format_holdings_response",
+            return_value=([], []),
+        ):
+            response = upsert_holdings.load_holdings(args)
+
+        self.assertEqual(response["holdings"]["success"], [[0, 1, 2], [3, 4], [5, 6]])
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+import unittest
+from unittest import mock
+from lusidtools.cocoon import async_tools
+from lusidtools.cocoon.async_tools import (
+    get_conversion_thread_pool,
+    get_thread_pool,
+    get_thread_pool_metrics,
+    run_in_executor,
+    shutdown_thread_pools,
+)
+from lusidtools import logger
+
+
+@run_in_executor
+def current_thread_name(**kwargs):
+    return threading.current_thread().name
+
+
+class CocoonTestsThreadPools(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+
+    def setUp(self) -> None:
+        shutdown_thread_pools()
+
+    def tearDown(self) -> None:
+        shutdown_thread_pools()
+
+    def test_thread_pool_is_shared(self) -> None:
+        """
+        Tests that the same thread pool is returned for the same number of workers
+
+        :return: None
+        """
+
+        self.assertIs(get_thread_pool(3), get_thread_pool(3))
+        self.assertIsNot(get_thread_pool(3), get_thread_pool(4))
+        self.assertEqual(list(get_thread_pool_metrics().keys()), [3, 4])
+
+    def test_conversion_thread_pool_is_shared(self) -> None:
+        """
+        Tests that the conversion thread pool has a single worker, is kept apart from the other shared thread pools
+        and is shut down and recreated with them
+
+        :return: None
+        """
+
+        conversion_thread_pool = get_conversion_thread_pool()
+
+        self.assertIs(get_conversion_thread_pool(), conversion_thread_pool)
+        self.assertIsNot(get_thread_pool(1), conversion_thread_pool)
+        self.assertEqual(conversion_thread_pool.metrics()["max_workers"], 1)
+
+        shutdown_thread_pools()
+
+        self.assertTrue(conversion_thread_pool.thread_pool.is_shutdown)
+        self.assertIsNot(get_conversion_thread_pool(), conversion_thread_pool)
+
+    def test_default_thread_pool_size_from_environment(self) -> None:
+        """
+        Tests that the size of the default thread pool can be set with an environment variable
+
+        :return: None
+        """
+
+        with mock.patch.dict(
+            os.environ, {async_tools.THREAD_POOL_MAX_WORKERS_ENV: "7"}
+        ):
+            self.assertEqual(get_thread_pool().metrics()["max_workers"], 7)
+
+        with mock.patch.dict(
+            os.environ, {async_tools.THREAD_POOL_MAX_WORKERS_ENV: "zero"}
+        ):
+            with self.assertRaises(ValueError):
+                get_thread_pool()
+
+    def test_thread_pool_recreated_after_shutdown(self) -> None:
+        """
+        Tests that a thread pool is recreated if it is used again after being shut down
+
+        :return: None
+        """
+
+        thread_pool = get_thread_pool(2)
+        thread_pool.shutdown()
+
+        self.assertIsNot(get_thread_pool(2), thread_pool)
+
+        shutdown_thread_pools()
+
+        self.assertEqual(get_thread_pool_metrics(), {})
+
+    def test_run_in_executor_uses_default_thread_pool(self) -> None:
+        """
+        Tests that awaiting a wrapped function without a thread pool reuses the shared default pool
+
+        :return: None
+        """
+
+        async def run_many():
+            return await asyncio.gather(*[current_thread_name() for _ in range(50)])
+
+        asyncio.run(run_many())
+        asyncio.run(run_many())
+
+        metrics = get_thread_pool_metrics()
+
+        self.assertEqual(list(metrics.keys()), [async_tools.get_default_max_workers()])
+        default_metrics = metrics[async_tools.get_default_max_workers()]
+        self.assertEqual(default_metrics["submitted"], 100)
+        self.assertEqual(default_metrics["completed"], 100)
+        self.assertLessEqual(default_metrics["threads"], default_metrics["max_workers"])
+
+    def test_run_in_executor_uses_provided_thread_pool(self) -> None:
+        """
+        Tests that a thread pool provided to a wrapped function is used instead of the default pool
+
+        :return: None
+        """
+
+        thread_pool = async_tools.ThreadPool(1)
+
+        async def run_one():
+            return await current_thread_name(thread_pool=thread_pool.thread_pool)
+
+        asyncio.run(run_one())
+
+        self.assertEqual(thread_pool.metrics()["completed"], 1)
+        self.assertEqual(get_thread_pool_metrics(), {})
+        thread_pool.shutdown()
+
+    def test_metrics_report_queue_depth_and_active_workers(self) -> None:
+        """
+        Tests that the metrics count the tasks waiting for a worker and those being run
+
+        :return: None
+        """
+
+        thread_pool = get_thread_pool(1)
+        release = threading.Event()
+
+        first = thread_pool.thread_pool.submit(release.wait)
+        second = thread_pool.thread_pool.submit(release.wait)
+
+        # Wait for the single worker to pick up the first task
+        while thread_pool.metrics()["active_workers"] != 1:
+            threading.Event().wait(0.01)
+
+        self.assertEqual(thread_pool.metrics()["queue_depth"], 1)
+
+        release.set()
+        first.result()
+        second.result()
+
+        metrics = thread_pool.metrics()
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["active_workers"], 0)
+        self.assertEqual(metrics["completed"], 2)
@@ -0,0 +1,312 @@
+import email.utils
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import lusid
+import pandas as pd
+from parameterized import parameterized
+from lusidtools import cocoon
+from lusidtools.cocoon import async_transport
+from lusidtools import logger
+
+version = {
+    "effectiveFrom": "2020-01-01T00:00:00.0000000+00:00",
+    "asAtDate": "2020-01-01T00:00:00.0000000+00:00",
+}
+
+
+class StubLusidHandler(BaseHTTPRequestHandler):
+    """
+    A stub of the LUSID endpoints used to load instruments and transactions. Portfolios with the code 'FailFund'
+    return a 400, the first request for 'ThrottledFund' returns a 429 with a Retry-After header in seconds and the
+    first request for 'BusyFund' returns a 429 with a Retry-After header which is an HTTP date.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/instruments/identifierTypes":
+            return self.send_json(
+                200,
+                {
+                    "values": [
+                        {
+                            "identifierType": identifier_type,
+                            "propertyKey": f"Instrument/default/{identifier_type}",
+                            "isUniqueIdentifierType": True,
+                        }
+                        for identifier_type in ["Figi", "ClientInternal"]
+                    ]
+                },
+            )
+        self.send_json(404, {"title": "Not found"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+        with self.server.lock:
+            self.server.requests.append(
+                {
+                    "method": self.command,
+                    "path": self.path,
+                    "body": body,
+                    "authorization": self.headers["Authorization"],
+                }
+            )
+            throttle = (
+                "ThrottledFund" in self.path and "ThrottledFund" not in self.server.seen
+            )
+            busy = "BusyFund" in self.path and "BusyFund" not in self.server.seen
+            self.server.seen.add(self.path.split("/")[-2])
+
+        if "FailFund" in self.path:
+            return self.send_json(400, {"title": "Invalid transactions"})
+
+        if throttle:
+            return self.send_json(
+                429, {"title": "Too many requests"}, {"Retry-After": "0"}
+            )
+
+        if busy:
+            return self.send_json(
+                429,
+                {"title": "Too many requests"},
+                {"Retry-After": email.utils.formatdate(usegmt=True)},
+            )
+
+        if self.path == "/api/instruments":
+            return self.send_json(
+                201,
+                {
+                    "values": {
+                        correlation_id: {
+                            "lusidInstrumentId": f"LUID_{correlation_id}",
+                            "version": version,
+                            "name": instrument["name"],
+                            "identifiers": {},
+                            "state": "Active",
+                        }
+                        for correlation_id, instrument in body.items()
+                    },
+                    "failed": {},
+                },
+            )
+
+        self.send_json(201, {"version": version, "href": self.path})
+
+
+class CocoonTestsAsyncTransport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubLusidHandler)
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.api_factory = lusid.utilities.ApiClientFactory(
+            token="stub-token", api_url=f"http://127.0.0.1:{cls.server.server_port}"
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        self.server.requests = []
+        self.server.seen = set()
+
+    def load(self, file_type, data_frame, mapping_required, use_async_transport):
+        self.setUp()
+
+        responses = cocoon.cocoon.load_from_data_frame(
+            api_factory=self.api_factory,
+            scope="TestScope",
+            data_frame=data_frame,
+            mapping_required=mapping_required,
+            mapping_optional={},
+            file_type=file_type,
+            identifier_mapping={"Figi": "figi", "ClientInternal": "client_internal"},
+            batch_size=2,
+            async_transport=use_async_transport,
+        )
+
+        requests = sorted(self.server.requests, key=lambda r: json.dumps(r))
+
+        return responses[file_type], requests
+
+    @parameterized.expand(
+        [
+            [
+                "Transactions across portfolios with errors and retries",
+                "transactions",
+                pd.DataFrame(
+                    {
+                        "portfolio_code": ["GoodFund"] * 3
+                        + ["FailFund", "ThrottledFund"],
+                        "id": [f"txn_{i}" for i in range(5)],
+                        "type": "Buy",
+                        "trade_date": "2020-01-0" + pd.Series(range(1, 6)).astype(str),
+                        "units": [100, 200, 300, 400, 500],
+                        "amount": [1.5, 2.5, 3.5, 4.5, 5.5],
+                        "currency": "GBP",
+                        "figi": [
+                            "BBG000C05BD1",
+                            None,
+                            "BBG000BLNNH6",
+                            "BBG000PN88Q7",
+                            "BBG000PN88Q7",
+                        ],
+                        "client_internal": ["imd_1", "imd_2", None, "imd_4", "imd_5"],
+                    }
+                ),
+                {
+                    "code": "portfolio_code",
+                    "transaction_id": "id",
+                    "type": "type",
+                    "transaction_date": "trade_date",
+                    "settlement_date": "trade_date",
+                    "units": "units",
+                    "total_consideration.amount": "amount",
+                    "total_consideration.currency": "currency",
+                },
+                3,
+                1,
+            ],
+            [
+                "Instruments in several batches",
+                "instruments",
+                pd.DataFrame(
+                    {
+                        "name": ["BP", "Burford", "IBM"],
+                        "figi": ["BBG000C05BD1", "BBG000PN88Q7", None],
+                        "client_internal": ["imd_1", None, "imd_3"],
+                    }
+                ),
+                {"name": "name"},
+                2,
+                0,
+            ],
+        ]
+    )
+    @unittest.skipIf(
+        async_transport.aiohttp is None, "The async transport requires aiohttp"
+    )
+    def test_async_transport_matches_thread_pool(
+        self,
+        _,
+        file_type,
+        data_frame,
+        mapping_required,
+        expected_success,
+        expected_errors,
+    ) -> None:
+        """
+        Tests that the async transport sends the same requests as the thread pool and returns the same responses
+
+        :param str file_type: The file type to load
+        :param pd.DataFrame data_frame: The data to load
+        :param dict mapping_required: The required mapping
+        :param int expected_success: The number of successful batches
+        :param int expected_errors: The number of batches which fail
+
+        :return: None
+        """
+
+        thread_pool_responses, thread_pool_requests = self.load(
+            file_type, data_frame.copy(), mapping_required, False
+        )
+        async_responses, async_requests = self.load(
+            file_type, data_frame.copy(), mapping_required, True
+        )
+
+        self.assertEqual(async_requests, thread_pool_requests)
+        self.assertEqual(async_requests[0]["authorization"], "Bearer stub-token")
+
+        for responses in [thread_pool_responses, async_responses]:
+            self.assertEqual(
+                set(responses.keys()), {"errors", "success", "batches", "scheduler"}
+            )
+            self.assertEqual(len(responses["success"]), expected_success)
+            self.assertEqual(len(responses["errors"]), expected_errors)
+
+        self.assertCountEqual(
+            async_responses["success"], thread_pool_responses["success"]
+        )
+
+        for error in async_responses["errors"]:
+            self.assertIsInstance(error, lusid.exceptions.ApiException)
+            self.assertEqual(error.status, 400)
+            self.assertEqual(json.loads(error.body)["title"], "Invalid transactions")
+
+    @unittest.skipIf(
+        async_transport.aiohttp is None, "The async transport requires aiohttp"
+    )
+    def test_unsupported_file_type_uses_thread_pool(self) -> None:
+        """
+        Tests that file types which need more than one request per batch are not prepared by the async transport
+
+        :return: None
+        """
+
+        transport = async_transport.AsyncTransport(api_factory=self.api_factory)
+
+        self.assertNotIn("portfolio", transport.supported_file_types)
+
+        with self.assertRaises(ValueError):
+            transport.prepare(lambda api_factory, single_requests: None, [])
+
+    @unittest.skipIf(
+        async_transport.aiohttp is None, "The async transport requires aiohttp"
+    )
+    def test_retry_after_http_date_is_retried_by_the_retry_policy(self) -> None:
+        """
+        Tests that a throttled request whose Retry-After header is an HTTP date is raised by the async transport
+        with the headers of the response, sent once, and retried by the RetryPolicy rather than failing the load
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {
+                "portfolio_code": ["BusyFund"],
+                "id": ["txn_0"],
+                "type": "Buy",
+                "trade_date": "2020-01-01",
+                "units": [100],
+                "amount": [1.5],
+                "currency": "GBP",
+                "figi": ["BBG000C05BD1"],
+                "client_internal": ["imd_1"],
+            }
+        )
+        mapping_required = {
+            "code": "portfolio_code",
+            "transaction_id": "id",
+            "type": "type",
+            "transaction_date": "trade_date",
+            "settlement_date": "trade_date",
+            "units": "units",
+            "total_consideration.amount": "amount",
+            "total_consideration.currency": "currency",
+        }
+
+        responses, requests = self.load(
+            "transactions", data_frame, mapping_required, True
+        )
+
+        self.assertEqual(responses["errors"], [])
+        self.assertEqual(len(responses["success"]), 1)
+        self.assertEqual(len(requests), 2)
+        self.assertEqual([batch["retries"] for batch in responses["batches"]], [1])
@@ -0,0 +1,224 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+import lusid
+import pandas as pd
+from lusidtools import cocoon
+from lusidtools.cocoon import batch_controller
+from lusidtools.cocoon.async_tools import get_thread_pool
+from lusidtools.cocoon.batch_controller import AdaptiveBatchController
+from lusidtools import logger
+
+
+class CocoonTestsBatchController(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+        cls.domain_lookup = cocoon.utilities.load_json_file(
+            "config/domain_settings.json"
+        )
+
+    def test_additive_increase_multiplicative_decrease(self) -> None:
+        """
+        Tests that successes grow the batch size and concurrency additively, throttling halves them once for each
+        window of batches and slow, oversized or invalid batches are handled within the bounds
+
+        :return: None
+        """
+
+        controller = AdaptiveBatchController(
+            min_batch_size=100,
+            initial_batch_size=400,
+            initial_concurrency=4,
+            target_latency=5,
+            max_payload_bytes=1000,
+        )
+        controller.start(batch_size=1000, max_batches_in_flight=8)
+
+        now = time.monotonic()
+        decision = controller.record(rows=400, started_at=now, status=200)
+        self.assertEqual(decision["action"], "increase")
+        self.assertEqual((controller.batch_size, controller.concurrency), (500, 4))
+
+        # A batch sent before the throttled one completes after the decrease, it is not counted again
+        decision = controller.record(rows=500, started_at=now, status=429)
+        self.assertEqual(decision["action"], "decrease")
+        self.assertEqual((controller.batch_size, controller.concurrency), (250, 2))
+        decision = controller.record(rows=500, started_at=now, status=503)
+        self.assertEqual(decision["action"], "hold")
+        self.assertEqual((controller.batch_size, controller.concurrency), (250, 2))
+
+        # A slow batch which was sent after the decrease
+        started_at = time.monotonic()
+        with mock.patch.object(
+            batch_controller.time, "monotonic", return_value=started_at + 10
+        ):
+            decision = controller.record(rows=250, started_at=started_at, status=200)
+        self.assertEqual(decision["action"], "decrease_batch_size")
+        self.assertEqual(controller.batch_size, 125)
+
+        decision = controller.record(
+            rows=125, started_at=time.monotonic(), status=200, payload_bytes=2000
+        )
+        self.assertEqual(decision["action"], "shrink_to_payload")
+        self.assertEqual(controller.batch_size, 100)
+
+        decision = controller.record(rows=100, started_at=time.monotonic(), status=400)
+        self.assertEqual(decision["action"], "hold")
+
+        # The concurrency grows by one for each window of successful batches
+        for _ in range(40):
+            controller.record(rows=100, started_at=time.monotonic(), status=200)
+        self.assertEqual((controller.batch_size, controller.concurrency), (1000, 8))
+
+        self.assertEqual(len(controller.decisions), 46)
+        self.assertGreater(controller.error_rate, 0)
+
+    def test_invalid_bounds(self) -> None:
+        """
+        Tests that invalid bounds are rejected
+
+        :return: None
+        """
+
+        with self.assertRaises(ValueError):
+            AdaptiveBatchController(decrease_factor=1)
+
+        with self.assertRaises(ValueError):
+            AdaptiveBatchController(min_batch_size=0)
+
+    def test_estimate_payload_bytes(self) -> None:
+        """
+        Tests that the size of a batch's request body is estimated from a sample of the requests
+
+        :return: None
+        """
+
+        requests = [
+            lusid.models.InstrumentDefinition(
+                name="Instrument",
+                identifiers={
+                    "Figi": lusid.models.InstrumentIdValue(value="BBG000C05BD1")
+                },
+            )
+        ] * 25
+
+        self.assertIsNone(AdaptiveBatchController().estimate_payload_bytes(requests))
+
+        controller = AdaptiveBatchController(max_payload_bytes=1000)
+        single = controller.estimate_payload_bytes(requests[:1])
+        self.assertEqual(controller.estimate_payload_bytes(requests), single * 25)
+
+    def test_construct_batches_adapts_batch_size_and_concurrency(self) -> None:
+        """
+        Tests that throttled batches shrink the batches created after them and the number loaded at once, while
+        every row is still loaded once
+
+        :return: None
+        """
+
+        loaded = []
+        state = {"active": 0, "max_active": 0, "throttled": False}
+
+        async def fake_load_data(
+            api_factory, single_requests, file_type, code, **kwargs
+        ):
+            state["active"] += 1
+            state["max_active"] = max(state["max_active"], state["active"])
+            await asyncio.sleep(0.01)
+            state["active"] -= 1
+
+            if not state["throttled"]:
+                state["throttled"] = True
+                return lusid.exceptions.ApiException(status=429)
+
+            loaded.append((code, [request.name for request in single_requests]))
+            return len(single_requests)
+
+        data_frame = pd.DataFrame(
+            {
+                "name": [f"Instrument {i}" for i in range(100)],
+                "figi": [f"BBG{i:09d}" for i in range(100)],
+            }
+        )
+        controller = AdaptiveBatchController(
+            min_batch_size=5, batch_size_increment=1, initial_concurrency=1
+        )
+
+        with mock.patch.object(cocoon.cocoon, "_load_data", fake_load_data):
+            responses = asyncio.run(
+                cocoon.cocoon._construct_batches(
+                    api_factory=None,
+                    data_frame=data_frame,
+                    mapping_required={"name": "name"},
+                    mapping_optional={},
+                    property_columns=[],
+                    properties_scope="TestScope",
+                    instrument_identifier_mapping={"Figi": "figi"},
+                    batch_size=20,
+                    file_type="instrument",
+                    domain_lookup=self.domain_lookup,
+                    sub_holding_keys=[],
+                    sub_holding_keys_scope="TestScope",
+                    max_batches_in_flight=4,
+                    batch_controller=controller,
+                    scope="TestScope",
+                    full_key_format=self.domain_lookup["instrument"]["full_key_format"],
+                    unique_identifiers=["Figi"],
+                    thread_pool=get_thread_pool(2).thread_pool,
+                )
+            )
+
+        self.assertEqual(len(responses["errors"]), 1)
+        self.assertEqual(controller.decisions[0]["action"], "decrease")
+        # The first batch is throttled, so the next is half the size and then grows by a row for each success
+        self.assertEqual([len(names) for _, names in loaded][:2], [10, 11])
+        self.assertEqual(controller.decisions[-1]["concurrency"], 4)
+        self.assertEqual(
+            sorted(name for _, names in loaded for name in names),
+            sorted(data_frame["name"][20:]),
+        )
+        self.assertLessEqual(state["max_active"], 4)
+
+    def test_portfolio_batches_keep_their_order(self) -> None:
+        """
+        Tests that the adaptive batches for portfolio specific file types load the rows of each portfolio in order
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {
+                "code": ["FundA", "FundB"] * 10,
+                "id": [f"txn_{i}" for i in range(20)],
+            }
+        )
+        controller = AdaptiveBatchController(min_batch_size=1, batch_size_increment=1)
+        controller.start(batch_size=3, max_batches_in_flight=2)
+        controller.batch_size = 1
+
+        batches = list(
+            cocoon.cocoon._create_adaptive_batches(
+                data_frame=data_frame,
+                mapping_required={"code": "code"},
+                file_type="transaction",
+                domain_lookup=self.domain_lookup,
+                batch_controller=controller,
+            )
+        )
+
+        # Each synchronous batch has a batch for each portfolio
+        self.assertEqual(
+            [(code, sync_batch_number) for _, code, _, sync_batch_number in batches],
+            [(code, i) for i in range(10) for code in ["FundA", "FundB"]],
+        )
+        self.assertEqual(
+            [
+                transaction_id
+                for batch, code, _, _ in batches
+                if code == "FundA"
+                for transaction_id in batch["id"]
+            ],
+            [f"txn_{i}" for i in range(0, 20, 2)],
+        )
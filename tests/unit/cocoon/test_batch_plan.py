@@ -0,0 +1,267 @@
+import unittest
+import numpy as np
+import pandas as pd
+from parameterized import parameterized
+from lusidtools import cocoon
+from lusidtools.cocoon.batch_plan import BatchPlan
+from lusidtools import logger
+
+
+class CocoonTestsBatchPlan(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+        cls.domain_lookup = cocoon.utilities.load_json_file(
+            "config/domain_settings.json"
+        )
+
+    def test_holdings_have_a_sync_batch_for_each_effective_date(self) -> None:
+        """
+        Tests that holdings have a synchronous batch for each effective date, in order of first appearance, with a
+        batch for each portfolio holding all of its rows for that date whatever the batch size
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {
+                "code": ["FundB", "FundA", "FundA", "FundB", "FundA", "FundB"],
+                "effective_at": pd.to_datetime(
+                    [
+                        "2020-01-02",
+                        "2020-01-02",
+                        "2020-01-01",
+                        "2020-01-02",
+                        "2020-01-02",
+                        "2020-01-01",
+                    ]
+                ),
+                "units": range(6),
+            }
+        )
+
+        plan = BatchPlan(
+            data_frame=data_frame,
+            mapping_required={"code": "code", "effective_at": "effective_at"},
+            file_type="holdings",
+            batch_size=1,
+            domain_lookup=self.domain_lookup,
+        )
+
+        self.assertEqual(
+            plan.to_data_frame()[["sync_batch", "code", "rows"]].values.tolist(),
+            [[0, "FundB", 2], [0, "FundA", 2], [1, "FundA", 1], [1, "FundB", 1]],
+        )
+        self.assertEqual(
+            [
+                (list(batch["units"]), code, str(effective_at)[:10], sync_batch)
+                for batch, code, effective_at, sync_batch in plan.batches()
+            ],
+            [
+                ([0, 3], "FundB", "2020-01-02", 0),
+                ([1, 4], "FundA", "2020-01-02", 0),
+                ([2], "FundA", "2020-01-01", 1),
+                ([5], "FundB", "2020-01-01", 1),
+            ],
+        )
+
+    def test_transactions_are_batched_for_each_portfolio(self) -> None:
+        """
+        Tests that each synchronous batch of transactions holds the next batch of rows for each portfolio which has
+        rows left, with the codes as strings
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {"code": [1, 2, 1, 1, 2, 1, 1], "id": [f"txn_{i}" for i in range(7)]}
+        )
+
+        sync_batches = BatchPlan(
+            data_frame=data_frame,
+            mapping_required={"code": "code"},
+            file_type="transaction",
+            batch_size=2,
+            domain_lookup=self.domain_lookup,
+        ).sync_batches()
+
+        self.assertEqual(
+            [
+                [
+                    (code, list(batch["id"]))
+                    for code, batch in zip(
+                        sync_batch["codes"], sync_batch["async_batches"]
+                    )
+                ]
+                for sync_batch in sync_batches
+            ],
+            [
+                [("1", ["txn_0", "txn_2"]), ("2", ["txn_1", "txn_4"])],
+                [("1", ["txn_3", "txn_5"])],
+                [("1", ["txn_6"])],
+            ],
+        )
+
+    def test_transaction_batches_can_be_independent_or_in_lanes(self) -> None:
+        """
+        Tests that without ordering every batch of transactions is in the first synchronous batch, in the same order
+        as with global ordering, and that the lanes hold the batches of each portfolio in order
+
+        :return: None
+        """
+
+        plan = BatchPlan(
+            data_frame=pd.DataFrame({"code": [1, 2, 1, 1, 2, 1, 1]}),
+            mapping_required={"code": "code"},
+            file_type="transaction",
+            batch_size=2,
+            domain_lookup=self.domain_lookup,
+        )
+
+        self.assertEqual(
+            plan.to_data_frame(ordering="none")[
+                ["sync_batch", "code", "first_row"]
+            ].values.tolist(),
+            [[0, "1", 0], [0, "2", 1], [0, "1", 3], [0, "1", 6]],
+        )
+        self.assertEqual(plan.lanes(), {"1": [0, 2, 3], "2": [1]})
+        self.assertEqual(list(plan.batch(2)[0].index), [3, 5])
+
+    def test_portfolio_group_batches_are_loaded_in_order(self) -> None:
+        """
+        Tests that the batches of a portfolio group, which each create or add to the same group, are in successive
+        synchronous batches by default and can not be loaded without ordering
+
+        :return: None
+        """
+
+        plan = BatchPlan(
+            data_frame=pd.DataFrame(
+                {
+                    "code": ["GroupA"] * 5 + ["GroupB"],
+                    "portfolio": [f"Fund{i}" for i in range(6)],
+                }
+            ),
+            mapping_required={"code": "code"},
+            file_type="portfolio_group",
+            batch_size=2,
+            domain_lookup=self.domain_lookup,
+        )
+
+        self.assertEqual(plan.default_ordering, "global")
+        self.assertEqual(
+            plan.to_data_frame(plan.default_ordering)[
+                ["sync_batch", "code", "rows"]
+            ].values.tolist(),
+            [[0, "GroupA", 2], [0, "GroupB", 1], [1, "GroupA", 2], [2, "GroupA", 1]],
+        )
+
+        with self.assertRaises(ValueError):
+            plan.to_data_frame(ordering="none")
+
+    def test_batch_size_can_change_between_batches(self) -> None:
+        """
+        Tests that file types which are not portfolio specific are split by the batch size current when each batch
+        is created
+
+        :return: None
+        """
+
+        plan = BatchPlan(
+            data_frame=pd.DataFrame({"name": range(10)}),
+            mapping_required={"name": "name"},
+            file_type="instruments",
+            domain_lookup=self.domain_lookup,
+        )
+        batch_sizes = iter([1, 2, 3, 4])
+
+        self.assertEqual(
+            [
+                (list(batch["name"]), sync_batch)
+                for batch, _, _, sync_batch in plan.batches(lambda: next(batch_sizes))
+            ],
+            [([0], 0), ([1, 2], 0), ([3, 4, 5], 0), ([6, 7, 8, 9], 0)],
+        )
+        self.assertEqual(plan.batch_size, 2000)
+
+    @parameterized.expand([["holding"], ["transaction"], ["instrument"]])
+    def test_same_batches_as_masks(self, file_type) -> None:
+        """
+        Tests that the batches are the same as those found by masking the DataFrame with each portfolio code and
+        effective date, for a DataFrame which is not in order and whose index is not a range
+
+        :return: None
+        """
+
+        random = np.random.RandomState(0)
+        rows = 200
+        data_frame = pd.DataFrame(
+            {
+                "code": random.choice(["FundA", "FundB", "FundC"], rows),
+                "effective_at": random.choice(["2020-01-01", "2020-01-02"], rows),
+                "id": range(rows),
+            },
+            index=random.permutation(rows) * 3,
+        )
+
+        if file_type == "holding":
+            expected = []
+            for effective_at in data_frame["effective_at"].unique():
+                dated = data_frame[data_frame["effective_at"] == effective_at]
+                expected.append(
+                    [
+                        list(dated[dated["code"] == code]["id"])
+                        for code in dated["code"].unique()
+                    ]
+                )
+        elif file_type == "transaction":
+            portfolios = [
+                data_frame[data_frame["code"] == code]["id"]
+                for code in data_frame["code"].unique()
+            ]
+            expected = [
+                [
+                    list(portfolio.iloc[start : start + 7])
+                    for portfolio in portfolios
+                    if start < len(portfolio)
+                ]
+                for start in range(0, max(map(len, portfolios)), 7)
+            ]
+        else:
+            expected = [
+                [
+                    list(data_frame["id"].iloc[start : start + 7])
+                    for start in range(0, rows, 7)
+                ]
+            ]
+
+        sync_batches = BatchPlan(
+            data_frame=data_frame,
+            mapping_required={"code": "code", "effective_at": "effective_at"},
+            file_type=file_type,
+            batch_size=7,
+            domain_lookup=self.domain_lookup,
+        ).sync_batches()
+
+        self.assertEqual(
+            [
+                [list(batch["id"]) for batch in sync_batch["async_batches"]]
+                for sync_batch in sync_batches
+            ],
+            expected,
+        )
+
+    def test_key_columns_must_exist(self) -> None:
+        """
+        Tests that a plan can not be made when the portfolio code is not mapped to a column
+
+        :return: None
+        """
+
+        with self.assertRaises(ValueError):
+            BatchPlan(
+                data_frame=pd.DataFrame({"id": [1]}),
+                mapping_required={"code": "$FundA"},
+                file_type="transaction",
+                domain_lookup=self.domain_lookup,
+            )
@@ -0,0 +1,521 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import lusid
+import pandas as pd
+from parameterized import parameterized
+from lusidtools import cocoon
+from lusidtools.cocoon.async_tools import get_conversion_thread_pool, get_thread_pool
+from lusidtools.cocoon.journal import LoadJournal
+from lusidtools import logger
+
+
+class CocoonTestsConstructBatches(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+        cls.domain_lookup = cocoon.utilities.load_json_file(
+            "config/domain_settings.json"
+        )
+
+    def setUp(self) -> None:
+        self.events = []
+        self.active = 0
+        self.max_active = 0
+        self.loaded = []
+        self.latency = {}
+        self.failing = set()
+
+    async def fake_load_data(
+        self, api_factory, single_requests, file_type, code, effective_at, **kwargs
+    ):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.events.append(("start", code, effective_at, time.perf_counter()))
+        await asyncio.sleep(self.latency.get(code, 0.01))
+        if code in self.failing:
+            self.events.append(("end", code, effective_at, time.perf_counter()))
+            self.active -= 1
+            raise lusid.exceptions.ApiException(status=500, reason="Failed")
+        self.events.append(("end", code, effective_at, time.perf_counter()))
+        self.active -= 1
+        self.loaded.append(single_requests)
+        return code, effective_at, len(single_requests)
+
+    def construct_batches(self, file_type, data_frame, mapping_required, **kwargs):
+        with mock.patch.object(cocoon.cocoon, "_load_data", self.fake_load_data):
+            return asyncio.run(
+                cocoon.cocoon._construct_batches(
+                    api_factory=None,
+                    data_frame=data_frame,
+                    mapping_required=mapping_required,
+                    mapping_optional={},
+                    property_columns=[],
+                    properties_scope="TestScope",
+                    instrument_identifier_mapping={"Figi": "figi"},
+                    file_type=file_type,
+                    domain_lookup=self.domain_lookup,
+                    sub_holding_keys=[],
+                    sub_holding_keys_scope="TestScope",
+                    scope="TestScope",
+                    full_key_format=self.domain_lookup[file_type]["full_key_format"],
+                    unique_identifiers=["Figi"],
+                    thread_pool=get_thread_pool(2).thread_pool,
+                    **kwargs,
+                )
+            )
+
+    def test_holdings_effective_dates_are_loaded_in_order(self) -> None:
+        """
+        Tests that with global ordering every holding batch for an effective date completes before any batch for the
+        next date starts
+
+        :return: None
+        """
+
+        dates = ["2020-01-01", "2020-01-02", "2020-01-03"]
+        data_frame = pd.DataFrame(
+            {
+                "code": ["FundA", "FundB", "FundC"] * len(dates),
+                "effective_at": [date for date in dates for _ in range(3)],
+                "figi": "BBG000C05BD1",
+                "units": 100,
+            }
+        )
+
+        responses = self.construct_batches(
+            "holding",
+            data_frame,
+            {"code": "code", "effective_at": "effective_at", "tax_lots.units": "units"},
+            batch_size=1,
+            ordering="global",
+        )
+
+        self.assertEqual(responses["errors"], [])
+        self.assertEqual(
+            [(code, effective_at) for code, effective_at, _ in responses["success"]],
+            [(code, date) for date in dates for code in ["FundA", "FundB", "FundC"]],
+        )
+
+        for previous_date, date in zip(dates, dates[1:]):
+            last_end = max(
+                event[3]
+                for event in self.events
+                if event[0] == "end" and event[2] == previous_date
+            )
+            first_start = min(
+                event[3]
+                for event in self.events
+                if event[0] == "start" and event[2] == date
+            )
+            self.assertLessEqual(last_end, first_start)
+
+    def test_holdings_are_loaded_in_a_lane_for_each_portfolio(self) -> None:
+        """
+        Tests that each portfolio loads its effective dates in order without waiting for the other portfolios, so a
+        slow portfolio does not hold up the rest, and that the batches in flight across the lanes are bounded
+
+        :return: None
+        """
+
+        dates = ["2020-01-01", "2020-01-02", "2020-01-03"]
+        codes = ["FundA", "FundB", "FundC"]
+        data_frame = pd.DataFrame(
+            {
+                "code": codes * len(dates),
+                "effective_at": [date for date in dates for _ in codes],
+                "figi": "BBG000C05BD1",
+                "units": 100,
+            }
+        )
+        self.latency = {"FundA": 0.3}
+
+        responses = self.construct_batches(
+            "holding",
+            data_frame,
+            {"code": "code", "effective_at": "effective_at", "tax_lots.units": "units"},
+            batch_size=1,
+            max_batches_in_flight=2,
+        )
+
+        self.assertEqual(responses["errors"], [])
+        # The responses are in the same order as when the dates are loaded one at a time
+        self.assertEqual(
+            [(code, effective_at) for code, effective_at, _ in responses["success"]],
+            [(code, date) for date in dates for code in codes],
+        )
+        self.assertEqual(self.max_active, 2)
+
+        def time_of(event_type, code, date):
+            return next(
+                event[3]
+                for event in self.events
+                if event[:3] == (event_type, code, date)
+            )
+
+        for code in codes:
+            for previous_date, date in zip(dates, dates[1:]):
+                self.assertLessEqual(
+                    time_of("end", code, previous_date), time_of("start", code, date)
+                )
+
+        # The other portfolios complete every date while the slow portfolio is loading its first
+        self.assertLess(
+            time_of("end", "FundC", dates[-1]), time_of("end", "FundA", dates[0])
+        )
+
+    def transactions(self, codes) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "code": codes,
+                "id": [f"txn_{i}" for i in range(len(codes))],
+                "figi": "BBG000C05BD1",
+                "transaction_date": "2020-01-01",
+                "type": "Buy",
+                "units": 100,
+                "price": 10.0,
+                "price_type": "Price",
+                "total_consideration": 1000.0,
+                "currency": "GBP",
+            }
+        )
+
+    transaction_mapping = {
+        "code": "code",
+        "transaction_id": "id",
+        "type": "type",
+        "transaction_date": "transaction_date",
+        "settlement_date": "transaction_date",
+        "units": "units",
+        "transaction_price.price": "price",
+        "transaction_price.type": "price_type",
+        "total_consideration.amount": "total_consideration",
+        "total_consideration.currency": "currency",
+    }
+
+    def max_active_for(self, code) -> int:
+        active = max_active = 0
+        for event in self.events:
+            if event[1] == code:
+                active += 1 if event[0] == "start" else -1
+                max_active = max(max_active, active)
+        return max_active
+
+    def test_transaction_batches_are_loaded_as_soon_as_there_is_room(self) -> None:
+        """
+        Tests that without ordering the batches of a large portfolio are loaded alongside each other once the small
+        portfolios have been loaded, rather than one at a time, and that the utilisation is reported
+
+        :return: None
+        """
+
+        data_frame = self.transactions(["FundA"] * 12 + ["FundB", "FundC"])
+        self.latency = {"FundA": 0.1}
+
+        responses = {}
+        for ordering in ["global", None]:
+            self.events = []
+            responses[ordering] = self.construct_batches(
+                "transaction",
+                data_frame,
+                self.transaction_mapping,
+                batch_size=2,
+                max_batches_in_flight=3,
+                ordering=ordering,
+            )
+
+        self.assertEqual(self.max_active_for("FundA"), 3)
+        self.assertEqual(responses[None]["scheduler"]["ordering"], "none")
+        # The responses are in the same order whatever the ordering
+        self.assertEqual(responses[None]["success"], responses["global"]["success"])
+        self.assertGreater(
+            responses[None]["scheduler"]["utilisation"],
+            responses["global"]["scheduler"]["utilisation"],
+        )
+        self.assertLessEqual(responses[None]["scheduler"]["utilisation"], 1)
+
+    def test_transaction_batches_are_loaded_in_a_lane_for_each_portfolio(
+        self,
+    ) -> None:
+        """
+        Tests that with portfolio ordering the batches of each portfolio are loaded one at a time, in order
+
+        :return: None
+        """
+
+        data_frame = self.transactions(["FundA", "FundB"] * 6)
+
+        responses = self.construct_batches(
+            "transaction",
+            data_frame,
+            self.transaction_mapping,
+            batch_size=2,
+            max_batches_in_flight=4,
+            ordering="portfolio",
+        )
+
+        self.assertEqual(responses["errors"], [])
+        self.assertEqual(self.max_active, 2)
+        self.assertEqual(self.max_active_for("FundA"), 1)
+        self.assertEqual(
+            [
+                [request.transaction_id for request in single_requests]
+                for single_requests in self.loaded
+                if single_requests[0].transaction_id in ["txn_0", "txn_4", "txn_8"]
+            ],
+            [["txn_0", "txn_2"], ["txn_4", "txn_6"], ["txn_8", "txn_10"]],
+        )
+
+    def test_conversion_thread_is_shared_between_calls(self) -> None:
+        """
+        Tests that every call converts its batches on the shared conversion thread rather than creating its own
+
+        :return: None
+        """
+
+        conversion_thread_pool = get_conversion_thread_pool()
+        submitted = conversion_thread_pool.metrics()["submitted"]
+
+        for _ in range(2):
+            responses = self.construct_batches(
+                "transaction",
+                self.transactions(["FundA", "FundB"] * 2),
+                self.transaction_mapping,
+                batch_size=2,
+            )
+            self.assertEqual(responses["errors"], [])
+
+        self.assertIs(get_conversion_thread_pool(), conversion_thread_pool)
+        self.assertFalse(conversion_thread_pool.thread_pool.is_shutdown)
+        self.assertEqual(conversion_thread_pool.metrics()["submitted"] - submitted, 4)
+
+    def test_holdings_can_not_be_loaded_without_ordering(self) -> None:
+        """
+        Tests that the effective dates of holdings must be loaded in order
+
+        :return: None
+        """
+
+        with self.assertRaises(ValueError):
+            self.construct_batches(
+                "holding",
+                pd.DataFrame({"code": ["FundA"], "effective_at": ["2020-01-01"]}),
+                {"code": "code", "effective_at": "effective_at"},
+                batch_size=1,
+                ordering="none",
+            )
+
+    @parameterized.expand(
+        [
+            ["transactions", "transaction", None],
+            ["holdings_in_lanes", "holding", "portfolio"],
+            ["holdings_in_order", "holding", "global"],
+        ]
+    )
+    def test_load_is_resumed_from_the_journal(self, _, file_type, ordering) -> None:
+        """
+        Tests that loading again with the same journal skips the batches which completed and loads those which failed
+
+        :return: None
+        """
+
+        if file_type == "transaction":
+            data_frame = self.transactions(["FundA", "FundB"] * 3)
+            mapping_required = self.transaction_mapping
+        else:
+            data_frame = pd.DataFrame(
+                {
+                    "code": ["FundA", "FundB"] * 3,
+                    "effective_at": ["2020-01-01"] * 2
+                    + ["2020-01-02"] * 2
+                    + ["2020-01-03"] * 2,
+                    "figi": "BBG000C05BD1",
+                    "units": 100,
+                }
+            )
+            mapping_required = {
+                "code": "code",
+                "effective_at": "effective_at",
+                "tax_lots.units": "units",
+            }
+
+        journal = LoadJournal(os.path.join(tempfile.mkdtemp(), "load_journal.db"))
+        self.failing = {"FundB"}
+
+        responses = self.construct_batches(
+            file_type,
+            data_frame,
+            mapping_required,
+            batch_size=1,
+            ordering=ordering,
+            journal=journal,
+        )
+
+        self.assertEqual(len(responses["success"]), 3)
+        self.assertEqual(len(responses["errors"]), 3)
+        self.assertEqual(
+            journal.to_data_frame().groupby("code")["status"].unique().to_dict(),
+            {"FundA": ["complete"], "FundB": ["failed"]},
+        )
+
+        self.events = []
+        self.failing = set()
+
+        responses = self.construct_batches(
+            file_type,
+            data_frame,
+            mapping_required,
+            batch_size=1,
+            ordering=ordering,
+            journal=journal,
+        )
+
+        self.assertEqual(responses["errors"], [])
+        self.assertEqual(len(responses["success"]), 3)
+        self.assertEqual(responses["scheduler"]["skipped"], 3)
+        self.assertEqual({event[1] for event in self.events}, {"FundB"})
+        self.assertEqual(set(journal.to_data_frame()["status"]), {"complete"})
+
+    def test_lane_error_waits_for_batches_in_flight(self) -> None:
+        """
+        Tests that an error building the models for one lane stops the lanes starting more batches, and is raised
+        once the batches already sent have completed
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {
+                "code": ["FundA", "FundB"] * 3,
+                "effective_at": ["2020-01-01"] * 2
+                + ["2020-01-02"] * 2
+                + ["2020-01-03"] * 2,
+                "figi": ["BBG000C05BD1"] * 3 + [None] + ["BBG000C05BD1"] * 2,
+                "units": 100,
+            }
+        )
+
+        with self.assertRaises(ValueError):
+            self.construct_batches(
+                "holding",
+                data_frame,
+                {
+                    "code": "code",
+                    "effective_at": "effective_at",
+                    "tax_lots.units": "units",
+                },
+                batch_size=1,
+            )
+
+        self.assertEqual(
+            [event[0] for event in self.events].count("start"),
+            [event[0] for event in self.events].count("end"),
+        )
+        self.assertNotIn("2020-01-03", [event[2] for event in self.events])
+
+    def test_in_flight_batches_are_bounded(self) -> None:
+        """
+        Tests that no more than max_batches_in_flight batches are loaded at once and responses keep the batch order
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {
+                "name": [f"Instrument {i}" for i in range(20)],
+                "figi": [f"BBG{i:09d}" for i in range(20)],
+            }
+        )
+
+        responses = self.construct_batches(
+            "instrument",
+            data_frame,
+            {"name": "name"},
+            batch_size=3,
+            max_batches_in_flight=2,
+        )
+
+        self.assertEqual(self.max_active, 2)
+        self.assertEqual(
+            [batch_length for _, _, batch_length in responses["success"]],
+            [3, 3, 3, 3, 3, 3, 2],
+        )
+
+    def test_conversion_error_waits_for_batches_in_flight(self) -> None:
+        """
+        Tests that an error building the models is raised once the batches already sent have completed
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {
+                "name": [f"Instrument {i}" for i in range(6)],
+                "figi": ["BBG000C05BD1"] * 5 + [None],
+            }
+        )
+
+        with self.assertRaises(ValueError):
+            self.construct_batches(
+                "instrument", data_frame, {"name": "name"}, batch_size=2
+            )
+
+        self.assertEqual(
+            [event[0] for event in self.events], ["start", "start", "end", "end"]
+        )
+
+    def test_process_parallelism_builds_the_same_models(self) -> None:
+        """
+        Tests that converting the batches in worker processes loads the same models in the same order as converting
+        them on a thread, and that an error in a worker is raised
+
+        :return: None
+        """
+
+        dates = ["2020-01-01", "2020-01-02"]
+        data_frame = pd.DataFrame(
+            {
+                "code": ["FundA", "FundB"] * 4,
+                "effective_at": [date for date in dates for _ in range(4)],
+                "figi": [f"BBG{i:09d}" for i in range(8)],
+                "units": range(8),
+            }
+        )
+        mapping_required = {
+            "code": "code",
+            "effective_at": "effective_at",
+            "tax_lots.units": "units",
+        }
+
+        responses = {}
+        loaded = {}
+        for parallelism in ["thread", "process"]:
+            self.loaded = []
+            responses[parallelism] = self.construct_batches(
+                "holding",
+                data_frame,
+                mapping_required,
+                batch_size=1,
+                parallelism=parallelism,
+                max_processes=2,
+                ordering="global",
+            )
+            loaded[parallelism] = self.loaded
+
+        for key in ["errors", "success"]:
+            self.assertEqual(responses["process"][key], responses["thread"][key])
+        self.assertEqual(loaded["process"], loaded["thread"])
+        self.assertEqual(len(loaded["process"]), 4)
+
+        with self.assertRaises(ValueError):
+            self.construct_batches(
+                "holding",
+                data_frame.assign(figi=[None] * 8),
+                mapping_required,
+                batch_size=1,
+                parallelism="process",
+                max_processes=2,
+            )
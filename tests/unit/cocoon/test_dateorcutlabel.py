@@ -4,7 +4,10 @@ import numpy as np
 import pandas as pd
 
 from lusidtools import logger
-from lusidtools.cocoon.dateorcutlabel import DateOrCutLabel
+from lusidtools.cocoon.dateorcutlabel import (
+    DateOrCutLabel,
+    convert_date_or_cut_label_column,
+)
 from parameterized import parameterized
 from datetime import datetime
 import pytz
@@ -140,3 +143,110 @@ class CocoonDateOrCutLabelTests(unittest.TestCase):
 
         date_or_cut_label = DateOrCutLabel(datetime_value, custom_format)
         self.assertEqual(first=expected_outcome, second=str(date_or_cut_label.data))
+
+    @parameterized.expand(
+        [
+            [
+                "Strings in different formats",
+                pd.Series(
+                    [
+                        "2019-11-04T13:25:34+00:00",
+                        "2020-04-29T09:30:00-05:00",
+                        "2012-05-21T00:00:00.1234500+00:00",
+                        "2019-11-04T13:25:34Z",
+                        "2019-09-01T09:31:22.664000Z",
+                        "2019-11-04",
+                        "04-11-2019",
+                        "2019-11-04NNYSEClose",
+                        "2019-04-11T00:00:00",
+                        "2019-11-20T00:00:00.000000000",
+                        "5 Jan 2020 10:00",
+                        None,
+                        "2019-11-04",
+                    ],
+                    index=range(10, 23),
+                ),
+            ],
+            [
+                "Strings in formats which are not ISO",
+                pd.Series(
+                    [
+                        "01/02/2020",
+                        "13/02/2020",
+                        "02/13/2020",
+                        "1/2/2020",
+                        "2020/01/02",
+                        "Jan 2, 2020",
+                        "01/02/2020 10:15:30 +01:00",
+                        "01/02/2020 10:15:30 -05:00",
+                        "01.02.2020",
+                        "01/02/20",
+                        "20200102",
+                        "Thursday, 2 January 2020",
+                        "2020-01-02 10:00 UTC",
+                    ]
+                ),
+            ],
+            [
+                "Datetimes with no timezone",
+                pd.Series(
+                    pd.to_datetime(["2019-09-01T09:31:22.664", None, "2019-07-02"])
+                ),
+            ],
+            [
+                "Datetimes with a timezone other than UTC",
+                pd.Series(
+                    pd.to_datetime(
+                        ["2019-08-05 10:30", "2019-12-05 10:30"]
+                    ).tz_localize("America/New_York")
+                ),
+            ],
+            [
+                "Datetime objects and strings",
+                pd.Series(
+                    [
+                        datetime(year=2019, month=8, day=5),
+                        "2019-08-05",
+                        pytz.timezone("America/New_York").localize(
+                            datetime(year=2019, month=8, day=5, hour=10, minute=30)
+                        ),
+                    ]
+                ),
+            ],
+            ["No values", pd.Series([], dtype=object)],
+        ]
+    )
+    def test_convert_date_or_cut_label_column(self, test_name, values):
+        """
+        Tests that converting a whole column gives the same result as converting each value with DateOrCutLabel
+
+        :param str test_name: The name of the test
+        :param pd.Series values: The column to convert
+
+        :return: None
+        """
+
+        converted = convert_date_or_cut_label_column(values)
+
+        self.assertTrue(converted.index.equals(values.index))
+        self.assertEqual(
+            list(converted),
+            [
+                None if pd.isna(value) else str(DateOrCutLabel(value))
+                for value in values
+            ],
+        )
+
+    def test_convert_date_or_cut_label_column_with_custom_format(self):
+        """
+        Tests that converting a whole column with a custom date format gives the same result as DateOrCutLabel
+
+        :return: None
+        """
+
+        values = pd.Series(["2019-09-01 6:30:30", "2019-09-02 7:30:30"])
+
+        self.assertEqual(
+            list(convert_date_or_cut_label_column(values, "%Y-%m-%d %H:%M:%S")),
+            ["2019-09-01T06:30:30+00:00", "2019-09-02T07:30:30+00:00"],
+        )
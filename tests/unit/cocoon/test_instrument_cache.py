@@ -0,0 +1,236 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+import pandas as pd
+from lusidtools.cocoon import instrument_cache
+from lusidtools.cocoon.instrument_cache import InstrumentCache, get_namespace
+from lusidtools.lpt import map_instruments
+from lusidtools.lpt.either import Either
+from lusidtools import logger
+
+
+class CocoonTestsInstrumentCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+
+    def setUp(self) -> None:
+        self.path = os.path.join(tempfile.mkdtemp(), "instrument_cache.db")
+        self.namespace = get_namespace("https://fbn.lusid.com/api")
+
+    def test_least_recently_used_entries_are_evicted(self) -> None:
+        """
+        Tests that the least recently used entry is evicted from memory once the cache is full
+
+        :return: None
+        """
+
+        cache = InstrumentCache(max_size=2)
+        cache.set(self.namespace, "Figi", "BBG000C05BD1", ["LUID_BP"])
+        cache.set(self.namespace, "Figi", "BBG000BVPXP1", ["LUID_AMZN"])
+
+        # Use the first entry so that the second is the least recently used
+        self.assertEqual(cache.get(self.namespace, "Figi", "BBG000C05BD1"), ["LUID_BP"])
+        cache.set(self.namespace, "Figi", "BBG000B9XVV8", ["LUID_AAPL"])
+
+        self.assertEqual(
+            cache.get_many(
+                self.namespace, "Figi", ["BBG000C05BD1", "BBG000BVPXP1", "BBG000B9XVV8"]
+            ),
+            {"BBG000C05BD1": ["LUID_BP"], "BBG000B9XVV8": ["LUID_AAPL"]},
+        )
+
+        statistics = cache.statistics()
+        self.assertEqual(statistics["memory_hits"], 3)
+        self.assertEqual(statistics["misses"], 1)
+        self.assertEqual(statistics["evictions"], 1)
+        self.assertEqual(statistics["memory_size"], 2)
+        self.assertEqual(statistics["hit_rate"], 0.75)
+
+    def test_entries_are_kept_apart_by_namespace(self) -> None:
+        """
+        Tests that the entries for different LUSID environments and identifier types are kept apart
+
+        :return: None
+        """
+
+        cache = InstrumentCache()
+        cache.set(self.namespace, "Figi", "BBG000C05BD1", ["LUID_BP"])
+
+        self.assertIsNone(
+            cache.get(
+                get_namespace("https://other.lusid.com/api"), "Figi", "BBG000C05BD1"
+            )
+        )
+        self.assertIsNone(cache.get(self.namespace, "ClientInternal", "BBG000C05BD1"))
+
+    def test_entries_expire_after_ttl(self) -> None:
+        """
+        Tests that entries in memory and on disk are not used once they are older than the ttl
+
+        :return: None
+        """
+
+        cache = InstrumentCache(ttl=60, path=self.path)
+
+        with mock.patch.object(instrument_cache.time, "time", return_value=1000):
+            cache.set(self.namespace, "Figi", "BBG000C05BD1", ["LUID_BP"])
+
+        with mock.patch.object(instrument_cache.time, "time", return_value=1059):
+            self.assertEqual(
+                cache.get(self.namespace, "Figi", "BBG000C05BD1"), ["LUID_BP"]
+            )
+
+        with mock.patch.object(instrument_cache.time, "time", return_value=1061):
+            self.assertIsNone(cache.get(self.namespace, "Figi", "BBG000C05BD1"))
+
+        # The expired entry is removed from memory and on disk
+        self.assertEqual(cache.statistics()["expired"], 2)
+
+    def test_entries_are_persisted_to_disk(self) -> None:
+        """
+        Tests that entries cached in one process can be used by another through the disk tier
+
+        :return: None
+        """
+
+        cache = InstrumentCache(path=self.path)
+        cache.set_many(
+            self.namespace,
+            "Figi",
+            {"BBG000C05BD1": ["LUID_BP"], "BBG000BVPXP1": ["LUID_AMZN"]},
+        )
+        cache.close()
+
+        cache = InstrumentCache(path=self.path)
+
+        self.assertEqual(
+            cache.get_many(self.namespace, "Figi", ["BBG000C05BD1", "BBG000BVPXP1"]),
+            {"BBG000C05BD1": ["LUID_BP"], "BBG000BVPXP1": ["LUID_AMZN"]},
+        )
+        # The entries are promoted to memory
+        self.assertEqual(cache.get(self.namespace, "Figi", "BBG000C05BD1"), ["LUID_BP"])
+
+        statistics = cache.statistics()
+        self.assertEqual(statistics["disk_hits"], 2)
+        self.assertEqual(statistics["memory_hits"], 1)
+        self.assertEqual(statistics["disk_size"], 2)
+
+    def test_invalidate_as_at(self) -> None:
+        """
+        Tests that only the entries cached before the as at time are invalidated
+
+        :return: None
+        """
+
+        cache = InstrumentCache(path=self.path)
+        as_at = datetime(2020, 1, 1, 12)
+
+        with mock.patch.object(
+            instrument_cache.time,
+            "time",
+            return_value=(as_at - timedelta(hours=1)).timestamp(),
+        ):
+            cache.set(self.namespace, "Figi", "BBG000C05BD1", ["LUID_BP"])
+
+        with mock.patch.object(
+            instrument_cache.time,
+            "time",
+            return_value=(as_at + timedelta(hours=1)).timestamp(),
+        ):
+            cache.set(self.namespace, "Figi", "BBG000BVPXP1", ["LUID_AMZN"])
+            cache.invalidate(as_at)
+
+            self.assertEqual(
+                cache.get_many(
+                    self.namespace, "Figi", ["BBG000C05BD1", "BBG000BVPXP1"]
+                ),
+                {"BBG000BVPXP1": ["LUID_AMZN"]},
+            )
+            self.assertEqual(cache.statistics()["disk_size"], 1)
+
+            cache.invalidate()
+
+            self.assertEqual(cache.statistics()["disk_size"], 0)
+            self.assertIsNone(cache.get(self.namespace, "Figi", "BBG000BVPXP1"))
+
+    def test_map_instruments_uses_cache(self) -> None:
+        """
+        Tests that the lpt instrument mapping only requests identifiers which are not cached
+
+        :return: None
+        """
+
+        requests = []
+
+        def get_instruments(instr_type, ids):
+            requests.append((instr_type, sorted(ids)))
+            return Either.Right(
+                SimpleNamespace(
+                    content=SimpleNamespace(
+                        values={
+                            figi: SimpleNamespace(lusid_instrument_id=f"LUID_{figi}")
+                            for figi in ids
+                        },
+                        failed={},
+                    )
+                )
+            )
+
+        api = SimpleNamespace(
+            api_url="https://fbn.lusid.com/api",
+            call=SimpleNamespace(get_instruments=get_instruments),
+        )
+        cache = InstrumentCache()
+        cache.set(self.namespace, "Figi", "BBG000C05BD1", ["LUID_BP"])
+
+        df = pd.DataFrame(
+            {"instrument": ["FIGI:BBG000C05BD1", "FIGI:BBG000BVPXP1", "CCY_GBP"]}
+        )
+
+        result = map_instruments.map_instruments(
+            api, df, "instrument", instrument_cache=cache
+        )
+
+        self.assertEqual(
+            list(result.right["instrument"]),
+            ["LUID_BP", "LUID_BBG000BVPXP1", "CCY_GBP"],
+        )
+        self.assertEqual(requests, [("Figi", ["BBG000BVPXP1"])])
+        self.assertEqual(
+            cache.get(self.namespace, "Figi", "BBG000BVPXP1"), ["LUID_BBG000BVPXP1"]
+        )
+
+    def test_default_instrument_cache_from_environment(self) -> None:
+        """
+        Tests that the process wide cache is configured from the environment variables
+
+        :return: None
+        """
+
+        self.addCleanup(instrument_cache.set_default_instrument_cache, None)
+        instrument_cache.set_default_instrument_cache(None)
+
+        with mock.patch.dict(
+            os.environ,
+            {
+                instrument_cache.INSTRUMENT_CACHE_PATH_ENV: self.path,
+                instrument_cache.INSTRUMENT_CACHE_TTL_ENV: "60",
+            },
+        ):
+            cache = instrument_cache.get_default_instrument_cache()
+
+        self.assertIs(instrument_cache.get_default_instrument_cache(), cache)
+        self.assertEqual(cache.ttl, 60)
+        self.assertEqual(cache.path, self.path)
+
+        instrument_cache.set_default_instrument_cache(None)
+
+        with mock.patch.dict(
+            os.environ, {instrument_cache.INSTRUMENT_CACHE_TTL_ENV: "a day"}
+        ):
+            with self.assertRaises(ValueError):
+                instrument_cache.get_default_instrument_cache()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from lusidtools.cocoon.journal import COMPLETE, FAILED, LoadJournal
+from lusidtools import logger
+
+
+class CocoonTestsJournal(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+
+    def setUp(self) -> None:
+        self.path = os.path.join(tempfile.mkdtemp(), "load_journal.db")
+        self.data_frame = pd.DataFrame(
+            {"id": ["txn_0", "txn_1", "txn_2"], "units": [100, 200, 300]},
+            index=[4, 5, 6],
+        )
+
+    def identify(self, data_frame, code="FundA") -> dict:
+        return LoadJournal.identify(
+            file_type="transaction",
+            scope="TestScope",
+            code=code,
+            effective_at=None,
+            data_frame=data_frame,
+        )
+
+    def test_batches_are_identified_by_their_rows(self) -> None:
+        """
+        Tests that a batch has the same key whenever its rows are the same, and a different key if its rows, their
+        position or the portfolio it is loaded into are different
+
+        :return: None
+        """
+
+        batch = self.identify(self.data_frame)
+
+        self.assertEqual(batch["key"], self.identify(self.data_frame.copy())["key"])
+        self.assertEqual(
+            (batch["first_row"], batch["last_row"], batch["rows"]), ("4", "6", 3)
+        )
+
+        for different in [
+            self.identify(self.data_frame.assign(units=[100, 200, 301])),
+            self.identify(self.data_frame.set_axis([0, 1, 2])),
+            self.identify(self.data_frame, code="FundB"),
+        ]:
+            self.assertNotEqual(batch["key"], different["key"])
+
+    def test_outcomes_are_persisted_to_disk(self) -> None:
+        """
+        Tests that the outcome of each batch is kept between journals opened on the same file, with a batch which
+        failed and is loaded again replacing its earlier outcome
+
+        :return: None
+        """
+
+        complete = self.identify(self.data_frame.iloc[:2])
+        failed = self.identify(self.data_frame.iloc[2:])
+
+        journal = LoadJournal(self.path)
+        journal.record(complete, COMPLETE)
+        journal.record(failed, FAILED)
+        journal.close()
+
+        journal = LoadJournal(self.path)
+        self.assertTrue(journal.is_complete(complete))
+        self.assertFalse(journal.is_complete(failed))
+        self.assertFalse(journal.is_complete(self.identify(self.data_frame)))
+
+        journal.record(failed, COMPLETE)
+        self.assertEqual(
+            journal.to_data_frame()[["first_row", "status"]].values.tolist(),
+            [["4", COMPLETE], ["6", COMPLETE]],
+        )
+
+        with self.assertRaises(ValueError):
+            journal.record(complete, "skipped")
@@ -0,0 +1,237 @@
+import asyncio
+import threading
+import unittest
+from types import SimpleNamespace
+import lusid
+from lusidtools import cocoon
+from lusidtools.cocoon.async_tools import get_thread_pool
+from lusidtools import logger
+
+
+class CocoonLoadInstrumentPropertiesTests(unittest.TestCase):
+    class MockApiFactory(lusid.utilities.ApiClientFactory):
+        """
+        This is a mock of the lusid.utilities.ApiClientFactory class which records the requests made
+        """
+
+        # The instruments in LUSID for each identifier
+        instruments = {
+            "Instrument/default/Isin": {
+                "GB0007980591": ["LUID_BP"],
+                "US0231351067": ["LUID_AMZN", "LUID_AMZN_2"],
+            },
+            "Instrument/default/Figi": {"BBG000C05BD1": ["LUID_BP"]},
+        }
+
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.lock = threading.Lock()
+            self.searches = []
+            self.upserts = []
+            # The status to fail each search with, None for the searches to succeed
+            self.search_status = None
+
+        def build(self, api):
+            """
+
+            :param lusid.api api: The api to mock
+
+            :return: mock(lusid.api): The mocked api
+            """
+
+            if api == lusid.SearchApi:
+                return self.MockSearchApi(self)
+            if api == lusid.InstrumentsApi:
+                return self.MockInstrumentsApi(self)
+
+        class MockSearchApi:
+            """
+            A mock of the lusid.SearchApi
+            """
+
+            def __init__(self, api_factory):
+                self.api_factory = api_factory
+
+            def instruments_search(self, instrument_search_property, **kwargs):
+                with self.api_factory.lock:
+                    self.api_factory.searches.append(
+                        (
+                            instrument_search_property[0].key,
+                            sorted(
+                                search.value for search in instrument_search_property
+                            ),
+                        )
+                    )
+
+                if self.api_factory.search_status is not None:
+                    raise lusid.exceptions.ApiException(
+                        status=self.api_factory.search_status
+                    )
+
+                return [
+                    SimpleNamespace(
+                        mastered_instruments=[
+                            SimpleNamespace(
+                                identifiers={
+                                    "LusidInstrumentId": SimpleNamespace(value=luid)
+                                }
+                            )
+                            for luid in self.api_factory.instruments[search.key].get(
+                                search.value, []
+                            )
+                        ]
+                    )
+                    for search in instrument_search_property
+                ]
+
+        class MockInstrumentsApi:
+            """
+            A mock of the lusid.InstrumentsApi
+            """
+
+            def __init__(self, api_factory):
+                self.api_factory = api_factory
+
+            def upsert_instruments_properties(
+                self, upsert_instrument_property_request, **kwargs
+            ):
+                with self.api_factory.lock:
+                    self.api_factory.upserts.append(upsert_instrument_property_request)
+
+                return lusid.models.UpsertInstrumentPropertiesResponse(
+                    as_at_date="2020-01-01T00:00:00Z"
+                )
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+
+    def setUp(self) -> None:
+        self.api_factory = self.MockApiFactory(
+            token="mock-token", api_url="http://localhost"
+        )
+
+    @staticmethod
+    def property_request(identifier_type, identifier, **properties):
+        return lusid.models.UpsertInstrumentPropertyRequest(
+            identifier_type=identifier_type,
+            identifier=identifier,
+            properties=[
+                lusid.models.ModelProperty(
+                    key=f"Instrument/TestScope/{code}",
+                    value=lusid.models.PropertyValue(label_value=value),
+                )
+                for code, value in properties.items()
+            ],
+        )
+
+    def load(self, property_batch, **kwargs):
+        async def load():
+            return await cocoon.cocoon.BatchLoader.load_instrument_property_batch(
+                self.api_factory,
+                property_batch,
+                instrument_cache=cocoon.InstrumentCache(),
+                thread_pool=get_thread_pool(4).thread_pool,
+                **kwargs,
+            )
+
+        return asyncio.run(load())
+
+    def test_properties_are_merged_and_upserted_in_batches(self) -> None:
+        """
+        Tests that each distinct identifier is searched for once, the properties for the same instrument are merged
+        and a response is returned for each request which resolved to an instrument
+
+        :return: None
+        """
+
+        property_batch = [
+            self.property_request("Isin", "GB0007980591", sector="Oil"),
+            self.property_request("Figi", "BBG000C05BD1", rating="A2"),
+            self.property_request("Isin", "US0231351067", sector="Retail"),
+            self.property_request("Isin", "XX0000000000", sector="Unknown"),
+            self.property_request("Isin", "GB0007980591", sector="Energy"),
+        ]
+
+        responses = self.load(property_batch, search_batch_size=2, upsert_batch_size=2)
+
+        self.assertCountEqual(
+            self.api_factory.searches,
+            [
+                ("Instrument/default/Isin", ["GB0007980591", "US0231351067"]),
+                ("Instrument/default/Isin", ["XX0000000000"]),
+                ("Instrument/default/Figi", ["BBG000C05BD1"]),
+            ],
+        )
+
+        upserted = {
+            request.identifier: {
+                model_property.key: model_property.value.label_value
+                for model_property in request.properties
+            }
+            for upsert in self.api_factory.upserts
+            for request in upsert
+        }
+
+        self.assertEqual(
+            upserted,
+            {
+                "LUID_BP": {
+                    "Instrument/TestScope/sector": "Energy",
+                    "Instrument/TestScope/rating": "A2",
+                },
+                "LUID_AMZN": {"Instrument/TestScope/sector": "Retail"},
+                "LUID_AMZN_2": {"Instrument/TestScope/sector": "Retail"},
+            },
+        )
+        self.assertEqual(
+            sorted(len(upsert) for upsert in self.api_factory.upserts), [1, 2]
+        )
+        self.assertEqual(len(responses), 4)
+        self.assertTrue(
+            all(
+                isinstance(response, lusid.models.UpsertInstrumentPropertiesResponse)
+                for response in responses
+            )
+        )
+
+    def test_unresolved_properties_are_not_upserted(self) -> None:
+        """
+        Tests that no upsert is sent if none of the requests resolve to an instrument
+
+        :return: None
+        """
+
+        responses = self.load([self.property_request("Isin", "blah", sector="Oil")])
+
+        self.assertEqual(responses, [])
+        self.assertEqual(self.api_factory.upserts, [])
+
+    def test_searches_are_retried_by_the_batch_retry_policy(self) -> None:
+        """
+        Tests that the searches made while loading a batch which is retried are sent once for each attempt of the
+        batch, rather than being retried by their own policy as well
+
+        :return: None
+        """
+
+        self.api_factory.search_status = 503
+        retry_policy = cocoon.RetryPolicy(max_attempts=3, base_delay=0)
+
+        async def load():
+            return await retry_policy.load_batch(
+                lambda property_batch: cocoon.cocoon.BatchLoader.load_instrument_property_batch(
+                    self.api_factory,
+                    property_batch,
+                    instrument_cache=cocoon.InstrumentCache(),
+                    thread_pool=get_thread_pool(4).thread_pool,
+                ),
+                [self.property_request("Isin", "GB0007980591", sector="Oil")],
+            )
+
+        responses, statistics = asyncio.run(load())
+
+        self.assertEqual(responses[0].status, 503)
+        self.assertEqual(statistics["requests"], 3)
+        self.assertEqual(len(self.api_factory.searches), 3)
+        self.assertFalse(cocoon.retry.in_retried_batch())
@@ -0,0 +1,420 @@
+import unittest
+from unittest import mock
+import lusid
+from pathlib import Path
+import pandas as pd
+from parameterized import parameterized
+from lusidtools import cocoon
+from lusidtools.cocoon.mapping_plan import MappingPlan
+from lusidtools.cocoon.utilities import convert_cell_value_to_string
+from lusidtools import logger
+
+unique_identifiers = ["Figi", "Isin", "ClientInternal"]
+
+
+def legacy_convert_batch_to_models(
+    data_frame,
+    file_type,
+    mapping_required,
+    mapping_optional,
+    identifier_mapping,
+    property_columns,
+    sub_holding_keys,
+):
+    """
+    Builds the models row by row using the original iterrows implementation of cocoon._convert_batch_to_models
+    """
+
+    domain_lookup = cocoon.utilities.load_json_file("config/domain_settings.json")
+    domain = domain_lookup[file_type]["domain"]
+    open_api_types = getattr(
+        lusid.models, domain_lookup[file_type]["top_level_model"]
+    ).openapi_types
+    sub_holding_keys_as_properties = (
+        "sub_holding_keys" in open_api_types.keys()
+        and "dict" in open_api_types["sub_holding_keys"]
+    )
+
+    if not sub_holding_keys_as_properties and len(sub_holding_keys) > 0:
+        sub_holding_keys_row = cocoon.properties._infer_full_property_keys(
+            partial_keys=sub_holding_keys,
+            properties_scope="TestScope",
+            domain="Transaction",
+        )
+    else:
+        sub_holding_keys_row = None
+
+    single_requests = []
+    for index, row in data_frame.iterrows():
+        properties = (
+            None
+            if domain is None
+            else cocoon.properties.create_property_values(
+                row=row,
+                scope="TestScope",
+                domain=domain,
+                dtypes=data_frame.loc[:, property_columns].dtypes,
+            )
+        )
+
+        if sub_holding_keys_as_properties:
+            sub_holding_keys_row = cocoon.properties.create_property_values(
+                row=row,
+                scope="TestScope",
+                domain="Transaction",
+                dtypes=data_frame.loc[:, sub_holding_keys].dtypes,
+            )
+
+        identifiers = (
+            cocoon.instruments.create_identifiers(
+                index=index,
+                row=row,
+                file_type=file_type,
+                instrument_identifier_mapping=identifier_mapping,
+                unique_identifiers=unique_identifiers,
+                full_key_format=domain_lookup[file_type]["full_key_format"],
+            )
+            if identifier_mapping
+            else None
+        )
+
+        single_requests.append(
+            cocoon.utilities.populate_model(
+                model_object_name=domain_lookup[file_type]["top_level_model"],
+                required_mapping=mapping_required,
+                optional_mapping=mapping_optional,
+                row=row,
+                properties=properties,
+                identifiers=identifiers,
+                sub_holding_keys=sub_holding_keys_row,
+            )
+        )
+
+    return single_requests
+
+
+def quotes_data_frame():
+    return pd.DataFrame(
+        {
+            "provider": ["DataScope", "DataScope", "DataScope"],
+            "instrument_id": ["BBG000C05BD1", "BBG000PN88Q7", "BBG000BLNNH6"],
+            "instrument_id_type": ["Figi", "Figi", "Figi"],
+            "price_source": ["Lse", None, None],
+            "quote_type": ["Price", "Price", "Price"],
+            "field": ["mid", "mid", "mid"],
+            "date": ["2019-09-01", "2019-09-02T10:00:00Z", "03/09/2019"],
+            "price": [101.5, None, 99.25],
+            "currency": ["GBP", "GBP", "USD"],
+        }
+    )
+
+
+class MappingPlanTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+
+    @parameterized.expand(
+        [
+            [
+                "Instruments with properties",
+                "data/global-fund-combined-instrument-master.csv",
+                "instrument",
+                {"name": "instrument_name"},
+                {},
+                {
+                    "Figi": "figi",
+                    "Isin": "isin",
+                    "ClientInternal": "client_internal",
+                },
+                ["couprate", "s&p rating", "moodys_rating", "currency"],
+                [],
+            ],
+            [
+                "Complex bond instruments with a polymorphic definition",
+                "data/global-fund-fixed-income-master.csv",
+                "instrument",
+                {
+                    "name": "Name",
+                    "definition.start_date": "Issue Date",
+                    "definition.maturity_date": "Maturity Date",
+                    "definition.dom_ccy": "Currency",
+                    "definition.instrument_type": "Instrument Type",
+                    "definition.principal": "Principal",
+                    "definition.coupon_rate": "Coupon",
+                    "definition.identifiers.ClientInternal": "Client Internal",
+                    "definition.flow_conventions.currency": "Currency",
+                    "definition.flow_conventions.payment_frequency": "Payment Frequency",
+                    "definition.flow_conventions.day_count_convention": "Day Count Convention",
+                    "definition.flow_conventions.roll_convention": "Roll Convention",
+                    "definition.flow_conventions.payment_calendars": "Payment Calendars",
+                    "definition.flow_conventions.reset_calendars": "Reset Calendars",
+                    "definition.flow_conventions.settle_days": "Settlement Days",
+                    "definition.flow_conventions.reset_days": "Reset Days",
+                },
+                {},
+                {"Isin": "ISIN", "ClientInternal": "Client Internal"},
+                [],
+                [],
+            ],
+            [
+                "Transactions with nested, optional and cash identifiers",
+                "data/global-fund-combined-transactions.csv",
+                "transaction",
+                {
+                    "transaction_id": "id",
+                    "type": "transaction_type",
+                    "transaction_date": "transaction_date",
+                    "settlement_date": "settlement_date",
+                    "units": "units",
+                    "transaction_price.price": "transaction_price",
+                    "transaction_price.type": "price_type",
+                    "total_consideration.amount": "amount",
+                    "total_consideration.currency": "trade_currency",
+                },
+                {
+                    "source": "source",
+                    "counterparty_id": "exposure_counterparty",
+                    "exchange_rate": None,
+                },
+                {
+                    "Isin": "isin",
+                    "Figi": "figi",
+                    "ClientInternal": "client_internal",
+                    "Currency": "currency_transaction",
+                },
+                ["location_region", "mtom", "val", "instrument_name"],
+                [],
+            ],
+            [
+                "Holdings with sub holding keys",
+                "data/global-fund-combined-transactions.csv",
+                "holding",
+                {
+                    "tax_lots.units": "units",
+                    "tax_lots.cost.amount": "amount",
+                    "tax_lots.cost.currency": "trade_currency",
+                },
+                {"tax_lots.purchase_date": "transaction_date", "currency": None},
+                {
+                    "Isin": "isin",
+                    "Figi": "figi",
+                    "ClientInternal": "client_internal",
+                    "Currency": "currency_transaction",
+                },
+                ["location_region", "mtom"],
+                ["broker_executor", "accounting_method"],
+            ],
+            [
+                "Quotes with no domain and missing values",
+                None,
+                "quote",
+                {
+                    "quote_id.quote_series_id.provider": "provider",
+                    "quote_id.quote_series_id.price_source": "price_source",
+                    "quote_id.quote_series_id.instrument_id": "instrument_id",
+                    "quote_id.quote_series_id.instrument_id_type": "instrument_id_type",
+                    "quote_id.quote_series_id.quote_type": "quote_type",
+                    "quote_id.quote_series_id.field": "field",
+                    "quote_id.effective_at": "date",
+                    "metric_value.value": "price",
+                    "metric_value.unit": "currency",
+                },
+                {},
+                None,
+                [],
+                [],
+            ],
+        ]
+    )
+    def test_build_models_matches_row_by_row_population(
+        self,
+        _,
+        file_name,
+        file_type,
+        mapping_required,
+        mapping_optional,
+        identifier_mapping,
+        property_columns,
+        sub_holding_keys,
+    ) -> None:
+        """
+        Tests that the models built from a compiled MappingPlan are identical to those built row by row
+
+        :param str file_name: The name of the test data file
+        :param str file_type: The file type to build models for
+        :param dict mapping_required: The required mapping
+        :param dict mapping_optional: The optional mapping
+        :param dict identifier_mapping: The mapping for the identifiers
+        :param list[str] property_columns: The columns to create properties for
+        :param list[str] sub_holding_keys: The columns to create sub holding keys for
+
+        :return: None
+        """
+
+        data_frame = (
+            quotes_data_frame()
+            if file_name is None
+            else pd.read_csv(Path(__file__).parent.joinpath(file_name))
+        )
+        data_frame = data_frame.applymap(convert_cell_value_to_string)
+
+        domain_lookup = cocoon.utilities.load_json_file("config/domain_settings.json")
+
+        mapping_plan = MappingPlan(
+            file_type=file_type,
+            domain_lookup=domain_lookup,
+            dtypes=data_frame.dtypes,
+            mapping_required=mapping_required,
+            mapping_optional=mapping_optional,
+            property_columns=property_columns,
+            properties_scope="TestScope",
+            instrument_identifier_mapping=identifier_mapping,
+            sub_holding_keys=sub_holding_keys,
+            sub_holding_keys_scope="TestScope",
+            unique_identifiers=unique_identifiers,
+            full_key_format=domain_lookup[file_type]["full_key_format"],
+        )
+
+        expected_outcome = legacy_convert_batch_to_models(
+            data_frame=data_frame,
+            file_type=file_type,
+            mapping_required=mapping_required,
+            mapping_optional=mapping_optional,
+            identifier_mapping=identifier_mapping,
+            property_columns=property_columns,
+            sub_holding_keys=sub_holding_keys,
+        )
+
+        self.assertEqual(
+            first=mapping_plan.build_models(data_frame), second=expected_outcome
+        )
+
+    def test_build_models_does_not_modify_mapping(self) -> None:
+        """
+        Tests that compiling a MappingPlan leaves the provided mappings untouched
+
+        :return: None
+        """
+
+        mapping_required = {"quote_id.quote_series_id.provider": "provider"}
+        mapping_optional = {"metric_value.value": "price"}
+
+        MappingPlan(
+            file_type="quote",
+            domain_lookup=cocoon.utilities.load_json_file(
+                "config/domain_settings.json"
+            ),
+            dtypes=quotes_data_frame().dtypes,
+            mapping_required=mapping_required,
+            mapping_optional=mapping_optional,
+            property_columns=[],
+            properties_scope="TestScope",
+            instrument_identifier_mapping=None,
+            sub_holding_keys=[],
+            sub_holding_keys_scope="TestScope",
+        )
+
+        self.assertEqual(
+            first=mapping_required,
+            second={"quote_id.quote_series_id.provider": "provider"},
+        )
+
+    def test_build_models_row_with_no_identifiers_fails(self) -> None:
+        """
+        Tests that a row without a value for any identifier raises a ValueError which references its index
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {"name": ["BP", "Burford"], "figi": ["BBG000C05BD1", None]},
+            index=[10, 11],
+        )
+
+        mapping_plan = MappingPlan(
+            file_type="instrument",
+            domain_lookup=cocoon.utilities.load_json_file(
+                "config/domain_settings.json"
+            ),
+            dtypes=data_frame.dtypes,
+            mapping_required={"name": "name"},
+            mapping_optional={},
+            property_columns=[],
+            properties_scope="TestScope",
+            instrument_identifier_mapping={"Figi": "figi"},
+            sub_holding_keys=[],
+            sub_holding_keys_scope="TestScope",
+            unique_identifiers=unique_identifiers,
+            full_key_format=False,
+        )
+
+        with self.assertRaisesRegex(ValueError, "index 11"):
+            mapping_plan.build_models(data_frame)
+
+    def test_build_models_uses_converted_date_columns(self) -> None:
+        """
+        Tests that the dates converted for the whole DataFrame are used for each batch taken from it rather than being
+        converted again, and give the same models as converting them for each batch
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {
+                "id": ["txn_0", "txn_1", "txn_2"],
+                "type": "Buy",
+                "transaction_date": ["01/02/2020", "2020-01-03", "4 Jan 2020 10:00"],
+                "units": [100, 200, 300],
+                "price": 10.0,
+                "price_type": "Price",
+                "total_consideration": 1000.0,
+                "currency": "GBP",
+                "figi": "BBG000C05BD1",
+            }
+        )
+
+        mapping_plan = MappingPlan(
+            file_type="transaction",
+            domain_lookup=cocoon.utilities.load_json_file(
+                "config/domain_settings.json"
+            ),
+            dtypes=data_frame.dtypes,
+            mapping_required={
+                "transaction_id": "id",
+                "type": "type",
+                "transaction_date": "transaction_date",
+                "settlement_date": "transaction_date",
+                "units": "units",
+                "transaction_price.price": "price",
+                "transaction_price.type": "price_type",
+                "total_consideration.amount": "total_consideration",
+                "total_consideration.currency": "currency",
+            },
+            mapping_optional={},
+            property_columns=[],
+            properties_scope="TestScope",
+            instrument_identifier_mapping={"Figi": "figi"},
+            sub_holding_keys=[],
+            sub_holding_keys_scope="TestScope",
+            unique_identifiers=unique_identifiers,
+            full_key_format=False,
+        )
+
+        converted = mapping_plan.convert_date_columns(data_frame)
+
+        self.assertEqual(list(data_frame.columns), list(converted.columns)[:-1])
+
+        with mock.patch(
+            "lusidtools.cocoon.mapping_plan.convert_date_or_cut_label_column"
+        ) as convert:
+            single_requests = mapping_plan.build_models(converted.iloc[1:])
+            convert.assert_not_called()
+
+        self.assertEqual(
+            [request.transaction_date for request in single_requests],
+            ["2020-01-03T00:00:00+00:00", "2020-01-04T10:00:00+00:00"],
+        )
+        self.assertEqual(
+            single_requests, mapping_plan.build_models(data_frame.iloc[1:])
+        )
@@ -0,0 +1,170 @@
+import unittest
+from types import SimpleNamespace
+import lusid
+from lusidtools import cocoon
+from lusidtools.cocoon.metadata_cache import IDENTIFIER_TYPES, TRANSACTION_TYPES
+from lusidtools.cocoon.transaction_type_upload import upsert_transaction_type_alias
+from lusidtools import logger
+
+
+class CocoonMetadataCacheTests(unittest.TestCase):
+    class MockApiFactory(lusid.utilities.ApiClientFactory):
+        """
+        This is a mock of the lusid.utilities.ApiClientFactory class which counts the requests made
+        """
+
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.requests = []
+
+        def build(self, api):
+            """
+
+            :param lusid.api api: The api to mock
+
+            :return: mock(lusid.api): The mocked api
+            """
+
+            if api == lusid.InstrumentsApi:
+                return self.MockInstrumentsApi(self)
+            if api == lusid.SystemConfigurationApi:
+                return self.MockSystemConfigurationApi(self)
+
+        class MockInstrumentsApi:
+            """
+            A mock of the lusid.InstrumentsApi
+            """
+
+            def __init__(self, api_factory):
+                self.api_factory = api_factory
+
+            def get_instrument_identifier_types(self, **kwargs):
+                self.api_factory.requests.append("get_instrument_identifier_types")
+
+                return SimpleNamespace(
+                    values=[
+                        SimpleNamespace(
+                            identifier_type=identifier_type,
+                            is_unique_identifier_type=identifier_type != "Isin",
+                        )
+                        for identifier_type in ["Figi", "Isin", "ClientInternal"]
+                    ]
+                )
+
+        class MockSystemConfigurationApi:
+            """
+            A mock of the lusid.SystemConfigurationApi
+            """
+
+            def __init__(self, api_factory):
+                self.api_factory = api_factory
+
+            def list_configuration_transaction_types(self, **kwargs):
+                self.api_factory.requests.append("list_configuration_transaction_types")
+
+                return lusid.models.TransactionSetConfigurationData(
+                    transaction_configs=[
+                        lusid.models.TransactionConfigurationData(
+                            aliases=[
+                                lusid.models.TransactionConfigurationTypeAlias(
+                                    type="Buy",
+                                    description="Purchase",
+                                    transaction_class="Basic",
+                                    transaction_group="default",
+                                    transaction_roles="Longer",
+                                )
+                            ],
+                            movements=[],
+                        )
+                    ],
+                    side_definitions=[],
+                )
+
+            def set_configuration_transaction_types(self, **kwargs):
+                self.api_factory.requests.append("set_configuration_transaction_types")
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+
+    def setUp(self) -> None:
+        self.api_factory = self.MockApiFactory(
+            token="mock-token", api_url="http://localhost"
+        )
+
+    def test_unique_identifiers_are_cached_for_api_factory(self) -> None:
+        """
+        Tests that the identifier types are only requested once for each api factory until they are refreshed
+
+        :return: None
+        """
+
+        for _ in range(3):
+            self.assertEqual(
+                cocoon.instruments.get_unique_identifiers(self.api_factory),
+                ["Figi", "ClientInternal"],
+            )
+
+        self.assertEqual(self.api_factory.requests, ["get_instrument_identifier_types"])
+
+        cocoon.get_metadata_cache(self.api_factory).refresh(IDENTIFIER_TYPES)
+        cocoon.instruments.get_unique_identifiers(self.api_factory)
+
+        self.assertEqual(
+            self.api_factory.requests, ["get_instrument_identifier_types"] * 2
+        )
+
+        other_api_factory = self.MockApiFactory(
+            token="mock-token", api_url="http://localhost"
+        )
+        cocoon.instruments.get_unique_identifiers(other_api_factory)
+
+        self.assertIsNot(
+            cocoon.get_metadata_cache(other_api_factory),
+            cocoon.get_metadata_cache(self.api_factory),
+        )
+        self.assertEqual(
+            other_api_factory.requests, ["get_instrument_identifier_types"]
+        )
+
+    def test_transaction_types_are_copied_and_refreshed_on_update(self) -> None:
+        """
+        Tests that the cached transaction types can not be modified by their users and that they are refreshed once
+        they have been updated in LUSID
+
+        :return: None
+        """
+
+        metadata_cache = cocoon.get_metadata_cache(self.api_factory)
+
+        transaction_types = metadata_cache.list_configuration_transaction_types()
+        transaction_types.transaction_configs.clear()
+
+        self.assertEqual(
+            len(
+                metadata_cache.list_configuration_transaction_types().transaction_configs
+            ),
+            1,
+        )
+        self.assertEqual(
+            self.api_factory.requests, ["list_configuration_transaction_types"]
+        )
+
+        upsert_transaction_type_alias(self.api_factory, [])
+        metadata_cache.list_configuration_transaction_types()
+
+        self.assertEqual(
+            self.api_factory.requests,
+            [
+                "list_configuration_transaction_types",
+                "set_configuration_transaction_types",
+                "list_configuration_transaction_types",
+            ],
+        )
+
+        metadata_cache.refresh(TRANSACTION_TYPES)
+        metadata_cache.list_configuration_transaction_types()
+
+        self.assertEqual(
+            self.api_factory.requests.count("list_configuration_transaction_types"), 3
+        )
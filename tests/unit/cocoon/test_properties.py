@@ -52,6 +52,25 @@ class CocoonPropertiesTests(unittest.TestCase):
                     ),
                 )
 
+            # A static representation of the property definitions that exist
+            property_keys_in_existance = {
+                "Instrument/default/Figi": lusid.models.ResourceId(
+                    scope="system", code="string"
+                ),
+                "Transaction/default/TradeToPortfolioRate": lusid.models.ResourceId(
+                    scope="system", code="number"
+                ),
+                "Transaction/Operations/Strategy": lusid.models.ResourceId(
+                    scope="system", code="string"
+                ),
+                "Holding/Operations/Currency": lusid.models.ResourceId(
+                    scope="system", code="currency"
+                ),
+            }
+
+            # The property keys requested from LUSID
+            requested_keys = []
+
             def get_property_definition(
                 self, domain, scope, code, **kwargs
             ) -> lusid.models.PropertyDefinition:
@@ -67,32 +86,41 @@ class CocoonPropertiesTests(unittest.TestCase):
                 """
                 # Construct the property key
                 property_key = "{}/{}/{}".format(domain, scope, code)
-
-                # A static representation of the property definitions that exist
-                property_keys_in_existance = {
-                    "Instrument/default/Figi": lusid.models.ResourceId(
-                        scope="system", code="string"
-                    ),
-                    "Transaction/default/TradeToPortfolioRate": lusid.models.ResourceId(
-                        scope="system", code="number"
-                    ),
-                    "Transaction/Operations/Strategy": lusid.models.ResourceId(
-                        scope="system", code="string"
-                    ),
-                    "Holding/Operations/Currency": lusid.models.ResourceId(
-                        scope="system", code="currency"
-                    ),
-                }
+                self.requested_keys.append(property_key)
 
                 # If the property exists return the defintion, else raise an exception
-                if property_key in list(property_keys_in_existance.keys()):
+                if property_key in list(self.property_keys_in_existance.keys()):
                     return lusid.models.PropertyDefinition(
                         key=property_key,
-                        data_type_id=property_keys_in_existance[property_key],
+                        data_type_id=self.property_keys_in_existance[property_key],
                     )
                 else:
                     raise lusid.exceptions.ApiException
 
+            def get_multiple_property_definitions(
+                self, property_keys, **kwargs
+            ) -> lusid.models.ResourceListOfPropertyDefinition:
+                """
+                This mocks the call to get multiple property definitions, the definitions which do not exist are omitted
+
+                :param list[str] property_keys: The keys of the properties
+                :param kwargs:
+
+                :return: lusid.models.ResourceListOfPropertyDefinition: The property definitions which exist
+                """
+                self.requested_keys.extend(property_keys)
+
+                return lusid.models.ResourceListOfPropertyDefinition(
+                    values=[
+                        lusid.models.PropertyDefinition(
+                            key=property_key,
+                            data_type_id=self.property_keys_in_existance[property_key],
+                        )
+                        for property_key in property_keys
+                        if property_key in self.property_keys_in_existance
+                    ]
+                )
+
     @classmethod
     def setUpClass(cls) -> None:
         # Use a mock of the lusid.ApiClientFactory
@@ -100,6 +128,10 @@ class CocoonPropertiesTests(unittest.TestCase):
         cls.api_factory = cls.MockApiFactory(api_secrets_filename=secrets_file)
         cls.logger = logger.LusidLogger("debug")
 
+    def setUp(self) -> None:
+        cocoon.get_metadata_cache(self.api_factory).refresh()
+        self.MockApiFactory.MockPropertyDefinitionsApi.requested_keys.clear()
+
     @parameterized.expand(
         [
             ["Instrument/default/Figi", [True, "string"]],
@@ -211,6 +243,43 @@ class CocoonPropertiesTests(unittest.TestCase):
 
         self.assertTrue(expr=updated_data_frame.equals(expected_outcome[1]))
 
+    def test_property_definitions_are_cached(self) -> None:
+        """
+        Tests that the property definitions which exist are only requested from LUSID once and those which do not
+        exist are requested again
+
+        :return: None
+        """
+
+        property_keys = [
+            "Instrument/default/Figi",
+            "Transaction/default/TradeToPortfolioRate",
+            "Instrument/default/PropertyThatDoesNotExist",
+        ]
+        requested_keys = self.MockApiFactory.MockPropertyDefinitionsApi.requested_keys
+
+        data_types = cocoon.properties.get_property_definition_data_types(
+            api_factory=self.api_factory, property_keys=property_keys, batch_size=2
+        )
+        self.assertCountEqual(requested_keys, property_keys)
+        requested_keys.clear()
+
+        cached_data_types = cocoon.properties.get_property_definition_data_types(
+            api_factory=self.api_factory, property_keys=property_keys
+        )
+
+        self.assertEqual(
+            data_types,
+            {
+                "Instrument/default/Figi": "string",
+                "Transaction/default/TradeToPortfolioRate": "number",
+            },
+        )
+        self.assertEqual(cached_data_types, data_types)
+        self.assertEqual(
+            requested_keys, ["Instrument/default/PropertyThatDoesNotExist"]
+        )
+
     @parameterized.expand(
         [
             # Test that a missing property is created as expected
@@ -376,6 +445,69 @@ class CocoonPropertiesTests(unittest.TestCase):
 
         self.assertEqual(first=property_values, second=expected_outcome)
 
+    @parameterized.expand(
+        [
+            ["Instrument", ["Moodys", "S&P", "Rebalancing_Interval"]],
+            ["Transaction", ["Moodys", "S&P", "Rebalancing_Interval"]],
+            ["Transaction", ["S&P"]],
+            ["Transaction", []],
+        ]
+    )
+    def test_create_property_values_from_data_frame(
+        self, domain, property_columns
+    ) -> None:
+        """
+        Tests that the property values created for a whole DataFrame match those created a row at a time
+
+        :param str domain: The domain to create the property values in
+        :param list[str] property_columns: The columns to create property values for
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {
+                "Moodys": ["A2", None, "Baa1"],
+                "S&P": ["A-", "BBB", None],
+                "Rebalancing_Interval": [30.0, np.nan, 7.5],
+                "Ignored": ["a", "b", "c"],
+            }
+        )
+
+        property_values = cocoon.properties.create_property_values_from_data_frame(
+            data_frame=data_frame,
+            scope="CreditRating",
+            domain=domain,
+            property_columns=property_columns,
+        )
+
+        self.assertEqual(
+            first=property_values,
+            second=[
+                cocoon.properties.create_property_values(
+                    row=row,
+                    scope="CreditRating",
+                    domain=domain,
+                    dtypes=data_frame.dtypes[property_columns],
+                )
+                for _, row in data_frame.iterrows()
+            ],
+        )
+
+    def test_create_property_values_from_data_frame_unmapped_data_type(self) -> None:
+        """
+        Tests that an error is raised if a column's data type has not been mapped to a LUSID data type
+
+        :return: None
+        """
+
+        with self.assertRaises(TypeError):
+            cocoon.properties.create_property_values_from_data_frame(
+                data_frame=pd.DataFrame({"Traded": [pd.Timedelta(days=1)]}),
+                scope="Operations",
+                domain="Transaction",
+            )
+
     @parameterized.expand(
         [
             [
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from lusidtools import cocoon
+from lusidtools.cocoon import rate_limiter
+from lusidtools.cocoon.rate_limiter import (
+    RateLimiter,
+    TokenBucket,
+    get_endpoint,
+    get_rate_limiter,
+    parse_rates,
+    set_rate_limiter,
+)
+from lusidtools.lpt.lse import Caller
+from lusidtools.lpt.record import Rec
+from lusidtools import logger
+
+
+class SearchApi:
+    """
+    A stand in for the LUSID SearchApi, the name of the class is the endpoint class
+    """
+
+    def instruments_search_with_http_info(self, **kwargs):
+        return [], 200, {"lusid-meta-success": "True"}
+
+
+class CocoonTestsRateLimiter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+
+    def tearDown(self) -> None:
+        set_rate_limiter(None)
+
+    def test_token_bucket(self) -> None:
+        """
+        Tests that a burst of up to the capacity does not wait and later requests wait for their token to be refilled
+
+        :return: None
+        """
+
+        bucket = TokenBucket(rate=10, capacity=2)
+
+        self.assertEqual([bucket.reserve(now=0) for _ in range(4)], [0, 0, 0.1, 0.2])
+        self.assertAlmostEqual(bucket.wait_time(now=0), 0.3)
+        # After a second the bucket is full again but no more than its capacity
+        self.assertEqual([bucket.reserve(now=1) for _ in range(3)], [0, 0, 0.1])
+
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+    def test_rates_for_each_endpoint_class(self) -> None:
+        """
+        Tests that each endpoint class with a rate has its own bucket, the others share the default bucket and are not
+        limited without a default rate
+
+        :return: None
+        """
+
+        limiter = RateLimiter(rates={"SearchApi": 1}, capacity=1)
+
+        self.assertEqual([limiter.reserve("InstrumentsApi") for _ in range(5)], [0] * 5)
+        self.assertEqual(limiter.reserve("SearchApi"), 0)
+        self.assertGreater(limiter.reserve("SearchApi"), 0.9)
+        self.assertGreater(limiter.wait_time("SearchApi"), 1.9)
+
+        statistics = limiter.statistics()
+        self.assertEqual(statistics["default"]["requests"], 5)
+        self.assertEqual(statistics["default"]["wait_time"], 0)
+        self.assertEqual(statistics["SearchApi"]["requests"], 2)
+        self.assertEqual(statistics["SearchApi"]["waits"], 1)
+
+        limiter = RateLimiter(rate=2, rates={"SearchApi": 1}, capacity=1)
+        limiter.reserve("InstrumentsApi")
+        self.assertGreater(limiter.reserve("QuotesApi"), 0.4)
+
+    def test_acquire_async_does_not_block_the_event_loop(self) -> None:
+        """
+        Tests that coroutines waiting for the limiter are spaced out at its rate while other work continues
+
+        :return: None
+        """
+
+        limiter = RateLimiter(rate=50, capacity=1)
+        events = []
+
+        async def request(i):
+            await limiter.acquire_async("InstrumentsApi")
+            events.append(("request", time.monotonic()))
+
+        async def other_work():
+            events.append(("other", time.monotonic()))
+
+        async def main():
+            await asyncio.gather(*[request(i) for i in range(5)], other_work())
+
+        start = time.monotonic()
+        asyncio.run(main())
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.07)
+        self.assertEqual(events[1][0], "other")
+        self.assertEqual(limiter.statistics()["default"]["waits"], 4)
+
+    @unittest.skipIf(rate_limiter.fcntl is None, "File locking is not available")
+    def test_budget_shared_through_a_file(self) -> None:
+        """
+        Tests that limiters using the same file share one budget, as the limiters in several processes would
+
+        :return: None
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rate_limits.json")
+            first = RateLimiter(rate=10, capacity=2, path=path)
+            second = RateLimiter(rate=10, capacity=2, path=path)
+
+            waits = [
+                limiter.reserve("InstrumentsApi") for limiter in [first, second] * 2
+            ]
+
+            self.assertEqual(waits[:2], [0, 0])
+            self.assertGreater(waits[2], 0.05)
+            self.assertGreater(waits[3], waits[2])
+            self.assertGreater(first.wait_time("InstrumentsApi"), waits[3])
+
+    def test_rate_limiter_from_environment(self) -> None:
+        """
+        Tests that the process wide rate limiter is configured from the environment variables
+
+        :return: None
+        """
+
+        self.assertEqual(
+            parse_rates("20, SearchApi=5"), {"default": 20, "SearchApi": 5}
+        )
+
+        with self.assertRaises(ValueError):
+            parse_rates("SearchApi=fast")
+
+        with mock.patch.dict(
+            os.environ, {rate_limiter.RATE_LIMITS_ENV: "default=20,SearchApi=5"}
+        ):
+            set_rate_limiter(None)
+            limiter = get_rate_limiter()
+
+        self.assertIs(get_rate_limiter(), limiter)
+        self.assertEqual((limiter.rate, limiter.rates), (20, {"SearchApi": 5}))
+
+    def test_callers_use_the_shared_rate_limiter(self) -> None:
+        """
+        Tests that batch loaders and lse queries wait for the process wide rate limiter of their endpoint class
+
+        :return: None
+        """
+
+        limiter = RateLimiter(rates={"InstrumentsApi": 100, "SearchApi": 100})
+        set_rate_limiter(limiter)
+
+        async def load_instrument_batch(api_factory, single_requests, **kwargs):
+            return len(single_requests)
+
+        with mock.patch.object(
+            cocoon.cocoon.BatchLoader, "load_instrument_batch", load_instrument_batch
+        ):
+            response = asyncio.run(
+                cocoon.cocoon._load_data(
+                    api_factory=None,
+                    single_requests=[1, 2],
+                    file_type="instrument",
+                    endpoint="InstrumentsApi",
+                )
+            )
+
+        self.assertEqual(response, 2)
+
+        caller = Caller(
+            Rec(instruments_search=SearchApi().instruments_search_with_http_info),
+            None,
+            Exception,
+        )
+        self.assertTrue(caller.instruments_search().is_right())
+        self.assertEqual(
+            get_endpoint(SearchApi().instruments_search_with_http_info), "SearchApi"
+        )
+
+        statistics = limiter.statistics()
+        self.assertEqual(statistics["InstrumentsApi"]["requests"], 1)
+        self.assertEqual(statistics["SearchApi"]["requests"], 1)
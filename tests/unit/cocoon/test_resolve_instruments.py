@@ -0,0 +1,264 @@
+import threading
+import unittest
+from types import SimpleNamespace
+import lusid
+import numpy as np
+import pandas as pd
+from lusidtools import cocoon
+from lusidtools import logger
+
+
+class CocoonResolveInstrumentsTests(unittest.TestCase):
+    class MockApiFactory(lusid.utilities.ApiClientFactory):
+        """
+        This is a mock of the lusid.utilities.ApiClientFactory class which records the requests made
+        """
+
+        # The instruments in LUSID for each identifier type
+        instruments = {
+            "Figi": {"BBG000C05BD1": "LUID_BP", "BBG000BVPXP1": "LUID_AMZN"},
+            "Isin": {
+                "GB0007980591": ["LUID_BP"],
+                "US0231351067": ["LUID_AMZN", "LUID_AMZN_2"],
+            },
+        }
+
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.lock = threading.Lock()
+            self.requests = []
+
+        def build(self, api):
+            """
+
+            :param lusid.api api: The api to mock
+
+            :return: mock(lusid.api): The mocked api
+            """
+
+            if api == lusid.InstrumentsApi:
+                return self.MockInstrumentsApi(self)
+            if api == lusid.SearchApi:
+                return self.MockSearchApi(self)
+
+        class MockInstrumentsApi:
+            """
+            A mock of the lusid.InstrumentsApi
+            """
+
+            def __init__(self, api_factory):
+                self.api_factory = api_factory
+
+            def get_instrument_identifier_types(self, **kwargs):
+                return SimpleNamespace(
+                    values=[
+                        SimpleNamespace(
+                            identifier_type=identifier_type,
+                            is_unique_identifier_type=identifier_type != "Isin",
+                        )
+                        for identifier_type in [
+                            "Figi",
+                            "Isin",
+                            "ClientInternal",
+                            "Currency",
+                        ]
+                    ]
+                )
+
+            def get_instruments(self, identifier_type, request_body, **kwargs):
+                with self.api_factory.lock:
+                    self.api_factory.requests.append(
+                        ("get_instruments", identifier_type, sorted(request_body))
+                    )
+
+                if identifier_type == "ClientInternal":
+                    raise lusid.exceptions.ApiException(
+                        status=500, reason="Internal Server Error"
+                    )
+
+                instruments = self.api_factory.instruments.get(identifier_type, {})
+
+                return SimpleNamespace(
+                    values={
+                        value: SimpleNamespace(lusid_instrument_id=instruments[value])
+                        for value in request_body
+                        if value in instruments
+                    },
+                    failed={},
+                )
+
+        class MockSearchApi:
+            """
+            A mock of the lusid.SearchApi
+            """
+
+            def __init__(self, api_factory):
+                self.api_factory = api_factory
+
+            def instruments_search(self, instrument_search_property, **kwargs):
+                with self.api_factory.lock:
+                    self.api_factory.requests.append(
+                        (
+                            "instruments_search",
+                            instrument_search_property[0].key,
+                            sorted(
+                                search.value for search in instrument_search_property
+                            ),
+                        )
+                    )
+
+                instruments = self.api_factory.instruments["Isin"]
+
+                return [
+                    SimpleNamespace(
+                        mastered_instruments=[
+                            SimpleNamespace(
+                                identifiers={
+                                    "LusidInstrumentId": SimpleNamespace(value=luid)
+                                }
+                            )
+                            for luid in instruments.get(search.value, [])
+                        ]
+                    )
+                    for search in instrument_search_property
+                ]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+
+    def setUp(self) -> None:
+        self.api_factory = self.MockApiFactory(
+            token="mock-token", api_url="http://localhost"
+        )
+        self.instrument_cache = cocoon.InstrumentCache()
+
+    def test_resolve_instruments(self) -> None:
+        """
+        Tests that each row is resolved using the first identifier which uniquely identifies an instrument
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {
+                "figi": ["BBG000C05BD1", None, None, "BBG000XXXXXX", None, None],
+                "isin": [None, "GB0007980591", "US0231351067", None, None, None],
+                "client_internal": [None, None, None, None, "imd_1", None],
+                "currency": [None, None, None, None, None, "GBP"],
+            },
+            index=[10, 11, 12, 13, 14, 15],
+        )
+
+        result = cocoon.instruments.resolve_instruments(
+            api_factory=self.api_factory,
+            data_frame=data_frame,
+            identifier_mapping={
+                "Figi": "figi",
+                "Isin": "isin",
+                "ClientInternal": "client_internal",
+                "Currency": "currency",
+            },
+            instrument_cache=self.instrument_cache,
+        )
+
+        self.assertEqual(list(result.index), list(data_frame.index))
+        self.assertEqual(
+            list(result["resolvable"]), [True, True, False, False, False, True]
+        )
+        self.assertEqual(
+            list(result["foundWith"]), [["Figi"], ["Isin"], [], [], [], ["GBP"]]
+        )
+        self.assertEqual(result["LusidInstrumentId"].iloc[0], "LUID_BP")
+        self.assertEqual(result["LusidInstrumentId"].iloc[1], "LUID_BP")
+        self.assertTrue(np.isnan(result["LusidInstrumentId"].iloc[2]))
+        self.assertIsNone(result["LusidInstrumentId"].iloc[3])
+        self.assertIsNone(result["LusidInstrumentId"].iloc[4])
+        self.assertEqual(result["LusidInstrumentId"].iloc[5], "GBP")
+        self.assertEqual(
+            list(result["comment"]),
+            [
+                "Uniquely resolved to an instrument in the securities master",
+                "Uniquely resolved to an instrument in the securities master",
+                "Multiple instruments found for the instrument using identifier Isin",
+                "No instruments found for the given identifiers",
+                "Failed to find instrument due to LUSID error during search due to status 500 with reason "
+                "Internal Server Error",
+                "Resolved as cash with a currency",
+            ],
+        )
+        self.assertNotIn("resolvable", data_frame.columns)
+
+    def test_identifier_values_are_resolved_once(self) -> None:
+        """
+        Tests that each distinct identifier value is only resolved once and the values are resolved in batches
+
+        :return: None
+        """
+
+        figis = ["BBG000C05BD1", "BBG000BVPXP1", "BBG000XXXXXX"]
+        data_frame = pd.DataFrame(
+            {
+                "figi": [figis[i % 3] for i in range(3000)],
+                "currency": None,
+            }
+        )
+
+        result = cocoon.instruments.resolve_instruments(
+            api_factory=self.api_factory,
+            data_frame=data_frame,
+            identifier_mapping={"Figi": "figi", "Currency": "currency"},
+            batch_size=2,
+            instrument_cache=self.instrument_cache,
+        )
+
+        self.assertCountEqual(
+            self.api_factory.requests,
+            [
+                ("get_instruments", "Figi", ["BBG000BVPXP1", "BBG000C05BD1"]),
+                ("get_instruments", "Figi", ["BBG000XXXXXX"]),
+            ],
+        )
+        self.assertEqual(
+            list(result["LusidInstrumentId"].iloc[:3]),
+            ["LUID_BP", "LUID_AMZN", None],
+        )
+        self.assertEqual(result["resolvable"].sum(), 2000)
+
+    def test_resolved_identifiers_are_cached(self) -> None:
+        """
+        Tests that identifiers which resolved to an instrument are not requested again while those which did not are
+
+        :return: None
+        """
+
+        data_frame = pd.DataFrame(
+            {
+                "figi": ["BBG000C05BD1", "BBG000XXXXXX"],
+                "isin": [None, "GB0007980591"],
+                "currency": None,
+            }
+        )
+        identifier_mapping = {"Figi": "figi", "Isin": "isin", "Currency": "currency"}
+
+        first = cocoon.instruments.resolve_instruments(
+            api_factory=self.api_factory,
+            data_frame=data_frame,
+            identifier_mapping=identifier_mapping,
+            instrument_cache=self.instrument_cache,
+        )
+        self.api_factory.requests.clear()
+
+        second = cocoon.instruments.resolve_instruments(
+            api_factory=self.api_factory,
+            data_frame=data_frame,
+            identifier_mapping=identifier_mapping,
+            instrument_cache=self.instrument_cache,
+        )
+
+        self.assertEqual(
+            self.api_factory.requests,
+            [("get_instruments", "Figi", ["BBG000XXXXXX"])],
+        )
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual(self.instrument_cache.statistics()["memory_hits"], 2)
@@ -0,0 +1,316 @@
+import asyncio
+import email.utils
+import time
+import unittest
+from unittest import mock
+import lusid
+import pandas as pd
+from parameterized import parameterized
+from lusidtools import cocoon
+from lusidtools.cocoon.async_tools import get_thread_pool
+from lusidtools.cocoon.retry import RetryPolicy, get_retry_after, get_status
+from lusidtools import logger
+
+
+def api_exception(status, headers=None):
+    """
+    Creates an ApiException with the status and the headers of its response
+    """
+
+    exception = lusid.exceptions.ApiException(status=status, reason="Failed")
+    exception.headers = headers
+    return exception
+
+
+class CocoonTestsRetry(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+        cls.domain_lookup = cocoon.utilities.load_json_file(
+            "config/domain_settings.json"
+        )
+
+    @parameterized.expand(
+        [
+            ["seconds", {"Retry-After": "2.5"}, 2.5],
+            ["lower_case", {"retry-after": "3"}, 3],
+            ["negative", {"Retry-After": "-1"}, 0],
+            ["invalid", {"Retry-After": "soon"}, None],
+            ["missing", {}, None],
+        ]
+    )
+    def test_get_retry_after(self, _, headers, expected_delay) -> None:
+        """
+        Tests that the delay LUSID asks for is read from the Retry-After header
+
+        :param dict headers: The headers of the response
+        :param float expected_delay: The expected number of seconds to wait
+
+        :return: None
+        """
+
+        self.assertEqual(get_retry_after(api_exception(429, headers)), expected_delay)
+
+    def test_get_retry_after_http_date(self) -> None:
+        """
+        Tests that a Retry-After header with an HTTP date is converted to the number of seconds until then
+
+        :return: None
+        """
+
+        retry_at = email.utils.formatdate(time.time() + 60, usegmt=True)
+        delay = get_retry_after(api_exception(429, {"Retry-After": retry_at}))
+
+        self.assertGreater(delay, 55)
+        self.assertLessEqual(delay, 60)
+
+    def test_get_delay(self) -> None:
+        """
+        Tests that the delay doubles after each attempt up to the maximum, is jittered when required and is replaced
+        by any Retry-After header
+
+        :return: None
+        """
+
+        policy = RetryPolicy(base_delay=1, max_delay=5, jitter=False)
+        self.assertEqual(
+            [policy.get_delay(attempt) for attempt in range(1, 5)], [1, 2, 4, 5]
+        )
+        self.assertEqual(
+            policy.get_delay(1, api_exception(429, {"Retry-After": "7"})), 7
+        )
+
+        policy = RetryPolicy(base_delay=1, max_delay=5)
+        for attempt in range(1, 5):
+            self.assertTrue(
+                0 <= policy.get_delay(attempt) <= min(2 ** (attempt - 1), 5)
+            )
+
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_attempts=0)
+
+    @parameterized.expand(
+        [
+            ["api_exception", api_exception(503), 503],
+            ["timeout", asyncio.TimeoutError(), 0],
+            ["connection", ConnectionError(), 0],
+            ["other", ValueError(), None],
+        ]
+    )
+    def test_get_status(self, _, error, expected_status) -> None:
+        """
+        Tests that timeouts and connection errors are given the status 0
+
+        :param Exception error: The error the request failed with
+        :param int expected_status: The expected status
+
+        :return: None
+        """
+
+        self.assertEqual(get_status(error), expected_status)
+
+    def test_retry_until_success(self) -> None:
+        """
+        Tests that throttled batches are retried, whether the exception is raised or returned, and that a request
+        which is invalid is not
+
+        :return: None
+        """
+
+        outcomes = [api_exception(429), api_exception(503), "loaded"]
+        attempts = []
+
+        async def load(requests):
+            attempts.append(list(requests))
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception) and len(attempts) == 1:
+                raise outcome
+            return outcome
+
+        policy = RetryPolicy(base_delay=0)
+        responses, statistics = asyncio.run(policy.load_batch(load, [1, 2, 3]))
+
+        self.assertEqual(responses, ["loaded"])
+        self.assertEqual(attempts, [[1, 2, 3]] * 3)
+        self.assertEqual(
+            {key: statistics[key] for key in ["rows", "requests", "retries", "splits"]},
+            {"rows": 3, "requests": 3, "retries": 2, "splits": 0},
+        )
+
+        async def invalid(requests):
+            raise api_exception(400)
+
+        responses, statistics = asyncio.run(policy.load_batch(invalid, [1, 2, 3]))
+        self.assertEqual(responses[0].status, 400)
+        self.assertEqual(statistics["requests"], 1)
+
+    def test_retries_are_limited(self) -> None:
+        """
+        Tests that the last failure is returned once the attempts are used up, and that a timeout is raised as it is
+        not a response from LUSID
+
+        :return: None
+        """
+
+        async def throttled(requests):
+            return api_exception(429)
+
+        policy = RetryPolicy(max_attempts=3, base_delay=0)
+        responses, statistics = asyncio.run(policy.load_batch(throttled, [1]))
+        self.assertEqual(responses[0].status, 429)
+        self.assertEqual(statistics["requests"], 3)
+
+        async def timeout(requests):
+            raise asyncio.TimeoutError()
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(policy.load_batch(timeout, [1], split_allowed=True))
+
+    def test_split_on_size_related_failures(self) -> None:
+        """
+        Tests that a batch which is too large is bisected until its parts are loaded, in order, and that it is only
+        retried as it is when splitting is not allowed
+
+        :return: None
+        """
+
+        attempts = []
+
+        async def load(requests):
+            attempts.append(list(requests))
+            if len(requests) > 2:
+                raise api_exception(413)
+            return list(requests)
+
+        policy = RetryPolicy(base_delay=0)
+        responses, statistics = asyncio.run(
+            policy.load_batch(load, list(range(7)), split_allowed=True)
+        )
+
+        self.assertEqual(responses, [[0], [1, 2], [3, 4], [5, 6]])
+        self.assertEqual(attempts[0], list(range(7)))
+        self.assertEqual(statistics["splits"], 3)
+        self.assertEqual(statistics["requests"], 7)
+
+        # A 413 is not worth retrying as it is
+        attempts.clear()
+        responses, statistics = asyncio.run(policy.load_batch(load, list(range(7))))
+        self.assertEqual(responses[0].status, 413)
+        self.assertEqual(len(attempts), 1)
+
+    def test_call_retries_without_blocking(self) -> None:
+        """
+        Tests that calls are retried with the waits made on the event loop, so other work continues while waiting
+
+        :return: None
+        """
+
+        events = []
+
+        async def flaky():
+            events.append("call")
+            if events.count("call") < 3:
+                raise api_exception(500)
+            return "resolved"
+
+        async def other_work():
+            for _ in range(3):
+                events.append("other")
+                await asyncio.sleep(0.005)
+
+        async def main():
+            policy = RetryPolicy(base_delay=0.01, jitter=False)
+            return await asyncio.gather(policy.call(flaky), other_work())
+
+        result, _ = asyncio.run(main())
+
+        self.assertEqual(result, "resolved")
+        self.assertEqual(events.count("call"), 3)
+        self.assertLess(events.index("other"), events.index("call", 1))
+
+    def test_construct_batches_retries_and_splits(self) -> None:
+        """
+        Tests that a batch of transactions which times out is split and throttled batches are retried, so every
+        transaction is loaded once, and that the retries of each batch are returned in the response
+
+        :return: None
+        """
+
+        loaded = []
+        throttled = set()
+
+        async def fake_load_data(
+            api_factory, single_requests, file_type, code, **kwargs
+        ):
+            await asyncio.sleep(0)
+            if len(single_requests) > 3:
+                raise asyncio.TimeoutError()
+
+            if code not in throttled:
+                throttled.add(code)
+                raise api_exception(429, {"Retry-After": "0"})
+
+            loaded.extend(request.transaction_id for request in single_requests)
+            return len(single_requests)
+
+        data_frame = pd.DataFrame(
+            {
+                "code": ["FundA", "FundB"] * 5,
+                "id": [f"txn_{i}" for i in range(10)],
+                "figi": "BBG000C05BD1",
+                "transaction_date": "2020-01-01",
+                "type": "Buy",
+                "units": 100,
+                "price": 10.0,
+                "price_type": "Price",
+                "total_consideration": 1000.0,
+                "currency": "GBP",
+            }
+        )
+
+        with mock.patch.object(cocoon.cocoon, "_load_data", fake_load_data):
+            responses = asyncio.run(
+                cocoon.cocoon._construct_batches(
+                    api_factory=None,
+                    data_frame=data_frame,
+                    mapping_required={
+                        "code": "code",
+                        "transaction_id": "id",
+                        "type": "type",
+                        "transaction_date": "transaction_date",
+                        "settlement_date": "transaction_date",
+                        "units": "units",
+                        "transaction_price.price": "price",
+                        "transaction_price.type": "price_type",
+                        "total_consideration.amount": "total_consideration",
+                        "total_consideration.currency": "currency",
+                    },
+                    mapping_optional={},
+                    property_columns=[],
+                    properties_scope="TestScope",
+                    instrument_identifier_mapping={"Figi": "figi"},
+                    batch_size=10,
+                    file_type="transaction",
+                    domain_lookup=self.domain_lookup,
+                    sub_holding_keys=[],
+                    sub_holding_keys_scope="TestScope",
+                    retry_policy=RetryPolicy(base_delay=0),
+                    scope="TestScope",
+                    full_key_format=self.domain_lookup["transaction"][
+                        "full_key_format"
+                    ],
+                    unique_identifiers=["Figi"],
+                    thread_pool=get_thread_pool(2).thread_pool,
+                )
+            )
+
+        self.assertEqual(responses["errors"], [])
+        self.assertEqual(sorted(loaded), sorted(data_frame["id"]))
+        self.assertEqual(sum(responses["success"]), 10)
+        self.assertEqual(
+            [
+                (batch["rows"], batch["splits"], batch["retries"])
+                for batch in responses["batches"]
+            ],
+            [(5, 1, 1), (5, 1, 1)],
+        )
@@ -0,0 +1,201 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import lusid
+import pandas as pd
+from parameterized import parameterized
+from lusidtools import cocoon
+from lusidtools.cocoon import async_transport, telemetry
+from lusidtools.cocoon.telemetry import LoadTelemetry, STATS_COLUMNS
+from lusidtools import logger
+
+
+class StubLusidHandler(BaseHTTPRequestHandler):
+    """
+    A stub of the LUSID endpoints used to load instruments, which reports its duration and a request id as LUSID does
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("lusid-meta-duration", "250")
+        self.send_header("lusid-meta-requestId", "request-1")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.send_json(
+            200,
+            {
+                "values": [
+                    {
+                        "identifierType": "Figi",
+                        "propertyKey": "Instrument/default/Figi",
+                        "isUniqueIdentifierType": True,
+                    }
+                ]
+            },
+        )
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.send_json(
+            201,
+            {
+                "values": {
+                    correlation_id: {
+                        "lusidInstrumentId": f"LUID_{correlation_id}",
+                        "name": instrument["name"],
+                        "identifiers": {},
+                        "state": "Active",
+                        "version": {
+                            "effectiveFrom": "2020-01-01T00:00:00.0000000+00:00",
+                            "asAtDate": "2020-01-01T00:00:00.0000000+00:00",
+                        },
+                    }
+                    for correlation_id, instrument in body.items()
+                },
+                "failed": {},
+            },
+        )
+
+
+class CocoonTestsTelemetry(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubLusidHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.api_factory = lusid.utilities.ApiClientFactory(
+            token="stub-token", api_url=f"http://127.0.0.1:{cls.server.server_port}"
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def load(self, use_async_transport: bool) -> LoadTelemetry:
+        load_telemetry = LoadTelemetry()
+
+        responses = cocoon.cocoon.load_from_data_frame(
+            api_factory=self.api_factory,
+            scope="TestScope",
+            data_frame=pd.DataFrame(
+                {
+                    "name": [f"Instrument {i}" for i in range(5)],
+                    "figi": [f"BBG{i:09d}" for i in range(5)],
+                }
+            ),
+            mapping_required={"name": "name"},
+            mapping_optional={},
+            file_type="instruments",
+            identifier_mapping={"Figi": "figi"},
+            batch_size=2,
+            async_transport=use_async_transport,
+            telemetry=load_telemetry,
+        )
+
+        self.assertEqual(len(responses["instruments"]["success"]), 3)
+
+        return load_telemetry
+
+    @parameterized.expand([["thread_pool", False], ["async_transport", True]])
+    def test_records_each_request(self, _, use_async_transport) -> None:
+        """
+        Tests that the rows, sizes, server duration and timing of each phase are recorded for each request, whichever
+        transport sends it
+
+        :param bool use_async_transport: Whether to use the async transport
+
+        :return: None
+        """
+
+        if use_async_transport and async_transport.aiohttp is None:
+            self.skipTest("The async transport requires aiohttp")
+
+        stats = self.load(use_async_transport).to_data_frame()
+
+        self.assertEqual(list(stats.columns), telemetry.TELEMETRY_COLUMNS)
+        self.assertEqual(sorted(stats["batch"]), [0, 1, 2])
+        self.assertEqual(sorted(stats["rows"]), [1, 2, 2])
+        self.assertEqual(list(stats["name"].unique()), ["load_instrument_batch"])
+        self.assertEqual(list(stats["status"].unique()), [201])
+        self.assertEqual(list(stats["requestId"].unique()), ["request-1"])
+        self.assertEqual(list(stats["elapsed"].unique()), [0.25])
+        self.assertTrue((stats["requests"] == 1).all())
+        self.assertTrue((stats["requestBytes"] > 0).all())
+        self.assertTrue((stats["responseBytes"] > 0).all())
+
+        for phase in ["convert", "serialize", "send", "deserialize"]:
+            self.assertTrue((stats[phase] >= 0).all(), phase)
+
+        self.assertTrue(
+            (
+                stats["serialize"] + stats["send"] + stats["deserialize"]
+                <= stats["duration"] + 1e-6
+            ).all()
+        )
+
+    def test_api_client_is_restored_after_the_load(self) -> None:
+        """
+        Tests that the ApiClient's request is only instrumented while loading, so that it is unchanged after the load
+
+        :return: None
+        """
+
+        api_client = self.api_factory.api_client
+        request = api_client.request
+
+        self.load(False)
+
+        self.assertNotIn("request", vars(api_client))
+        self.assertNotIn("_telemetry_instrumented", vars(api_client))
+        self.assertEqual(api_client.request, request)
+
+    def test_summary_and_dump_stats(self) -> None:
+        """
+        Tests that the time is summarised by phase and the stats are written in the same format as lpt.dump_stats
+
+        :return: None
+        """
+
+        load_telemetry = self.load(False)
+
+        summary = load_telemetry.summary()
+        self.assertEqual(
+            list(summary.index),
+            ["convert", "serialize", "network", "server", "deserialize"],
+        )
+        self.assertAlmostEqual(summary.loc["server", "seconds"], 0.75)
+        self.assertAlmostEqual(summary["share"].sum(), 1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.csv")
+            load_telemetry.dump_stats(path)
+
+            with open(path) as file:
+                rows = list(csv.reader(file))
+
+        self.assertEqual(rows[0], STATS_COLUMNS)
+        self.assertEqual(len(rows), 4)
+
+    @unittest.skipIf(telemetry.trace is not None, "opentelemetry is installed")
+    def test_spans_require_opentelemetry(self) -> None:
+        """
+        Tests that spans can not be requested without opentelemetry
+
+        :return: None
+        """
+
+        with self.assertRaises(ValueError):
+            LoadTelemetry(spans=True)
@@ -1,4 +1,6 @@
+import asyncio
 import copy
+import os
 import uuid
 
 import numpy
@@ -6,6 +8,7 @@ import unittest
 from datetime import datetime
 from pathlib import Path
 from typing import Callable
+from unittest import mock
 import lusid
 import numpy as np
 import pandas as pd
@@ -13,8 +16,17 @@ from pandas.util.testing import assert_frame_equal, assert_series_equal
 import pytz
 from parameterized import parameterized
 from lusidtools import cocoon
-from lusidtools.cocoon.utilities import (
+from lusidtools.cocoon.async_tools import run_in_executor
+from lusidtools.cocoon.argument_checks import (
     checkargs,
+    get_checkargs_mode,
+    set_checkargs_mode,
+    CHECKARGS_MODE_ENV,
+    CHECKARGS_ALWAYS,
+    CHECKARGS_BOUNDARY,
+    CHECKARGS_NEVER,
+)
+from lusidtools.cocoon.utilities import (
     get_delimiter,
     check_mapping_fields_exist,
     identify_cash_items,
@@ -48,6 +60,19 @@ def checkargs_function(a_function: Callable):
     return isinstance(a_function, Callable)
 
 
+@checkargs
+def checkargs_nested(a_list: list):
+    return checkargs_dict(a_list)
+
+
+@checkargs
+def checkargs_nested_in_thread(a_list: list):
+    async def check_in_thread():
+        return await run_in_executor(checkargs_dict)(a_list)
+
+    return asyncio.run(check_in_thread())
+
+
 def instr_def(look_through_portfolio_id=None):
     return lusid.models.InstrumentDefinition(
         name="GlobalCreditFund",
@@ -165,7 +190,7 @@ class CocoonUtilitiesTests(unittest.TestCase):
         :return: None
         """
 
-        nested_dictionary = cocoon.utilities.expand_dictionary_single_recursive(
+        nested_dictionary = cocoon.mapping_plan.expand_dictionary_single_recursive(
             index=0, key_list=key_list, value=value
         )
 
@@ -210,7 +235,7 @@ class CocoonUtilitiesTests(unittest.TestCase):
         :return: None
         """
 
-        expanded_dictionary = cocoon.utilities.expand_dictionary(
+        expanded_dictionary = cocoon.mapping_plan.expand_dictionary(
             dictionary=compacted_dictionary
         )
 
@@ -267,7 +292,7 @@ class CocoonUtilitiesTests(unittest.TestCase):
         :return: None
         """
 
-        cocoon.utilities.update_dict(
+        cocoon.mapping_plan.update_dict(
             orig_dict=nested_dictionary_1, new_dict=nested_dictionary_2
         )
 
@@ -656,8 +681,74 @@ class CocoonUtilitiesTests(unittest.TestCase):
         )
 
     def test_populate_model(self):
-        """Not implemented yet"""
-        pass
+        """
+        Tests that populating a model neither modifies the provided mappings nor compiles the plan for the model
+        more than once
+
+        :return: None
+        """
+
+        mapping_required = {
+            "transaction_id": "id",
+            "type": "type",
+            "transaction_date": "trade_date",
+            "settlement_date": "trade_date",
+            "units": "units",
+            "transaction_price.price": "price",
+            "total_consideration.currency": "currency",
+        }
+        mapping_optional = {
+            "transaction_price.type": "price_type",
+            "total_consideration.amount": "amount",
+        }
+        mappings = copy.deepcopy([mapping_required, mapping_optional])
+
+        rows = [
+            pd.Series(
+                {
+                    "id": f"txn_{i}",
+                    "type": "Buy",
+                    "trade_date": "2020-01-02",
+                    "units": 100 + i,
+                    "price": 10.5,
+                    "price_type": "Price",
+                    "currency": "GBP",
+                    "amount": None if i else 1050.0,
+                }
+            )
+            for i in range(3)
+        ]
+
+        cocoon.mapping_plan._compile_cached_row_plan.cache_clear()
+
+        populated_models = [
+            cocoon.utilities.populate_model(
+                model_object_name="TransactionRequest",
+                required_mapping=mapping_required,
+                optional_mapping=mapping_optional,
+                row=row,
+                properties=None,
+                identifiers={"Instrument/default/Figi": "BBG000C05BD1"},
+            )
+            for row in rows
+        ]
+
+        self.assertEqual([mapping_required, mapping_optional], mappings)
+        self.assertEqual(
+            cocoon.mapping_plan._compile_cached_row_plan.cache_info().misses, 1
+        )
+        self.assertEqual([model.units for model in populated_models], [100, 101, 102])
+        self.assertEqual(
+            populated_models[0].transaction_date, "2020-01-02T00:00:00+00:00"
+        )
+        self.assertEqual(
+            populated_models[0].total_consideration,
+            models.CurrencyAndAmount(amount=1050.0, currency="GBP"),
+        )
+        self.assertEqual(
+            populated_models[1].total_consideration,
+            models.CurrencyAndAmount(currency="GBP"),
+        )
 
     def test_file_type_checks(self):
         """Not implemented yet"""
@@ -1340,6 +1431,47 @@ class CocoonUtilitiesTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             function(**kwargs)
 
+    @parameterized.expand(
+        [
+            ("always", CHECKARGS_ALWAYS, True),
+            ("boundary", CHECKARGS_BOUNDARY, False),
+            ("never", CHECKARGS_NEVER, False),
+        ]
+    )
+    def test_checkargs_nested_calls(self, _, mode, nested_calls_checked):
+        self.addCleanup(set_checkargs_mode, None)
+        set_checkargs_mode(mode)
+
+        for function in [checkargs_nested, checkargs_nested_in_thread]:
+            if nested_calls_checked:
+                with self.assertRaises(TypeError):
+                    function(["a"])
+            else:
+                self.assertFalse(function(["a"]))
+
+        # The arguments of the outermost call are only skipped when checks are turned off
+        if mode == CHECKARGS_NEVER:
+            self.assertFalse(checkargs_nested("a"))
+        else:
+            with self.assertRaises(TypeError):
+                checkargs_nested("a")
+
+    def test_checkargs_mode_from_environment(self):
+        self.addCleanup(set_checkargs_mode, None)
+        set_checkargs_mode(None)
+
+        with mock.patch.dict(os.environ, {CHECKARGS_MODE_ENV: "Boundary"}):
+            self.assertEqual(get_checkargs_mode(), CHECKARGS_BOUNDARY)
+
+        set_checkargs_mode(None)
+
+        with mock.patch.dict(os.environ, {CHECKARGS_MODE_ENV: "sometimes"}):
+            with self.assertRaises(ValueError):
+                get_checkargs_mode()
+
+        with self.assertRaises(ValueError):
+            set_checkargs_mode("sometimes")
+
     @parameterized.expand(
         [
             (
@@ -1722,6 +1854,73 @@ class CocoonUtilitiesTests(unittest.TestCase):
 
         self.assertTrue(df_true.equals(df_test))
 
+    @parameterized.expand(
+        [
+            ("remove_white_space", True),
+            ("keep_white_space", False),
+        ]
+    )
+    def test_preprocess_data_frame(self, _, remove_white_space):
+        data_frame = pd.DataFrame(
+            {
+                "name": ["  Apple ", "Amazon", None],
+                "figi": [" BBG000B9XRY4", "BBG000BVPV84 ", "BBG000BPH459"],
+                "units": [1, 2, 3],
+                "price": [10.5, np.NaN, 20.0],
+                "tags": [["a", "b"], "c ", {"d": 1}],
+                "date": pd.to_datetime(["2020-01-01", "2020-01-02", "2020-01-03"]),
+                "sector": pd.Categorical([" Tech", "Retail ", " Tech"]),
+                "unmapped": ["  x  ", " y", "z "],
+            }
+        )
+        original = data_frame.copy(deep=True)
+        mapping_required = {
+            "name": {"column": "name", "default": "unknown"},
+            "type": "$Equity",
+        }
+        mapping_optional = {"sector": "sector", "tags": "tags", "scale": 1}
+        identifier_mapping = {"Figi": "figi", "ClientInternal": "$internal"}
+        property_columns = ["price"]
+
+        # The previous implementation, the defaults are populated and the whole DataFrame copied twice
+        expected = data_frame.copy(deep=True)
+        expected, expected_required = cocoon.utilities.handle_nested_default_and_column_mapping(
+            expected, mapping_required
+        )
+        expected, expected_optional = cocoon.utilities.handle_nested_default_and_column_mapping(
+            expected, mapping_optional
+        )
+        expected = expected.applymap(cocoon.utilities.convert_cell_value_to_string)
+        if remove_white_space:
+            expected = strip_whitespace(
+                expected,
+                ["name", "figi", "price", "sector", "tags", "LUSID.type", "LUSID.scale"],
+            )
+
+        (
+            data_frame_test,
+            mapping_required_test,
+            mapping_optional_test,
+        ) = cocoon.utilities.preprocess_data_frame(
+            data_frame=data_frame,
+            mapping_required=mapping_required,
+            mapping_optional=mapping_optional,
+            identifier_mapping=identifier_mapping,
+            property_columns=property_columns,
+            remove_white_space=remove_white_space,
+        )
+
+        assert_frame_equal(data_frame_test, expected)
+        self.assertEqual(mapping_required_test, expected_required)
+        self.assertEqual(mapping_optional_test, expected_optional)
+        self.assertEqual(data_frame_test["unmapped"].tolist(), ["  x  ", " y", "z "])
+
+        # The DataFrame provided is not modified and the columns which do not change are not copied
+        assert_frame_equal(data_frame, original)
+        self.assertTrue(
+            np.shares_memory(data_frame_test["units"].values, data_frame["units"].values)
+        )
+
     def test_create_scope_id_success(self):
         time_generator = MockTimeGenerator(current_datetime=1574852918)
         expected_outcome = "37f3-342f-823f-00"
@@ -1812,7 +2011,7 @@ class CocoonUtilitiesTests(unittest.TestCase):
         (
             attribute_type,
             nested_type,
-        ) = cocoon.utilities.extract_lusid_model_from_attribute_type(attribute_type)
+        ) = cocoon.mapping_plan.extract_lusid_model_from_attribute_type(attribute_type)
 
         self.assertEqual(first=expected_attribute, second=attribute_type)
 
@@ -0,0 +1,86 @@
+import subprocess
+import sys
+import unittest
+from parameterized import parameterized
+import lusidtools
+from lusidtools import cocoon, apps, extract
+from lusidtools import logger
+
+
+class LazyImportsTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.logger = logger.LusidLogger("debug")
+
+    @parameterized.expand(
+        [
+            ["lusidtools", ["pandas", "lusid", "lusidtools.cocoon"]],
+            ["lusidtools.cocoon", ["pandas", "lusid", "lusidtools.cocoon.cocoon"]],
+            ["lusidtools.apps", ["pandas", "lusidtools.apps.upsert_instruments"]],
+            ["lusidtools.extract", ["pandas", "lusidtools.extract.group_holdings"]],
+            ["lusidtools.cocoon.rate_limiter", ["pandas", "lusidtools.cocoon.cocoon"]],
+        ]
+    )
+    def test_import_is_lazy(self, module, not_imported) -> None:
+        """
+        Tests that importing a package in a fresh interpreter does not import its submodules or their dependencies
+
+        :param str module: The module to import
+        :param list[str] not_imported: The modules which must not be imported with it
+
+        :return: None
+        """
+
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                f"import sys, {module}; print(' '.join(sorted(sys.modules)))",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        imported = set(result.stdout.split())
+        self.assertIn(module, imported)
+        self.assertEqual(set(not_imported) & imported, set())
+
+    def test_public_names_are_unchanged(self) -> None:
+        """
+        Tests that the public names and submodules of the packages are available as they were before they were
+        imported lazily
+
+        :return: None
+        """
+
+        from lusidtools.cocoon import load_from_data_frame, RetryPolicy, seed_data
+        from lusidtools.cocoon.utilities import checkargs
+
+        self.assertIs(cocoon.load_from_data_frame, load_from_data_frame)
+        self.assertIs(cocoon.cocoon.load_from_data_frame, load_from_data_frame)
+        self.assertIs(cocoon.RetryPolicy, cocoon.retry.RetryPolicy)
+        self.assertIs(cocoon.checkargs, checkargs)
+        self.assertIs(lusidtools.cocoon, cocoon)
+        self.assertTrue(callable(seed_data))
+        self.assertTrue(callable(apps.load_instruments))
+        self.assertTrue(callable(extract.get_holdings_for_group))
+
+        for name in cocoon.__all__ + ["utilities", "async_tools", "validator"]:
+            self.assertIn(name, dir(cocoon))
+            getattr(cocoon, name)
+
+        self.assertIn("cocoon", dir(lusidtools))
+
+    def test_unknown_name(self) -> None:
+        """
+        Tests that names which are not exported still raise an AttributeError
+
+        :return: None
+        """
+
+        with self.assertRaises(AttributeError):
+            cocoon.not_a_name
+
+        with self.assertRaises(ImportError):
+            from lusidtools.cocoon import not_a_name